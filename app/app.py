@@ -10,25 +10,35 @@ Diese Klasse steuert:
 
 from __future__ import annotations
 
-from typing import Optional, Callable
+from typing import TYPE_CHECKING, Optional, Callable
 import flet as ft
 
-from services.supabase_client import get_client
-from supabase import Client
+from services.supabase_client import get_async_client, get_client
+from supabase import AsyncClient, Client
 from utils.logging_config import get_logger
+from utils.metrics import SessionMetrics
 
 logger = get_logger(__name__)
 from ui.theme import ThemeManager
-from ui.post_form import PostForm
-from ui.discover import DiscoverView
-from ui.profile import ProfileView
 from ui.shared_components import show_confirm_dialog
 from ui.constants import (
+    PROFILE_VIEW_EDIT_PROFILE,
+    PROFILE_VIEW_FAVORITES,
+    PROFILE_VIEW_MY_POSTS,
+    PROFILE_VIEW_SAVED_SEARCHES,
+    PROFILE_VIEW_SETTINGS,
     WINDOW_MIN_WIDTH,
     WINDOW_DEFAULT_WIDTH,
     WINDOW_DEFAULT_HEIGHT,
 )
 
+# Views (und ihre Abhängigkeiten wie ReportLab, NumPy, KI) werden erst beim
+# ersten Aufruf des jeweiligen Tabs importiert
+if TYPE_CHECKING:
+    from ui.post_form import PostForm
+    from ui.discover import DiscoverView
+    from ui.profile import ProfileView
+
 from app.dialogs import (
     show_comment_login_dialog,
     show_contact_login_dialog,
@@ -71,6 +81,8 @@ class PetBuddyApp:
         self.page: ft.Page = page
         self.current_tab: int = TAB_START
         self.sb: Optional[Client] = None
+        # Async Client derselben Session (für async Services)
+        self.async_sb: Optional[AsyncClient] = None
         self.theme_manager: Optional[ThemeManager] = None
         self.is_logged_in: bool = False
         # Merkt sich gewünschten Tab nach Login
@@ -95,12 +107,13 @@ class PetBuddyApp:
         self.discover_view: Optional[DiscoverView] = None
         self.profile_view: Optional[ProfileView] = None
         self._auth_flow: Optional[AuthFlow] = None
+        self._session_metrics: Optional[SessionMetrics] = None
         self._profile_routes: dict[str, str] = {
-            ProfileView.VIEW_EDIT_PROFILE: "/profile/edit",
-            ProfileView.VIEW_MY_POSTS: "/profile/my_posts",
-            ProfileView.VIEW_FAVORITES: "/profile/favorites",
-            ProfileView.VIEW_SAVED_SEARCHES: "/profile/saved_searches",
-            ProfileView.VIEW_SETTINGS: "/profile/settings",
+            PROFILE_VIEW_EDIT_PROFILE: "/profile/edit",
+            PROFILE_VIEW_MY_POSTS: "/profile/my_posts",
+            PROFILE_VIEW_FAVORITES: "/profile/favorites",
+            PROFILE_VIEW_SAVED_SEARCHES: "/profile/saved_searches",
+            PROFILE_VIEW_SETTINGS: "/profile/settings",
         }
     
     # ════════════════════════════════════════════════════════════════════
@@ -120,6 +133,9 @@ class PetBuddyApp:
             # Routing einrichten
             self.page.on_route_change = self._handle_route_change
             self.page.on_disconnect = self._handle_disconnect
+            self.page.on_connect = self._handle_connect
+            self.page.on_close = self._handle_close
+            self._session_metrics = SessionMetrics()
             
             # Theme anwenden
             self.theme_manager = ThemeManager(self.page)
@@ -132,6 +148,7 @@ class PetBuddyApp:
             
             # Supabase-Client initialisieren
             self.sb = get_client()
+            self.async_sb = get_async_client(self.sb)
 
             # Auth-Flow initialisieren
             self._auth_flow = AuthFlow(
@@ -159,8 +176,20 @@ class PetBuddyApp:
 
     def _handle_disconnect(self, _e: ft.ControlEvent) -> None:
         """Cleanup bei App-Schliessen oder Verbindungsabbruch."""
+        if self._session_metrics:
+            self._session_metrics.disconnected()
         self._cleanup_post_form_uploads()
 
+    def _handle_connect(self, _e: ft.ControlEvent) -> None:
+        """Session nach Verbindungsabbruch wieder verbunden."""
+        if self._session_metrics:
+            self._session_metrics.connected()
+
+    def _handle_close(self, _e: ft.ControlEvent) -> None:
+        """Session abgelaufen bzw. endgültig geschlossen."""
+        if self._session_metrics:
+            self._session_metrics.closed()
+
     def _cleanup_post_form_uploads(self) -> None:
         """Entfernt lokale Uploads aus dem Meldeformular, falls vorhanden."""
         if self.post_form:
@@ -193,15 +222,15 @@ class PetBuddyApp:
         elif route_path == "/profile":
             self._show_profile()
         elif route_path == "/profile/edit":
-            self._show_profile_view(ProfileView.VIEW_EDIT_PROFILE)
+            self._show_profile_view(PROFILE_VIEW_EDIT_PROFILE)
         elif route_path == "/profile/my_posts":
-            self._show_profile_view(ProfileView.VIEW_MY_POSTS)
+            self._show_profile_view(PROFILE_VIEW_MY_POSTS)
         elif route_path == "/profile/favorites":
-            self._show_profile_view(ProfileView.VIEW_FAVORITES)
+            self._show_profile_view(PROFILE_VIEW_FAVORITES)
         elif route_path == "/profile/saved_searches":
-            self._show_profile_view(ProfileView.VIEW_SAVED_SEARCHES)
+            self._show_profile_view(PROFILE_VIEW_SAVED_SEARCHES)
         elif route_path == "/profile/settings":
-            self._show_profile_view(ProfileView.VIEW_SETTINGS)
+            self._show_profile_view(PROFILE_VIEW_SETTINGS)
         elif route_path == "/post/new":
             self._show_new_post()
         else:
@@ -254,7 +283,7 @@ class PetBuddyApp:
             return
         
         if not self.profile_view:
-            if not self.build_ui():
+            if not self._ensure_profile_view():
                 return
         else:
             self.page.run_task(self.profile_view.refresh_user_data)
@@ -281,7 +310,7 @@ class PetBuddyApp:
             return
         
         if not self.post_form:
-            if not self.build_ui():
+            if not self._ensure_post_form():
                 return
         
         self.current_tab = TAB_MELDEN
@@ -313,6 +342,10 @@ class PetBuddyApp:
     def render_tab(self) -> None:
         """Rendert den aktuellen Tab."""
         try:
+            if self.current_tab == TAB_MELDEN:
+                self._ensure_post_form()
+            elif self.current_tab == TAB_PROFIL:
+                self._ensure_profile_view()
             content = {
                 TAB_START: self.start_section,
                 TAB_MELDEN: self.post_form.build() if self.post_form else None,
@@ -502,13 +535,20 @@ class PetBuddyApp:
     # ════════════════════════════════════════════════════════════════════
     
     def build_ui(self) -> bool:
-        """Baut die UI-Bereiche auf."""
+        """Baut die Startseite (DiscoverView) auf.
+
+        Meldeformular und Profil werden erst beim ersten Aufruf ihres Tabs
+        erstellt (``_ensure_post_form()``, ``_ensure_profile_view()``).
+        """
         try:
             # DiscoverView erstellen
             if self.discover_view is None:
+                from ui.discover import DiscoverView
+
                 self.discover_view = DiscoverView(
                     page=self.page,
                     sb=self.sb,
+                    async_sb=self.async_sb,
                     on_contact_click=None,
                     on_melden_click=self.go_to_melden_tab,
                     on_login_required=lambda: show_favorite_login_dialog(
@@ -529,27 +569,47 @@ class PetBuddyApp:
                     ),
                 )
 
-            # PostForm erstellen
-            if self.post_form is None:
-                self.post_form = PostForm(
-                    page=self.page,
-                    sb=self.sb,
-                    on_saved_callback=self.on_post_saved
-                )
+            return True
+        except Exception as e:
+            logger.error(f"Fehler in build_ui: {e}", exc_info=True)
+            self._show_error(f"Fehler beim Laden der UI: {str(e)}")
+            return False
 
-            # ProfileView erstellen
-            if self.profile_view is None:
-                self.profile_view = ProfileView(
-                    page=self.page,
-                    sb=self.sb,
-                    on_logout=self._logout,
-                    on_favorites_changed=self._on_favorites_changed,
-                    on_posts_changed=self._on_posts_changed,
-                )
+    def _ensure_post_form(self) -> bool:
+        """Erstellt das Meldeformular beim ersten Aufruf."""
+        if self.post_form is not None:
+            return True
+        try:
+            from ui.post_form import PostForm
 
+            self.post_form = PostForm(
+                page=self.page,
+                sb=self.sb,
+                on_saved_callback=self.on_post_saved
+            )
             return True
         except Exception as e:
-            logger.error(f"Fehler in build_ui: {e}", exc_info=True)
+            logger.error(f"Fehler beim Erstellen des Meldeformulars: {e}", exc_info=True)
+            self._show_error(f"Fehler beim Laden der UI: {str(e)}")
+            return False
+
+    def _ensure_profile_view(self) -> bool:
+        """Erstellt die Profil-Ansicht beim ersten Aufruf."""
+        if self.profile_view is not None:
+            return True
+        try:
+            from ui.profile import ProfileView
+
+            self.profile_view = ProfileView(
+                page=self.page,
+                sb=self.sb,
+                on_logout=self._logout,
+                on_favorites_changed=self._on_favorites_changed,
+                on_posts_changed=self._on_posts_changed,
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Fehler beim Erstellen der Profil-Ansicht: {e}", exc_info=True)
             self._show_error(f"Fehler beim Laden der UI: {str(e)}")
             return False
 
@@ -600,23 +660,23 @@ class PetBuddyApp:
                 DRAWER_KEY_START: lambda: self._navigate_to_tab(TAB_START),
                 DRAWER_KEY_MELDEN: lambda: self._navigate_to_tab(TAB_MELDEN),
                 DRAWER_KEY_PROFILE_EDIT: lambda: self._open_profile_section(
-                    ProfileView.VIEW_EDIT_PROFILE,
+                    PROFILE_VIEW_EDIT_PROFILE,
                     DRAWER_KEY_PROFILE_EDIT,
                 ),
                 DRAWER_KEY_MY_POSTS: lambda: self._open_profile_section(
-                    ProfileView.VIEW_MY_POSTS,
+                    PROFILE_VIEW_MY_POSTS,
                     DRAWER_KEY_MY_POSTS,
                 ),
                 DRAWER_KEY_FAVORITES: lambda: self._open_profile_section(
-                    ProfileView.VIEW_FAVORITES,
+                    PROFILE_VIEW_FAVORITES,
                     DRAWER_KEY_FAVORITES,
                 ),
                 DRAWER_KEY_SAVED_SEARCHES: lambda: self._open_profile_section(
-                    ProfileView.VIEW_SAVED_SEARCHES,
+                    PROFILE_VIEW_SAVED_SEARCHES,
                     DRAWER_KEY_SAVED_SEARCHES,
                 ),
                 DRAWER_KEY_SETTINGS: lambda: self._open_profile_section(
-                    ProfileView.VIEW_SETTINGS,
+                    PROFILE_VIEW_SETTINGS,
                     DRAWER_KEY_SETTINGS,
                 ),
                 DRAWER_KEY_LOGOUT: self._confirm_logout,
@@ -721,6 +781,14 @@ class PetBuddyApp:
 
     def _set_logged_in(self, is_logged_in: bool) -> None:
         self.is_logged_in = is_logged_in
+        if is_logged_in:
+            self._resume_storage_cleanup()
+
+    def _resume_storage_cleanup(self) -> None:
+        """Nimmt unterbrochene Storage-Bereinigungen des Benutzers im Hintergrund wieder auf."""
+        from services.posts.post import resume_image_cleanup
+
+        self.page.run_thread(resume_image_cleanup, self.sb)
 
     def _clear_pending_tab(self) -> None:
         self.pending_tab_after_login = None
@@ -739,7 +807,7 @@ class PetBuddyApp:
         try:
             user = self.sb.auth.get_user()
             if user and user.user:
-                self.is_logged_in = True
+                self._set_logged_in(True)
         except Exception:
             self.is_logged_in = False
         
@@ -13,6 +13,15 @@ from typing import Callable, Optional
 
 import flet as ft
 
+from ui.constants import (
+    PROFILE_VIEW_EDIT_PROFILE,
+    PROFILE_VIEW_FAVORITES,
+    PROFILE_VIEW_MY_POSTS,
+    PROFILE_VIEW_SAVED_SEARCHES,
+    PROFILE_VIEW_SETTINGS,
+)
+from utils.http_middleware import asset_url
+
 
 # Tab-Indices als Konstanten
 TAB_START = 0
@@ -59,7 +68,7 @@ def create_app_bar(
         bgcolor = get_theme_color("background", is_dark=False)
     
     title_content = ft.Image(
-        src="petbuddy_logo.png",
+        src=asset_url("petbuddy_logo.png", web=bool(page and page.web)),
         height=50,
         fit=ft.ImageFit.CONTAIN,
     )
@@ -234,14 +243,12 @@ def get_profile_drawer_key(current_view: Optional[str]) -> Optional[str]:
     """Mappt die aktuelle Profil-View auf den Drawer-Key."""
     if not current_view:
         return None
-    from ui.profile import ProfileView
-
     return {
-        ProfileView.VIEW_EDIT_PROFILE: DRAWER_KEY_PROFILE_EDIT,
-        ProfileView.VIEW_MY_POSTS: DRAWER_KEY_MY_POSTS,
-        ProfileView.VIEW_FAVORITES: DRAWER_KEY_FAVORITES,
-        ProfileView.VIEW_SAVED_SEARCHES: DRAWER_KEY_SAVED_SEARCHES,
-        ProfileView.VIEW_SETTINGS: DRAWER_KEY_SETTINGS,
+        PROFILE_VIEW_EDIT_PROFILE: DRAWER_KEY_PROFILE_EDIT,
+        PROFILE_VIEW_MY_POSTS: DRAWER_KEY_MY_POSTS,
+        PROFILE_VIEW_FAVORITES: DRAWER_KEY_FAVORITES,
+        PROFILE_VIEW_SAVED_SEARCHES: DRAWER_KEY_SAVED_SEARCHES,
+        PROFILE_VIEW_SETTINGS: DRAWER_KEY_SETTINGS,
     }.get(current_view)
 
 
@@ -0,0 +1 @@
+"""Benchmark- und Budget-Skripte für PetBuddy (Aufruf: ``python -m benchmarks.<name>``)."""
@@ -0,0 +1,887 @@
+"""
+Lokaler Ersatz für den Supabase-Client (PostgREST, Storage, Auth) im Prozess.
+
+Implementiert genau die Teilmenge, die ``services/`` nutzt, damit die Services
+ohne das Live-Projekt gemessen werden können:
+
+    - ``table(...).select(...)`` mit eingebetteten Relationen
+      (``post_status(id, name)``, ``post_color(color(id, name))``, ``*``)
+    - Filter ``eq``, ``neq``, ``gt``, ``gte``, ``lt``, ``lte``, ``in_``, ``is_``
+    - ``order``, ``limit``, ``range``, ``single``, ``maybe_single``, ``count="exact"``
+    - ``insert``, ``update``, ``delete``, ``upsert``
+    - ``storage.from_(bucket)`` mit ``upload``, ``remove``, ``download``, ``get_public_url``
+    - ``auth.get_user``, ``auth.get_session``, ``auth.update_user``
+    - ``rpc(name, params)`` für registrierte Python-Funktionen; die Funktionen aus
+      ``supabase/migrations`` (``create_post_full``, ``delete_post_full``) sind
+      vorab registriert
+    - ``FakeAsyncSupabase``: dieselbe Schnittstelle wie ``supabase.AsyncClient``
+      (``await ....execute()``) auf derselben Datenbank und Anmeldung
+
+Relationen werden wie bei PostgREST über Fremdschlüssel-Namen aufgelöst:
+``<relation>_id`` in der Zeile ergibt eine n:1-Relation (Objekt), eine Spalte
+``<tabelle>_id`` in der Relationstabelle eine 1:n-Relation (Liste).
+
+Jeder ``execute()``-Aufruf und jeder Storage-/Auth-Aufruf mit Netzwerkzugriff
+zählt als ein Roundtrip (``FakeSupabase.stats``); optional wird je Roundtrip
+eine feste Latenz simuliert (``rtt_ms``; beim async Client mit
+``asyncio.sleep``). Ergebnisse sind wie bei einer echten
+HTTP-Antwort eigene Kopien (JSON-Roundtrip).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from utils.metrics import record_supabase_call
+
+# Tabellen mit UUID-Primärschlüssel; alle anderen nutzen fortlaufende Integer (serial)
+UUID_TABLES = frozenset({"post", "user", "post_image", "saved_search", "post_image_embedding"})
+TABLES = (
+    "user", "post", "post_status", "species", "breed", "color", "sex",
+    "post_image", "post_color", "comment", "comment_reaction", "favorite",
+    "saved_search", "post_image_embedding", "storage_cleanup",
+)
+FAKE_URL = "http://fake-supabase.local"
+
+# Feld: Spaltenname oder (Alias, Relation, Unterfelder)
+Field = Union[str, Tuple[str, str, list]]
+
+
+class FakeAPIError(Exception):
+    """Fehler einer Abfrage (entspricht ``postgrest.exceptions.APIError``)."""
+
+
+class RoundTripStats:
+    """Zählt Roundtrips gesamt und je ``art:ziel:methode`` (thread-sicher)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls: Counter = Counter()
+
+    def record(self, key: str) -> None:
+        with self._lock:
+            self.calls[key] += 1
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.calls)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+
+def parse_select(text: str) -> List[Field]:
+    """Zerlegt einen PostgREST-Select-String.
+
+    Args:
+        text: z. B. ``"id, post_status(id, name), post_color(color(id, name))"``
+
+    Returns:
+        Liste von Spaltennamen bzw. (Alias, Relation, Unterfelder)
+
+    Raises:
+        FakeAPIError: Bei unausgeglichenen Klammern
+    """
+    parts: List[str] = []
+    depth = 0
+    current: List[str] = []
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                raise FakeAPIError(f"Ungültiger Select: {text!r}")
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    if depth != 0:
+        raise FakeAPIError(f"Ungültiger Select: {text!r}")
+    parts.append("".join(current))
+
+    fields: List[Field] = []
+    for part in (p.strip() for p in parts):
+        if not part:
+            continue
+        if "(" not in part:
+            fields.append(part.split(":")[-1].split("::")[0].strip())
+            continue
+        head, inner = part.split("(", 1)
+        alias, _, relation = head.strip().rpartition(":")
+        relation = relation.split("!")[0].strip()
+        fields.append((alias.strip() or relation, relation, parse_select(inner[:-1])))
+    return fields
+
+
+def _norm(value: Any) -> str:
+    """Vergleichswert wie in der URL eines PostgREST-Filters."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _compare(left: Any, right: Any) -> Optional[int]:
+    """Vergleicht Spaltenwert und Filterwert (-1/0/1, None bei NULL)."""
+    if left is None or right is None:
+        return None
+    try:
+        a, b = float(left), float(right)
+    except (TypeError, ValueError):
+        a, b = str(left), str(right)
+    return (a > b) - (a < b)
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return (0, "" if value is None else str(value))
+    return (0, value)
+
+
+class FakeDatabase:
+    """Tabellen im Speicher mit Index auf den Primärschlüssel."""
+
+    def __init__(self) -> None:
+        self.tables: Dict[str, List[Dict[str, Any]]] = {name: [] for name in TABLES}
+        self._by_id: Dict[str, Dict[str, Dict[str, Any]]] = {name: {} for name in TABLES}
+        # (Tabelle, Spalte) -> Wert -> Zeilen; wird bei Schreibzugriffen verworfen
+        self._fk_index: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = {}
+        self._serial: Counter = Counter()
+        self.storage: Dict[str, Dict[str, bytes]] = {}
+        self.rpcs: Dict[str, Callable[["FakeDatabase", Dict[str, Any]], Any]] = dict(DEFAULT_RPCS)
+        self.lock = threading.RLock()
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        try:
+            return self.tables[table]
+        except KeyError:
+            raise FakeAPIError(f'relation "public.{table}" does not exist') from None
+
+    def get(self, table: str, row_id: Any) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(table, {}).get(_norm(row_id))
+
+    def children(self, table: str, column: str, value: Any) -> List[Dict[str, Any]]:
+        """Zeilen von ``table`` mit ``column == value`` (über einen Index)."""
+        key = (table, column)
+        index = self._fk_index.get(key)
+        if index is None:
+            index = {}
+            for row in self.rows(table):
+                index.setdefault(_norm(row.get(column)), []).append(row)
+            self._fk_index[key] = index
+        return index.get(_norm(value), [])
+
+    def insert(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Fügt eine Zeile ein und vergibt ID und ``created_at``."""
+        rows = self.rows(table)
+        row = dict(row)
+        if row.get("id") is None:
+            if table in UUID_TABLES:
+                row["id"] = str(uuid.uuid4())
+            else:
+                self._serial[table] += 1
+                row["id"] = self._serial[table]
+        elif isinstance(row["id"], int):
+            self._serial[table] = max(self._serial[table], row["id"])
+        if _norm(row["id"]) in self._by_id[table]:
+            raise FakeAPIError(f'duplicate key value violates unique constraint "{table}_pkey"')
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        rows.append(row)
+        self._by_id[table][_norm(row["id"])] = row
+        self._invalidate(table)
+        return row
+
+    def delete_rows(self, table: str, doomed: Sequence[Dict[str, Any]]) -> None:
+        ids = {id(row) for row in doomed}
+        self.tables[table] = [row for row in self.rows(table) if id(row) not in ids]
+        for row in doomed:
+            self._by_id[table].pop(_norm(row.get("id")), None)
+        self._invalidate(table)
+
+    def touched(self, table: str) -> None:
+        """Nach einem Update: Fremdschlüssel-Indizes der Tabelle verwerfen."""
+        self._invalidate(table)
+
+    def _invalidate(self, table: str) -> None:
+        for key in [k for k in self._fk_index if k[0] == table]:
+            del self._fk_index[key]
+
+    def project(self, table: str, row: Dict[str, Any], fields: Sequence[Field]) -> Dict[str, Any]:
+        """Wendet einen geparsten Select (inkl. Relationen) auf eine Zeile an."""
+        out: Dict[str, Any] = {}
+        for field in fields:
+            if field == "*":
+                out.update(row)
+            elif isinstance(field, str):
+                out[field] = row.get(field)
+            else:
+                alias, relation, sub = field
+                out[alias] = self._embed(table, row, relation, sub)
+        return out
+
+    def _embed(self, table: str, row: Dict[str, Any], relation: str, sub: Sequence[Field]) -> Any:
+        if relation not in self.tables:
+            raise FakeAPIError(f"Could not find a relationship between '{table}' and '{relation}'")
+        if f"{relation}_id" in row:
+            target = self.get(relation, row[f"{relation}_id"])
+            return self.project(relation, target, sub) if target is not None else None
+        return [self.project(relation, child, sub) for child in self.children(relation, f"{table}_id", row.get("id"))]
+
+
+class FakeResponse:
+    """Antwort einer Abfrage (wie ``postgrest.APIResponse``)."""
+
+    def __init__(self, data: Any, count: Optional[int] = None) -> None:
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """Abfrage auf eine Tabelle (Builder wie ``postgrest.SyncRequestBuilder``)."""
+
+    def __init__(self, client: "FakeSupabase", table: str) -> None:
+        self._client = client
+        self._table = table
+        self._method = "select"
+        self._fields: List[Field] = ["*"]
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+        self._filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self._order: List[Tuple[str, bool]] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._count: Optional[str] = None
+        self._single: Optional[str] = None
+
+    # --- Methode -----------------------------------------------------------
+
+    def select(self, columns: str = "*", count: Optional[str] = None, **_kwargs: Any) -> "FakeQuery":
+        self._fields = parse_select(columns)
+        self._count = count
+        return self
+
+    def insert(self, data: Union[Dict[str, Any], List[Dict[str, Any]]], **_kwargs: Any) -> "FakeQuery":
+        self._method, self._payload = "insert", data
+        return self
+
+    def upsert(
+        self,
+        data: Union[Dict[str, Any], List[Dict[str, Any]]],
+        on_conflict: str = "id",
+        **_kwargs: Any,
+    ) -> "FakeQuery":
+        self._method, self._payload, self._on_conflict = "upsert", data, on_conflict
+        return self
+
+    def update(self, data: Dict[str, Any], **_kwargs: Any) -> "FakeQuery":
+        self._method, self._payload = "update", data
+        return self
+
+    def delete(self, **_kwargs: Any) -> "FakeQuery":
+        self._method = "delete"
+        return self
+
+    # --- Filter ------------------------------------------------------------
+
+    def _where(self, predicate: Callable[[Dict[str, Any]], bool]) -> "FakeQuery":
+        self._filters.append(predicate)
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        expected = _norm(value)
+        return self._where(lambda row: _norm(row.get(column)) == expected)
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        expected = _norm(value)
+        return self._where(lambda row: row.get(column) is not None and _norm(row.get(column)) != expected)
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._where(lambda row: (_compare(row.get(column), value) or 0) > 0)
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self._where(lambda row: _compare(row.get(column), value) in (0, 1))
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._where(lambda row: (_compare(row.get(column), value) or 0) < 0)
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self._where(lambda row: _compare(row.get(column), value) in (0, -1))
+
+    def in_(self, column: str, values: Iterable[Any]) -> "FakeQuery":
+        expected = {_norm(v) for v in values}
+        return self._where(lambda row: row.get(column) is not None and _norm(row.get(column)) in expected)
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        expected = _norm(None if value in (None, "null") else value).lower()
+        return self._where(lambda row: _norm(row.get(column)) == expected)
+
+    def order(self, column: str, desc: bool = False, **_kwargs: Any) -> "FakeQuery":
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **_kwargs: Any) -> "FakeQuery":
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **_kwargs: Any) -> "FakeQuery":
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self) -> "FakeQuery":
+        self._single = "single"
+        return self
+
+    def maybe_single(self) -> "FakeQuery":
+        self._single = "maybe"
+        return self
+
+    # --- Ausführung --------------------------------------------------------
+
+    def _matching(self) -> List[Dict[str, Any]]:
+        rows = self._client.db.rows(self._table)
+        return [row for row in rows if all(predicate(row) for predicate in self._filters)]
+
+    def _sorted(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Stabile Sortierung: letzte Sortierspalte zuerst; NULL wie in PostgreSQL
+        # bei ASC zuletzt, bei DESC zuerst
+        for column, desc in reversed(self._order):
+            present = [row for row in rows if row.get(column) is not None]
+            missing = [row for row in rows if row.get(column) is None]
+            present.sort(key=lambda row: _sort_key(row.get(column)), reverse=desc)
+            rows = missing + present if desc else present + missing
+        return rows
+
+    def execute(self) -> FakeResponse:
+        """Führt die Abfrage aus (ein Roundtrip)."""
+        client = self._client
+        client.round_trip(f"table:{self._table}:{self._method}")
+        db = client.db
+        with db.lock:
+            count: Optional[int] = None
+            if self._method == "select":
+                rows = self._sorted(self._matching())
+                if self._count:
+                    count = len(rows)
+                end = None if self._limit is None else self._offset + self._limit
+                rows = rows[self._offset:end]
+                data: Any = [db.project(self._table, row, self._fields) for row in rows]
+            elif self._method == "insert":
+                payload = self._payload if isinstance(self._payload, list) else [self._payload]
+                data = [db.insert(self._table, row) for row in payload]
+            elif self._method == "upsert":
+                payload = self._payload if isinstance(self._payload, list) else [self._payload]
+                data = [self._upsert_row(row) for row in payload]
+            elif self._method == "update":
+                data = self._matching()
+                for row in data:
+                    row.update(self._payload)
+                db.touched(self._table)
+            else:
+                data = self._matching()
+                db.delete_rows(self._table, data)
+            data = json.loads(json.dumps(data, default=str))
+
+        if self._single is not None:
+            if len(data) > 1 or (self._single == "single" and not data):
+                raise FakeAPIError(f"JSON object requested, multiple (or no) rows returned ({len(data)})")
+            data = data[0] if data else None
+        return FakeResponse(data, count)
+
+    def _upsert_row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        db = self._client.db
+        keys = [c.strip() for c in (self._on_conflict or "id").split(",")]
+        for existing in db.rows(self._table):
+            if all(_norm(existing.get(k)) == _norm(row.get(k)) for k in keys):
+                existing.update(row)
+                db.touched(self._table)
+                return existing
+        return db.insert(self._table, row)
+
+
+class FakeRPC:
+    """Aufruf einer registrierten Datenbankfunktion."""
+
+    def __init__(self, client: "FakeSupabase", name: str, params: Dict[str, Any]) -> None:
+        self._client = client
+        self._name = name
+        self._params = params
+
+    def execute(self) -> FakeResponse:
+        self._client.round_trip(f"rpc:{self._name}")
+        function = self._client.db.rpcs.get(self._name)
+        if function is None:
+            raise FakeAPIError(f"Could not find the function public.{self._name}")
+        with self._client.db.lock:
+            data = function(self._client.db, copy.deepcopy(self._params))
+            return FakeResponse(json.loads(json.dumps(data, default=str)))
+
+
+class FakeBucket:
+    """Storage-Bucket (``storage.from_(name)``)."""
+
+    def __init__(self, client: "FakeSupabase", name: str) -> None:
+        self._client = client
+        self._name = name
+        self._files = client.db.storage.setdefault(name, {})
+
+    def upload(self, path: str, file: Any, file_options: Optional[Dict[str, Any]] = None) -> SimpleNamespace:
+        self._client.round_trip(f"storage:{self._name}:upload")
+        if isinstance(file, (bytes, bytearray)):
+            data = file
+        else:
+            with open(file, "rb") as handle:
+                data = handle.read()
+        with self._client.db.lock:
+            if path in self._files and str((file_options or {}).get("upsert", "false")).lower() != "true":
+                raise FakeAPIError(f"The resource already exists: {path}")
+            self._files[path] = bytes(data)
+        return SimpleNamespace(path=path, full_path=f"{self._name}/{path}")
+
+    def remove(self, paths: List[str]) -> List[Dict[str, Any]]:
+        self._client.round_trip(f"storage:{self._name}:remove")
+        with self._client.db.lock:
+            removed = [path for path in paths if self._files.pop(path, None) is not None]
+        return [{"name": path, "bucket_id": self._name} for path in removed]
+
+    def download(self, path: str, **_kwargs: Any) -> bytes:
+        self._client.round_trip(f"storage:{self._name}:download")
+        try:
+            return self._files[path]
+        except KeyError:
+            raise FakeAPIError(f"Object not found: {path}") from None
+
+    def get_public_url(self, path: str, **_kwargs: Any) -> str:
+        # Wird lokal im Client berechnet (kein Roundtrip)
+        return f"{FAKE_URL}/storage/v1/object/public/{self._name}/{path}"
+
+
+class FakeStorage:
+    def __init__(self, client: "FakeSupabase") -> None:
+        self._client = client
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self._client, bucket)
+
+
+class FakeAuth:
+    """Auth-Teil des Clients mit einem fest angemeldeten Benutzer."""
+
+    def __init__(self, client: "FakeSupabase") -> None:
+        self._client = client
+        self.user: Optional[SimpleNamespace] = None
+
+    def sign_in_as(self, user_id: Optional[str]) -> None:
+        """Meldet einen Benutzer aus der Tabelle ``user`` an (None = abmelden)."""
+        if user_id is None:
+            self.user = None
+            return
+        row = self._client.db.get("user", user_id) or {}
+        self.user = SimpleNamespace(
+            id=str(user_id),
+            email=row.get("email", f"{user_id}@example.test"),
+            user_metadata={"display_name": row.get("display_name", "Benutzer")},
+        )
+
+    def get_user(self, jwt: Optional[str] = None) -> Optional[SimpleNamespace]:
+        self._client.round_trip("auth:get_user")
+        return SimpleNamespace(user=self.user) if self.user else None
+
+    def get_session(self) -> Optional[SimpleNamespace]:
+        # Sitzung liegt lokal im Client (kein Roundtrip)
+        if self.user is None:
+            return None
+        return SimpleNamespace(user=self.user, access_token="fake-access-token", refresh_token="fake-refresh-token")
+
+    def update_user(self, attributes: Dict[str, Any]) -> SimpleNamespace:
+        self._client.round_trip("auth:update_user")
+        if self.user is None:
+            raise FakeAPIError("Auth session missing!")
+        self.user.user_metadata.update(attributes.get("data") or {})
+        return SimpleNamespace(user=self.user)
+
+    def sign_out(self, *_args: Any, **_kwargs: Any) -> None:
+        self.user = None
+
+
+class FakeSupabase:
+    """Client mit der Schnittstelle von ``supabase.Client`` (Teilmenge)."""
+
+    def __init__(self, db: Optional[FakeDatabase] = None, rtt_ms: float = 0.0) -> None:
+        """Initialisiert den Client.
+
+        Args:
+            db: Datenbank (Standard: leer)
+            rtt_ms: Simulierte Latenz je Roundtrip in Millisekunden
+        """
+        self.db = db or FakeDatabase()
+        self.rtt_ms = rtt_ms
+        self.stats = RoundTripStats()
+        self.supabase_url = FAKE_URL
+        self.storage = FakeStorage(self)
+        self.auth = FakeAuth(self)
+
+    def record(self, key: str) -> None:
+        """Zählt einen Roundtrip (ohne Latenz)."""
+        self.stats.record(key)
+        # Wie die httpx-Hooks des echten Clients (API wie im URL-Pfad)
+        api, _, rest = key.partition(":")
+        record_supabase_call("rest" if api == "table" else api, rest.rpartition(":")[2] or rest)
+
+    def round_trip(self, key: str) -> None:
+        self.record(key)
+        if self.rtt_ms > 0:
+            time.sleep(self.rtt_ms / 1000.0)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> FakeRPC:
+        return FakeRPC(self, name, params or {})
+
+
+# --- Datenbankfunktionen (wie in supabase/migrations) ----------------------
+#
+# Die Funktionen laufen unter ``db.lock`` (siehe ``FakeRPC``). Eingaben werden
+# vor dem ersten Insert geprüft, damit ein Fehler wie ein Rollback in
+# PostgreSQL keine halben Datensätze hinterlässt.
+
+POST_INSERT_COLUMNS = (
+    "user_id", "post_status_id", "headline", "description",
+    "species_id", "breed_id", "sex_id", "event_date",
+    "location_text", "location_lat", "location_lon",
+)
+
+
+def rpc_create_post_full(db: FakeDatabase, params: Dict[str, Any]) -> Dict[str, Any]:
+    """``create_post_full(p_post, p_color_ids, p_image_urls)``: Post mit Farben und Bildern."""
+    post = params.get("p_post") or {}
+    color_ids = list(dict.fromkeys(params.get("p_color_ids") or []))
+    urls = [url for url in params.get("p_image_urls") or [] if url and str(url).strip()]
+    for column in ("user_id", "post_status_id", "species_id"):
+        if post.get(column) is None:
+            raise FakeAPIError(f'null value in column "{column}" of relation "post" violates not-null constraint')
+    for color_id in color_ids:
+        if db.get("color", color_id) is None:
+            raise FakeAPIError(
+                'insert or update on table "post_color" violates foreign key constraint "post_color_color_id_fkey"'
+            )
+
+    row = db.insert("post", {**{c: post.get(c) for c in POST_INSERT_COLUMNS}, "is_active": True})
+    for color_id in color_ids:
+        db.insert("post_color", {"post_id": row["id"], "color_id": color_id})
+    images = [db.insert("post_image", {"post_id": row["id"], "url": url}) for url in urls]
+    return {**row, "post_image": [{"id": image["id"], "url": image["url"]} for image in images]}
+
+
+def rpc_delete_post_full(db: FakeDatabase, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """``delete_post_full(p_post_id)``: Post mit Bildern und Farben löschen, Bild-URLs zurückgeben."""
+    post_id = params.get("p_post_id")
+    post = db.get("post", post_id)
+    if post is None:
+        return None
+    images = list(db.children("post_image", "post_id", post_id))
+    db.delete_rows("post_image", images)
+    db.delete_rows("post_color", list(db.children("post_color", "post_id", post_id)))
+    db.delete_rows("post", [post])
+    urls = [image["url"] for image in images]
+    if urls:
+        # Outbox wie in der Migration (Zeile je Post, wird nach dem Entfernen gelöscht)
+        db.delete_rows("storage_cleanup", list(db.children("storage_cleanup", "post_id", post_id)))
+        db.insert("storage_cleanup", {"post_id": post["id"], "image_urls": urls})
+    return {"id": post["id"], "image_urls": urls}
+
+
+DEFAULT_RPCS: Dict[str, Callable[[FakeDatabase, Dict[str, Any]], Any]] = {
+    "create_post_full": rpc_create_post_full,
+    "delete_post_full": rpc_delete_post_full,
+}
+
+
+# --- Async Client -----------------------------------------------------------
+#
+# Die async Varianten nutzen die Logik der synchronen Klassen; der Roundtrip
+# wird vorab gezählt und die Latenz mit ``asyncio.sleep`` abgewartet, danach
+# läuft der synchrone Teil über ``_SilentClient`` ohne erneutes Zählen.
+
+
+class _SilentClient:
+    """Sicht auf einen ``FakeSupabase`` ohne Roundtrip-Zählung."""
+
+    def __init__(self, client: FakeSupabase) -> None:
+        self.db = client.db
+
+    def round_trip(self, key: str) -> None:
+        pass
+
+
+class FakeAsyncQuery(FakeQuery):
+    """Abfrage wie ``postgrest.AsyncRequestBuilder`` (``await query.execute()``)."""
+
+    def __init__(self, client: "FakeAsyncSupabase", table: str) -> None:
+        super().__init__(client.silent, table)  # type: ignore[arg-type]
+        self._async_client = client
+
+    async def execute(self) -> FakeResponse:  # type: ignore[override]
+        await self._async_client.round_trip(f"table:{self._table}:{self._method}")
+        return super().execute()
+
+
+class FakeAsyncRPC(FakeRPC):
+    def __init__(self, client: "FakeAsyncSupabase", name: str, params: Dict[str, Any]) -> None:
+        super().__init__(client.silent, name, params)  # type: ignore[arg-type]
+        self._async_client = client
+
+    async def execute(self) -> FakeResponse:  # type: ignore[override]
+        await self._async_client.round_trip(f"rpc:{self._name}")
+        return super().execute()
+
+
+class FakeAsyncBucket(FakeBucket):
+    def __init__(self, client: "FakeAsyncSupabase", name: str) -> None:
+        super().__init__(client.silent, name)  # type: ignore[arg-type]
+        self._async_client = client
+
+    async def upload(  # type: ignore[override]
+        self, path: str, file: Any, file_options: Optional[Dict[str, Any]] = None
+    ) -> SimpleNamespace:
+        await self._async_client.round_trip(f"storage:{self._name}:upload")
+        return super().upload(path, file, file_options)
+
+    async def remove(self, paths: List[str]) -> List[Dict[str, Any]]:  # type: ignore[override]
+        await self._async_client.round_trip(f"storage:{self._name}:remove")
+        return super().remove(paths)
+
+    async def download(self, path: str, **kwargs: Any) -> bytes:  # type: ignore[override]
+        await self._async_client.round_trip(f"storage:{self._name}:download")
+        return super().download(path, **kwargs)
+
+    async def get_public_url(self, path: str, **kwargs: Any) -> str:  # type: ignore[override]
+        return super().get_public_url(path, **kwargs)
+
+
+class FakeAsyncStorage:
+    def __init__(self, client: "FakeAsyncSupabase") -> None:
+        self._client = client
+
+    def from_(self, bucket: str) -> FakeAsyncBucket:
+        return FakeAsyncBucket(self._client, bucket)
+
+
+class FakeAsyncAuth:
+    """Auth-Teil mit der Anmeldung des synchronen Clients (wie ``get_async_client``)."""
+
+    def __init__(self, client: "FakeAsyncSupabase") -> None:
+        self._client = client
+        self._auth = client.sync.auth
+
+    async def get_user(self, jwt: Optional[str] = None) -> Optional[SimpleNamespace]:
+        await self._client.round_trip("auth:get_user")
+        return SimpleNamespace(user=self._auth.user) if self._auth.user else None
+
+    async def get_session(self) -> Optional[SimpleNamespace]:
+        return self._auth.get_session()
+
+
+class FakeAsyncSupabase:
+    """Client mit der Schnittstelle von ``supabase.AsyncClient`` (Teilmenge)."""
+
+    def __init__(self, client: FakeSupabase) -> None:
+        """Initialisiert den Client.
+
+        Args:
+            client: Synchroner Client, dessen Datenbank, Anmeldung, Latenz
+                und Statistik geteilt werden
+        """
+        self.sync = client
+        self.silent = _SilentClient(client)
+        self.db = client.db
+        self.stats = client.stats
+        self.supabase_url = client.supabase_url
+        self.storage = FakeAsyncStorage(self)
+        self.auth = FakeAsyncAuth(self)
+
+    async def round_trip(self, key: str) -> None:
+        self.sync.record(key)
+        if self.sync.rtt_ms > 0:
+            await asyncio.sleep(self.sync.rtt_ms / 1000.0)
+
+    def table(self, name: str) -> FakeAsyncQuery:
+        return FakeAsyncQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> FakeAsyncRPC:
+        return FakeAsyncRPC(self, name, params or {})
+
+
+# --- Synthetische Daten -----------------------------------------------------
+
+POST_STATUSES = ("Vermisst", "Gefunden", "Gesichtet")
+SPECIES = ("Hund", "Katze", "Kaninchen", "Vogel", "Sonstiges")
+SEXES = ("Männlich", "Weiblich")
+COLORS = ("Schwarz", "Weiß", "Braun", "Grau", "Rot", "Beige", "Gestreift", "Gefleckt")
+CITIES = (
+    ("Berlin", 52.52, 13.405), ("Hamburg", 53.551, 9.994), ("München", 48.137, 11.575),
+    ("Köln", 50.938, 6.96), ("Frankfurt am Main", 50.11, 8.682), ("Stuttgart", 48.776, 9.183),
+    ("Leipzig", 51.34, 12.375), ("Dresden", 51.05, 13.738), ("Hannover", 52.375, 9.732),
+    ("Nürnberg", 49.452, 11.077),
+)
+WORDS = (
+    "klein", "groß", "scheu", "verspielt", "Halsband", "Chip", "Park", "Bahnhof",
+    "Garten", "Wald", "entlaufen", "zugelaufen", "freundlich", "ängstlich", "alt", "jung",
+)
+
+
+def seed(
+    db: FakeDatabase,
+    posts: int = 1000,
+    users: int = 100,
+    comments_per_post: float = 2.0,
+    favorites_per_user: int = 10,
+    images_per_post: int = 2,
+    random_seed: int = 42,
+) -> Dict[str, List[Any]]:
+    """Füllt die Datenbank deterministisch mit synthetischen Daten.
+
+    Args:
+        db: Leere Datenbank
+        posts: Anzahl Meldungen
+        users: Anzahl Benutzer
+        comments_per_post: Durchschnittliche Kommentare je Meldung
+        favorites_per_user: Favoriten je Benutzer
+        images_per_post: Bilder je Meldung (inkl. Storage-Datei)
+        random_seed: Startwert des Zufallsgenerators
+
+    Returns:
+        Dictionary mit den IDs je Tabelle (``user``, ``post``, ``comment``)
+    """
+    rng = random.Random(random_seed)
+    ids: Dict[str, List[Any]] = {"user": [], "post": [], "comment": []}
+    now = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+    def uid() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    for table, names in (("post_status", POST_STATUSES), ("species", SPECIES), ("sex", SEXES), ("color", COLORS)):
+        for name in names:
+            db.insert(table, {"name": name})
+    for species_id in range(1, len(SPECIES) + 1):
+        for n in range(1, 9):
+            db.insert("breed", {"name": f"{SPECIES[species_id - 1]}-Rasse {n}", "species_id": species_id})
+    breeds = db.rows("breed")
+
+    for n in range(users):
+        row = db.insert("user", {
+            "id": uid(),
+            "display_name": f"Benutzer {n}",
+            "email": f"user{n}@example.test",
+            "profile_image": None if n % 3 else f"{FAKE_URL}/storage/v1/object/public/profile-images/{n}.jpg",
+        })
+        ids["user"].append(row["id"])
+
+    bucket = db.storage.setdefault("pet-images", {})
+    for n in range(posts):
+        city, lat, lon = CITIES[n % len(CITIES)]
+        species_id = rng.randint(1, len(SPECIES))
+        species_breeds = [b["id"] for b in breeds if b["species_id"] == species_id]
+        created = now - timedelta(minutes=n * 37)
+        post = db.insert("post", {
+            "id": uid(),
+            "user_id": rng.choice(ids["user"]),
+            "post_status_id": rng.randint(1, len(POST_STATUSES)),
+            "species_id": species_id,
+            "breed_id": rng.choice(species_breeds) if rng.random() < 0.7 else None,
+            "sex_id": rng.randint(1, len(SEXES)) if rng.random() < 0.8 else None,
+            "headline": f"{SPECIES[species_id - 1]} {' '.join(rng.sample(WORDS, 2))} in {city}",
+            "description": " ".join(rng.choice(WORDS) for _ in range(24)),
+            "location_text": f"{city}, Deutschland",
+            "location_lat": round(lat + rng.uniform(-0.15, 0.15), 6),
+            "location_lon": round(lon + rng.uniform(-0.25, 0.25), 6),
+            "event_date": (created - timedelta(days=rng.randint(0, 14))).date().isoformat(),
+            "created_at": created.isoformat(),
+            "is_active": rng.random() < 0.9,
+        })
+        ids["post"].append(post["id"])
+        for i in range(images_per_post):
+            path = f"seed_{n}_{i}.jpg"
+            bucket[path] = b"\xff\xd8\xff\xd9"
+            db.insert("post_image", {
+                "post_id": post["id"],
+                "url": f"{FAKE_URL}/storage/v1/object/public/pet-images/{path}",
+            })
+        for color_id in rng.sample(range(1, len(COLORS) + 1), rng.randint(1, 3)):
+            db.insert("post_color", {"post_id": post["id"], "color_id": color_id})
+
+        top_level: List[int] = []
+        for _ in range(int(comments_per_post) + (rng.random() < comments_per_post % 1)):
+            comment = db.insert("comment", {
+                "post_id": post["id"],
+                "user_id": rng.choice(ids["user"]),
+                "content": " ".join(rng.choice(WORDS) for _ in range(8)),
+                "is_deleted": False,
+                "parent_comment_id": rng.choice(top_level) if top_level and rng.random() < 0.3 else None,
+                "updated_at": None,
+                "created_at": (created + timedelta(minutes=rng.randint(1, 600))).isoformat(),
+            })
+            ids["comment"].append(comment["id"])
+            if comment["parent_comment_id"] is None:
+                top_level.append(comment["id"])
+            if rng.random() < 0.5:
+                db.insert("comment_reaction", {
+                    "comment_id": comment["id"],
+                    "user_id": rng.choice(ids["user"]),
+                    "emoji": rng.choice(("👍", "❤️", "🙏")),
+                })
+
+    for user_id in ids["user"]:
+        for post_id in rng.sample(ids["post"], min(favorites_per_user, len(ids["post"]))):
+            db.insert("favorite", {"user_id": user_id, "post_id": post_id})
+    return ids
+
+
+def create_fake_client(
+    posts: int = 1000,
+    users: int = 100,
+    rtt_ms: float = 0.0,
+    user_index: Optional[int] = 0,
+    **seed_kwargs: Any,
+) -> Tuple[FakeSupabase, Dict[str, List[Any]]]:
+    """Erzeugt einen Client mit synthetischen Daten und angemeldetem Benutzer.
+
+    Args:
+        posts: Anzahl Meldungen
+        users: Anzahl Benutzer
+        rtt_ms: Simulierte Latenz je Roundtrip in Millisekunden
+        user_index: Index des angemeldeten Benutzers (None = nicht angemeldet)
+        **seed_kwargs: Weitere Parameter für ``seed``
+
+    Returns:
+        Tuple (Client, IDs je Tabelle)
+    """
+    db = FakeDatabase()
+    ids = seed(db, posts=posts, users=users, **seed_kwargs)
+    client = FakeSupabase(db, rtt_ms=rtt_ms)
+    if user_index is not None and ids["user"]:
+        client.auth.sign_in_as(ids["user"][user_index])
+    return client, ids
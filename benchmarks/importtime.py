@@ -0,0 +1,233 @@
+"""
+Import-Zeit-Budget für den Serverstart (``python -X importtime``).
+
+Misst ``import main`` in frischen Interpretern und prüft:
+    - die Gesamtzeit gegen ein Budget (``--budget-ms``)
+    - dass schwere Module (Views, ReportLab, Folium, NumPy, KI, Supabase) nicht
+      schon beim Start geladen werden, sondern erst in der ersten Session bzw.
+      beim ersten Aufruf des jeweiligen Tabs
+
+Optional (``--ttfb``) wird ``main.py`` gestartet und die Zeit bis zur ersten
+HTTP-Antwort gemessen.
+
+Aufruf (im Projektverzeichnis)::
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --budget-ms 1200 --runs 5 --ttfb
+
+Exit-Code 1, wenn das Budget überschritten oder ein verbotenes Modul geladen wird.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_BUDGET_MS = 1500.0
+# Module, die ``import main`` nicht laden darf (Präfix-Vergleich)
+DEFERRED_MODULES = (
+    "app.app",
+    "ui.discover",
+    "ui.post_form",
+    "ui.profile",
+    "services.posts.similarity",
+    "services.posts.pdf_export",
+    "supabase",
+    "reportlab",
+    "folium",
+    "branca",
+    "numpy",
+    "torch",
+    "transformers",
+)
+
+
+@dataclass
+class ImportRecord:
+    """Eine Zeile der ``-X importtime``-Ausgabe (Zeiten in Millisekunden)."""
+
+    name: str
+    self_ms: float
+    cumulative_ms: float
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Liest die ``-X importtime``-Ausgabe.
+
+    Args:
+        output: stderr des Interpreters
+
+    Returns:
+        Liste der importierten Module in Ausgabereihenfolge
+    """
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, name = parts
+        stripped = name.lstrip()
+        try:
+            records.append(ImportRecord(
+                name=stripped.strip(),
+                self_ms=int(self_us) / 1000.0,
+                cumulative_ms=int(cumulative_us) / 1000.0,
+                # Einrückung: ein Leerzeichen nach "|", dann zwei je Ebene
+                depth=(len(name) - len(stripped) - 1) // 2,
+            ))
+        except ValueError:
+            continue
+    return records
+
+
+def measure(module: str, env: Optional[Dict[str, str]] = None) -> List[ImportRecord]:
+    """Importiert ein Modul in einem frischen Interpreter und liefert die Messwerte.
+
+    Args:
+        module: Modulname (z. B. ``"main"``)
+        env: Umgebung des Interpreters
+
+    Returns:
+        Liste der importierten Module
+
+    Raises:
+        RuntimeError: Wenn der Import fehlschlägt
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} fehlgeschlagen:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def deferred_violations(records: Sequence[ImportRecord], deferred: Sequence[str] = DEFERRED_MODULES) -> List[str]:
+    """Gibt geladene Module zurück, die erst später geladen werden sollen."""
+    found = []
+    for record in records:
+        if any(record.name == prefix or record.name.startswith(prefix + ".") for prefix in deferred):
+            found.append(record.name)
+    # Nur die obersten Treffer melden (nicht jedes Untermodul)
+    return [name for name in found if not any(name.startswith(other + ".") for other in found if other != name)]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_ttfb(env: Dict[str, str], timeout: float = 60.0) -> float:
+    """Startet ``main.py`` und misst die Zeit bis zur ersten HTTP-Antwort.
+
+    Args:
+        env: Umgebung des Serverprozesses
+        timeout: Maximale Wartezeit in Sekunden
+
+    Returns:
+        Sekunden vom Prozessstart bis zur ersten Antwort auf ``GET /``
+
+    Raises:
+        RuntimeError: Wenn der Server nicht rechtzeitig antwortet
+    """
+    port = _free_port()
+    server_env = dict(env, PORT=str(port), WEB_WORKERS="1", LOG_TO_FILE="false")
+    # Kein Browserfenster öffnen
+    server_env.setdefault("FLY_APP_NAME", "importtime-benchmark")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "main.py"],
+        cwd=ROOT,
+        env=server_env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"main.py beendet (Code {process.returncode})")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1.0) as response:
+                    response.read(1)
+                return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                time.sleep(0.02)
+        raise RuntimeError(f"Keine Antwort nach {timeout:.0f} s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import-Zeit-Budget für den Serverstart")
+    parser.add_argument("--module", default="main", help="Zu messendes Modul (Standard: main)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Budget für den Import")
+    parser.add_argument("--runs", type=int, default=3, help="Anzahl Messungen (Median wird geprüft)")
+    parser.add_argument("--top", type=int, default=15, help="Langsamste Module anzeigen")
+    parser.add_argument("--ttfb", action="store_true", help="Zusätzlich Zeit bis zur ersten HTTP-Antwort messen")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    env["LOG_TO_FILE"] = "false"
+
+    # Erster Lauf erzeugt .pyc-Dateien und zählt nicht
+    measure(args.module, env)
+    runs = [measure(args.module, env) for _ in range(max(1, args.runs))]
+    totals = sorted(next(r.cumulative_ms for r in records if r.name == args.module and r.depth == 0) for records in runs)
+    median = totals[len(totals) // 2]
+    records = runs[0]
+
+    print(f"import {args.module}: Median {median:.0f} ms (min {totals[0]:.0f} ms, max {totals[-1]:.0f} ms), "
+          f"{len(records)} Module, Budget {args.budget_ms:.0f} ms")
+    top_level = sorted((r for r in records if r.depth <= 1), key=lambda r: r.cumulative_ms, reverse=True)
+    print("\nLangsamste Module (kumuliert, Ebene 0/1):")
+    for record in top_level[:args.top]:
+        print(f"  {record.cumulative_ms:8.1f} ms  {'  ' * record.depth}{record.name}")
+
+    failed = False
+    violations = deferred_violations(records)
+    if violations:
+        failed = True
+        print("\nFEHLER: Beim Start geladen, sollte verzögert sein:")
+        for name in violations:
+            print(f"  - {name}")
+    if median > args.budget_ms:
+        failed = True
+        print(f"\nFEHLER: Budget überschritten ({median:.0f} ms > {args.budget_ms:.0f} ms)")
+
+    if args.ttfb:
+        try:
+            print(f"\nZeit bis zur ersten HTTP-Antwort: {measure_ttfb(env) * 1000:.0f} ms")
+        except RuntimeError as e:
+            failed = True
+            print(f"\nFEHLER bei der TTFB-Messung: {e}")
+
+    if not failed:
+        print("\nOK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
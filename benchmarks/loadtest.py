@@ -0,0 +1,534 @@
+"""
+Lasttest: viele gleichzeitige Flet-Sessions ohne Browser.
+
+Jede simulierte Session erhält eine echte ``ft.Page`` mit einer Verbindung
+ohne WebSocket (``HeadlessConnection``): Flet serialisiert alle Updates wie im
+Betrieb, die Nachrichten werden nur gezählt statt gesendet. Der Einstiegspunkt
+``main(page)`` aus ``main.py`` läuft unverändert im Thread-Pool wie bei
+``flet.fastapi``; Supabase wird durch ``benchmarks.fake_supabase`` mit
+synthetischen Daten und simulierter Latenz ersetzt.
+
+Ablauf je Session: Start (Discover inkl. erster Suche), danach in Runden
+Filter ändern, Suchbegriff eingeben, Detail öffnen und schließen, Favorit
+umschalten, Karte öffnen, zurück zur Liste. Ereignisse werden wie vom Client
+an ``page.on_event_async`` geschickt; ein Schritt gilt als fertig, wenn alle
+dadurch gestarteten Tasks und Threads der Session beendet sind.
+
+Gemeldet werden Durchsatz, p50/p95/p99 je Schritt, Roundtrips je Schritt,
+Speicher je Session (RSS), Flet-Nachrichten je Session und die Verzögerung
+der Event-Loop.
+
+Aufruf (im Projektverzeichnis)::
+
+    python -m benchmarks.loadtest
+    python -m benchmarks.loadtest --sessions 50 --rounds 5 --rtt-ms 30 --posts 3000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+# Vor dem Import von main: keine Logdatei, wenig Ausgabe, In-Memory-Caches
+os.environ["LOG_TO_FILE"] = "false"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["SHARED_STORE_URL"] = "memory://"
+
+import flet as ft  # noqa: E402
+from flet.core.event import Event  # noqa: E402
+from flet.core.local_connection import LocalConnection  # noqa: E402
+from flet.core.protocol import (  # noqa: E402
+    ClientActions,
+    ClientMessage,
+    Command,
+    CommandEncoder,
+    PageCommandResponsePayload,
+    PageCommandsBatchResponsePayload,
+    RegisterWebClientRequestPayload,
+)
+
+from benchmarks.fake_supabase import WORDS, FakeAsyncSupabase, FakeDatabase, FakeSupabase, seed  # noqa: E402
+
+DEFAULT_STEP_TIMEOUT = 60.0
+LOOP_LAG_INTERVAL = 0.01
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def rss_mb() -> float:
+    """Aktueller Speicherverbrauch des Prozesses (RSS) in MB."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource  # Nicht-Linux: Höchstwert statt aktuellem Wert
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class HeadlessConnection(LocalConnection):
+    """Flet-Verbindung ohne Client: verarbeitet Befehle und zählt die Nachrichten."""
+
+    def __init__(self, session_id: str, route: str = "/") -> None:
+        super().__init__()
+        self.page: Optional[ft.Page] = None
+        self.messages = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self.page_url = "http://loadtest.local"
+        self._client_details = RegisterWebClientRequestPayload(
+            pageName="", pageRoute=route, pageWidth="1280", pageHeight="900",
+            windowWidth="1280", windowHeight="900", windowTop="0", windowLeft="0",
+            isPWA="false", isWeb="true", isDebug="false", platform="linux",
+            platformBrightness="light", media="{}", sessionId=session_id,
+        )
+
+    def send_command(self, session_id: str, command: Command) -> PageCommandResponsePayload:
+        result, message = self._process_command(command)
+        if message:
+            self._send(message)
+        if command.name == "invokeMethod":
+            self._answer_method(command.values[0])
+        return PageCommandResponsePayload(result=result, error="")
+
+    def send_commands(self, session_id: str, commands: List[Command]) -> PageCommandsBatchResponsePayload:
+        results = []
+        messages = []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name in ("add", "get"):
+                results.append(result)
+            if message:
+                messages.append(message)
+        if messages:
+            self._send(ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, messages))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    def _send(self, message: ClientMessage) -> None:
+        # Gleiche Serialisierung wie flet_web.fastapi.FletApp
+        size = len(json.dumps(message, cls=CommandEncoder, separators=(",", ":")))
+        with self._lock:
+            self.messages += 1
+            self.bytes_sent += size
+
+    def _answer_method(self, method_id: str) -> None:
+        """Beantwortet invokeMethod sofort (Methoden mit Rückgabewert warten sonst)."""
+        handler = self.page._get_event_handler("invoke_method_result") if self.page else None
+        if handler is not None:
+            handler(Event("page", "invoke_method_result", json.dumps(
+                {"method_id": method_id, "result": None, "error": None}
+            )))
+
+
+class TrackedPage(ft.Page):
+    """Page, die laufende ``run_task``/``run_thread``-Arbeit der Session zählt."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self.errors: List[str] = []
+
+    def _begin(self) -> None:
+        with self._pending_lock:
+            self._pending += 1
+
+    def _end(self) -> None:
+        with self._pending_lock:
+            self._pending -= 1
+
+    def run_task(self, handler: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Future:
+        self._begin()
+        try:
+            future = super().run_task(handler, *args, **kwargs)
+        except Exception:
+            self._end()
+            raise
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            self.errors.append(repr(future.exception()))
+        self._end()
+
+    def run_thread(self, handler: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        self._begin()
+
+        def tracked(*inner_args: Any, **inner_kwargs: Any) -> None:
+            try:
+                handler(*inner_args, **inner_kwargs)
+            except Exception as e:  # noqa: BLE001
+                self.errors.append(repr(e))
+            finally:
+                self._end()
+
+        try:
+            super().run_thread(tracked, *args, **kwargs)
+        except Exception:
+            self._end()
+            raise
+
+    async def wait_idle(self, timeout: float) -> None:
+        """Wartet, bis keine von der Session gestartete Arbeit mehr läuft.
+
+        Raises:
+            TimeoutError: Wenn die Session nach ``timeout`` Sekunden noch arbeitet
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            if self._pending == 0:
+                # Eine Runde abwarten: gerade geplante Callbacks erhöhen den Zähler
+                await asyncio.sleep(0)
+                if self._pending == 0:
+                    return
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"Session nach {timeout:.0f} s nicht fertig ({self._pending} offen)")
+            await asyncio.sleep(0.002)
+
+
+def _descendants(root: ft.Control) -> List[ft.Control]:
+    found = []
+    stack = [root]
+    while stack:
+        control = stack.pop()
+        found.append(control)
+        stack.extend(reversed(control._get_children()))
+    return found
+
+
+def _outermost(root: ft.Control, predicate: Callable[[ft.Control], bool]) -> List[ft.Control]:
+    """Treffer unter ``root``, ohne in Treffer hinabzusteigen."""
+    found = []
+    stack = [root]
+    while stack:
+        control = stack.pop()
+        if control is not root and predicate(control):
+            found.append(control)
+            continue
+        stack.extend(reversed(control._get_children()))
+    return found
+
+
+class SimulatedSession:
+    """Eine Browser-Session, die ``main(page)`` ausführt und Ereignisse auslöst."""
+
+    def __init__(
+        self,
+        index: int,
+        client: FakeSupabase,
+        executor: ThreadPoolExecutor,
+        rng: random.Random,
+        step_timeout: float,
+    ) -> None:
+        self.index = index
+        self.client = client
+        self.executor = executor
+        self.rng = rng
+        self.step_timeout = step_timeout
+        self.connection = HeadlessConnection(session_id=f"load-{index}")
+        self.page: Optional[TrackedPage] = None
+        self.app: Any = None
+        # Schritt -> Laufzeiten (ms) bzw. Roundtrips
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.round_trips: Dict[str, List[int]] = defaultdict(list)
+        # Schritt -> Roundtrips je Tabelle/Methode (Summe)
+        self.calls: Dict[str, Counter] = defaultdict(Counter)
+
+    async def _step(self, name: str, action: Callable[[], Awaitable[None]]) -> None:
+        before = self.client.stats.snapshot()
+        started = time.perf_counter()
+        await action()
+        await self.page.wait_idle(self.step_timeout)
+        self.timings[name].append((time.perf_counter() - started) * 1000.0)
+        delta = Counter(self.client.stats.snapshot())
+        delta.subtract(before)
+        self.calls[name].update(+delta)
+        self.round_trips[name].append(sum((+delta).values()))
+
+    async def _dispatch(self, control: ft.Control, name: str, data: str = "") -> None:
+        """Schickt ein Ereignis wie der Flet-Client (bei ``change`` zuerst den neuen Wert)."""
+        if name == "change":
+            await self.page.on_event_async(Event("page", "change", json.dumps([{"i": control.uid, "value": data}])))
+        await self.page.on_event_async(Event(control.uid, name, data))
+
+    async def open(self, main: Callable[[ft.Page], None], start_client: Callable[[FakeSupabase], None]) -> None:
+        """Erzeugt die Page und führt ``main(page)`` aus (wie ``flet.fastapi``)."""
+        loop = asyncio.get_running_loop()
+
+        async def start() -> None:
+            self.page = TrackedPage(self.connection, f"load-{self.index}", loop=loop, executor=self.executor)
+            self.connection.page = self.page
+            await self.page.fetch_page_details_async()
+
+            def run_main() -> None:
+                start_client(self.client)
+                main(self.page)
+
+            await loop.run_in_executor(self.executor, run_main)
+            # Die App ist über ihren Routen-Handler erreichbar
+            self.app = getattr(self.page.on_route_change, "__self__", None)
+
+        await self._step("open_discover", start)
+
+    @property
+    def discover(self) -> Any:
+        return self.app.discover_view if self.app else None
+
+    async def change_filter(self) -> None:
+        dropdown = self.discover._filter_art
+        options = [o.key for o in (dropdown.options or []) if o.key]
+        await self._step("change_filter", lambda: self._dispatch(dropdown, "change", self.rng.choice(options)))
+
+    async def search(self) -> None:
+        field = self.discover._search_q
+        await self._step("search", lambda: self._dispatch(field, "change", self.rng.choice(WORDS)))
+
+    async def open_detail(self) -> None:
+        cards = _outermost(
+            self.discover._list_view,
+            lambda c: isinstance(c, ft.Container) and c.on_click is not None,
+        )
+        if not cards:
+            return
+        await self._step("open_detail", lambda: self._dispatch(self.rng.choice(cards), "click"))
+
+        dialogs = [c for c in self.page.overlay if isinstance(c, ft.AlertDialog) and c.open]
+        if dialogs:
+            loop = asyncio.get_running_loop()
+            await self._step(
+                "close_detail",
+                lambda: loop.run_in_executor(self.executor, self.page.close, dialogs[-1]),
+            )
+
+    async def toggle_favorite(self) -> None:
+        buttons = [
+            c for c in _descendants(self.discover._list_view)
+            if isinstance(c, ft.IconButton) and "Favoriten" in (c.tooltip or "")
+        ]
+        if buttons:
+            await self._step("toggle_favorite", lambda: self._dispatch(self.rng.choice(buttons), "click"))
+
+    def _tab_button(self, label: str) -> Optional[ft.Control]:
+        for control in list(self.page._index.values()):
+            if isinstance(control, ft.TextButton) and any(
+                isinstance(c, ft.Text) and c.value == label for c in _descendants(control)
+            ):
+                return control
+        return None
+
+    async def open_map(self) -> None:
+        button = self._tab_button("Karte")
+        if button is not None:
+            await self._step("open_map", lambda: self._dispatch(button, "click"))
+        button = self._tab_button("Meldungen")
+        if button is not None:
+            await self._step("back_to_list", lambda: self._dispatch(button, "click"))
+
+    async def run_round(self, think: Callable[[], Awaitable[None]]) -> None:
+        for action in (self.change_filter, self.search, self.open_detail, self.toggle_favorite, self.open_map):
+            await action()
+            await think()
+
+
+async def _monitor_loop_lag(samples: List[float], stop: asyncio.Event) -> None:
+    """Misst, wie viel später als geplant die Event-Loop einen Timer bedient."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        samples.append(max(0.0, (loop.time() - started - LOOP_LAG_INTERVAL) * 1000.0))
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    """Führt den Lasttest aus und liefert die Kennzahlen."""
+    import app.app as app_module
+    from main import main as entry_point
+
+    db = FakeDatabase()
+    ids = seed(db, posts=args.posts, users=args.users)
+    executor = ThreadPoolExecutor(max_workers=args.threads or None, thread_name_prefix="flet-session")
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=args.threads or None, thread_name_prefix="to-thread"))
+
+    # get_client() der App liefert je Session einen eigenen Client (gleiche Datenbank),
+    # get_async_client() das async Gegenstück mit derselben Anmeldung
+    current = threading.local()
+    app_module.get_client = lambda: current.client
+    app_module.get_async_client = FakeAsyncSupabase
+
+    def start_client(client: FakeSupabase) -> None:
+        current.client = client
+
+    def new_session(index: int) -> SimulatedSession:
+        client = FakeSupabase(db, rtt_ms=args.rtt_ms)
+        client.auth.sign_in_as(ids["user"][index % len(ids["user"])])
+        return SimulatedSession(index, client, executor, random.Random(args.seed + index), args.step_timeout)
+
+    # Aufwärmen: Importe und erste Caches zählen nicht zum Speicher je Session
+    warmup = new_session(-1)
+    await warmup.open(entry_point, start_client)
+    gc.collect()
+    rss_before = rss_mb()
+
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.ensure_future(_monitor_loop_lag(lag_samples, stop))
+    sessions = [new_session(i) for i in range(args.sessions)]
+    opened = 0
+    opened_event = asyncio.Event()
+    rss_opened = rss_before
+
+    async def think() -> None:
+        await asyncio.sleep(args.think_ms / 1000.0 * random.uniform(0.5, 1.5))
+
+    async def drive(session: SimulatedSession) -> None:
+        nonlocal opened, rss_opened
+        await asyncio.sleep(session.index * args.ramp_ms / 1000.0)
+        try:
+            await session.open(entry_point, start_client)
+        finally:
+            opened += 1
+            if opened == len(sessions):
+                gc.collect()
+                rss_opened = rss_mb()
+                opened_event.set()
+        # Runden erst starten, wenn alle Sessions offen sind (Speichermessung)
+        await opened_event.wait()
+        for _ in range(args.rounds):
+            await session.run_round(think)
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(drive(s) for s in sessions), return_exceptions=True)
+    wall = time.perf_counter() - started
+    stop.set()
+    await monitor
+    executor.shutdown(wait=False)
+
+    timings: Dict[str, List[float]] = defaultdict(list)
+    round_trips: Dict[str, List[int]] = defaultdict(list)
+    calls: Dict[str, Counter] = defaultdict(Counter)
+    for session in sessions:
+        for name, values in session.timings.items():
+            timings[name].extend(values)
+        for name, values in session.round_trips.items():
+            round_trips[name].extend(values)
+        for name, counter in session.calls.items():
+            calls[name].update(counter)
+    failures = [repr(o) for o in outcomes if isinstance(o, BaseException)]
+    handler_errors = [e for s in sessions if s.page for e in s.page.errors]
+    total_steps = sum(len(v) for v in timings.values())
+
+    return {
+        "config": {key: getattr(args, key) for key in (
+            "sessions", "rounds", "posts", "users", "rtt_ms", "think_ms", "ramp_ms", "threads",
+        )},
+        "wall_s": wall,
+        "steps": total_steps,
+        "throughput_steps_per_s": total_steps / wall if wall else 0.0,
+        "latency_ms": {
+            name: {
+                "count": len(values),
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+                "p99": _percentile(values, 0.99),
+                "max": max(values),
+                "round_trips": statistics.mean(round_trips[name]),
+                "calls": {key: count / len(values) for key, count in calls[name].most_common()},
+            }
+            for name, values in timings.items()
+        },
+        "loop_lag_ms": {
+            "p50": _percentile(lag_samples, 0.50),
+            "p95": _percentile(lag_samples, 0.95),
+            "p99": _percentile(lag_samples, 0.99),
+            "max": max(lag_samples, default=0.0),
+        },
+        "memory_mb": {
+            "rss_before": rss_before,
+            "rss_sessions_open": rss_opened,
+            "rss_end": rss_mb(),
+            "per_session": (rss_opened - rss_before) / max(1, len(sessions)),
+        },
+        "flet_per_session": {
+            "messages": statistics.mean(s.connection.messages for s in sessions),
+            "kb": statistics.mean(s.connection.bytes_sent for s in sessions) / 1024,
+        },
+        "failures": failures,
+        "handler_errors": handler_errors,
+    }
+
+
+def _print_report(report: Dict[str, Any], verbose: bool = False) -> None:
+    config = report["config"]
+    print(
+        f"{config['sessions']} Sessions × {config['rounds']} Runden, {config['posts']} Meldungen, "
+        f"{config['rtt_ms']:g} ms je Roundtrip, Denkzeit {config['think_ms']:g} ms"
+    )
+    print(f"Dauer {report['wall_s']:.1f} s, {report['steps']} Schritte, "
+          f"Durchsatz {report['throughput_steps_per_s']:.1f} Schritte/s\n")
+    print(f"{'Schritt':<16} {'Anzahl':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'Roundtrips':>11}")
+    for name, stats in report["latency_ms"].items():
+        print(f"{name:<16} {stats['count']:>7} {stats['p50']:>6.0f} ms {stats['p95']:>6.0f} ms "
+              f"{stats['p99']:>6.0f} ms {stats['max']:>6.0f} ms {stats['round_trips']:>11.1f}")
+        if verbose:
+            for key, count in stats["calls"].items():
+                print(f"    {count:>5.1f} × {key}")
+    lag = report["loop_lag_ms"]
+    print(f"\nEvent-Loop-Verzögerung: p50 {lag['p50']:.1f} ms, p95 {lag['p95']:.1f} ms, "
+          f"p99 {lag['p99']:.1f} ms, max {lag['max']:.1f} ms")
+    memory = report["memory_mb"]
+    print(f"Speicher (RSS): {memory['rss_before']:.0f} MB vor, {memory['rss_sessions_open']:.0f} MB mit "
+          f"offenen Sessions, {memory['rss_end']:.0f} MB am Ende; {memory['per_session']:.2f} MB je Session")
+    flet_stats = report["flet_per_session"]
+    print(f"Flet je Session: {flet_stats['messages']:.0f} Nachrichten, {flet_stats['kb']:.0f} KB")
+    if report["failures"] or report["handler_errors"]:
+        print(f"\nFehler: {len(report['failures'])} Sessions abgebrochen, "
+              f"{len(report['handler_errors'])} Handler-Ausnahmen")
+        for error in (report["failures"] + report["handler_errors"])[:10]:
+            print(f"  - {error}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Lasttest mit simulierten Flet-Sessions")
+    parser.add_argument("--sessions", type=int, default=20, help="Gleichzeitige Sessions")
+    parser.add_argument("--rounds", type=int, default=3, help="Runden je Session")
+    parser.add_argument("--posts", type=int, default=2000, help="Anzahl synthetischer Meldungen")
+    parser.add_argument("--users", type=int, default=200, help="Anzahl synthetischer Benutzer")
+    parser.add_argument("--rtt-ms", type=float, default=20.0, help="Simulierte Latenz je Supabase-Roundtrip")
+    parser.add_argument("--think-ms", type=float, default=300.0, help="Mittlere Denkzeit zwischen Schritten")
+    parser.add_argument("--ramp-ms", type=float, default=50.0, help="Versatz beim Start der Sessions")
+    parser.add_argument("--threads", type=int, default=0, help="Threads im Pool (0 = Python-Standard)")
+    parser.add_argument("--step-timeout", type=float, default=DEFAULT_STEP_TIMEOUT, help="Maximale Dauer je Schritt (s)")
+    parser.add_argument("--seed", type=int, default=1, help="Startwert für Zufallsentscheidungen")
+    parser.add_argument("--verbose", action="store_true", help="Roundtrips je Tabelle/Methode und Schritt anzeigen")
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load(args))
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        _print_report(report, verbose=args.verbose)
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
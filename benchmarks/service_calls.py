@@ -0,0 +1,330 @@
+"""
+Benchmark der Service-Aufrufe gegen den lokalen Supabase-Ersatz.
+
+Führt typische Aufrufe von ``SearchService``, ``FavoritesService``,
+``CommentService``, ``PostService``, ``ReferenceService`` und
+``ProfileService`` gegen ``benchmarks.fake_supabase`` mit synthetischen Daten
+aus und meldet je Aufruf Median/p95 der Laufzeit sowie die Anzahl der
+Roundtrips (Datenbank, Storage, Auth). Der gemeinsame Speicher
+(``services.shared_store``) wird vor jeder Wiederholung geleert, außer bei
+Fällen mit ``[warm]``.
+
+Aufruf (im Projektverzeichnis)::
+
+    python -m benchmarks.service_calls
+    python -m benchmarks.service_calls --posts 5000 --rtt-ms 20 --runs 10
+    python -m benchmarks.service_calls --baseline benchmarks/baselines/service_calls.json
+    python -m benchmarks.service_calls --update-baseline benchmarks/baselines/service_calls.json
+
+Mit ``--baseline`` gilt als Regression (Exit-Code 1):
+    - mehr Roundtrips als in der Baseline
+    - Median langsamer als Baseline × ``--max-slowdown``
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Vor dem Import der Services: nur In-Memory-Speicher, keine Logdatei
+os.environ["SHARED_STORE_URL"] = "memory://"
+os.environ.setdefault("LOG_TO_FILE", "false")
+
+from benchmarks.fake_supabase import CITIES, FakeSupabase, create_fake_client  # noqa: E402
+
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baselines" / "service_calls.json"
+# Latenz schwankt auf geteilten Maschinen stark; Roundtrips sind exakt
+DEFAULT_MAX_SLOWDOWN = 2.0
+# Unterhalb dieser Differenz gilt eine Verlangsamung als Messrauschen
+MIN_SLOWDOWN_MS = 2.0
+
+
+@dataclass
+class Case:
+    """Ein gemessener Service-Aufruf."""
+
+    name: str
+    run: Callable[[], Any]
+    # Vorbereitung je Wiederholung (nicht gemessen, Roundtrips zählen nicht)
+    setup: Optional[Callable[[], None]] = None
+    # Gemeinsamen Speicher vor jeder Wiederholung leeren
+    cold: bool = True
+
+
+@dataclass
+class CaseResult:
+    """Messergebnis eines Falls (Zeiten in Millisekunden)."""
+
+    name: str
+    runs: int
+    median_ms: float
+    p95_ms: float
+    round_trips: int
+    calls: Dict[str, int] = field(default_factory=dict)
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build_cases(client: FakeSupabase, ids: Dict[str, List[Any]]) -> List[Case]:
+    """Erzeugt die Benchmark-Fälle für einen befüllten Client.
+
+    Args:
+        client: Client mit synthetischen Daten und angemeldetem Benutzer
+        ids: IDs je Tabelle (aus ``create_fake_client``)
+
+    Returns:
+        Liste der Fälle
+    """
+    from services.account.profile import ProfileService
+    from services.posts.comment import CommentService
+    from services.posts.favorites import FavoritesService
+    from services.posts.post import PostService
+    from services.posts.post_relations import PostRelationsService
+    from services.posts.references import ReferenceService
+    from services.posts.search import SearchService
+    from services.posts.storage_cleanup import get_storage_cleanup_queue
+
+    profile = ProfileService(client)
+    search = SearchService(client, profile)
+    favorites = FavoritesService(client, profile)
+    comments = CommentService(client, profile)
+    posts = PostService(client)
+    relations = PostRelationsService(client)
+
+    user_id = client.auth.user.id
+    post_id = ids["post"][0]
+    favorite_ids = favorites.get_favorite_ids(user_id)
+    not_favorite = next(pid for pid in ids["post"] if pid not in favorite_ids)
+    _, berlin_lat, berlin_lon = CITIES[0]
+    comment_id = ids["comment"][0]
+    scratch: Dict[str, str] = {}
+
+    def new_payload() -> Dict[str, Any]:
+        return {
+            "user_id": user_id,
+            "post_status_id": 1,
+            "species_id": 1,
+            "headline": "Benchmark-Meldung",
+            "description": "Synthetische Meldung",
+            "location_text": "Berlin, Deutschland",
+            "location_lat": berlin_lat,
+            "location_lon": berlin_lon,
+            "event_date": "2026-06-01",
+            "is_active": True,
+        }
+
+    def create_full_post() -> None:
+        created = posts.create(new_payload())
+        relations.update_colors(created["id"], [1, 2])
+        for n in range(2):
+            path = f"bench_{created['id']}_{n}.jpg"
+            client.storage.from_("pet-images").upload(path=path, file=b"\xff\xd8\xff\xd9")
+            relations.add_photo(created["id"], client.storage.from_("pet-images").get_public_url(path))
+        scratch["post_id"] = created["id"]
+
+    def create_post_rpc() -> None:
+        path = f"bench_{uuid.uuid4().hex}.jpg"
+        client.storage.from_("pet-images").upload(path=path, file=b"\xff\xd8\xff\xd9")
+        url = client.storage.from_("pet-images").get_public_url(path)
+        scratch["post_id"] = posts.create_full(new_payload(), [1, 2], [url])["id"]
+
+    def delete_post() -> None:
+        posts.delete(scratch["post_id"])
+        # Storage-Dateien entfernt die Bereinigung im Hintergrund; mitzählen
+        get_storage_cleanup_queue().wait_idle(timeout=10)
+
+    def load_references() -> None:
+        references = ReferenceService(client)
+        references.get_post_statuses()
+        references.get_species()
+        references.get_breeds_by_species()
+        references.get_colors()
+        references.get_sex()
+
+    def toggle_twice() -> None:
+        comments.toggle_reaction(comment_id, user_id, "🐾")
+        comments.toggle_reaction(comment_id, user_id, "🐾")
+
+    def favorite_roundtrip() -> None:
+        favorites.add_favorite(not_favorite)
+        favorites.remove_favorite(not_favorite)
+
+    return [
+        Case("search.search_posts", lambda: search.search_posts({}, favorite_ids=favorite_ids)),
+        Case("search.search_posts[warm]", lambda: search.search_posts({}, favorite_ids=favorite_ids), cold=False),
+        Case("search.search_posts[filter+query+colors]", lambda: search.search_posts(
+            {"typ": 1, "art": 1}, search_query="Park", selected_colors={1, 2}, favorite_ids=favorite_ids,
+        )),
+        Case("search.search_posts[radius]", lambda: search.search_posts(
+            {}, location_lat=berlin_lat, location_lon=berlin_lon, radius_km=25, sort_option="distance",
+        )),
+        Case("search.get_markers_in_bbox", lambda: search.get_markers_in_bbox(
+            [5.8, 47.2, 15.1, 55.1], {}, favorite_ids=favorite_ids,
+        )),
+        Case("favorites.get_favorites", favorites.get_favorites),
+        Case("favorites.get_favorite_ids", lambda: favorites.get_favorite_ids(user_id)),
+        Case("favorites.add+remove", favorite_roundtrip),
+        Case("comments.get_comments", lambda: comments.get_comments(post_id)),
+        Case("comments.create_comment", lambda: comments.create_comment(post_id, user_id, "Benchmark")),
+        Case("comments.toggle_reaction×2", toggle_twice),
+        Case("post.get_by_id", lambda: posts.get_by_id(post_id)),
+        Case("post.get_my_posts", lambda: posts.get_my_posts(user_id)),
+        Case("post.create+colors+photos", create_full_post),
+        Case("post.create_full", create_post_rpc),
+        Case("post.update", lambda: posts.update(post_id, {"headline": "Aktualisiert"})),
+        Case("post.delete", delete_post, setup=create_full_post),
+        Case("references.load_all", load_references),
+        Case("profile.get_user_profiles[50]", lambda: profile.get_user_profiles(ids["user"][:50])),
+    ]
+
+
+def run_case(client: FakeSupabase, case: Case, runs: int, warmup: int = 1) -> CaseResult:
+    """Misst einen Fall.
+
+    Args:
+        client: Client, dessen Roundtrips gezählt werden
+        case: Zu messender Fall
+        runs: Anzahl gemessener Wiederholungen
+        warmup: Nicht gewertete Wiederholungen vorab
+
+    Returns:
+        Messergebnis (Roundtrips = Maximum über alle Wiederholungen)
+    """
+    from services.shared_store import MemorySharedStore, set_shared_store
+
+    timings: List[float] = []
+    round_trips = 0
+    calls: Dict[str, int] = {}
+    for iteration in range(warmup + runs):
+        if case.cold:
+            set_shared_store(MemorySharedStore())
+        if case.setup is not None:
+            case.setup()
+        gc.collect()
+        client.stats.reset()
+        started = time.perf_counter()
+        case.run()
+        elapsed = (time.perf_counter() - started) * 1000.0
+        if iteration < warmup:
+            continue
+        timings.append(elapsed)
+        if client.stats.total >= round_trips:
+            round_trips = client.stats.total
+            calls = client.stats.snapshot()
+    return CaseResult(
+        name=case.name,
+        runs=runs,
+        median_ms=statistics.median(timings),
+        p95_ms=_percentile(timings, 0.95),
+        round_trips=round_trips,
+        calls=dict(sorted(calls.items())),
+    )
+
+
+def compare(
+    results: Sequence[CaseResult],
+    baseline: Dict[str, Any],
+    max_slowdown: float,
+) -> List[str]:
+    """Vergleicht Ergebnisse mit einer Baseline.
+
+    Args:
+        results: Aktuelle Messergebnisse
+        baseline: Inhalt der Baseline-Datei
+        max_slowdown: Erlaubter Faktor für den Median
+
+    Returns:
+        Liste der Regressionen (leer = OK)
+    """
+    previous = {entry["name"]: entry for entry in baseline.get("results", [])}
+    problems = []
+    for result in results:
+        before = previous.get(result.name)
+        if before is None:
+            continue
+        if result.round_trips > before["round_trips"]:
+            problems.append(
+                f"{result.name}: {result.round_trips} Roundtrips statt {before['round_trips']}"
+            )
+        limit = before["median_ms"] * max_slowdown
+        if result.median_ms > limit and result.median_ms - before["median_ms"] > MIN_SLOWDOWN_MS:
+            problems.append(
+                f"{result.name}: Median {result.median_ms:.1f} ms > {limit:.1f} ms "
+                f"(Baseline {before['median_ms']:.1f} ms × {max_slowdown:g})"
+            )
+    return problems
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark der Service-Aufrufe gegen einen lokalen Supabase-Ersatz")
+    parser.add_argument("--posts", type=int, default=1000, help="Anzahl synthetischer Meldungen")
+    parser.add_argument("--users", type=int, default=100, help="Anzahl synthetischer Benutzer")
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="Simulierte Latenz je Roundtrip")
+    parser.add_argument("--runs", type=int, default=7, help="Gemessene Wiederholungen je Fall")
+    parser.add_argument("--only", default="", help="Nur Fälle, deren Name diesen Text enthält")
+    parser.add_argument("--verbose", action="store_true", help="Roundtrips je Tabelle/Methode anzeigen")
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON ausgeben")
+    parser.add_argument("--baseline", type=Path, help="Mit dieser Baseline vergleichen")
+    parser.add_argument("--max-slowdown", type=float, default=DEFAULT_MAX_SLOWDOWN,
+                        help="Erlaubter Faktor für den Median gegenüber der Baseline")
+    parser.add_argument("--update-baseline", type=Path, nargs="?", const=DEFAULT_BASELINE,
+                        help="Ergebnisse als neue Baseline speichern")
+    args = parser.parse_args(argv)
+
+    client, ids = create_fake_client(posts=args.posts, users=args.users, rtt_ms=args.rtt_ms)
+    cases = [case for case in build_cases(client, ids) if args.only in case.name]
+    results = [run_case(client, case, max(1, args.runs)) for case in cases]
+    config = {"posts": args.posts, "users": args.users, "rtt_ms": args.rtt_ms, "runs": args.runs}
+
+    if args.json:
+        print(json.dumps({"config": config, "results": [asdict(r) for r in results]}, indent=2, ensure_ascii=False))
+    else:
+        print(f"{args.posts} Meldungen, {args.users} Benutzer, {args.rtt_ms:g} ms je Roundtrip, {args.runs} Läufe\n")
+        print(f"{'Fall':<42} {'Median':>10} {'p95':>10} {'Roundtrips':>11}")
+        for result in results:
+            print(f"{result.name:<42} {result.median_ms:>7.2f} ms {result.p95_ms:>7.2f} ms {result.round_trips:>11}")
+            if args.verbose:
+                for key, count in result.calls.items():
+                    print(f"    {count:>3} × {key}")
+
+    failed = False
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("config") != config:
+            print(f"\nHinweis: Baseline mit anderer Konfiguration gemessen ({baseline.get('config')})", file=sys.stderr)
+        problems = compare(results, baseline, args.max_slowdown)
+        if problems:
+            failed = True
+            print("\nFEHLER: Regression gegenüber der Baseline:", file=sys.stderr)
+            for problem in problems:
+                print(f"  - {problem}", file=sys.stderr)
+        elif not args.json:
+            print("\nOK (keine Regression gegenüber der Baseline)")
+
+    if args.update_baseline is not None:
+        args.update_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.update_baseline.write_text(
+            json.dumps({"config": config, "results": [asdict(r) for r in results]}, indent=2, ensure_ascii=False) + "\n",
+            encoding="utf-8",
+        )
+        print(f"\nBaseline gespeichert: {args.update_baseline}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
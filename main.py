@@ -3,16 +3,25 @@
 # Dieses Modul ist der Einstiegspunkt der Anwendung.
 # Die Hauptlogik wurde in das app/ Modul ausgelagert.
 
+import hmac
 import os
+import threading
 import webbrowser
+from typing import Optional
 import flet as ft
 import uvicorn
-from fastapi.responses import FileResponse, PlainTextResponse
+from fastapi import Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from flet.fastapi import FastAPI, app as flet_app
 from dotenv import load_dotenv
 
-from app import PetBuddyApp
-from utils.logging_config import setup_logging
+from services.download_store import DownloadEntry, get_download_store
+from services.posts.map_feed import get_map_feed_store
+from utils.http_middleware import IMMUTABLE_CACHE_CONTROL, HttpCacheMiddleware, asset_version
+from utils.logging_config import get_logger, setup_logging
+from utils.metrics import METRICS_ENABLED, METRICS_TOKEN, PROMETHEUS_CONTENT_TYPE, render_metrics
+from utils import profiling
+from utils.workers import WorkerAffinityMiddleware, run_workers, web_worker_count, worker_index
 
 # Lade Umgebungsvariablen aus .env
 load_dotenv()
@@ -23,11 +32,115 @@ setup_logging(
     log_to_file=os.getenv("LOG_TO_FILE", "true").lower() == "true"
 )
 
+logger = get_logger(__name__)
+
 # Secret Key für Flet Uploads aus .env laden
 os.environ["FLET_SECRET_KEY"] = os.getenv("FLET_SECRET_KEY", "")
 
 
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def _parse_range(range_header: str, size: int):
+    """Liest einen einzelnen Byte-Bereich ("bytes=start-end").
+
+    Returns:
+        (start, end) inklusive, None ohne/bei mehreren Bereichen, "invalid" wenn nicht erfüllbar
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_raw, _, end_raw = range_header[6:].strip().partition("-")
+    try:
+        if start_raw:
+            start = int(start_raw)
+            end = int(end_raw) if end_raw else size - 1
+        else:
+            # Suffix-Bereich: die letzten N Bytes
+            start = max(0, size - int(end_raw))
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return "invalid"
+    return start, min(end, size - 1)
+
+
+def _iter_file(path, start: int, length: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _download_response(entry: DownloadEntry, request: Request, media_type: str) -> Response:
+    """Liefert eine gespeicherte Datei gestreamt aus (ETag, Range, Speicher-Cache)."""
+    headers = {
+        "ETag": f'"{entry.etag}"',
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=3600",
+        "Content-Disposition": f'attachment; filename="{entry.name}"',
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range == headers["ETag"]:
+        byte_range = _parse_range(request.headers.get("range", ""), entry.size)
+    if byte_range == "invalid":
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{entry.size}"})
+
+    status_code = 200
+    start, end = 0, entry.size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{entry.size}"
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+
+    if entry.data is not None:
+        return Response(entry.data[start:end + 1], status_code=status_code, media_type=media_type, headers=headers)
+    return StreamingResponse(
+        _iter_file(entry.path, start, length),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def _bearer_authorized(request: Request, token: str) -> bool:
+    """Prüft ``Authorization: Bearer <token>`` in konstanter Zeit."""
+    received = request.headers.get("authorization", "").encode("utf-8")
+    return hmac.compare_digest(received, f"Bearer {token}".encode("utf-8"))
+
+
+def _preload_app() -> None:
+    """Importiert die App-Module im Hintergrund, nachdem der Server lauscht.
+
+    Der Server beantwortet so bereits HTTP-Anfragen (Flet-Web-Bundle), während
+    UI und Services geladen werden; die erste Session findet sie meist fertig vor.
+    """
+    def run() -> None:
+        import app  # noqa: F401
+        import ui.discover  # noqa: F401
+        from services.supabase_client import shared_pool_supported
+
+        # Versionsprüfung beim Start: ältere supabase-Versionen bekommen keinen geteilten Pool
+        shared_pool_supported()
+
+    threading.Thread(target=run, name="app-preload", daemon=True).start()
+
+
 def main(page: ft.Page):
+    # App-Module erst hier importieren (schneller Serverstart, siehe _preload_app)
+    from app import PetBuddyApp
+
     # App-Sprache auf Deutsch setzen (betrifft u.a. DatePicker)
     page.locale = "de-DE"
     page.locale_configuration = ft.LocaleConfiguration(
@@ -41,32 +154,159 @@ def main(page: ft.Page):
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8080))
+    worker = worker_index()
 
     # Absoluten Upload-Pfad festlegen und Verzeichnis sicherstellen
+    # (alle Worker nutzen dasselbe Verzeichnis)
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    upload_dir_abs = os.path.join(base_dir, "image_uploads")
+    upload_dir_abs = os.path.abspath(os.getenv("UPLOAD_DIR") or os.path.join(base_dir, "image_uploads"))
     os.makedirs(upload_dir_abs, exist_ok=True)
     os.environ["UPLOAD_DIR"] = upload_dir_abs
 
+    # Mehrprozess-Betrieb: Elternprozess startet die Worker und den Sticky-Proxy
+    workers = web_worker_count()
+    if workers > 1 and worker is None:
+        if os.getenv("FLY_APP_NAME") is None:
+            webbrowser.open(f"http://localhost:{port}")
+        run_workers(os.path.abspath(__file__), workers, port)
+        raise SystemExit(0)
+
     assets_dir_abs = os.path.join(base_dir, "assets")
-    os.makedirs(os.path.join(assets_dir_abs, "pdf_exports"), exist_ok=True)
 
-    app = FastAPI()
+    # PDF-Exporte: Ablaufzeit und Größenbegrenzung, regelmäßiges Aufräumen
+    download_store = get_download_store()
+    download_store.start_sweeper()
+
+    app = FastAPI(on_startup=[_preload_app])
+    # Kompression, Cache-Control und ETag-Revalidierung für alle HTTP-Antworten
+    app.add_middleware(HttpCacheMiddleware)
+    if worker is not None:
+        # Sticky-Routing: Folgeanfragen und WebSocket derselben Session an diesen Worker
+        app.add_middleware(WorkerAffinityMiddleware, index=worker)
 
     @app.get("/download/{filename}")
-    def download_pdf(filename: str):
-        safe_name = os.path.basename(filename)
-        pdf_path = os.path.join(assets_dir_abs, "pdf_exports", safe_name)
-        if not os.path.exists(pdf_path):
+    def download_pdf(filename: str, request: Request):
+        entry = download_store.get(filename)
+        if entry is None:
             return PlainTextResponse("PDF nicht gefunden", status_code=404)
+        return _download_response(entry, request, "application/pdf")
+
+    # Auf Fly.io (öffentlich erreichbar) nur mit Token; lokal auch ohne
+    metrics_route = METRICS_ENABLED and (bool(METRICS_TOKEN) or os.getenv("FLY_APP_NAME") is None)
+    if METRICS_ENABLED and not metrics_route:
+        logger.warning("/metrics deaktiviert: auf Fly.io ist METRICS_TOKEN erforderlich")
+    if metrics_route:
+        @app.get("/metrics")
+        def metrics(request: Request):
+            # Metriken des Prozesses (bei mehreren Workern führt der Proxy sie zusammen)
+            if METRICS_TOKEN and not _bearer_authorized(request, METRICS_TOKEN):
+                return PlainTextResponse("Nicht autorisiert", status_code=401)
+            return Response(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE, headers={"Cache-Control": "no-store"})
+
+    if profiling.PROFILE_ADMIN_TOKEN:
+        def _profiling_authorized(request: Request) -> bool:
+            return _bearer_authorized(request, profiling.PROFILE_ADMIN_TOKEN)
+
+        @app.get("/admin/profiling")
+        def profiling_status(request: Request):
+            if not _profiling_authorized(request):
+                return PlainTextResponse("Nicht autorisiert", status_code=401)
+            return JSONResponse(profiling.status(), headers={"Cache-Control": "no-store"})
+
+        @app.post("/admin/profiling")
+        def profiling_configure(
+            request: Request,
+            enabled: Optional[bool] = None,
+            operations: Optional[str] = None,
+            sample_rate: Optional[float] = None,
+            interval_ms: Optional[float] = None,
+            duration: Optional[float] = None,
+        ):
+            if not _profiling_authorized(request):
+                return PlainTextResponse("Nicht autorisiert", status_code=401)
+            state = profiling.configure(
+                enabled=enabled,
+                operations=operations.split(",") if operations is not None else None,
+                sample_rate=sample_rate,
+                interval_ms=interval_ms,
+                duration=duration,
+            )
+            return JSONResponse(state, headers={"Cache-Control": "no-store"})
+
+        @app.get("/admin/profiling/{name}")
+        def profiling_file(name: str, request: Request):
+            if not _profiling_authorized(request):
+                return PlainTextResponse("Nicht autorisiert", status_code=401)
+            path = profiling.get_profile_path(name)
+            if path is None:
+                return PlainTextResponse("Profil nicht gefunden", status_code=404)
+            return FileResponse(path, media_type="text/plain", headers={"Cache-Control": "no-store"})
+
+    map_shell_path = os.path.join(assets_dir_abs, "map", "index.html")
+
+    @app.get("/map/")
+    def map_shell(request: Request):
+        # Statische Karten-Seite: mit passender Version (?v=) unbegrenzt cachebar
+        versioned = request.query_params.get("v") == asset_version("map/index.html")
         return FileResponse(
-            pdf_path,
-            media_type="application/pdf",
-            filename=safe_name,
-            headers={"Content-Disposition": f'attachment; filename="{safe_name}"'},
+            map_shell_path,
+            media_type="text/html",
+            headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL if versioned else "no-cache"},
         )
 
-    # Download-Route vor der Flet-App mounten
+    @app.get("/map/feed/{feed_id}")
+    def map_feed(feed_id: str, request: Request):
+        entry = get_map_feed_store().get(feed_id)
+        if entry is None:
+            return PlainTextResponse("Feed nicht gefunden", status_code=404)
+        payload, etag = entry
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+        return Response(payload, media_type="application/geo+json", headers=headers)
+
+    def _parse_bbox(bbox: str):
+        try:
+            west, south, east, north = (float(v) for v in bbox.split(","))
+        except ValueError:
+            return None
+        return [west, south, east, north]
+
+    @app.get("/map/feed/{feed_id}/clusters")
+    def map_clusters(feed_id: str, bbox: str, zoom: float):
+        index = get_map_feed_store().get_cluster_index(feed_id)
+        if index is None:
+            return PlainTextResponse("Feed nicht gefunden", status_code=404)
+        box = _parse_bbox(bbox)
+        if box is None:
+            return PlainTextResponse("Ungültige bbox", status_code=400)
+        features = index.clusters(box, zoom)
+        return JSONResponse(
+            {"type": "FeatureCollection", "features": features},
+            headers={"Cache-Control": "no-store"},
+        )
+
+    @app.get("/map/feed/{feed_id}/markers")
+    def map_markers(feed_id: str, bbox: str, zoom: float):
+        box = _parse_bbox(bbox)
+        if box is None:
+            return PlainTextResponse("Ungültige bbox", status_code=400)
+        features = get_map_feed_store().query_viewport(feed_id, box, zoom)
+        if features is None:
+            return PlainTextResponse("Feed nicht gefunden", status_code=404)
+        return JSONResponse(
+            {"type": "FeatureCollection", "features": features},
+            headers={"Cache-Control": "no-store"},
+        )
+
+    @app.get("/map/feed/{feed_id}/post/{post_id}")
+    def map_post_detail(feed_id: str, post_id: str):
+        properties = get_map_feed_store().get_detail(feed_id, post_id)
+        if properties is None:
+            return PlainTextResponse("Meldung nicht gefunden", status_code=404)
+        return JSONResponse(properties, headers={"Cache-Control": "no-store"})
+
+    # Download- und Karten-Routen vor der Flet-App mounten
     app.mount(
         "/",
         flet_app(
@@ -76,7 +316,10 @@ if __name__ == "__main__":
         ),
     )
 
-    if os.getenv("FLY_APP_NAME") is None:
+    if os.getenv("FLY_APP_NAME") is None and worker is None:
         webbrowser.open(f"http://localhost:{port}")
 
-    uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
\ No newline at end of file
+    # Worker sind nur über den Proxy erreichbar
+    host = "127.0.0.1" if worker is not None else "0.0.0.0"
+    # log_config=None: Uvicorn-Logs laufen über die Log-Warteschlange (setup_logging)
+    uvicorn.run(app, host=host, port=port, log_level="info", log_config=None)
\ No newline at end of file
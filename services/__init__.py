@@ -5,8 +5,25 @@ Enthält alle Service-Klassen für Datenbankoperationen:
 - Post Services: CRUD, Suche, Favoriten, Gespeicherte Suchen, Stammdaten
 """
 
-from .posts import PostService, SearchService, FavoritesService, SavedSearchService, ReferenceService
-from .account import ProfileService, AuthService, AuthResult
+from typing import TYPE_CHECKING
+
+from utils.lazy_import import lazy_exports
+
+if TYPE_CHECKING:
+    from .posts import PostService, SearchService, FavoritesService, SavedSearchService, ReferenceService
+    from .account import ProfileService, AuthService, AuthResult
+
+# Untermodule werden erst beim ersten Zugriff importiert (schneller Serverstart)
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "PostService": ".posts",
+    "SearchService": ".posts",
+    "FavoritesService": ".posts",
+    "SavedSearchService": ".posts",
+    "ReferenceService": ".posts",
+    "ProfileService": ".account",
+    "AuthService": ".account",
+    "AuthResult": ".account",
+})
 
 __all__ = [
     "PostService",
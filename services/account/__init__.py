@@ -8,7 +8,7 @@ Enthält:
 """
 
 from .auth import AuthService, AuthResult
-from .profile import ProfileService
+from .profile import AsyncProfileService, ProfileService
 from .profile_image import ProfileImageService
 from .account_deletion import AccountDeletionService
 
@@ -16,6 +16,7 @@ __all__ = [
     "AuthService",
     "AuthResult",
     "ProfileService",
+    "AsyncProfileService",
     "ProfileImageService",
     "AccountDeletionService",
 ]
@@ -1,17 +1,116 @@
-"""Service für Benutzer-Profil-Verwaltung."""
+"""Service für Benutzer-Profil-Verwaltung (synchron und async)."""
 
 from __future__ import annotations
 
 from typing import Optional, List, Dict, Any, Tuple, Iterable
 
-from supabase import Client
+from supabase import AsyncClient, Client
 
+from services.posts.queries import user_profiles_query
+from services.shared_store import get_shared_store
 from utils.logging_config import get_logger
+from utils.metrics import timed
 from utils.validators import validate_not_empty, validate_length, sanitize_string
 from utils.constants import MAX_DISPLAY_NAME_LENGTH
 
 logger = get_logger(__name__)
 
+# Lebensdauer fremder Profile (Name, Bild) im gemeinsamen Speicher (Sekunden)
+PROFILE_CACHE_TTL = 300.0
+
+
+def _profile_cache_key(user_id: str) -> str:
+    return f"profile:{user_id}"
+
+
+def _clean_image_url(profile_image_url: Any) -> Optional[str]:
+    """Leere bzw. Platzhalter-URLs ("null", "none", ...) werden zu None."""
+    if isinstance(profile_image_url, str):
+        profile_image_url = profile_image_url.strip()
+        if profile_image_url.lower() in {"", "null", "none", "undefined"}:
+            return None
+    return profile_image_url or None
+
+
+def _prepare_user_ids(user_ids: Iterable[str]) -> List[str]:
+    """Bereitet User-IDs für Queries vor (dedupliziert, validiert).
+
+    Args:
+        user_ids: Iterable mit User-IDs
+
+    Returns:
+        Liste von deduplizierten User-IDs, leere Liste wenn ungültig
+    """
+    if not user_ids:
+        return []
+    user_ids_list = list(set(user_ids))
+    return user_ids_list if user_ids_list else []
+
+
+def _split_cached(
+    user_ids_list: List[str], cached: Dict[str, Any]
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Teilt User-IDs anhand der Speichertreffer in Profile und noch zu ladende IDs auf."""
+    known: Dict[str, Dict[str, Any]] = {}
+    for user_id in user_ids_list:
+        profile = cached.get(_profile_cache_key(user_id))
+        if profile is not None:
+            known[user_id] = profile
+    return known, [user_id for user_id in user_ids_list if user_id not in known]
+
+
+def _cached_profiles(user_ids: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Teilt User-IDs in gecachte Profile und noch zu ladende IDs auf."""
+    user_ids_list = _prepare_user_ids(user_ids)
+    if not user_ids_list:
+        return {}, []
+    cached = get_shared_store().get_many(_profile_cache_key(user_id) for user_id in user_ids_list)
+    return _split_cached(user_ids_list, cached)
+
+
+async def _cached_profiles_async(user_ids: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Async-Variante von ``_cached_profiles`` (Speicherzugriff nicht im Event-Loop)."""
+    user_ids_list = _prepare_user_ids(user_ids)
+    if not user_ids_list:
+        return {}, []
+    cached = await get_shared_store().aget_many(_profile_cache_key(user_id) for user_id in user_ids_list)
+    return _split_cached(user_ids_list, cached)
+
+
+def _to_profiles(rows: Optional[List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Wandelt user-Zeilen in Profile um."""
+    profiles = {}
+    for row in (rows or []):
+        user_id = row.get("id")
+        if user_id:
+            profiles[user_id] = {
+                "display_name": row.get("display_name") or "Unbekannt",
+                "profile_image": _clean_image_url(row.get("profile_image")),
+            }
+    return profiles
+
+
+def _store_profiles(rows: Optional[List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Wandelt user-Zeilen in Profile um und legt sie im gemeinsamen Speicher ab."""
+    store = get_shared_store()
+    profiles = _to_profiles(rows)
+    store.set_many(
+        {_profile_cache_key(user_id): profile for user_id, profile in profiles.items()},
+        ttl=PROFILE_CACHE_TTL,
+    )
+    return profiles
+
+
+async def _store_profiles_async(rows: Optional[List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Async-Variante von ``_store_profiles``."""
+    store = get_shared_store()
+    profiles = _to_profiles(rows)
+    await store.aset_many(
+        {_profile_cache_key(user_id): profile for user_id, profile in profiles.items()},
+        ttl=PROFILE_CACHE_TTL,
+    )
+    return profiles
+
 
 class ProfileService:
     """Service-Klasse für Benutzer-Profil-Daten."""
@@ -66,12 +165,7 @@ class ProfileService:
                 .execute()
             )
             row = (result.data or [None])[0]
-            profile_image_url = row.get("profile_image") if isinstance(row, dict) else None
-            if isinstance(profile_image_url, str):
-                profile_image_url = profile_image_url.strip()
-                if profile_image_url.lower() in {"", "none", "null", "undefined"}:
-                    profile_image_url = None
-            return profile_image_url or None
+            return _clean_image_url(row.get("profile_image") if isinstance(row, dict) else None)
         except Exception as e:  # noqa: BLE001
             logger.debug(f"Konnte Profilbild aus user-Tabelle nicht laden: {e}")
             return None
@@ -129,20 +223,8 @@ class ProfileService:
             self.sb.table("user").update(payload).eq("id", str(user.id)).execute()
         except Exception as e:  # noqa: BLE001
             logger.debug(f"Sync public.user übersprungen: {e}")
-
-    def _prepare_user_ids(self, user_ids: Iterable[str]) -> List[str]:
-        """Bereitet User-IDs für Queries vor (dedupliziert, validiert).
-        
-        Args:
-            user_ids: Iterable mit User-IDs
-        
-        Returns:
-            Liste von deduplizierten User-IDs, leere Liste wenn ungültig
-        """
-        if not user_ids:
-            return []
-        user_ids_list = list(set(user_ids))
-        return user_ids_list if user_ids_list else []
+        finally:
+            get_shared_store().delete(_profile_cache_key(str(user.id)))
 
     def get_user_display_names(self, user_ids: Iterable[str]) -> Dict[str, str]:
         """Lädt die Anzeigenamen für eine Liste von User-IDs.
@@ -160,10 +242,13 @@ class ProfileService:
             for user_id, profile in profiles.items()
         }
 
+    @timed("get_user_profiles")
     def get_user_profiles(self, user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
         """Lädt Profil-Daten (display_name + profile_image) für mehrere User-IDs.
         
-        Enthält Retry-Logik für transiente Netzwerkfehler (z.B. HTTP/2 Connection-Pool).
+        Transiente Netzwerkfehler wiederholt der geteilte httpx-Client (siehe services.resilience).
+        Profile werden ``PROFILE_CACHE_TTL`` Sekunden im gemeinsamen Speicher
+        gehalten; nur fehlende IDs werden aus der Datenbank geladen.
         
         Args:
             user_ids: Iterable mit User-IDs (wird automatisch dedupliziert)
@@ -172,48 +257,102 @@ class ProfileService:
             Dictionary: user_id -> {"display_name": str, "profile_image": str | None}
             Leeres Dictionary bei Fehler oder wenn keine user_ids vorhanden.
         """
-        import time
+        known, user_ids_list = _cached_profiles(user_ids)
+        if not user_ids_list:
+            return known
+
+        try:
+            result = user_profiles_query(self.sb, user_ids_list).execute()
+            profiles = _store_profiles(result.data)
+            profiles.update(known)
+            return profiles
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Laden der Benutzerprofile: {e}", exc_info=True)
+            return known
+
+
+class AsyncProfileService:
+    """Async-Variante der lesenden Methoden von ``ProfileService`` (``AsyncClient``).
+
+    Profiländerungen (Anzeigename, Profilbild) laufen weiterhin über
+    ``ProfileService``; der Profil-Cache im gemeinsamen Speicher ist derselbe.
+    """
+
+    def __init__(self, sb: AsyncClient) -> None:
+        """Initialisiert den Service mit dem async Supabase-Client.
+
+        Args:
+            sb: Async Supabase Client-Instanz
+        """
+        self.sb = sb
+
+    async def get_current_user(self) -> Optional[Any]:
+        """Gibt den aktuell eingeloggten Benutzer zurück."""
+        try:
+            user_response = await self.sb.auth.get_user()
+            if user_response and user_response.user:
+                return user_response.user
+            return None
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Laden des Benutzers: {e}", exc_info=True)
+            return None
+
+    async def get_user_id(self) -> Optional[str]:
+        """Gibt die ID des aktuell eingeloggten Benutzers zurück."""
+        user = await self.get_current_user()
+        return user.id if user else None
+
+    async def get_display_name(self) -> str:
+        """Gibt den Anzeigenamen des aktuellen Benutzers zurück."""
+        user = await self.get_current_user()
+        if user and user.user_metadata:
+            return user.user_metadata.get("display_name", "Benutzer")
+        return "Benutzer"
+
+    async def get_email(self) -> Optional[str]:
+        """Gibt die E-Mail des aktuellen Benutzers zurück."""
+        user = await self.get_current_user()
+        return user.email if user else None
+
+    async def get_profile_image_url(self) -> Optional[str]:
+        """Gibt die Profilbild-URL des aktuellen Benutzers zurück."""
+        user = await self.get_current_user()
+        if not user:
+            return None
 
-        user_ids_list = self._prepare_user_ids(user_ids)
+        try:
+            result = await self.sb.table("user").select("profile_image").eq("id", str(user.id)).execute()
+            row = (result.data or [None])[0]
+            return _clean_image_url(row.get("profile_image") if isinstance(row, dict) else None)
+        except Exception as e:  # noqa: BLE001
+            logger.debug(f"Konnte Profilbild aus user-Tabelle nicht laden: {e}")
+            return None
+
+    async def get_user_display_names(self, user_ids: Iterable[str]) -> Dict[str, str]:
+        """Lädt die Anzeigenamen für eine Liste von User-IDs (user_id -> display_name)."""
+        profiles = await self.get_user_profiles(user_ids)
+        return {
+            user_id: profile.get("display_name", "")
+            for user_id, profile in profiles.items()
+        }
+
+    @timed("get_user_profiles")
+    async def get_user_profiles(self, user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Lädt Profil-Daten für mehrere User-IDs (siehe ``ProfileService.get_user_profiles``).
+
+        Returns:
+            Dictionary: user_id -> {"display_name": str, "profile_image": str | None}
+            Leeres Dictionary bei Fehler oder wenn keine user_ids vorhanden.
+        """
+        known, user_ids_list = await _cached_profiles_async(user_ids)
         if not user_ids_list:
-            return {}
-        
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                result = (
-                    self.sb.table("user")
-                    .select("id, display_name, profile_image")
-                    .in_("id", user_ids_list)
-                    .execute()
-                )
-                
-                profiles = {}
-                
-                for row in (result.data or []):
-                    user_id = row.get("id")
-                    if user_id:
-                        profile_image_url = row.get("profile_image")
-                        if isinstance(profile_image_url, str):
-                            profile_image_url = profile_image_url.strip()
-                            if profile_image_url.lower() in {"", "null", "none", "undefined"}:
-                                profile_image_url = None
-                        
-                        profiles[user_id] = {
-                            "display_name": row.get("display_name") or "Unbekannt",
-                            "profile_image": profile_image_url,
-                        }
-                
-                return profiles
-            except Exception as e:  # noqa: BLE001
-                if attempt < max_retries - 1:
-                    wait = 0.5 * (attempt + 1)
-                    logger.warning(
-                        f"Benutzerprofile laden fehlgeschlagen (Versuch {attempt + 1}/{max_retries}), "
-                        f"Retry in {wait}s: {e}"
-                    )
-                    time.sleep(wait)
-                else:
-                    logger.error(f"Fehler beim Laden der Benutzerprofile nach {max_retries} Versuchen: {e}", exc_info=True)
-                    return {}
-    
+            return known
+
+        try:
+            result = await user_profiles_query(self.sb, user_ids_list).execute()
+            profiles = await _store_profiles_async(result.data)
+            profiles.update(known)
+            return profiles
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Laden der Benutzerprofile: {e}", exc_info=True)
+            return known
@@ -3,16 +3,22 @@
 from __future__ import annotations
 
 import io
-from typing import Optional, Dict, Tuple, Any
+from typing import Optional, Dict, Tuple, Any, List
 from PIL import Image
 
 from utils.logging_config import get_logger
+from utils.metrics import timed
 
 logger = get_logger(__name__)
 
+EMBEDDING_DIM = 768
+"""Dimension der Bild-Embeddings (Hidden Size von google/vit-base-patch16-224)."""
+
 
 class PetRecognitionService:
     """Service zur Erkennung von Tierarten und -rassen aus Bildern."""
+
+    INPUT_SIZE: int = 224
     
     def __init__(self):
         """Initialisiert den Service und lädt das Modell."""
@@ -88,19 +94,118 @@ class PetRecognitionService:
                 "Bitte trage die Rasse manuell ein."
             )
     
+    def _get_input_geometry(self) -> Tuple[Tuple[int, int], Optional[Tuple[int, int]]]:
+        """Liest Zielgröße und optionalen Center-Crop aus der Processor-Konfiguration.
+
+        Returns:
+            Tuple (resize_size, crop_size) jeweils als (Höhe, Breite);
+            resize_size mit Höhe 0 bedeutet "kürzeste Kante auf Breite skalieren"
+        """
+        def dim(value: Any, key: str) -> Optional[int]:
+            found = value.get(key) if isinstance(value, dict) else getattr(value, key, None)
+            return int(found) if found else None
+
+        size = getattr(self.processor, "size", None)
+        if isinstance(size, int):
+            resize = (size, size)
+        elif dim(size, "height") and dim(size, "width"):
+            resize = (dim(size, "height"), dim(size, "width"))
+        elif dim(size, "shortest_edge"):
+            resize = (0, dim(size, "shortest_edge"))
+        else:
+            resize = (self.INPUT_SIZE, self.INPUT_SIZE)
+
+        crop = None
+        if getattr(self.processor, "do_center_crop", False):
+            crop_size = getattr(self.processor, "crop_size", None)
+            if isinstance(crop_size, int):
+                crop = (crop_size, crop_size)
+            elif dim(crop_size, "height") and dim(crop_size, "width"):
+                crop = (dim(crop_size, "height"), dim(crop_size, "width"))
+        return resize, crop
+
     def _preprocess_image(self, image_data: bytes) -> Image.Image:
-        """Bereitet das Bild für die Verarbeitung vor."""
+        """Dekodiert das Bild verkleinert und bringt es auf die Modell-Eingabegröße.
+
+        JPEGs werden per ``draft()`` direkt in reduzierter Auflösung dekodiert
+        (DCT-Skalierung 1/2 bis 1/8), danach wird wie im HF-Processor auf die
+        Eingabegröße skaliert (bzw. skaliert und mittig beschnitten).
+        """
         try:
+            resize, crop = self._get_input_geometry()
+            target = crop or (resize if resize[0] else (resize[1], resize[1]))
+
             img = Image.open(io.BytesIO(image_data))
-            
+            img.draft("RGB", (target[1], target[0]))
+
             # Konvertiere zu RGB falls notwendig
             if img.mode != "RGB":
                 img = img.convert("RGB")
-            
+
+            if resize[0]:
+                img = img.resize((resize[1], resize[0]), Image.Resampling.BILINEAR)
+            else:
+                scale = resize[1] / min(img.size)
+                new_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+                img = img.resize(new_size, Image.Resampling.BILINEAR)
+
+            if crop:
+                left = (img.width - crop[1]) // 2
+                top = (img.height - crop[0]) // 2
+                img = img.crop((left, top, left + crop[1], top + crop[0]))
+
             return img
         except Exception as e:  # noqa: BLE001
             raise ValueError(f"Bild konnte nicht geladen werden: {e}")
-    
+
+    def _to_pixel_values(self, img: Image.Image) -> Any:
+        """Baut den Eingabe-Tensor (1, 3, H, W) direkt mit NumPy.
+
+        Entspricht Rescale + Normalize des HF-Processors, ohne dessen
+        zusätzliche PIL-Konvertierungen pro Aufruf.
+        """
+        import numpy as np
+        import torch
+
+        mean = np.asarray(getattr(self.processor, "image_mean", None) or [0.5, 0.5, 0.5], dtype=np.float32)
+        std = np.asarray(getattr(self.processor, "image_std", None) or [0.5, 0.5, 0.5], dtype=np.float32)
+        rescale = float(getattr(self.processor, "rescale_factor", None) or 1 / 255)
+
+        arr = np.asarray(img, dtype=np.float32)
+        arr *= rescale
+        arr -= mean
+        arr /= std
+        return torch.from_numpy(np.ascontiguousarray(arr.transpose(2, 0, 1))).unsqueeze(0)
+
+    def compute_embedding(self, image_data: bytes) -> Optional[List[float]]:
+        """Berechnet den Merkmalsvektor eines Bildes für die Ähnlichkeitssuche.
+
+        Verwendet den CLS-Token der letzten ViT-Schicht (vor dem Klassifikator)
+        und normiert ihn auf Länge 1, damit das Skalarprodukt der Kosinus-
+        Ähnlichkeit entspricht.
+
+        Args:
+            image_data: Bilddaten als Bytes
+
+        Returns:
+            Liste mit EMBEDDING_DIM Floats oder None bei Fehler
+        """
+        try:
+            if not self._model_loaded:
+                self._load_model()
+
+            img = self._preprocess_image(image_data)
+
+            import torch
+            with torch.no_grad():
+                outputs = self.model.base_model(pixel_values=self._to_pixel_values(img))
+            vector = outputs.last_hidden_state[0, 0]
+            vector = torch.nn.functional.normalize(vector, dim=0)
+            return vector.tolist()
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Berechnen des Bild-Embeddings: {e}", exc_info=True)
+            return None
+
     def _is_cat_or_dog(self, predicted_label: str) -> Tuple[Optional[str], str]:
         """
         Prüft, ob die erkannte Klasse ein Hund oder eine Katze ist.
@@ -198,6 +303,7 @@ class PetRecognitionService:
         breed_name = translate(label_norm).title()
         return (None, breed_name)
     
+    @timed("recognize_pet")
     def recognize_pet(
         self,
         image_data: bytes,
@@ -219,39 +325,31 @@ class PetRecognitionService:
                 - error: str - Fehlermeldung falls success=False
         """
         try:
-            logger.info("=" * 60)
-            logger.info("STARTE RASSENERKENNUNG")
-            logger.info(f"Bilddaten: {len(image_data)} bytes")
-            logger.info(f"Modell geladen: {self._model_loaded}")
-            logger.info("=" * 60)
+            logger.info("Starte Rassenerkennung (%d Bytes, Modell geladen: %s)", len(image_data), self._model_loaded)
             
             # Lade Modell falls noch nicht geschehen
             if not self._model_loaded:
                 logger.info("Modell ist noch nicht geladen, lade es jetzt...")
                 self._load_model()
-                logger.info("Modell erfolgreich geladen")
             
             # Bild vorbereiten
-            logger.info("Bereite Bild vor...")
             img = self._preprocess_image(image_data)
-            logger.info(f"Bild vorbereitet: {img.size}, Mode: {img.mode}")
+            logger.debug("Bild vorbereitet: %s, Mode: %s", img.size, img.mode)
             
             # Inference
-            logger.info("Starte Inference...")
-            inputs = self.processor(images=img, return_tensors="pt")
-            logger.info("Inputs vorbereitet")
-            outputs = self.model(**inputs)
-            logger.info("Modell-Ausgabe erhalten")
+            import torch
+            pixel_values = self._to_pixel_values(img)
+            with torch.no_grad():
+                outputs = self.model(pixel_values=pixel_values)
+            logger.debug("Modell-Ausgabe erhalten")
             
             # Hole Vorhersage
-            import torch
-            logger.info("Berechne Wahrscheinlichkeiten...")
             probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
             top_prob, top_class = probs[0].topk(1)
             
             confidence = top_prob.item()
             predicted_label = self.labels[top_class.item()]
-            logger.info(f"Erkannte Klasse: '{predicted_label}' mit {confidence:.2%} Konfidenz")
+            logger.info("Erkannte Klasse: '%s' mit %.1f%% Konfidenz", predicted_label, confidence * 100)
             
             # Bestimme Tierart und formatiere Rasse
             species, breed = self._is_cat_or_dog(predicted_label)
@@ -299,13 +397,7 @@ class PetRecognitionService:
             }
             
         except Exception as e:  # noqa: BLE001
-            logger.error("=" * 60)
-            logger.error("FEHLER BEI DER RASSENERKENNUNG")
-            logger.error("=" * 60)
-            logger.error(f"Exception: {type(e).__name__}")
-            logger.error(f"Nachricht: {str(e)}")
-            logger.error("Details: ", exc_info=True)
-            logger.error("=" * 60)
+            logger.error("Fehler bei der Rassenerkennung: %s: %s", type(e).__name__, e, exc_info=True)
             return {
                 "success": False,
                 "error": f"Fehler bei der Erkennung: {str(e)}",
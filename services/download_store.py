@@ -0,0 +1,324 @@
+"""Download-Speicher für erzeugte Dateien (z. B. PDF-Exporte).
+
+Dateien liegen in ``assets/pdf_exports`` und werden über einen In-Memory-Index
+verwaltet, statt bei jedem Abruf das Verzeichnis zu prüfen. Ein Hintergrund-
+Thread entfernt abgelaufene Dateien und hält Anzahl und Gesamtgröße unter den
+konfigurierten Grenzen (älteste Zugriffe zuerst). Kleine Dateien werden
+zusätzlich im Speicher gehalten und ohne Dateizugriff ausgeliefert.
+Teilen sich mehrere Worker-Prozesse das Verzeichnis, übernimmt ``get`` Dateien
+anderer Worker beim ersten Abruf in den eigenen Index.
+
+Konfiguration (Umgebungsvariablen):
+    - DOWNLOAD_TTL_SECONDS: Lebensdauer ohne Zugriff (Standard: 86400)
+    - DOWNLOAD_MAX_BYTES: Maximale Gesamtgröße auf Disk (Standard: 512 MB)
+    - DOWNLOAD_MAX_FILES: Maximale Anzahl Dateien (Standard: 2000)
+    - DOWNLOAD_MEMORY_MAX_BYTES: Dateien bis zu dieser Größe im Speicher halten
+      (Standard: 256 KB, 0 = aus)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+DOWNLOAD_DIR = Path(__file__).resolve().parents[1] / "assets" / "pdf_exports"
+DOWNLOAD_TTL_SECONDS = float(os.getenv("DOWNLOAD_TTL_SECONDS", "86400"))
+DOWNLOAD_MAX_BYTES = int(os.getenv("DOWNLOAD_MAX_BYTES", str(512 * 1024 * 1024)))
+DOWNLOAD_MAX_FILES = int(os.getenv("DOWNLOAD_MAX_FILES", "2000"))
+DOWNLOAD_MEMORY_MAX_BYTES = int(os.getenv("DOWNLOAD_MEMORY_MAX_BYTES", str(256 * 1024)))
+# Gesamtbudget für im Speicher gehaltene Dateien
+DOWNLOAD_MEMORY_BUDGET = 32 * 1024 * 1024
+# Intervall des Hintergrund-Aufräumens
+SWEEP_INTERVAL_SECONDS = 300.0
+# Übrig gebliebene Temp-Dateien (abgebrochene Schreibvorgänge) nach dieser Zeit löschen
+_TMP_SUFFIX = ".tmp"
+_TMP_MAX_AGE_SECONDS = 3600.0
+
+
+@dataclass
+class DownloadEntry:
+    """Eine gespeicherte Datei.
+
+    Attributes:
+        name: Dateiname (ohne Verzeichnis)
+        path: Pfad auf Disk
+        size: Größe in Bytes
+        etag: Entity-Tag für bedingte Anfragen
+        last_access: Zeitpunkt des letzten Zugriffs (Epoch)
+        data: Dateiinhalt, falls im Speicher gehalten
+    """
+
+    name: str
+    path: Path
+    size: int
+    etag: str
+    last_access: float
+    data: Optional[bytes] = None
+
+
+class DownloadStore:
+    """Verzeichnis mit Ablaufzeit, Größenbegrenzung und optionalem Speicher-Cache."""
+
+    def __init__(
+        self,
+        directory: Path = DOWNLOAD_DIR,
+        ttl_seconds: float = DOWNLOAD_TTL_SECONDS,
+        max_bytes: int = DOWNLOAD_MAX_BYTES,
+        max_files: int = DOWNLOAD_MAX_FILES,
+        memory_max_bytes: int = DOWNLOAD_MEMORY_MAX_BYTES,
+        memory_budget: int = DOWNLOAD_MEMORY_BUDGET,
+    ) -> None:
+        """Initialisiert den Speicher und liest vorhandene Dateien einmalig ein.
+
+        Args:
+            directory: Verzeichnis der Dateien
+            ttl_seconds: Lebensdauer einer Datei ohne Zugriff
+            max_bytes: Maximale Gesamtgröße
+            max_files: Maximale Anzahl Dateien
+            memory_max_bytes: Dateien bis zu dieser Größe im Speicher halten
+            memory_budget: Gesamtgröße der im Speicher gehaltenen Dateien
+        """
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.memory_max_bytes = memory_max_bytes
+        self.memory_budget = memory_budget
+        # Reihenfolge = letzter Zugriff (älteste zuerst)
+        self._entries: "OrderedDict[str, DownloadEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def _safe_name(name: str) -> Optional[str]:
+        """Gibt den Dateinamen ohne Pfadanteile zurück (None bei ungültigen Namen)."""
+        safe = os.path.basename(name or "")
+        if not safe or safe.startswith(".") or safe.endswith(_TMP_SUFFIX):
+            return None
+        return safe
+
+    def _load_index(self) -> None:
+        """Liest vorhandene Dateien ein und entfernt verwaiste Temp-Dateien."""
+        now = time.time()
+        found = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if not item.is_file():
+                    continue
+                stat = item.stat()
+                if item.name.endswith(_TMP_SUFFIX):
+                    if stat.st_mtime + _TMP_MAX_AGE_SECONDS < now:
+                        self._unlink(Path(item.path))
+                    continue
+                if self._safe_name(item.name) is None:
+                    continue
+                etag = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+                found.append(DownloadEntry(item.name, Path(item.path), stat.st_size, etag, stat.st_mtime))
+        for entry in sorted(found, key=lambda e: e.last_access):
+            self._entries[entry.name] = entry
+            self._total_bytes += entry.size
+        if found:
+            logger.info(f"Download-Speicher: {len(found)} Dateien ({self._total_bytes // 1024} KB) gefunden")
+
+    def put_bytes(self, name: str, data: bytes) -> DownloadEntry:
+        """Speichert eine Datei (atomar) und trägt sie in den Index ein.
+
+        Args:
+            name: Dateiname
+            data: Dateiinhalt
+
+        Returns:
+            Der neue Eintrag
+
+        Raises:
+            ValueError: Bei ungültigem Dateinamen
+        """
+        safe = self._safe_name(name)
+        if safe is None:
+            raise ValueError(f"Ungültiger Dateiname: {name!r}")
+        path = self.directory / safe
+        tmp_path = self.directory / f".{safe}.{uuid.uuid4().hex[:8]}{_TMP_SUFFIX}"
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+        etag = hashlib.blake2b(data, digest_size=12).hexdigest()
+        entry = DownloadEntry(safe, path, len(data), etag, time.time())
+        with self._lock:
+            self._drop(safe, unlink=False)
+            if self.memory_max_bytes and len(data) <= self.memory_max_bytes:
+                if self._memory_bytes + len(data) <= self.memory_budget:
+                    entry.data = data
+                    self._memory_bytes += len(data)
+            self._entries[safe] = entry
+            self._total_bytes += entry.size
+            self._enforce_quota()
+        return entry
+
+    def get(self, name: str) -> Optional[DownloadEntry]:
+        """Liefert eine gespeicherte Datei und verlängert ihre Lebensdauer.
+
+        Args:
+            name: Dateiname
+
+        Returns:
+            DownloadEntry oder None (unbekannt, abgelaufen oder gelöscht)
+        """
+        safe = self._safe_name(name)
+        if safe is None:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(safe)
+            if entry is None:
+                entry = self._adopt(safe, now)
+                if entry is None:
+                    return None
+            if entry.last_access + self.ttl_seconds < now:
+                self._drop(safe, unlink=True)
+                return None
+            entry.last_access = now
+            self._entries.move_to_end(safe)
+        # Extern gelöschte Datei (z. B. manuell auf dem Volume)
+        if entry.data is None and not entry.path.exists():
+            with self._lock:
+                if self._entries.get(safe) is entry:
+                    self._drop(safe, unlink=False)
+            return None
+        return entry
+
+    def remove(self, name: str) -> None:
+        """Entfernt eine Datei aus Index und Verzeichnis."""
+        safe = self._safe_name(name)
+        if safe is None:
+            return
+        with self._lock:
+            self._drop(safe, unlink=True)
+
+    def sweep(self) -> int:
+        """Entfernt abgelaufene Dateien und setzt die Größenbegrenzung durch.
+
+        Returns:
+            Anzahl entfernter Dateien
+        """
+        now = time.time()
+        removed = 0
+        with self._lock:
+            while self._entries:
+                name, entry = next(iter(self._entries.items()))
+                if entry.last_access + self.ttl_seconds >= now:
+                    break
+                self._drop(name, unlink=True)
+                removed += 1
+            removed += self._enforce_quota()
+        if removed:
+            logger.info(f"Download-Speicher: {removed} Dateien entfernt")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Gibt Kennzahlen des Speichers zurück (Dateien, Bytes, Bytes im Speicher)."""
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": self._total_bytes,
+                "memory_bytes": self._memory_bytes,
+            }
+
+    def start_sweeper(self, interval: float = SWEEP_INTERVAL_SECONDS) -> None:
+        """Startet das regelmäßige Aufräumen in einem Daemon-Thread.
+
+        Args:
+            interval: Sekunden zwischen zwei Durchläufen
+        """
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._stop.clear()
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.sweep()
+                except Exception as e:  # noqa: BLE001
+                    logger.error(f"Fehler beim Aufräumen des Download-Speichers: {e}", exc_info=True)
+
+        self._sweeper = threading.Thread(target=run, name="download-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        """Beendet das regelmäßige Aufräumen."""
+        self._stop.set()
+
+    def _adopt(self, name: str, now: float) -> Optional[DownloadEntry]:
+        """Nimmt eine von einem anderen Prozess geschriebene Datei auf (Lock gehalten)."""
+        path = self.directory / name
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if stat.st_mtime + self.ttl_seconds < now:
+            return None
+        entry = DownloadEntry(name, path, stat.st_size, f"{stat.st_size:x}-{stat.st_mtime_ns:x}", stat.st_mtime)
+        self._entries[name] = entry
+        self._total_bytes += entry.size
+        return entry
+
+    def _enforce_quota(self) -> int:
+        """Entfernt die am längsten nicht abgerufenen Dateien über den Grenzen (Lock gehalten)."""
+        removed = 0
+        while self._entries and (
+            len(self._entries) > self.max_files or self._total_bytes > self.max_bytes
+        ):
+            name = next(iter(self._entries))
+            self._drop(name, unlink=True)
+            removed += 1
+        return removed
+
+    def _drop(self, name: str, unlink: bool) -> None:
+        """Entfernt einen Eintrag aus dem Index (Lock gehalten)."""
+        entry = self._entries.pop(name, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry.size
+        if entry.data is not None:
+            self._memory_bytes -= len(entry.data)
+        if unlink:
+            self._unlink(entry.path)
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Datei {path.name} konnte nicht gelöscht werden: {e}")
+
+
+# Globale Instanz (Singleton)
+_download_store: Optional[DownloadStore] = None
+_download_store_lock = threading.Lock()
+
+
+def get_download_store() -> DownloadStore:
+    """Gibt den globalen Download-Speicher zurück."""
+    global _download_store
+    with _download_store_lock:
+        if _download_store is None:
+            _download_store = DownloadStore()
+        return _download_store
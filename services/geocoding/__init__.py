@@ -1,5 +1,20 @@
 """Geocoding services."""
 
-from .mapbox_geocoding import geocode_suggestions
+from .cache import GeocodingCache, get_geocoding_cache
+from .gazetteer import Gazetteer, get_gazetteer, reverse_geocode
+from .mapbox_geocoding import (
+    geocode_suggestions,
+    geocode_suggestions_async,
+    close_async_client,
+)
 
-__all__ = ["geocode_suggestions"]
+__all__ = [
+    "geocode_suggestions",
+    "geocode_suggestions_async",
+    "close_async_client",
+    "GeocodingCache",
+    "get_geocoding_cache",
+    "Gazetteer",
+    "get_gazetteer",
+    "reverse_geocode",
+]
@@ -0,0 +1,259 @@
+"""Cache für Geocoding-Vorschläge (In-Memory-LRU + SQLite mit TTL).
+
+Schlüssel ist die normalisierte Suchanfrage zusammen mit den Parametern
+(Limit, Sprache, Land). Wiederverwendet werden nur Treffer für genau diese
+Anfrage: Die Mapbox-Autovervollständigung ist nicht präfix-monoton (unscharfe
+Treffer, PLZ, Straßennamen), Ergebnisse einer kürzeren Eingabe können also
+passende Treffer der längeren Eingabe verdecken.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_PATH = "cache/geocoding.sqlite3"
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600  # Ortskoordinaten ändern sich praktisch nie
+DEFAULT_MEMORY_SIZE = 2048
+
+# Eintrag: (Ablaufzeitpunkt, Ergebnisse)
+_Entry = Tuple[float, List[Dict[str, Any]]]
+
+
+def normalize_query(query: str) -> str:
+    """Normalisiert eine Suchanfrage (Unicode NFC, Kleinschreibung, Leerraum)."""
+    text = unicodedata.normalize("NFC", query or "")
+    return " ".join(text.casefold().split())
+
+
+def _params_key(limit: int, language: str, country: str) -> str:
+    return f"{(country or '').lower()}|{(language or '').lower()}|{int(limit)}"
+
+
+class GeocodingCache:
+    """Zweistufiger Cache für Geocoding-Ergebnisse."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        memory_size: int = DEFAULT_MEMORY_SIZE,
+    ) -> None:
+        """Initialisiert den Cache.
+
+        Args:
+            db_path: Pfad zur SQLite-Datei (None = nur In-Memory)
+            ttl_seconds: Gültigkeitsdauer eines Eintrags in Sekunden
+            memory_size: Maximale Anzahl Einträge im In-Memory-LRU
+        """
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str) -> None:
+        """Öffnet die SQLite-Datei; bei Fehlern läuft der Cache nur im Speicher."""
+        try:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(geocode_cache)")}
+            if "complete" in columns:
+                # Tabelle aus der Version mit Präfix-Wiederverwendung: nur Cache, neu anlegen
+                self._db.execute("DROP TABLE geocode_cache")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS geocode_cache (
+                    params TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    results TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (params, query)
+                )
+                """
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Geocoding-Cache-Datei nicht nutzbar ({db_path}): {e}")
+            self._db = None
+
+    # ─────────────────────────────────────────────────────────────
+    # Interne Zugriffe
+    # ─────────────────────────────────────────────────────────────
+
+    def _memory_get(self, key: str, now: float) -> Optional[_Entry]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        if entry[0] < now:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return entry
+
+    def _memory_put(self, key: str, entry: _Entry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _db_get_many(self, params: str, queries: List[str], now: float) -> Dict[str, _Entry]:
+        if self._db is None or not queries:
+            return {}
+        placeholders = ",".join("?" for _ in queries)
+        try:
+            rows = self._db.execute(
+                f"SELECT query, results, expires_at FROM geocode_cache "
+                f"WHERE params = ? AND query IN ({placeholders}) AND expires_at >= ?",
+                [params, *queries, now],
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Geocoding-Cache lesen fehlgeschlagen: {e}")
+            return {}
+        found: Dict[str, _Entry] = {}
+        for query, results, expires_at in rows:
+            try:
+                found[query] = (expires_at, json.loads(results))
+            except (json.JSONDecodeError, TypeError):
+                continue
+        return found
+
+    # ─────────────────────────────────────────────────────────────
+    # Öffentliche API
+    # ─────────────────────────────────────────────────────────────
+
+    def get(
+        self,
+        query: str,
+        limit: int,
+        language: str,
+        country: str,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Sucht die Ergebnisse genau dieser Anfrage im Cache.
+
+        Args:
+            query: Suchtext
+            limit: Maximale Anzahl Vorschläge
+            language: Sprache der Ergebnisse
+            country: Ländercode
+
+        Returns:
+            Liste von Vorschlägen oder None bei Cache-Miss
+        """
+        q = normalize_query(query)
+        if not q:
+            return None
+        params = _params_key(limit, language, country)
+        key = f"{params}|{q}"
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory_get(key, now)
+            if entry is None:
+                entry = self._db_get_many(params, [q], now).get(q)
+                if entry is None:
+                    return None
+                self._memory_put(key, entry)
+        return [dict(r) for r in entry[1]]
+
+    def put(
+        self,
+        query: str,
+        limit: int,
+        language: str,
+        country: str,
+        results: List[Dict[str, Any]],
+    ) -> None:
+        """Speichert die Ergebnisse einer Anfrage.
+
+        Args:
+            query: Suchtext
+            limit: Maximale Anzahl Vorschläge
+            language: Sprache der Ergebnisse
+            country: Ländercode
+            results: Vorschläge mit "text", "lat", "lon"
+        """
+        q = normalize_query(query)
+        if not q:
+            return
+        params = _params_key(limit, language, country)
+        expires_at = time.time() + self.ttl_seconds
+        entry: _Entry = (expires_at, [dict(r) for r in results])
+
+        with self._lock:
+            self._memory_put(f"{params}|{q}", entry)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO geocode_cache "
+                    "(params, query, results, expires_at) VALUES (?, ?, ?, ?)",
+                    (params, q, json.dumps(entry[1], ensure_ascii=False), expires_at),
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Geocoding-Cache schreiben fehlgeschlagen: {e}")
+
+    def purge_expired(self) -> int:
+        """Entfernt abgelaufene Einträge aus der SQLite-Datei.
+
+        Returns:
+            Anzahl gelöschter Einträge
+        """
+        if self._db is None:
+            return 0
+        with self._lock:
+            try:
+                cur = self._db.execute("DELETE FROM geocode_cache WHERE expires_at < ?", (time.time(),))
+                return cur.rowcount or 0
+            except sqlite3.Error as e:
+                logger.warning(f"Geocoding-Cache bereinigen fehlgeschlagen: {e}")
+                return 0
+
+    def clear(self) -> None:
+        """Leert beide Cache-Stufen."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM geocode_cache")
+                except sqlite3.Error as e:
+                    logger.warning(f"Geocoding-Cache leeren fehlgeschlagen: {e}")
+
+
+# Globale Instanz (Singleton)
+_geocoding_cache: Optional[GeocodingCache] = None
+_geocoding_cache_lock = threading.Lock()
+
+
+def get_geocoding_cache() -> GeocodingCache:
+    """Gibt die globale Instanz des Geocoding-Caches zurück.
+
+    Konfiguration über Umgebungsvariablen:
+    - GEOCODING_CACHE_PATH: SQLite-Datei ("" = nur In-Memory)
+    - GEOCODING_CACHE_TTL: Gültigkeitsdauer in Sekunden
+    """
+    global _geocoding_cache
+    with _geocoding_cache_lock:
+        if _geocoding_cache is None:
+            db_path = os.getenv("GEOCODING_CACHE_PATH", DEFAULT_CACHE_PATH) or None
+            try:
+                ttl = float(os.getenv("GEOCODING_CACHE_TTL", DEFAULT_TTL_SECONDS))
+            except ValueError:
+                ttl = DEFAULT_TTL_SECONDS
+            _geocoding_cache = GeocodingCache(db_path=db_path, ttl_seconds=ttl)
+            _geocoding_cache.purge_expired()
+        return _geocoding_cache
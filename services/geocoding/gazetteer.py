@@ -0,0 +1,451 @@
+"""Offline-Gazetteer für deutsche Orte und Postleitzahlen.
+
+Die Daten liegen in einer kompakten Binärdatei, die per ``mmap`` gelesen
+wird. Ein sortierter Schlüsselindex (Ortsname, Wortanfänge, PLZ) erlaubt
+Präfixsuche per Binärsuche; ein Raster über Koordinaten dient der
+Rückwärtssuche (Koordinate → nächster Ort).
+
+Die Datei wird aus dem GeoNames-Postleitzahlen-Export erzeugt
+(https://download.geonames.org/export/zip/DE.zip, CC BY 4.0)::
+
+    python -m services.geocoding.gazetteer DE.txt assets/gazetteer/de_places.bin
+
+Dateiaufbau (Little Endian):
+    Header   ``<8s9I``   Magic, Anzahl/Offsets der Abschnitte
+    Records  ``<ffIIHBx`` lat, lon, Gewicht, Label-Offset, Label-Länge, Art
+    Keys     ``<IHxxI``  Key-Offset, Key-Länge, Record-Index (sortiert nach Key)
+    Cells    ``<iII``    Raster-Zelle, Start, Anzahl (sortiert nach Zelle)
+    Items    ``<I``      Record-Indizes je Zelle
+    Strings  UTF-8-Blob für Labels und Keys
+"""
+
+from __future__ import annotations
+
+import bisect
+import csv
+import heapq
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.logging_config import get_logger
+from .cache import normalize_query
+
+logger = get_logger(__name__)
+
+DEFAULT_GAZETTEER_PATH = "assets/gazetteer/de_places.bin"
+
+MAGIC = b"PBGAZ001"
+_HEADER = struct.Struct("<8s9I")
+_RECORD = struct.Struct("<ffIIHBx")
+_KEY = struct.Struct("<IHxxI")
+_CELL = struct.Struct("<iII")
+_ITEM = struct.Struct("<I")
+
+KIND_PLACE = 0
+KIND_POSTCODE = 1
+
+CELL_SIZE_DEG = 0.25
+# Ergebnisse für Präfixe bis zu dieser Länge werden je Instanz gemerkt:
+# deren Schlüsselbereich ist groß (z. B. "b"), die Zahl der Präfixe klein
+SHORT_PREFIX_LEN = 2
+MAX_SHORT_PREFIX_ENTRIES = 4096
+
+_TRANSLIT = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+# Buchstaben gefolgt von Hausnummer oder typische Straßenbezeichnungen
+_ADDRESS_RE = re.compile(r"[^\W\d_]{2,}\.?\s+\d|stra(ss|ß)e\b|str\.|\bweg\b|\bplatz\b|\ballee\b|\bgasse\b")
+
+
+def _fold(text: str) -> str:
+    return normalize_query(text).replace(",", " ").strip()
+
+
+def _cell_id(lat: float, lon: float) -> int:
+    lat_i = int(math.floor((lat + 90.0) / CELL_SIZE_DEG))
+    lon_i = int(math.floor((lon + 180.0) / CELL_SIZE_DEG))
+    return lat_i * 2000 + lon_i
+
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    r = 6371.0
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * r * math.asin(math.sqrt(a))
+
+
+def looks_like_address(query: str) -> bool:
+    """Erkennt Straßenadressen, die nur Mapbox auflösen kann."""
+    return bool(_ADDRESS_RE.search(normalize_query(query)))
+
+
+class Gazetteer:
+    """Lesezugriff auf eine Gazetteer-Datei per Memory-Mapping."""
+
+    def __init__(self, path: str) -> None:
+        """Öffnet die Gazetteer-Datei.
+
+        Args:
+            path: Pfad zur Binärdatei
+
+        Raises:
+            ValueError: Wenn die Datei kein gültiges Gazetteer-Format hat
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            self.n_records,
+            self.n_keys,
+            self.n_cells,
+            self._records_off,
+            self._keys_off,
+            self._cells_off,
+            self._items_off,
+            self._strings_off,
+            _n_items,
+        ) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Ungültige Gazetteer-Datei: {path}")
+        self._cell_ids = [
+            _CELL.unpack_from(self._mm, self._cells_off + i * _CELL.size)[0]
+            for i in range(self.n_cells)
+        ]
+        # (Suchtext, Limit) -> Record-Indizes der besten Treffer kurzer Präfixe
+        self._short_prefix_top: Dict[Tuple[str, int], List[int]] = {}
+
+    def close(self) -> None:
+        """Gibt das Memory-Mapping frei."""
+        self._mm.close()
+
+    # ─────────────────────────────────────────────────────────────
+    # Interne Zugriffe
+    # ─────────────────────────────────────────────────────────────
+
+    def _string(self, offset: int, length: int) -> bytes:
+        start = self._strings_off + offset
+        return self._mm[start:start + length]
+
+    def _key(self, index: int) -> Tuple[bytes, int]:
+        key_off, key_len, rec = _KEY.unpack_from(self._mm, self._keys_off + index * _KEY.size)
+        return self._string(key_off, key_len), rec
+
+    def _key_record(self, index: int) -> int:
+        return _KEY.unpack_from(self._mm, self._keys_off + index * _KEY.size)[2]
+
+    def _weight(self, index: int) -> int:
+        return _RECORD.unpack_from(self._mm, self._records_off + index * _RECORD.size)[2]
+
+    def _record(self, index: int) -> Tuple[float, float, int, str, int]:
+        lat, lon, weight, label_off, label_len, kind = _RECORD.unpack_from(
+            self._mm, self._records_off + index * _RECORD.size
+        )
+        return lat, lon, weight, self._string(label_off, label_len).decode("utf-8"), kind
+
+    def _lower_bound(self, prefix: bytes) -> int:
+        lo, hi = 0, self.n_keys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid)[0] < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _collect_prefix(self, raw: bytes, ranks: Dict[int, Tuple[bool, int]]) -> None:
+        """Sammelt alle Records, deren Schlüssel mit ``raw`` beginnt.
+
+        Der Schlüsselbereich wird per Binärsuche begrenzt; exakte Treffer
+        stehen wegen der Sortierung am Anfang des Bereichs.
+        """
+        start = self._lower_bound(raw)
+        end = self._lower_bound(raw + b"\xff")
+        i = start
+        while i < end and self._key(i)[0] == raw:
+            rec = self._key_record(i)
+            ranks[rec] = (True, self._weight(rec))
+            i += 1
+        for j in range(i, end):
+            rec = self._key_record(j)
+            if rec not in ranks:
+                ranks[rec] = (False, self._weight(rec))
+
+    def _result(self, index: int) -> Dict[str, Any]:
+        lat, lon, _weight, label, _kind = self._record(index)
+        return {"text": label, "lat": round(lat, 6), "lon": round(lon, 6)}
+
+    # ─────────────────────────────────────────────────────────────
+    # Öffentliche API
+    # ─────────────────────────────────────────────────────────────
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Präfixsuche nach Ortsnamen oder Postleitzahl.
+
+        Args:
+            query: Suchtext (z. B. "Fürt", "9076", "90762 fü")
+            limit: Maximale Anzahl Vorschläge
+
+        Returns:
+            Liste mit Schlüsseln "text", "lat", "lon" (größte Orte zuerst)
+        """
+        q = _fold(query)
+        if not q or limit <= 0:
+            return []
+        short = len(q) <= SHORT_PREFIX_LEN
+        top = self._short_prefix_top.get((q, limit)) if short else None
+        if top is None:
+            ranks: Dict[int, Tuple[bool, int]] = {}
+            for prefix in {q, q.translate(_TRANSLIT)}:
+                self._collect_prefix(prefix.encode("utf-8"), ranks)
+            # Exakte Treffer und größere Orte (mehr PLZ) zuerst; Heap statt
+            # vollständiger Sortierung, der Bereich kann sehr groß sein
+            best = heapq.nsmallest(limit, ranks.items(), key=lambda item: (not item[1][0], -item[1][1], item[0]))
+            top = [rec for rec, _ in best]
+            if short and len(self._short_prefix_top) < MAX_SHORT_PREFIX_ENTRIES:
+                self._short_prefix_top[(q, limit)] = top
+        return [self._result(rec) for rec in top]
+
+    def reverse(self, lat: float, lon: float, max_km: float = 25.0) -> Optional[Dict[str, Any]]:
+        """Findet den nächstgelegenen Ort zu einer Koordinate.
+
+        Args:
+            lat: Breitengrad
+            lon: Längengrad
+            max_km: Maximale Entfernung in Kilometern
+
+        Returns:
+            Dict mit "text", "lat", "lon", "distance_km" oder None
+        """
+        reach = max(1, int(math.ceil(max_km / (CELL_SIZE_DEG * 111.0))) + 1)
+        center = _cell_id(lat, lon)
+        best: Optional[Tuple[float, int]] = None
+        for d_lat in range(-reach, reach + 1):
+            for d_lon in range(-reach, reach + 1):
+                cell = center + d_lat * 2000 + d_lon
+                pos = bisect.bisect_left(self._cell_ids, cell)
+                if pos >= self.n_cells or self._cell_ids[pos] != cell:
+                    continue
+                _cid, start, count = _CELL.unpack_from(self._mm, self._cells_off + pos * _CELL.size)
+                for j in range(start, start + count):
+                    rec = _ITEM.unpack_from(self._mm, self._items_off + j * _ITEM.size)[0]
+                    r_lat, r_lon, _w, _label, kind = self._record(rec)
+                    if kind != KIND_PLACE:
+                        continue
+                    dist = _haversine_km(lat, lon, r_lat, r_lon)
+                    if dist <= max_km and (best is None or dist < best[0]):
+                        best = (dist, rec)
+        if best is None:
+            return None
+        result = self._result(best[1])
+        result["distance_km"] = round(best[0], 2)
+        return result
+
+
+# ─────────────────────────────────────────────────────────────
+# Erzeugen der Datei
+# ─────────────────────────────────────────────────────────────
+
+def _place_keys(name: str) -> List[str]:
+    """Schlüssel für einen Ortsnamen: voller Name und jeder Wortanfang."""
+    folded = _fold(name)
+    words = folded.split()
+    keys = {" ".join(words[i:]) for i in range(len(words))}
+    keys |= {k.translate(_TRANSLIT) for k in keys}
+    return sorted(keys)
+
+
+def write_gazetteer(
+    places: Iterable[Tuple[int, str, float, float, int, List[str]]],
+    target_path: str,
+) -> int:
+    """Schreibt eine Gazetteer-Datei.
+
+    Args:
+        places: Tupel (Art, Label, lat, lon, Gewicht, Suchschlüssel)
+        target_path: Zieldatei
+
+    Returns:
+        Anzahl geschriebener Records
+    """
+    strings = bytearray()
+    string_offsets: Dict[bytes, int] = {}
+
+    def add_string(value: str) -> Tuple[int, int]:
+        raw = value.encode("utf-8")
+        if raw not in string_offsets:
+            string_offsets[raw] = len(strings)
+            strings.extend(raw)
+        return string_offsets[raw], len(raw)
+
+    records = bytearray()
+    keys: List[Tuple[bytes, int]] = []
+    cells: Dict[int, List[int]] = defaultdict(list)
+    n_records = 0
+    for kind, label, lat, lon, weight, record_keys in places:
+        label_off, label_len = add_string(label)
+        records.extend(_RECORD.pack(lat, lon, weight, label_off, label_len, kind))
+        for key in record_keys:
+            keys.append((key.encode("utf-8"), n_records))
+        cells[_cell_id(lat, lon)].append(n_records)
+        n_records += 1
+
+    keys.sort()
+    key_blob = bytearray()
+    for raw, rec in keys:
+        off, length = add_string(raw.decode("utf-8"))
+        key_blob.extend(_KEY.pack(off, length, rec))
+
+    cell_blob = bytearray()
+    item_blob = bytearray()
+    n_items = 0
+    for cell in sorted(cells):
+        members = cells[cell]
+        cell_blob.extend(_CELL.pack(cell, n_items, len(members)))
+        for rec in members:
+            item_blob.extend(_ITEM.pack(rec))
+        n_items += len(members)
+
+    records_off = _HEADER.size
+    keys_off = records_off + len(records)
+    cells_off = keys_off + len(key_blob)
+    items_off = cells_off + len(cell_blob)
+    strings_off = items_off + len(item_blob)
+
+    Path(target_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(target_path, "wb") as f:
+        f.write(_HEADER.pack(
+            MAGIC, n_records, len(keys), len(cells),
+            records_off, keys_off, cells_off, items_off, strings_off, n_items,
+        ))
+        f.write(records)
+        f.write(key_blob)
+        f.write(cell_blob)
+        f.write(item_blob)
+        f.write(strings)
+    return n_records
+
+
+def build_from_geonames(source_path: str, target_path: str) -> int:
+    """Erzeugt die Gazetteer-Datei aus dem GeoNames-PLZ-Export (DE.txt).
+
+    Orte werden über alle ihre Postleitzahlen gemittelt; die Anzahl der
+    PLZ dient als Gewicht für die Sortierung (Großstädte zuerst).
+
+    Args:
+        source_path: Tab-getrennte GeoNames-Datei
+        target_path: Zieldatei
+
+    Returns:
+        Anzahl geschriebener Records
+    """
+    postcodes: Dict[Tuple[str, str], Tuple[str, str, float, float]] = {}
+    towns: Dict[Tuple[str, str], List[Tuple[float, float]]] = defaultdict(list)
+    with open(source_path, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f, delimiter="\t"):
+            if len(row) < 11:
+                continue
+            plz, name, state = row[1].strip(), row[2].strip(), row[3].strip()
+            try:
+                lat, lon = float(row[9]), float(row[10])
+            except ValueError:
+                continue
+            if not plz or not name:
+                continue
+            postcodes.setdefault((plz, name), (plz, state, lat, lon))
+            towns[(name, state)].append((lat, lon))
+
+    def suffix(state: str) -> str:
+        return f", {state}, Deutschland" if state else ", Deutschland"
+
+    places: List[Tuple[int, str, float, float, int, List[str]]] = []
+    for (name, state), coords in towns.items():
+        lat = sum(c[0] for c in coords) / len(coords)
+        lon = sum(c[1] for c in coords) / len(coords)
+        places.append((KIND_PLACE, f"{name}{suffix(state)}", lat, lon, len(coords), _place_keys(name)))
+    for (plz, name), (_plz, state, lat, lon) in postcodes.items():
+        keys = [plz] + [f"{plz} {k}" for k in _place_keys(name)]
+        places.append((KIND_POSTCODE, f"{plz} {name}{suffix(state)}", lat, lon, 0, keys))
+    return write_gazetteer(places, target_path)
+
+
+# ─────────────────────────────────────────────────────────────
+# Globale Instanz
+# ─────────────────────────────────────────────────────────────
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_loaded = False
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """Gibt den globalen Gazetteer zurück (None wenn keine Datei vorhanden).
+
+    Pfad über Umgebungsvariable GAZETTEER_PATH ("" = deaktiviert).
+    """
+    global _gazetteer, _gazetteer_loaded
+    if _gazetteer_loaded:
+        return _gazetteer
+    with _gazetteer_lock:
+        if not _gazetteer_loaded:
+            path = os.getenv("GAZETTEER_PATH", DEFAULT_GAZETTEER_PATH)
+            if path and os.path.exists(path):
+                try:
+                    _gazetteer = Gazetteer(path)
+                    logger.info(f"Gazetteer geladen: {path} ({_gazetteer.n_records} Einträge)")
+                except (OSError, ValueError, struct.error) as e:
+                    logger.warning(f"Gazetteer konnte nicht geladen werden: {e}")
+            _gazetteer_loaded = True
+    return _gazetteer
+
+
+def local_suggestions(query: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
+    """Beantwortet Orts-/PLZ-Anfragen lokal.
+
+    Args:
+        query: Suchtext
+        limit: Maximale Anzahl Vorschläge
+
+    Returns:
+        Vorschläge, oder None wenn Mapbox gefragt werden soll
+        (kein Gazetteer, Straßenadresse oder kein lokaler Treffer)
+    """
+    gazetteer = get_gazetteer()
+    if gazetteer is None or looks_like_address(query):
+        return None
+    results = gazetteer.search(query, limit)
+    return results or None
+
+
+def reverse_geocode(lat: float, lon: float, max_km: float = 25.0) -> Optional[Dict[str, Any]]:
+    """Findet offline den nächstgelegenen Ort zu einer Koordinate.
+
+    Args:
+        lat: Breitengrad
+        lon: Längengrad
+        max_km: Maximale Entfernung in Kilometern
+
+    Returns:
+        Dict mit "text", "lat", "lon", "distance_km" oder None
+    """
+    gazetteer = get_gazetteer()
+    if gazetteer is None:
+        return None
+    return gazetteer.reverse(lat, lon, max_km)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Aufruf: python -m services.geocoding.gazetteer <DE.txt> <ziel.bin>")
+        sys.exit(2)
+    count = build_from_geonames(sys.argv[1], sys.argv[2])
+    print(f"{count} Einträge geschrieben nach {sys.argv[2]}")
@@ -2,21 +2,76 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import ssl
-from typing import List, Dict, Any
-from urllib.parse import quote
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import quote, urlencode
 from urllib.request import urlopen
 
 import certifi
+import httpx
 
 from utils.logging_config import get_logger
+from .cache import get_geocoding_cache
+from .gazetteer import local_suggestions
 
 logger = get_logger(__name__)
 
 
 MAPBOX_BASE_URL = "https://api.mapbox.com/geocoding/v5/mapbox.places"
+MAPBOX_TYPES = "address,place,locality,postcode"
+
+# Einmalig erstellt statt pro Anfrage (erst beim ersten Abruf)
+_ssl_context: Optional[ssl.SSLContext] = None
+
+
+def _get_ssl_context() -> ssl.SSLContext:
+    """Gibt den SSL-Kontext mit den certifi-Zertifikaten zurück."""
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context(cafile=certifi.where())
+    return _ssl_context
+
+
+# Einstellungen für den gemeinsamen Async-Client
+ASYNC_TIMEOUT = httpx.Timeout(5.0, connect=3.0)
+ASYNC_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+
+# Async-Client und laufende Anfragen gehören jeweils zu einem Event-Loop
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_inflight: Dict[Tuple[str, int, str, str], "asyncio.Future[Optional[List[Dict[str, Any]]]]"] = {}
+
+
+def _build_url(q: str, token: str, limit: int, language: str, country: str) -> str:
+    """Baut die Mapbox-URL für einen Suchtext."""
+    params = urlencode({
+        "access_token": token,
+        "autocomplete": "true",
+        "limit": limit,
+        "language": language,
+        "country": country,
+        "types": MAPBOX_TYPES,
+    }, safe=",")
+    return f"{MAPBOX_BASE_URL}/{quote(q)}.json?{params}"
+
+
+def _parse_features(payload: Any) -> List[Dict[str, Any]]:
+    """Wandelt die Mapbox-Antwort in Vorschläge mit "text", "lat", "lon" um."""
+    features = payload.get("features", []) if isinstance(payload, dict) else []
+    results: List[Dict[str, Any]] = []
+    for feature in features:
+        center = feature.get("center") or []
+        if len(center) != 2:
+            continue
+        results.append({
+            "text": feature.get("place_name") or feature.get("text") or "",
+            "lon": center[0],
+            "lat": center[1],
+        })
+    return results
 
 
 def geocode_suggestions(
@@ -27,7 +82,9 @@ def geocode_suggestions(
 ) -> List[Dict[str, Any]]:
     """Liefert Ortsvorschlaege inkl. Koordinaten fuer einen Suchtext.
 
-    Ergebnisse werden standardmaessig auf Deutschland begrenzt.
+    Ergebnisse werden standardmaessig auf Deutschland begrenzt. Orte und
+    Postleitzahlen kommen aus dem Offline-Gazetteer, sofern vorhanden.
+    Blockierende Variante; in async-Code ``geocode_suggestions_async`` nutzen.
 
     Args:
         query: Suchtext (Ort, PLZ, Adresse)
@@ -37,40 +94,172 @@ def geocode_suggestions(
 
     Rueckgabe: Liste mit Schluesseln "text", "lat", "lon".
     """
+    q = (query or "").strip()
+    if not q:
+        return []
+
+    # Orte und PLZ offline beantworten, Mapbox nur für Adressen
+    if country.lower() == "de":
+        local = local_suggestions(q, limit)
+        if local is not None:
+            return local
+
+    cache = get_geocoding_cache()
+    cached = cache.get(q, limit, language, country)
+    if cached is not None:
+        return cached
+
     token = os.getenv("MAPBOX_TOKEN")
     if not token:
         logger.warning("MAPBOX_TOKEN fehlt. Geocoding wird uebersprungen.")
         return []
 
-    q = (query or "").strip()
-    if not q:
+    results = _fetch_mapbox(q, token, limit, language, country)
+    if results is None:
         return []
+    cache.put(q, limit, language, country, results)
+    return results
+
 
+def _fetch_mapbox(
+    q: str,
+    token: str,
+    limit: int,
+    language: str,
+    country: str,
+) -> Optional[List[Dict[str, Any]]]:
+    """Fragt die Mapbox-API ab (None bei Fehlern, damit diese nicht gecacht werden)."""
     try:
-        url = (
-            f"{MAPBOX_BASE_URL}/{quote(q)}.json"
-            f"?access_token={token}"
-            f"&autocomplete=true"
-            f"&limit={limit}"
-            f"&language={language}"
-            f"&country={country}"
-            f"&types=address,place,locality,postcode"
-        )
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        with urlopen(url, timeout=10, context=ssl_context) as resp:
+        url = _build_url(q, token, limit, language, country)
+        with urlopen(url, timeout=10, context=_get_ssl_context()) as resp:
             payload = json.loads(resp.read().decode("utf-8"))
-        features = payload.get("features", []) if isinstance(payload, dict) else []
-        results: List[Dict[str, Any]] = []
-        for feature in features:
-            center = feature.get("center") or []
-            if len(center) != 2:
-                continue
-            results.append({
-                "text": feature.get("place_name") or feature.get("text") or "",
-                "lon": center[0],
-                "lat": center[1],
-            })
-        return results
+        return _parse_features(payload)
     except Exception as exc:  # noqa: BLE001
         logger.error(f"Fehler bei Mapbox-Geocoding: {exc}", exc_info=True)
+        return None
+
+
+# ─────────────────────────────────────────────────────────────
+# Async-Variante
+# ─────────────────────────────────────────────────────────────
+
+def _http2_available() -> bool:
+    """HTTP/2 benötigt das optionale Paket ``h2``."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Gibt den gemeinsamen AsyncClient des aktuellen Event-Loops zurück.
+
+    Verbindungen bleiben offen (Keep-Alive), sodass Folgeanfragen nur
+    noch einen Round-Trip über die warme Verbindung benötigen.
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            http2=_http2_available(),
+            timeout=ASYNC_TIMEOUT,
+            limits=ASYNC_LIMITS,
+            verify=_get_ssl_context(),
+        )
+        _async_client_loop = loop
+        _inflight.clear()
+    return _async_client
+
+
+async def _fetch_mapbox_async(
+    q: str,
+    token: str,
+    limit: int,
+    language: str,
+    country: str,
+) -> Optional[List[Dict[str, Any]]]:
+    """Async-Abfrage der Mapbox-API (None bei Fehlern)."""
+    try:
+        client = _get_async_client()
+        response = await client.get(_build_url(q, token, limit, language, country))
+        response.raise_for_status()
+        return _parse_features(response.json())
+    except Exception as exc:  # noqa: BLE001
+        logger.error(f"Fehler bei Mapbox-Geocoding: {exc}", exc_info=True)
+        return None
+
+
+async def geocode_suggestions_async(
+    query: str,
+    limit: int = 5,
+    language: str = "de",
+    country: str = "de",
+) -> List[Dict[str, Any]]:
+    """Async-Variante von ``geocode_suggestions`` ohne Blockieren des Event-Loops.
+
+    Gleichzeitige Anfragen mit identischen Parametern werden zu einem
+    einzigen HTTP-Aufruf zusammengefasst.
+
+    Args:
+        query: Suchtext (Ort, PLZ, Adresse)
+        limit: Maximale Anzahl Vorschlaege (Standard: 5)
+        language: Sprache der Ergebnisse (Standard: "de")
+        country: ISO-3166-1 Laendercode zur Begrenzung (Standard: "de")
+
+    Rueckgabe: Liste mit Schluesseln "text", "lat", "lon".
+    """
+    q = (query or "").strip()
+    if not q:
+        return []
+
+    # Orte und PLZ offline beantworten, Mapbox nur für Adressen
+    if country.lower() == "de":
+        local = local_suggestions(q, limit)
+        if local is not None:
+            return local
+
+    # Cache liegt teils in SQLite (Datei-I/O, Lock): nicht im Event-Loop lesen
+    cache = get_geocoding_cache()
+    cached = await asyncio.to_thread(cache.get, q, limit, language, country)
+    if cached is not None:
+        return cached
+
+    token = os.getenv("MAPBOX_TOKEN")
+    if not token:
+        logger.warning("MAPBOX_TOKEN fehlt. Geocoding wird uebersprungen.")
         return []
+
+    _get_async_client()
+    key = (" ".join(q.casefold().split()), limit, language, country)
+    pending = _inflight.get(key)
+    if pending is not None:
+        results = await asyncio.shield(pending)
+        return [dict(r) for r in results] if results else []
+
+    future: "asyncio.Future[Optional[List[Dict[str, Any]]]]" = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        results = await _fetch_mapbox_async(q, token, limit, language, country)
+        if results is not None:
+            await asyncio.to_thread(cache.put, q, limit, language, country, results)
+        future.set_result(results)
+    except BaseException as exc:
+        # Abbruch oder unerwarteter Fehler: wartende Aufrufer nicht hängen lassen
+        if not future.done():
+            future.set_result(None)
+        raise exc
+    finally:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+    return results or []
+
+
+async def close_async_client() -> None:
+    """Schließt den gemeinsamen AsyncClient (z. B. beim Herunterfahren)."""
+    global _async_client, _async_client_loop
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = None
+    _async_client_loop = None
+    _inflight.clear()
@@ -8,18 +8,45 @@ Enthält:
 - favorites: Favoriten-Verwaltung
 - saved_search: Gespeicherte Suchen
 - comment: Kommentar-Verwaltung
-- queries: Zentrale Query-Definitionen
+- queries: Zentrale Query-Definitionen und Query-Bausteine
 - references: Post-Stammdaten (Tierarten, Rassen, Farben, etc.)
+- similarity: Bildähnlichkeitssuche (Vermisst <-> Fundtier)
+
+Für Suche, Favoriten, Kommentare und Post-CRUD gibt es async Varianten
+(``AsyncSearchService`` usw.) auf dem ``AsyncClient``.
 """
 
-from .post import PostService
-from .post_relations import PostRelationsService
-from .post_image import PostStorageService
-from .search import SearchService
-from .favorites import FavoritesService
-from .saved_search import SavedSearchService
-from .comment import CommentService
-from .references import ReferenceService
+from typing import TYPE_CHECKING
+
+from utils.lazy_import import lazy_exports
+
+if TYPE_CHECKING:
+    from .post import AsyncPostService, PostService
+    from .post_relations import PostRelationsService
+    from .post_image import PostStorageService
+    from .search import AsyncSearchService, SearchService
+    from .favorites import AsyncFavoritesService, FavoritesService
+    from .saved_search import SavedSearchService
+    from .comment import AsyncCommentService, CommentService
+    from .references import ReferenceService
+    from .similarity import SimilarityService
+
+# Untermodule werden erst beim ersten Zugriff importiert (schneller Serverstart)
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "PostService": ".post",
+    "PostRelationsService": ".post_relations",
+    "PostStorageService": ".post_image",
+    "SearchService": ".search",
+    "FavoritesService": ".favorites",
+    "SavedSearchService": ".saved_search",
+    "CommentService": ".comment",
+    "AsyncPostService": ".post",
+    "AsyncSearchService": ".search",
+    "AsyncFavoritesService": ".favorites",
+    "AsyncCommentService": ".comment",
+    "ReferenceService": ".references",
+    "SimilarityService": ".similarity",
+})
 
 __all__ = [
     "PostService",
@@ -30,5 +57,10 @@ __all__ = [
     "SavedSearchService",
     "CommentService",
     "ReferenceService",
+    "SimilarityService",
+    "AsyncPostService",
+    "AsyncSearchService",
+    "AsyncFavoritesService",
+    "AsyncCommentService",
 ]
 
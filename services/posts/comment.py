@@ -1,22 +1,132 @@
-"""Service für Kommentar-Verwaltung."""
+"""Service für Kommentar-Verwaltung (synchron und async)."""
 
 from __future__ import annotations
 
+import asyncio
 from typing import List, Dict, Any, Optional, Union, TYPE_CHECKING
 
-from supabase import Client
+from supabase import AsyncClient, Client
 
 from utils.logging_config import get_logger
+from utils.metrics import timed
 from utils.constants import MAX_COMMENT_LENGTH
 from utils.validators import validate_length
-from .queries import COMMENT_SELECT_FULL
+from .queries import comment_reactions_query, comments_query, user_reaction_query
 
 if TYPE_CHECKING:
-    from services.account.profile import ProfileService
+    from services.account.profile import AsyncProfileService, ProfileService
 
 logger = get_logger(__name__)
 
 
+def _attach_users(comments: List[Dict[str, Any]], user_profiles: Dict[str, Dict[str, Any]]) -> None:
+    """Ergänzt User-Daten (konsistent mit comment_components Erwartung)."""
+    for comment in comments:
+        user_id = comment.get("user_id")
+        profile = user_profiles.get(user_id, {})
+        comment["user"] = {
+            "display_name": profile.get("display_name", "Unbekannt"),
+            "profile_image": profile.get("profile_image"),
+        }
+        comment["replies"] = []  # Initialisiere replies-Liste
+
+
+def _attach_reactions(comments: List[Dict[str, Any]], reactions_map: Dict[int, Dict[str, Any]]) -> None:
+    for comment in comments:
+        r = reactions_map.get(comment.get("id"), {"counts": {}, "user_emojis": set()})
+        comment["reactions"] = r.get("counts", {})
+        comment["user_reactions"] = list(r.get("user_emojis", set()))
+
+
+def _build_comment_tree(comments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Baut die hierarchische Struktur (Antworten in 'replies') auf."""
+    top_level = []
+    replies_map = {}
+
+    for comment in comments:
+        parent_id = comment.get("parent_comment_id")
+        if parent_id is None:
+            # Top-Level Kommentar
+            top_level.append(comment)
+        else:
+            # Antwort - zu replies_map hinzufügen
+            parent_id_str = str(parent_id)
+            if parent_id_str not in replies_map:
+                replies_map[parent_id_str] = []
+            replies_map[parent_id_str].append(comment)
+
+    # Antworten zu ihren Eltern zuordnen
+    def attach_replies(comment_list):
+        for comment in comment_list:
+            comment_id_str = str(comment.get("id"))
+            if comment_id_str in replies_map:
+                comment["replies"] = sorted(
+                    replies_map[comment_id_str],
+                    key=lambda x: x.get("created_at", "")
+                )
+                attach_replies(comment["replies"])  # Rekursiv für verschachtelte Antworten
+
+    attach_replies(top_level)
+    return top_level
+
+
+def _aggregate_reactions(rows: List[Dict[str, Any]], user_id: Optional[str]) -> Dict[int, Dict[str, Any]]:
+    result: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        cid = row.get("comment_id")
+        if cid is None:
+            continue
+        if cid not in result:
+            result[cid] = {"counts": {}, "user_emojis": set()}
+        emoji = row.get("emoji")
+        if emoji:
+            result[cid]["counts"][emoji] = result[cid]["counts"].get(emoji, 0) + 1
+            if user_id and row.get("user_id") == str(user_id):
+                result[cid]["user_emojis"].add(emoji)
+    return result
+
+
+def _response_rows(response: Any) -> List[Dict[str, Any]]:
+    return response.data if response and hasattr(response, "data") else []
+
+
+def _to_int_id(value: Union[int, str]) -> int:
+    return int(value) if isinstance(value, str) else value
+
+
+def _comment_row(
+    post_id: str,
+    user_id: str,
+    content: str,
+    parent_comment_id: Optional[Union[int, str]],
+) -> Optional[Dict[str, Any]]:
+    """Validiert einen neuen Kommentar und gibt die Datenbankzeile zurück (None = ungültig)."""
+    # Validierung: Leerer Kommentar
+    if not content or not content.strip():
+        logger.warning("Versuch, leeren Kommentar zu erstellen")
+        return None
+
+    # Validierung: Maximale Länge (1000 Zeichen)
+    length_valid, length_error = validate_length(
+        content.strip(),
+        max_length=MAX_COMMENT_LENGTH
+    )
+    if not length_valid:
+        logger.warning(f"Kommentar zu lang: {length_error}")
+        return None
+
+    # Schema: id ist serial (auto-increment integer)
+    comment_data = {
+        "post_id": post_id,
+        "user_id": str(user_id),
+        "content": content.strip(),
+        "is_deleted": False,
+    }
+    if parent_comment_id is not None:
+        comment_data["parent_comment_id"] = _to_int_id(parent_comment_id)
+    return comment_data
+
+
 class CommentService:
     """Service-Klasse für das Verwalten von Kommentaren."""
 
@@ -38,6 +148,7 @@ class CommentService:
         else:
             self._profile_service = profile_service
 
+    @timed("get_comments")
     def get_comments(self, post_id: str) -> List[Dict[str, Any]]:
         """Lädt alle nicht gelöschten Kommentare für einen Post.
         
@@ -51,71 +162,20 @@ class CommentService:
         """
         try:
             # Kommentare laden 
-            response = (
-                self.sb.table("comment")
-                .select(COMMENT_SELECT_FULL)
-                .eq("post_id", post_id)
-                .eq("is_deleted", False)
-                .order("created_at", desc=True)
-                .execute()
-            )
-            
-            comments = response.data if response and hasattr(response, "data") else []
+            comments = _response_rows(comments_query(self.sb, post_id).execute())
             
             # User-Daten über ProfileService anreichern (konsistent mit SearchService)
             if comments:
                 user_ids = {c.get("user_id") for c in comments if c.get("user_id")}
-                user_profiles = self._profile_service.get_user_profiles(user_ids)
-                
-                # User-Daten zu Kommentaren hinzufügen (konsistent mit comment_components Erwartung)
-                for comment in comments:
-                    user_id = comment.get("user_id")
-                    profile = user_profiles.get(user_id, {})
-                    comment["user"] = {
-                        "display_name": profile.get("display_name", "Unbekannt"),
-                        "profile_image": profile.get("profile_image"),
-                    }
-                    comment["replies"] = []  # Initialisiere replies-Liste
+                _attach_users(comments, self._profile_service.get_user_profiles(user_ids))
 
                 # Emoji-Reaktionen laden
                 current_user_id = self._profile_service.get_user_id()
                 comment_ids = [c.get("id") for c in comments if c.get("id") is not None]
-                reactions_map = self.get_comment_reactions(comment_ids, current_user_id)
-                for comment in comments:
-                    r = reactions_map.get(comment.get("id"), {"counts": {}, "user_emojis": set()})
-                    comment["reactions"] = r.get("counts", {})
-                    comment["user_reactions"] = list(r.get("user_emojis", set()))
+                _attach_reactions(comments, self.get_comment_reactions(comment_ids, current_user_id))
             
             # Hierarchische Struktur aufbauen
-            top_level = []
-            replies_map = {}
-            
-            for comment in comments:
-                parent_id = comment.get("parent_comment_id")
-                if parent_id is None:
-                    # Top-Level Kommentar
-                    top_level.append(comment)
-                else:
-                    # Antwort - zu replies_map hinzufügen
-                    parent_id_str = str(parent_id)
-                    if parent_id_str not in replies_map:
-                        replies_map[parent_id_str] = []
-                    replies_map[parent_id_str].append(comment)
-            
-            # Antworten zu ihren Eltern zuordnen
-            def attach_replies(comment_list):
-                for comment in comment_list:
-                    comment_id_str = str(comment.get("id"))
-                    if comment_id_str in replies_map:
-                        comment["replies"] = sorted(
-                            replies_map[comment_id_str],
-                            key=lambda x: x.get("created_at", "")
-                        )
-                        attach_replies(comment["replies"])  # Rekursiv für verschachtelte Antworten
-            
-            attach_replies(top_level)
-            
-            return top_level
+            return _build_comment_tree(comments)
             
         except Exception as e:
             logger.error(f"Fehler beim Laden der Kommentare für Post {post_id}: {e}", exc_info=True)
@@ -134,26 +194,8 @@ class CommentService:
         if not comment_ids:
             return {}
         try:
-            response = (
-                self.sb.table("comment_reaction")
-                .select("comment_id, emoji, user_id")
-                .in_("comment_id", comment_ids)
-                .execute()
-            )
-            rows = response.data if response and hasattr(response, "data") else []
-            result: Dict[int, Dict[str, Any]] = {}
-            for row in rows:
-                cid = row.get("comment_id")
-                if cid is None:
-                    continue
-                if cid not in result:
-                    result[cid] = {"counts": {}, "user_emojis": set()}
-                emoji = row.get("emoji")
-                if emoji:
-                    result[cid]["counts"][emoji] = result[cid]["counts"].get(emoji, 0) + 1
-                    if user_id and row.get("user_id") == str(user_id):
-                        result[cid]["user_emojis"].add(emoji)
-            return result
+            response = comment_reactions_query(self.sb, comment_ids).execute()
+            return _aggregate_reactions(_response_rows(response), user_id)
         except Exception as e:
             logger.error(f"Fehler beim Laden der Reaktionen: {e}", exc_info=True)
             return {}
@@ -165,15 +207,8 @@ class CommentService:
             True wenn hinzugefügt, False wenn entfernt oder Fehler.
         """
         try:
-            comment_id_int = int(comment_id) if isinstance(comment_id, str) else comment_id
-            existing = (
-                self.sb.table("comment_reaction")
-                .select("id")
-                .eq("comment_id", comment_id_int)
-                .eq("user_id", str(user_id))
-                .eq("emoji", emoji)
-                .execute()
-            )
+            comment_id_int = _to_int_id(comment_id)
+            existing = user_reaction_query(self.sb, comment_id_int, user_id, emoji).execute()
             if existing and getattr(existing, "data", None):
                 reaction_id = existing.data[0].get("id")
                 self.sb.table("comment_reaction").delete().eq("id", reaction_id).execute()
@@ -207,31 +242,11 @@ class CommentService:
         Returns:
             True bei Erfolg, False bei Fehler oder ungültiger Eingabe
         """
-        # Validierung: Leerer Kommentar
-        if not content or not content.strip():
-            logger.warning("Versuch, leeren Kommentar zu erstellen")
-            return False
-        
-        # Validierung: Maximale Länge (1000 Zeichen)
-        length_valid, length_error = validate_length(
-            content.strip(),
-            max_length=MAX_COMMENT_LENGTH
-        )
-        if not length_valid:
-            logger.warning(f"Kommentar zu lang: {length_error}")
-            return False
-        
         try:
             # Kommentar-Daten vorbereiten
-            # Schema: id ist serial (auto-increment integer)
-            comment_data = {
-                "post_id": post_id,
-                "user_id": str(user_id),
-                "content": content.strip(),
-                "is_deleted": False,
-            }
-            if parent_comment_id is not None:
-                comment_data["parent_comment_id"] = int(parent_comment_id) if isinstance(parent_comment_id, str) else parent_comment_id
+            comment_data = _comment_row(post_id, user_id, content, parent_comment_id)
+            if comment_data is None:
+                return False
             
             # Kommentar in Supabase speichern
             self.sb.table("comment").insert(comment_data).execute()
@@ -254,7 +269,7 @@ class CommentService:
         """
         try:
             # Konvertiere comment_id zu int (falls als str übergeben)
-            comment_id_int = int(comment_id) if isinstance(comment_id, str) else comment_id
+            comment_id_int = _to_int_id(comment_id)
             
             # Soft Delete in Supabase (updated_at wird automatisch von DB-Trigger gesetzt)
             self.sb.table("comment").update({
@@ -271,3 +286,121 @@ class CommentService:
         except Exception as e:
             logger.error(f"Fehler beim Löschen des Kommentars (ID: {comment_id}): {e}", exc_info=True)
             return False
+
+
+class AsyncCommentService:
+    """Async-Variante von ``CommentService`` auf dem ``AsyncClient``."""
+
+    def __init__(
+        self,
+        sb: AsyncClient,
+        profile_service: Optional["AsyncProfileService"] = None,
+    ) -> None:
+        """Initialisiert den AsyncCommentService.
+
+        Args:
+            sb: Async Supabase Client-Instanz
+            profile_service: Optional AsyncProfileService
+        """
+        self.sb = sb
+        if profile_service is None:
+            from services.account.profile import AsyncProfileService
+            self._profile_service = AsyncProfileService(sb)
+        else:
+            self._profile_service = profile_service
+
+    @timed("get_comments")
+    async def get_comments(self, post_id: str) -> List[Dict[str, Any]]:
+        """Lädt alle nicht gelöschten Kommentare für einen Post (siehe ``CommentService``).
+
+        Profile, aktueller Benutzer und Reaktionen werden parallel geladen.
+        """
+        try:
+            comments = _response_rows(await comments_query(self.sb, post_id).execute())
+
+            if comments:
+                user_ids = {c.get("user_id") for c in comments if c.get("user_id")}
+                comment_ids = [c.get("id") for c in comments if c.get("id") is not None]
+                user_profiles, current_user_id, reaction_rows = await asyncio.gather(
+                    self._profile_service.get_user_profiles(user_ids),
+                    self._profile_service.get_user_id(),
+                    self._reaction_rows(comment_ids),
+                )
+                _attach_users(comments, user_profiles)
+                _attach_reactions(comments, _aggregate_reactions(reaction_rows, current_user_id))
+
+            return _build_comment_tree(comments)
+
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Laden der Kommentare für Post {post_id}: {e}", exc_info=True)
+            return []
+
+    async def _reaction_rows(self, comment_ids: List[int]) -> List[Dict[str, Any]]:
+        if not comment_ids:
+            return []
+        try:
+            return _response_rows(await comment_reactions_query(self.sb, comment_ids).execute())
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Laden der Reaktionen: {e}", exc_info=True)
+            return []
+
+    async def get_comment_reactions(
+        self,
+        comment_ids: List[int],
+        user_id: Optional[str] = None,
+    ) -> Dict[int, Dict[str, Any]]:
+        """Lädt Emoji-Reaktionen für mehrere Kommentare (siehe ``CommentService``)."""
+        return _aggregate_reactions(await self._reaction_rows(comment_ids), user_id)
+
+    async def toggle_reaction(self, comment_id: Union[int, str], user_id: str, emoji: str) -> bool:
+        """Toggle einer Emoji-Reaktion (True = hinzugefügt, False = entfernt oder Fehler)."""
+        try:
+            comment_id_int = _to_int_id(comment_id)
+            existing = await user_reaction_query(self.sb, comment_id_int, user_id, emoji).execute()
+            if existing and getattr(existing, "data", None):
+                reaction_id = existing.data[0].get("id")
+                await self.sb.table("comment_reaction").delete().eq("id", reaction_id).execute()
+                return False
+
+            await self.sb.table("comment_reaction").insert({
+                "comment_id": comment_id_int,
+                "user_id": str(user_id),
+                "emoji": emoji,
+            }).execute()
+            return True
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Toggle der Reaktion: {e}", exc_info=True)
+            return False
+
+    async def create_comment(
+        self,
+        post_id: str,
+        user_id: str,
+        content: str,
+        parent_comment_id: Optional[Union[int, str]] = None,
+    ) -> bool:
+        """Erstellt einen neuen Kommentar (siehe ``CommentService``)."""
+        try:
+            comment_data = _comment_row(post_id, user_id, content, parent_comment_id)
+            if comment_data is None:
+                return False
+            await self.sb.table("comment").insert(comment_data).execute()
+            logger.info(f"Kommentar erstellt für Post {post_id} von User {user_id}")
+            return True
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Erstellen des Kommentars: {e}", exc_info=True)
+            return False
+
+    async def delete_comment(self, comment_id: Union[int, str]) -> bool:
+        """Soft-Delete eines Kommentars (siehe ``CommentService``)."""
+        try:
+            comment_id_int = _to_int_id(comment_id)
+            await self.sb.table("comment").update({"is_deleted": True}).eq("id", comment_id_int).execute()
+            logger.info(f"Kommentar {comment_id_int} als gelöscht markiert")
+            return True
+        except (ValueError, TypeError) as e:
+            logger.error(f"Ungültige comment_id: {comment_id} ({type(comment_id)}): {e}", exc_info=True)
+            return False
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Löschen des Kommentars (ID: {comment_id}): {e}", exc_info=True)
+            return False
@@ -1,21 +1,48 @@
-"""Service für Favoriten-Verwaltung."""
+"""Service für Favoriten-Verwaltung (synchron und async)."""
 
 from __future__ import annotations
 
-import time
 from typing import Any, Dict, List, TYPE_CHECKING, Optional
 
-from supabase import Client
+from supabase import AsyncClient, Client
 
 from utils.logging_config import get_logger
-from .queries import POST_SELECT_FAVORITES
+from utils.metrics import timed
+from .queries import favorite_ids_query, favorite_posts_query, favorite_query
 
 if TYPE_CHECKING:
-    from services.account.profile import ProfileService
+    from services.account.profile import AsyncProfileService, ProfileService
 
 logger = get_logger(__name__)
 
 
+def _valid_post_id(post_id: Any) -> bool:
+    return bool(post_id) and isinstance(post_id, str) and bool(post_id.strip())
+
+
+def _favorite_row(user_id: str, post_id: str) -> Dict[str, str]:
+    return {
+        "user_id": user_id,
+        "post_id": post_id,
+    }
+
+
+def _post_ids(rows: Optional[List[Dict[str, Any]]]) -> List[str]:
+    return [row["post_id"] for row in (rows or []) if row.get("post_id")]
+
+
+def _favorite_id_set(rows: Optional[List[Dict[str, Any]]]) -> set[str]:
+    # Set-Comprehension für schnellen Lookup
+    return {str(row["post_id"]) for row in (rows or []) if "post_id" in row}
+
+
+def _mark_all_favorite(posts: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    posts = posts or []
+    for post in posts:
+        post["is_favorite"] = True
+    return posts
+
+
 class FavoritesService:
     """Service-Klasse für das Verwalten von Favoriten."""
 
@@ -37,6 +64,7 @@ class FavoritesService:
         else:
             self._profile_service = profile_service
 
+    @timed("get_favorites")
     def get_favorites(self) -> List[Dict[str, Any]]:
         """Lädt alle favorisierten Meldungen des aktuellen Benutzers.
         
@@ -50,36 +78,21 @@ class FavoritesService:
 
         try:
             # Favoriten-IDs laden
-            fav_res = (
-                self.sb.table("favorite")
-                .select("post_id")
-                .eq("user_id", user.id)
-                .execute()
-            )
-            fav_rows = fav_res.data or []
-            post_ids = [row["post_id"] for row in fav_rows if row.get("post_id")]
+            fav_res = favorite_ids_query(self.sb, user.id).execute()
+            post_ids = _post_ids(fav_res.data)
 
             if not post_ids:
                 return []
 
             # Posts laden
-            posts_res = (
-                self.sb.table("post")
-                .select(POST_SELECT_FAVORITES)
-                .in_("id", post_ids)
-                .order("created_at", desc=True)
-                .execute()
-            )
-
-            posts = posts_res.data or []
-            for post in posts:
-                post["is_favorite"] = True
-            return posts
+            posts_res = favorite_posts_query(self.sb, post_ids).execute()
+            return _mark_all_favorite(posts_res.data)
 
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Laden der Favoriten: {e}", exc_info=True)
             return []
 
+    @timed("add_favorite")
     def add_favorite(self, post_id: str) -> bool:
         """Fügt einen Post zu den Favoriten hinzu.
         
@@ -89,7 +102,7 @@ class FavoritesService:
         Returns:
             True bei Erfolg, False wenn Benutzer nicht eingeloggt ist, post_id ungültig ist oder bei Fehler
         """
-        if not post_id or not isinstance(post_id, str) or not post_id.strip():
+        if not _valid_post_id(post_id):
             logger.warning(f"Ungültige post_id beim Hinzufügen zu Favoriten: {post_id}")
             return False
         
@@ -98,18 +111,14 @@ class FavoritesService:
             return False
 
         try:
-            self.sb.table("favorite").insert(
-                {
-                    "user_id": user_id,
-                    "post_id": post_id,
-                }
-            ).execute()
+            self.sb.table("favorite").insert(_favorite_row(user_id, post_id)).execute()
             logger.info(f"Favorit hinzugefügt: User {user_id}, Post {post_id}")
             return True
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Hinzufügen zu Favoriten: {e}", exc_info=True)
             return False
 
+    @timed("remove_favorite")
     def remove_favorite(self, post_id: str) -> bool:
         """Entfernt einen Post aus den Favoriten.
         
@@ -119,7 +128,7 @@ class FavoritesService:
         Returns:
             True bei Erfolg, False wenn Benutzer nicht eingeloggt ist, post_id ungültig ist oder bei Fehler
         """
-        if not post_id or not isinstance(post_id, str) or not post_id.strip():
+        if not _valid_post_id(post_id):
             logger.warning(f"Ungültige post_id beim Entfernen aus Favoriten: {post_id}")
             return False
         
@@ -150,7 +159,7 @@ class FavoritesService:
         Returns:
             True wenn der Post in den Favoriten ist, False sonst oder bei Fehler
         """
-        if not post_id or not isinstance(post_id, str) or not post_id.strip():
+        if not _valid_post_id(post_id):
             return False
         
         user_id = self._profile_service.get_user_id()
@@ -158,19 +167,13 @@ class FavoritesService:
             return False
 
         try:
-            res = (
-                self.sb.table("favorite")
-                .select("id")
-                .eq("user_id", user_id)
-                .eq("post_id", post_id)
-                .maybe_single()
-                .execute()
-            )
-            return res.data is not None
+            res = favorite_query(self.sb, user_id, post_id).execute()
+            return res is not None and res.data is not None
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Prüfen des Favoriten-Status für Post {post_id}: {e}", exc_info=True)
             return False
 
+    @timed("get_favorite_ids")
     def get_favorite_ids(self, user_id: str) -> set[str]:
         """Holt die Favoriten-IDs eines Benutzers.
         
@@ -185,27 +188,123 @@ class FavoritesService:
         if not user_id:
             return set()
         
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                # Optimierte Query: Nur post_id selektieren, keine unnötigen Daten
-                fav_res = (
-                    self.sb.table("favorite")
-                    .select("post_id")
-                    .eq("user_id", user_id)
-                    .execute()
-                )
-                # Set-Comprehension für schnellen Lookup
-                return {str(row["post_id"]) for row in (fav_res.data or []) if "post_id" in row}
-            except Exception as e:  # noqa: BLE001
-                if attempt < max_retries - 1:
-                    wait = 0.5 * (attempt + 1)
-                    logger.warning(
-                        f"Favoriten laden fehlgeschlagen (Versuch {attempt + 1}/{max_retries}), "
-                        f"Retry in {wait}s: {e}"
-                    )
-                    time.sleep(wait)
-                else:
-                    logger.error(f"Fehler beim Laden der Favoriten für User {user_id} nach {max_retries} Versuchen: {e}", exc_info=True)
-                    return set()
+        try:
+            # Optimierte Query: Nur post_id selektieren, keine unnötigen Daten
+            fav_res = favorite_ids_query(self.sb, user_id).execute()
+            return _favorite_id_set(fav_res.data)
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Laden der Favoriten für User {user_id}: {e}", exc_info=True)
+            return set()
 
+
+class AsyncFavoritesService:
+    """Async-Variante von ``FavoritesService`` auf dem ``AsyncClient``."""
+
+    def __init__(
+        self,
+        sb: AsyncClient,
+        profile_service: Optional["AsyncProfileService"] = None,
+    ) -> None:
+        """Initialisiert den AsyncFavoritesService.
+
+        Args:
+            sb: Async Supabase Client-Instanz
+            profile_service: Optional AsyncProfileService (wird bei Bedarf erstellt)
+        """
+        self.sb = sb
+        if profile_service is None:
+            from services.account.profile import AsyncProfileService
+            self._profile_service = AsyncProfileService(sb)
+        else:
+            self._profile_service = profile_service
+
+    @timed("get_favorites")
+    async def get_favorites(self) -> List[Dict[str, Any]]:
+        """Lädt alle favorisierten Meldungen des aktuellen Benutzers (siehe ``FavoritesService``)."""
+        user = await self._profile_service.get_current_user()
+        if not user:
+            return []
+
+        try:
+            fav_res = await favorite_ids_query(self.sb, user.id).execute()
+            post_ids = _post_ids(fav_res.data)
+            if not post_ids:
+                return []
+            posts_res = await favorite_posts_query(self.sb, post_ids).execute()
+            return _mark_all_favorite(posts_res.data)
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Laden der Favoriten: {e}", exc_info=True)
+            return []
+
+    @timed("add_favorite")
+    async def add_favorite(self, post_id: str) -> bool:
+        """Fügt einen Post zu den Favoriten hinzu (siehe ``FavoritesService``)."""
+        if not _valid_post_id(post_id):
+            logger.warning(f"Ungültige post_id beim Hinzufügen zu Favoriten: {post_id}")
+            return False
+
+        user_id = await self._profile_service.get_user_id()
+        if not user_id:
+            return False
+
+        try:
+            await self.sb.table("favorite").insert(_favorite_row(user_id, post_id)).execute()
+            logger.info(f"Favorit hinzugefügt: User {user_id}, Post {post_id}")
+            return True
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Hinzufügen zu Favoriten: {e}", exc_info=True)
+            return False
+
+    @timed("remove_favorite")
+    async def remove_favorite(self, post_id: str) -> bool:
+        """Entfernt einen Post aus den Favoriten (siehe ``FavoritesService``)."""
+        if not _valid_post_id(post_id):
+            logger.warning(f"Ungültige post_id beim Entfernen aus Favoriten: {post_id}")
+            return False
+
+        user_id = await self._profile_service.get_user_id()
+        if not user_id:
+            return False
+
+        try:
+            await (
+                self.sb.table("favorite")
+                .delete()
+                .eq("user_id", user_id)
+                .eq("post_id", post_id)
+                .execute()
+            )
+            logger.info(f"Favorit entfernt: User {user_id}, Post {post_id}")
+            return True
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Entfernen aus Favoriten: {e}", exc_info=True)
+            return False
+
+    async def is_favorite(self, post_id: str) -> bool:
+        """Prüft ob ein Post in den Favoriten ist (siehe ``FavoritesService``)."""
+        if not _valid_post_id(post_id):
+            return False
+
+        user_id = await self._profile_service.get_user_id()
+        if not user_id:
+            return False
+
+        try:
+            res = await favorite_query(self.sb, user_id, post_id).execute()
+            return res is not None and res.data is not None
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Prüfen des Favoriten-Status für Post {post_id}: {e}", exc_info=True)
+            return False
+
+    @timed("get_favorite_ids")
+    async def get_favorite_ids(self, user_id: str) -> set[str]:
+        """Holt die Favoriten-IDs eines Benutzers (siehe ``FavoritesService``)."""
+        if not user_id:
+            return set()
+
+        try:
+            fav_res = await favorite_ids_query(self.sb, user_id).execute()
+            return _favorite_id_set(fav_res.data)
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Laden der Favoriten für User {user_id}: {e}", exc_info=True)
+            return set()
@@ -0,0 +1,278 @@
+"""
+Map-Feed: Zwischenspeicher für GeoJSON-Daten der Kartenansicht.
+
+Jede Kartenansicht (Session) erhält eine zufällige Feed-ID. Die statische
+Karten-Seite (``assets/map/index.html``) lädt die Daten über
+``/map/feed/<feed_id>`` nach, sobald sich die Version im URL-Hash ändert.
+Bei aktivem Clustering liefert der Feed nur die Kartenansicht; Marker kommen
+dann je Ausschnitt aus ``/map/feed/<feed_id>/clusters`` (``ClusterIndex``).
+Mit einer ``MapViewportSource`` lädt der Server die Marker des Ausschnitts
+selbst aus der Datenbank (``/map/feed/<feed_id>/markers``), unabhängig vom
+Listenlimit; Popup-Details kommen einzeln über ``/map/feed/<feed_id>/post/<id>``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from services.posts.map_service import ClusterIndex, MapDataService
+from utils.constants import MAX_MAP_MARKERS
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+# Ausschnitte werden vergrößert geladen, damit kleine Pan-Bewegungen keinen Abruf auslösen
+VIEWPORT_PADDING = 0.5
+
+
+@dataclass
+class MapViewportSource:
+    """Datenquelle für ausschnittsbasiertes Laden der Karte.
+
+    Attributes:
+        load_markers: Lädt GeoJSON-Features für eine Bounding Box [W, S, O, N]
+        load_detail: Lädt die vollständigen Popup-Properties eines Posts
+    """
+
+    load_markers: Callable[[Sequence[float]], List[Dict[str, Any]]]
+    load_detail: Callable[[str], Optional[Dict[str, Any]]]
+
+
+class _FeedEntry:
+    """Ein veröffentlichter Feed."""
+
+    __slots__ = (
+        "payload", "version", "etag", "last_access", "features", "cluster_index",
+        "source", "viewport_bbox", "viewport_index", "viewport_zoom", "viewport_truncated", "lock",
+    )
+
+    def __init__(
+        self,
+        payload: bytes,
+        version: int,
+        etag: str,
+        features: Optional[List[Dict[str, Any]]],
+        source: Optional[MapViewportSource] = None,
+    ) -> None:
+        self.payload = payload
+        self.version = version
+        self.etag = etag
+        self.last_access = time.time()
+        # Nur bei Clustering gesetzt; der Index wird beim ersten Abruf gebaut
+        self.features = features
+        self.cluster_index: Optional[ClusterIndex] = None
+        # Nur bei ausschnittsbasiertem Laden gesetzt
+        self.source = source
+        self.viewport_bbox: Optional[Tuple[float, float, float, float]] = None
+        self.viewport_index: Optional[ClusterIndex] = None
+        # Zoomstufe des letzten Abrufs; bei erreichtem Markerlimit fehlen Marker im Index
+        self.viewport_zoom = 0.0
+        self.viewport_truncated = False
+        self.lock = threading.Lock()
+
+
+class MapFeedStore:
+    """Thread-sicherer In-Memory-Speicher für Karten-Feeds (LRU + TTL)."""
+
+    def __init__(self, max_feeds: int = 1000, ttl_seconds: float = 3600.0) -> None:
+        """Initialisiert den Speicher.
+
+        Args:
+            max_feeds: Maximale Anzahl gleichzeitig gehaltener Feeds
+            ttl_seconds: Lebensdauer eines Feeds ohne Zugriff
+        """
+        self.max_feeds = max_feeds
+        self.ttl_seconds = ttl_seconds
+        self._feeds: "OrderedDict[str, _FeedEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()
+
+    @staticmethod
+    def new_feed_id() -> str:
+        """Erzeugt eine neue, nicht erratbare Feed-ID."""
+        return uuid.uuid4().hex
+
+    def publish(
+        self,
+        feed_id: str,
+        data: Dict[str, Any],
+        clustered: bool = False,
+        source: Optional[MapViewportSource] = None,
+    ) -> int:
+        """Speichert neue Daten für einen Feed.
+
+        Args:
+            feed_id: ID des Feeds
+            data: GeoJSON-FeatureCollection (JSON-serialisierbar)
+            clustered: Marker serverseitig clustern statt alle auszuliefern
+            source: Datenquelle für ausschnittsbasiertes Laden (ersetzt ``features``)
+
+        Returns:
+            Neue Versionsnummer des Feeds (unverändert bei gleichem Inhalt)
+        """
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        etag = hashlib.blake2b(payload, digest_size=12).hexdigest()
+        features: Optional[List[Dict[str, Any]]] = None
+        if source is not None:
+            light = dict(data, features=[])
+            light["view"] = dict(data.get("view") or {}, mode="viewport")
+            payload = json.dumps(light, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        elif clustered:
+            features = list(data.get("features") or [])
+            light = dict(data, features=[], total=len(features))
+            payload = json.dumps(light, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            current = self._feeds.get(feed_id)
+            if current is not None and current.etag == etag and source is None:
+                current.last_access = now
+                self._feeds.move_to_end(feed_id)
+                return current.version
+            version = (current.version + 1) if current is not None else 1
+            self._feeds[feed_id] = _FeedEntry(payload, version, etag, features, source)
+            self._feeds.move_to_end(feed_id)
+            while len(self._feeds) > self.max_feeds:
+                self._feeds.popitem(last=False)
+        return version
+
+    def get(self, feed_id: str) -> Optional[Tuple[bytes, str]]:
+        """Liest einen Feed.
+
+        Args:
+            feed_id: ID des Feeds
+
+        Returns:
+            Tuple (JSON-Bytes, ETag) oder None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._feeds.get(feed_id)
+            if entry is None or entry.last_access + self.ttl_seconds < now:
+                return None
+            entry.last_access = now
+            self._feeds.move_to_end(feed_id)
+            return entry.payload, entry.etag
+
+    def get_cluster_index(self, feed_id: str) -> Optional[ClusterIndex]:
+        """Gibt den Cluster-Index eines Feeds zurück (einmalig aufgebaut).
+
+        Args:
+            feed_id: ID des Feeds
+
+        Returns:
+            ClusterIndex oder None (unbekannter Feed oder ohne Clustering)
+        """
+        with self._lock:
+            entry = self._feeds.get(feed_id)
+            if entry is None or entry.features is None:
+                return None
+            entry.last_access = time.time()
+            if entry.cluster_index is not None:
+                return entry.cluster_index
+        # Aufbau außerhalb des Store-Locks, damit andere Feeds nicht warten
+        with self._index_lock:
+            if entry.cluster_index is None:
+                entry.cluster_index = MapDataService.build_cluster_index(entry.features)
+        return entry.cluster_index
+
+    def _get_entry(self, feed_id: str) -> Optional[_FeedEntry]:
+        with self._lock:
+            entry = self._feeds.get(feed_id)
+            if entry is not None:
+                entry.last_access = time.time()
+            return entry
+
+    def query_viewport(self, feed_id: str, bbox: Sequence[float], zoom: float) -> Optional[List[Dict[str, Any]]]:
+        """Liefert Cluster und Marker eines Ausschnitts aus der Datenquelle.
+
+        Die Marker werden für einen vergrößerten Ausschnitt geladen und
+        geclustert; solange spätere Ausschnitte darin liegen, wird der
+        vorhandene Index wiederverwendet. Hat der Abruf das Markerlimit
+        erreicht, fehlen Marker; beim Hineinzoomen wird dann der kleinere
+        Ausschnitt neu geladen.
+
+        Args:
+            feed_id: ID des Feeds
+            bbox: [west, süd, ost, nord] in Grad
+            zoom: Aktuelle Zoomstufe
+
+        Returns:
+            GeoJSON-Features oder None (unbekannter Feed oder ohne Datenquelle)
+        """
+        entry = self._get_entry(feed_id)
+        if entry is None or entry.source is None:
+            return None
+        west, south, east, north = (float(v) for v in bbox)
+        with entry.lock:
+            cached = entry.viewport_bbox
+            covered = cached is not None and (
+                cached[0] <= west and cached[1] <= south and cached[2] >= east and cached[3] >= north
+            )
+            zoomed_in = entry.viewport_truncated and zoom > entry.viewport_zoom
+            if not covered or zoomed_in or entry.viewport_index is None:
+                pad_x = (east - west) * VIEWPORT_PADDING
+                pad_y = (north - south) * VIEWPORT_PADDING
+                padded = (
+                    max(-180.0, west - pad_x),
+                    max(-90.0, south - pad_y),
+                    min(180.0, east + pad_x),
+                    min(90.0, north + pad_y),
+                )
+                features = entry.source.load_markers(padded)
+                entry.viewport_index = MapDataService.build_cluster_index(features)
+                entry.viewport_bbox = padded
+                entry.viewport_zoom = zoom
+                entry.viewport_truncated = len(features) >= MAX_MAP_MARKERS
+            index = entry.viewport_index
+        return index.clusters([west, south, east, north], zoom)
+
+    def get_detail(self, feed_id: str, post_id: str) -> Optional[Dict[str, Any]]:
+        """Lädt die Popup-Details eines Posts über die Datenquelle des Feeds.
+
+        Args:
+            feed_id: ID des Feeds
+            post_id: ID des Posts
+
+        Returns:
+            Feature-Properties oder None
+        """
+        entry = self._get_entry(feed_id)
+        if entry is None or entry.source is None:
+            return None
+        return entry.source.load_detail(post_id)
+
+    def discard(self, feed_id: str) -> None:
+        """Entfernt einen Feed (z. B. beim Verlassen der Session)."""
+        with self._lock:
+            self._feeds.pop(feed_id, None)
+
+    def _evict(self, now: float) -> None:
+        """Entfernt abgelaufene Feeds (älteste zuerst)."""
+        while self._feeds:
+            feed_id, entry = next(iter(self._feeds.items()))
+            if entry.last_access + self.ttl_seconds >= now:
+                break
+            self._feeds.popitem(last=False)
+
+
+# Globale Instanz (Singleton)
+_map_feed_store: Optional[MapFeedStore] = None
+_map_feed_store_lock = threading.Lock()
+
+
+def get_map_feed_store() -> MapFeedStore:
+    """Gibt die globale Instanz des Map-Feed-Speichers zurück."""
+    global _map_feed_store
+    with _map_feed_store_lock:
+        if _map_feed_store is None:
+            _map_feed_store = MapFeedStore()
+        return _map_feed_store
@@ -1,24 +1,64 @@
 """
 Map-Service: Daten-Vorbereitung für Kartenvisualisierung.
 
-Konvertiert Post-Daten in GeoJSON-Format und bereitet sie für Folium-Maps auf.
+Konvertiert Post-Daten in GeoJSON-Format für die statische Leaflet-Karte
+(``assets/map/index.html``) und clustert Marker serverseitig (``ClusterIndex``).
 """
 
 from __future__ import annotations
 
-from typing import List, Dict, Any, Optional
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Fertige GeoJSON-Features je Post-Version (LRU)
+FEATURE_CACHE_SIZE = 5000
+_feature_cache: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+_feature_cache_lock = threading.Lock()
+# Post-Felder, aus denen ``posts_to_geojson`` Marker und Popup aufbaut
+MAP_POST_FIELDS = (
+    "location_lat", "location_lon", "headline", "description", "location_text",
+    "post_status", "species", "species_id", "breed", "breed_id", "sex", "sex_id",
+    "color_ids", "post_image", "created_at", "user_id", "username", "user_profile_image",
+    "is_favorite",
+)
+
 
 class MapDataService:
     """Service zur Vorbereitung von Post-Daten für Kartendarstellung."""
 
+    @staticmethod
+    def post_cache_key(post: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Schlüssel, der sich mit jeder sichtbaren Änderung eines Posts ändert.
+
+        Die Tabelle ``post`` hat keinen Änderungszeitpunkt; der Schlüssel enthält
+        daher einen Hash aller Felder, die die Karte anzeigt (``MAP_POST_FIELDS``).
+
+        Args:
+            post: Post-Dictionary
+
+        Returns:
+            Tuple (ID, Hash der angezeigten Felder)
+        """
+        shown = repr(tuple(post.get(name) for name in MAP_POST_FIELDS))
+        return (
+            post.get("id"),
+            hashlib.blake2b(shown.encode("utf-8"), digest_size=12).hexdigest(),
+        )
+
     @staticmethod
     def posts_to_geojson(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Konvertiert Posts mit Geokoordinaten zu GeoJSON-Features.
 
+        Features werden je Post-Version (``post_cache_key``) zwischengespeichert,
+        sodass unveränderte Posts beim erneuten Rendern nicht neu aufbereitet werden.
+
         Args:
             posts: Liste von Post-Dictionaries mit location_lat/location_lon
 
@@ -26,20 +66,31 @@ class MapDataService:
             Liste von GeoJSON-Feature-Dictionaries (nur Posts mit Koordinaten)
         """
         features = []
+        skipped = 0
         for post in posts:
+            key = MapDataService.post_cache_key(post)
+            with _feature_cache_lock:
+                cached = _feature_cache.get(key)
+                if cached is not None:
+                    _feature_cache.move_to_end(key)
+            if cached is not None:
+                # Properties kopieren, damit Aufrufer den Cache nicht verändern
+                features.append(dict(cached, properties=dict(cached["properties"])))
+                continue
+
             lat = post.get("location_lat")
             lon = post.get("location_lon")
 
             # Posts ohne Koordinaten überspringen
             if lat is None or lon is None:
-                logger.debug(f"Post {post.get('id')} hat keine Koordinaten, wird übersprungen")
+                skipped += 1
                 continue
 
             try:
                 lat = float(lat)
                 lon = float(lon)
             except (ValueError, TypeError):
-                logger.warning(f"Ungültige Koordinaten für Post {post.get('id')}")
+                logger.warning("Ungültige Koordinaten für Post %s", post.get("id"))
                 continue
 
             # Erstes Bild extrahieren (wie in extract_item_data)
@@ -54,6 +105,8 @@ class MapDataService:
             species = post.get("species") or {}
             species_name = species.get("name", "") if isinstance(species, dict) else ""
             species_id = species.get("id") if isinstance(species, dict) else post.get("species_id")
+            breed = post.get("breed") or {}
+            sex = post.get("sex") or {}
 
             # GeoJSON-Feature erstellen
             feature = {
@@ -80,13 +133,126 @@ class MapDataService:
                     "breed_id": post.get("breed_id"),
                     "sex_id": post.get("sex_id"),
                     "color_ids": post.get("color_ids", []),
+                    # Felder für Marker und Popup der Karte
+                    "status_key": MapDataService.get_status_key(status_name),
+                    "species_emoji": MapDataService.get_species_emoji(species_id),
+                    "breed_name": breed.get("name", "") if isinstance(breed, dict) else "",
+                    "sex_name": sex.get("name", "") if isinstance(sex, dict) else "",
+                    "date": MapDataService._format_date(post.get("created_at")),
                 },
             }
+            if key[0] is not None:
+                with _feature_cache_lock:
+                    _feature_cache[key] = dict(feature, properties=dict(feature["properties"]))
+                    while len(_feature_cache) > FEATURE_CACHE_SIZE:
+                        _feature_cache.popitem(last=False)
             features.append(feature)
 
-        logger.info(f"{len(features)} von {len(posts)} Posts haben Koordinaten")
+        logger.debug("%d von %d Posts haben Koordinaten (%d ohne übersprungen)", len(features), len(posts), skipped)
         return features
 
+    @staticmethod
+    def markers_to_geojson(markers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Konvertiert leichtgewichtige Marker (``get_markers_in_bbox``) zu GeoJSON.
+
+        Popup-Details fehlen bewusst (``detail: False``) und werden beim
+        Öffnen einzeln nachgeladen.
+
+        Args:
+            markers: Liste von Marker-Dicts mit id, lat, lon, status, species_id, thumb
+
+        Returns:
+            Liste von GeoJSON-Features
+        """
+        return [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [m["lon"], m["lat"]]},
+                "properties": {
+                    "id": m.get("id"),
+                    "headline": m.get("headline", ""),
+                    "status_key": MapDataService.get_status_key(m.get("status", "")),
+                    "species_id": m.get("species_id"),
+                    "species_emoji": MapDataService.get_species_emoji(m.get("species_id")),
+                    "first_image_url": m.get("thumb"),
+                    "is_favorite": m.get("is_favorite", False),
+                    "detail": False,
+                },
+            }
+            for m in markers
+        ]
+
+    @staticmethod
+    def build_feature_collection(
+        posts: List[Dict[str, Any]],
+        center_lat: float = 51.1657,
+        center_lon: float = 10.4515,
+        zoom_level: int = 5,
+        use_clustering: bool = True,
+    ) -> Dict[str, Any]:
+        """Erstellt die FeatureCollection für den Karten-Feed.
+
+        Args:
+            posts: Liste von Post-Dictionaries
+            center_lat: Breitengrad des Zentrums
+            center_lon: Längengrad des Zentrums
+            zoom_level: Standard-Zoom-Level (1-20)
+            use_clustering: Marker-Clustering aktivieren
+
+        Returns:
+            GeoJSON-FeatureCollection mit zusätzlichem "view"-Objekt
+        """
+        return {
+            "type": "FeatureCollection",
+            "features": MapDataService.posts_to_geojson(posts),
+            "view": {
+                "lat": center_lat,
+                "lon": center_lon,
+                "zoom": zoom_level,
+                "cluster": use_clustering,
+            },
+        }
+
+    @staticmethod
+    def build_cluster_index(features: Sequence[Dict[str, Any]], **options: Any) -> "ClusterIndex":
+        """Baut den serverseitigen Cluster-Index für eine Post-Menge.
+
+        Args:
+            features: GeoJSON-Features aus ``posts_to_geojson``
+            **options: Weitere Parameter für ``ClusterIndex``
+
+        Returns:
+            ClusterIndex für Abfragen per ``clusters(bbox, zoom)``
+        """
+        return ClusterIndex(features, **options)
+
+    @staticmethod
+    def get_status_key(status_name: str) -> str:
+        """Normalisiert Statusnamen auf die Marker-Farbkeys der Karte.
+
+        Args:
+            status_name: Name des Post-Status
+
+        Returns:
+            "vermisst", "gefunden" oder "wiedervereint"
+        """
+        status_lower = (status_name or "").strip().lower()
+        if "wiedervereint" in status_lower:
+            return "wiedervereint"
+        if "fundtier" in status_lower or "gefunden" in status_lower or "zugelaufen" in status_lower:
+            return "gefunden"
+        return "vermisst"
+
+    @staticmethod
+    def _format_date(created_at: Optional[str]) -> str:
+        """Formatiert einen ISO-Zeitstempel als TT.MM.JJJJ (leer bei Fehlern)."""
+        if not created_at:
+            return ""
+        try:
+            return datetime.fromisoformat(created_at.replace("Z", "+00:00")).strftime("%d.%m.%Y")
+        except (ValueError, AttributeError):
+            return ""
+
     @staticmethod
     def get_map_bounds(posts: List[Dict[str, Any]]) -> Optional[Dict[str, float]]:
         """Berechnet die Bounding Box für alle Posts mit Koordinaten.
@@ -175,3 +341,257 @@ class MapDataService:
             6: "🐠",  # Fisch
         }
         return species_emojis.get(species_id, "🐾")  # Fallback: Pfote
+
+
+# ─────────────────────────────────────────────────────────────
+# Serverseitiges Clustering (nach dem Supercluster-Verfahren)
+# ─────────────────────────────────────────────────────────────
+
+def _lng_x(lng: float) -> float:
+    return lng / 360.0 + 0.5
+
+
+def _lat_y(lat: float) -> float:
+    sin = math.sin(lat * math.pi / 180.0)
+    if sin >= 1.0:
+        return 0.0
+    if sin <= -1.0:
+        return 1.0
+    y = 0.5 - 0.25 * math.log((1 + sin) / (1 - sin)) / math.pi
+    return min(max(y, 0.0), 1.0)
+
+
+def _x_lng(x: float) -> float:
+    return (x - 0.5) * 360.0
+
+
+def _y_lat(y: float) -> float:
+    y2 = (180.0 - y * 360.0) * math.pi / 180.0
+    return 360.0 * math.atan(math.exp(y2)) / math.pi - 90.0
+
+
+class _ClusterNode:
+    """Punkt oder Cluster auf einer Zoomstufe (projizierte Koordinaten 0..1)."""
+
+    __slots__ = ("x", "y", "count", "feature", "cluster_id", "status_counts", "species_counts", "merged")
+
+    def __init__(
+        self,
+        x: float,
+        y: float,
+        count: int,
+        feature: Optional[Dict[str, Any]],
+        cluster_id: Optional[int],
+        status_counts: Dict[str, int],
+        species_counts: Dict[str, int],
+    ) -> None:
+        self.x = x
+        self.y = y
+        self.count = count
+        self.feature = feature
+        self.cluster_id = cluster_id
+        self.status_counts = status_counts
+        self.species_counts = species_counts
+        self.merged = False
+
+
+class _GridIndex:
+    """Einfaches Raster-Index für Umkreis- und Rechteckabfragen."""
+
+    def __init__(self, nodes: List[_ClusterNode], cell: float) -> None:
+        self.nodes = nodes
+        self.cell = cell
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for i, node in enumerate(nodes):
+            key = (int(node.x / cell), int(node.y / cell))
+            self.cells.setdefault(key, []).append(i)
+
+    def within(self, x: float, y: float, r: float) -> Iterable[int]:
+        reach = int(math.ceil(r / self.cell))
+        cx, cy = int(x / self.cell), int(y / self.cell)
+        r2 = r * r
+        for gx in range(cx - reach, cx + reach + 1):
+            for gy in range(cy - reach, cy + reach + 1):
+                for i in self.cells.get((gx, gy), ()):
+                    node = self.nodes[i]
+                    dx, dy = node.x - x, node.y - y
+                    if dx * dx + dy * dy <= r2:
+                        yield i
+
+    def range(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Iterable[int]:
+        gx0, gx1 = int(min_x / self.cell), int(max_x / self.cell)
+        gy0, gy1 = int(min_y / self.cell), int(max_y / self.cell)
+        # Großes Rechteck bei feinem Raster: linear scannen statt Zellen aufzählen
+        if (gx1 - gx0 + 1) * (gy1 - gy0 + 1) > len(self.cells):
+            candidates: Iterable[int] = range(len(self.nodes))
+        else:
+            candidates = (
+                i
+                for gx in range(gx0, gx1 + 1)
+                for gy in range(gy0, gy1 + 1)
+                for i in self.cells.get((gx, gy), ())
+            )
+        for i in candidates:
+            node = self.nodes[i]
+            if min_x <= node.x <= max_x and min_y <= node.y <= max_y:
+                yield i
+
+
+class ClusterIndex:
+    """Hierarchischer Cluster-Index über GeoJSON-Punkte.
+
+    Wird einmal pro Post-Menge aufgebaut: von der höchsten Zoomstufe
+    abwärts werden benachbarte Punkte (Radius in Pixeln) gierig zu
+    Clustern zusammengefasst. ``clusters(bbox, zoom)`` liefert danach nur
+    die im Ausschnitt sichtbaren Punkte und Cluster dieser Zoomstufe.
+    """
+
+    def __init__(
+        self,
+        features: Sequence[Dict[str, Any]],
+        min_zoom: int = 0,
+        max_zoom: int = 16,
+        radius: float = 60.0,
+        extent: float = 512.0,
+        min_points: int = 2,
+    ) -> None:
+        """Baut den Index auf.
+
+        Args:
+            features: GeoJSON-Features (z. B. aus ``posts_to_geojson``)
+            min_zoom: Kleinste Zoomstufe mit Clustern
+            max_zoom: Größte Zoomstufe mit Clustern (darüber nur Einzelpunkte)
+            radius: Cluster-Radius in Pixeln
+            extent: Kachelgröße in Pixeln
+            min_points: Mindestanzahl Punkte für einen Cluster
+        """
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.radius = radius
+        self.extent = extent
+        self.min_points = min_points
+
+        points: List[_ClusterNode] = []
+        for feature in features:
+            coords = (feature.get("geometry") or {}).get("coordinates") or []
+            if len(coords) != 2:
+                continue
+            props = feature.get("properties") or {}
+            status = str(props.get("status_key") or "vermisst")
+            species = str(props.get("species_id") or "")
+            points.append(_ClusterNode(
+                _lng_x(float(coords[0])),
+                _lat_y(float(coords[1])),
+                1,
+                feature,
+                None,
+                {status: 1},
+                {species: 1},
+            ))
+
+        # levels[z] = Knoten auf Zoomstufe z; max_zoom + 1 = Einzelpunkte
+        self._levels: Dict[int, _GridIndex] = {}
+        nodes = points
+        self._levels[max_zoom + 1] = _GridIndex(nodes, self._radius_at(max_zoom))
+        for z in range(max_zoom, min_zoom - 1, -1):
+            nodes = self._cluster(nodes, z)
+            self._levels[z] = _GridIndex(nodes, self._radius_at(z))
+        self.size = len(points)
+
+    def _radius_at(self, zoom: int) -> float:
+        return self.radius / (self.extent * (2 ** zoom))
+
+    def _cluster(self, nodes: List[_ClusterNode], zoom: int) -> List[_ClusterNode]:
+        """Fasst die Knoten der Stufe ``zoom + 1`` zur Stufe ``zoom`` zusammen."""
+        r = self._radius_at(zoom)
+        index = self._levels[zoom + 1]
+        for node in nodes:
+            node.merged = False
+
+        result: List[_ClusterNode] = []
+        for i, node in enumerate(nodes):
+            if node.merged:
+                continue
+            node.merged = True
+            neighbours = [j for j in index.within(node.x, node.y, r) if not nodes[j].merged]
+            count = node.count + sum(nodes[j].count for j in neighbours)
+            if not neighbours or count < self.min_points:
+                result.append(node)
+                continue
+
+            wx, wy = node.x * node.count, node.y * node.count
+            status_counts = dict(node.status_counts)
+            species_counts = dict(node.species_counts)
+            for j in neighbours:
+                other = nodes[j]
+                other.merged = True
+                wx += other.x * other.count
+                wy += other.y * other.count
+                for key, value in other.status_counts.items():
+                    status_counts[key] = status_counts.get(key, 0) + value
+                for key, value in other.species_counts.items():
+                    species_counts[key] = species_counts.get(key, 0) + value
+            # Cluster-ID kodiert Position und Entstehungs-Zoomstufe
+            cluster_id = (len(result) << 5) + zoom
+            result.append(_ClusterNode(
+                wx / count, wy / count, count, None, cluster_id, status_counts, species_counts,
+            ))
+        return result
+
+    def _to_feature(self, node: _ClusterNode) -> Dict[str, Any]:
+        if node.cluster_id is None:
+            return node.feature or {}
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [_x_lng(node.x), _y_lat(node.y)]},
+            "properties": {
+                "cluster": True,
+                "cluster_id": node.cluster_id,
+                "point_count": node.count,
+                "expansion_zoom": self.get_cluster_expansion_zoom(node.cluster_id),
+                "status_counts": node.status_counts,
+                "species_counts": node.species_counts,
+            },
+        }
+
+    def clusters(self, bbox: Sequence[float], zoom: float) -> List[Dict[str, Any]]:
+        """Liefert Cluster und Einzelpunkte im Kartenausschnitt.
+
+        Args:
+            bbox: [west, süd, ost, nord] in Grad
+            zoom: Aktuelle Zoomstufe der Karte
+
+        Returns:
+            GeoJSON-Features; Cluster haben ``properties.cluster = True``
+            sowie Anzahlen je Status (``status_counts``) und Tierart
+            (``species_counts``)
+        """
+        min_lng = ((bbox[0] + 180) % 360 + 360) % 360 - 180
+        min_lat = max(-90.0, min(90.0, bbox[1]))
+        max_lng = 180.0 if bbox[2] == 180 else ((bbox[2] + 180) % 360 + 360) % 360 - 180
+        max_lat = max(-90.0, min(90.0, bbox[3]))
+
+        if bbox[2] - bbox[0] >= 360:
+            min_lng, max_lng = -180.0, 180.0
+        elif min_lng > max_lng:
+            # Ausschnitt über die Datumsgrenze: in zwei Abfragen teilen
+            eastern = self.clusters([min_lng, min_lat, 180.0, max_lat], zoom)
+            western = self.clusters([-180.0, min_lat, max_lng, max_lat], zoom)
+            return eastern + western
+
+        z = max(self.min_zoom, min(int(math.floor(zoom)), self.max_zoom + 1))
+        level = self._levels[z]
+        ids = level.range(_lng_x(min_lng), _lat_y(max_lat), _lng_x(max_lng), _lat_y(min_lat))
+        return [self._to_feature(level.nodes[i]) for i in ids]
+
+    def get_cluster_expansion_zoom(self, cluster_id: int) -> int:
+        """Zoomstufe, ab der ein Cluster in mehrere Teile zerfällt.
+
+        Args:
+            cluster_id: ID aus ``properties.cluster_id``
+
+        Returns:
+            Zoomstufe zum Hineinzoomen beim Klick auf den Cluster
+        """
+        return min((cluster_id & 31) + 1, self.max_zoom + 1)
+
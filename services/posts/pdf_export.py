@@ -0,0 +1,328 @@
+"""
+PDF-Export: Erstellt Flyer für Meldungen im Hintergrund.
+
+Die Erstellung (Bild laden + ReportLab) läuft in einem Worker-Pool, damit die
+Session nicht blockiert. Ergebnisse werden unter einem Schlüssel aus
+Post-Version, Kontaktdaten und Layout-Version im Download-Speicher
+(``services.download_store``) abgelegt; wiederholte Exporte liefern die
+vorhandene Datei sofort.
+Sammel-Exporte mehrerer Meldungen (optional mehrere Flyer pro Seite) laufen
+über dieselbe Queue.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from supabase import Client
+
+from services.download_store import DownloadStore, get_download_store
+from services.posts.post_image import PostStorageService
+from utils.logging_config import get_logger
+from utils.pdf_generator import (
+    PDF_LAYOUT_VERSION,
+    PDF_SHEET_LAYOUTS,
+    create_post_pdf_bytes,
+    create_posts_pdf,
+)
+
+logger = get_logger(__name__)
+
+
+PDF_EXPORT_WORKERS = int(os.getenv("PDF_EXPORT_WORKERS", "2"))
+
+# Job-Status
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class PdfJob:
+    """Ein PDF-Export-Auftrag.
+
+    Attributes:
+        job_id: Eindeutige ID des Auftrags
+        cache_key: Schlüssel des Ergebnisses (gleicher Inhalt = gleicher Schlüssel)
+        path: Zielpfad der PDF im Export-Verzeichnis
+        status: queued, running, done oder failed
+        progress: Fortschritt zwischen 0.0 und 1.0
+        error: Fehlermeldung bei Status failed
+        cached: True wenn die Datei bereits vorhanden war
+        future: Wird mit dem Pfad der PDF erfüllt
+    """
+
+    job_id: str
+    cache_key: str
+    path: Path
+    status: str = JOB_QUEUED
+    progress: float = 0.0
+    error: Optional[str] = None
+    cached: bool = False
+    future: "Future[Path]" = field(default_factory=Future, repr=False)
+    _listeners: List[Callable[["PdfJob"], None]] = field(default_factory=list, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def filename(self) -> str:
+        """Dateiname der PDF (für ``/download/<filename>``)."""
+        return self.path.name
+
+    @property
+    def done(self) -> bool:
+        """True wenn der Auftrag abgeschlossen ist (erfolgreich oder nicht)."""
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def add_progress_listener(self, listener: Callable[["PdfJob"], None]) -> None:
+        """Registriert einen Callback für Fortschrittsänderungen.
+
+        Der Callback wird sofort mit dem aktuellen Stand und danach aus dem
+        Worker-Thread aufgerufen.
+
+        Args:
+            listener: Funktion, die den Job erhält
+        """
+        with self._lock:
+            self._listeners.append(listener)
+        self._notify(listener)
+
+    def _update(self, status: str, progress: float) -> None:
+        self.status = status
+        self.progress = progress
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            self._notify(listener)
+
+    def _notify(self, listener: Callable[["PdfJob"], None]) -> None:
+        try:
+            listener(self)
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Fehler im PDF-Fortschritts-Callback: {e}")
+
+
+class PdfJobQueue:
+    """Worker-Pool für PDF-Exporte mit dateibasiertem Ergebnis-Cache."""
+
+    def __init__(self, store: Optional[DownloadStore] = None, max_workers: int = PDF_EXPORT_WORKERS) -> None:
+        """Initialisiert die Queue.
+
+        Args:
+            store: Download-Speicher für die erzeugten PDFs (Standard: global)
+            max_workers: Anzahl paralleler Exporte
+        """
+        self.store = store or get_download_store()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="pdf-export")
+        self._inflight: Dict[str, PdfJob] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(
+        post: Dict[str, Any],
+        contact_email: Optional[str],
+        contact_phone: Optional[str],
+        additions: Optional[str],
+    ) -> str:
+        """Berechnet den Ergebnis-Schlüssel eines Exports.
+
+        Ohne ``updated_at`` wird der Inhalt des Posts gehasht, damit
+        Bearbeitungen nicht die alte PDF liefern.
+
+        Args:
+            post: Post-Dictionary
+            contact_email: Kontakt-E-Mail
+            contact_phone: Kontakt-Telefon
+            additions: Ergänzungen
+
+        Returns:
+            Hex-Schlüssel
+        """
+        version = post.get("updated_at") or json.dumps(post, sort_keys=True, default=str)
+        raw = json.dumps(
+            [post.get("id"), version, contact_email or "", contact_phone or "", additions or "", PDF_LAYOUT_VERSION],
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def submit(
+        self,
+        cache_key: str,
+        name: str,
+        render: Callable[[Callable[[float], None]], bytes],
+    ) -> PdfJob:
+        """Stellt einen Export ein oder liefert ein vorhandenes Ergebnis.
+
+        Args:
+            cache_key: Ergebnis-Schlüssel (siehe ``cache_key``)
+            name: Lesbarer Anfang des Dateinamens
+            render: Erzeugt die PDF-Bytes im Worker; erhält einen
+                Fortschritts-Callback (0.0 bis 1.0)
+
+        Returns:
+            PdfJob (bei vorhandener Datei bereits abgeschlossen)
+        """
+        safe_name = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in name or "meldung")
+        filename = f"{safe_name}_{cache_key[:16]}.pdf"
+        path = self.store.directory / filename
+
+        with self._lock:
+            running = self._inflight.get(cache_key)
+            if running is not None:
+                return running
+            job = PdfJob(job_id=uuid.uuid4().hex, cache_key=cache_key, path=path)
+            if self.store.get(filename) is not None:
+                job.cached = True
+                job._update(JOB_DONE, 1.0)
+                job.future.set_result(path)
+                return job
+            self._inflight[cache_key] = job
+
+        self._executor.submit(self._run, job, render)
+        return job
+
+    def _run(self, job: PdfJob, render: Callable[[Callable[[float], None]], bytes]) -> None:
+        """Führt einen Export im Worker-Thread aus."""
+        try:
+            job._update(JOB_RUNNING, 0.05)
+            pdf_bytes = render(lambda value: job._update(JOB_RUNNING, min(0.95, max(job.progress, value))))
+            job._update(JOB_RUNNING, 0.95)
+            self.store.put_bytes(job.filename, pdf_bytes)
+            job._update(JOB_DONE, 1.0)
+            job.future.set_result(job.path)
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim PDF-Export {job.filename}: {e}", exc_info=True)
+            job.error = str(e)
+            job._update(JOB_FAILED, job.progress)
+            job.future.set_exception(e)
+        finally:
+            with self._lock:
+                if self._inflight.get(job.cache_key) is job:
+                    del self._inflight[job.cache_key]
+
+
+class PdfExportService:
+    """Service für PDF-Exporte einer Session (Bild-Download über Supabase Storage)."""
+
+    def __init__(self, sb: Client) -> None:
+        """Initialisiert den Service.
+
+        Args:
+            sb: Supabase Client
+        """
+        self.sb = sb
+
+    def export(
+        self,
+        post: Dict[str, Any],
+        contact_email: Optional[str] = None,
+        contact_phone: Optional[str] = None,
+        additions: Optional[str] = None,
+    ) -> PdfJob:
+        """Startet den Export einer Meldung als PDF.
+
+        Args:
+            post: Post-Dictionary
+            contact_email: Kontakt-E-Mail
+            contact_phone: Kontakt-Telefon
+            additions: Ergänzungen
+
+        Returns:
+            PdfJob mit Fortschritt und Ergebnis
+        """
+        queue = get_pdf_job_queue()
+
+        def render(progress: Callable[[float], None]) -> bytes:
+            post_images = post.get("post_image") or []
+            image_url = post_images[0].get("url") if post_images else None
+            image_bytes = self._load_image(image_url) if isinstance(image_url, str) and image_url.strip() else None
+            progress(0.4)
+            return create_post_pdf_bytes(
+                post=post,
+                image_bytes=image_bytes,
+                contact_email=contact_email,
+                contact_phone=contact_phone,
+                additions=additions,
+            )
+
+        key = queue.cache_key(post, contact_email, contact_phone, additions)
+        return queue.submit(key, str(post.get("id") or "meldung"), render)
+
+    def export_batch(
+        self,
+        posts: Sequence[Dict[str, Any]],
+        per_sheet: int = 1,
+        contact_email: Optional[str] = None,
+        contact_phone: Optional[str] = None,
+        additions: Optional[str] = None,
+    ) -> PdfJob:
+        """Startet den Sammel-Export mehrerer Meldungen in eine PDF.
+
+        Args:
+            posts: Post-Dictionaries
+            per_sheet: Flyer pro A4-Seite (1, 2 oder 4)
+            contact_email: Kontakt-E-Mail
+            contact_phone: Kontakt-Telefon
+            additions: Ergänzungen
+
+        Returns:
+            PdfJob mit Fortschritt und Ergebnis
+
+        Raises:
+            ValueError: Bei nicht unterstütztem ``per_sheet``
+        """
+        if per_sheet not in PDF_SHEET_LAYOUTS:
+            raise ValueError(f"per_sheet muss einer von {sorted(PDF_SHEET_LAYOUTS)} sein")
+        queue = get_pdf_job_queue()
+        posts = list(posts)
+
+        def render(progress: Callable[[float], None]) -> bytes:
+            buffer = BytesIO()
+            create_posts_pdf(
+                posts,
+                buffer,
+                load_image=self._load_image,
+                per_sheet=per_sheet,
+                contact_email=contact_email,
+                contact_phone=contact_phone,
+                additions=additions,
+                on_progress=lambda done, total: progress(done / max(1, total)),
+            )
+            return buffer.getvalue()
+
+        post_keys = [queue.cache_key(post, contact_email, contact_phone, additions) for post in posts]
+        raw = json.dumps([post_keys, per_sheet]).encode("utf-8")
+        key = hashlib.blake2b(raw, digest_size=16).hexdigest()
+        return queue.submit(key, f"meldungen_{len(posts)}", render)
+
+    def _load_image(self, image_url: str) -> Optional[bytes]:
+        """Lädt ein Post-Bild anhand seiner URL aus dem Storage."""
+        storage_service = PostStorageService(self.sb)
+        storage_path = storage_service.extract_storage_path_from_url(image_url)
+        if not storage_path:
+            return None
+        return storage_service.download_post_image(storage_path)
+
+
+# Globale Instanz (Singleton)
+_pdf_job_queue: Optional[PdfJobQueue] = None
+_pdf_job_queue_lock = threading.Lock()
+
+
+def get_pdf_job_queue() -> PdfJobQueue:
+    """Gibt die globale PDF-Job-Queue zurück."""
+    global _pdf_job_queue
+    with _pdf_job_queue_lock:
+        if _pdf_job_queue is None:
+            _pdf_job_queue = PdfJobQueue()
+        return _pdf_job_queue
@@ -1,14 +1,25 @@
-"""Post CRUD-Operationen - Erstellen, Lesen, Aktualisieren, Löschen."""
+"""Post CRUD-Operationen - Erstellen, Lesen, Aktualisieren, Löschen (synchron und async)."""
 
 from __future__ import annotations
 
-from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
 
-from supabase import Client
+from supabase import AsyncClient, Client
 
 from utils.logging_config import get_logger
+from utils.metrics import timed
 from utils.constants import DEFAULT_POSTS_LIMIT
-from .queries import POST_SELECT_FULL, POST_SELECT_MY_POSTS
+from .queries import (
+    all_posts_query,
+    create_post_full_rpc,
+    delete_post_full_rpc,
+    delete_storage_cleanup_query,
+    my_posts_query,
+    pending_storage_cleanup_query,
+    post_by_id_query,
+)
+from .search import invalidate_search_cache
+from .storage_cleanup import get_storage_cleanup_queue
 
 if TYPE_CHECKING:
     from .post_image import PostStorageService
@@ -16,6 +27,81 @@ if TYPE_CHECKING:
 logger = get_logger(__name__)
 
 
+def _validate_create_full(
+    payload: Dict[str, Any],
+    color_ids: Optional[List[int]],
+    image_urls: Optional[List[str]],
+) -> Tuple[List[int], List[str]]:
+    """Prüft die Eingaben von ``create_full`` und gibt bereinigte Farb-IDs und URLs zurück.
+
+    Raises:
+        ValueError: Wenn payload oder eine Farb-ID ungültig ist
+    """
+    if not payload or not isinstance(payload, dict):
+        raise ValueError("Payload darf nicht leer sein und muss ein Dictionary sein.")
+    colors = list(dict.fromkeys(color_ids or []))
+    if any(not isinstance(color_id, int) or color_id <= 0 for color_id in colors):
+        raise ValueError("color_id muss eine positive Zahl sein")
+    urls = [url.strip() for url in (image_urls or []) if url and url.strip()]
+    return colors, urls
+
+
+def _schedule_image_cleanup(
+    sb: Any,
+    storage_service: "PostStorageService",
+    post_id: str,
+    image_urls: Optional[List[str]],
+) -> None:
+    """Übergibt die Storage-Dateien eines gelöschten Posts an die Storage-Bereinigung.
+
+    Nach dem Entfernen wird die Zeile in ``storage_cleanup`` gelöscht; ``sb``
+    kann ein synchroner oder async Client sein.
+    """
+    paths = [
+        path
+        for path in (storage_service.extract_storage_path_from_url(url) for url in image_urls or [])
+        if path
+    ]
+    get_storage_cleanup_queue().submit(
+        sb,
+        storage_service.STORAGE_BUCKET,
+        paths,
+        context=f"Post {post_id}",
+        key=str(post_id),
+        on_done=lambda: delete_storage_cleanup_query(sb, post_id).execute(),
+    )
+
+
+def resume_image_cleanup(sb: Client) -> int:
+    """Stellt übrig gebliebene Storage-Bereinigungen des angemeldeten Benutzers erneut ein.
+
+    Wird nach der Anmeldung aufgerufen: Aufträge, die ein Neustart, eine
+    Abmeldung oder ein Storage-Ausfall unterbrochen hat, stehen noch in
+    ``storage_cleanup``.
+
+    Args:
+        sb: Supabase Client der angemeldeten Session
+
+    Returns:
+        Anzahl wieder eingestellter Aufträge
+    """
+    try:
+        rows = pending_storage_cleanup_query(sb).execute().data or []
+    except Exception as e:  # noqa: BLE001
+        logger.warning(f"Offene Storage-Bereinigungen konnten nicht geladen werden: {e}")
+        return 0
+    if not rows:
+        return 0
+
+    from .post_image import PostStorageService
+
+    storage_service = PostStorageService(sb)
+    for row in rows:
+        _schedule_image_cleanup(sb, storage_service, row["post_id"], row.get("image_urls"))
+    logger.info(f"{len(rows)} offene Storage-Bereinigungen wieder aufgenommen")
+    return len(rows)
+
+
 class PostService:
     """Service-Klasse für Post CRUD-Operationen."""
 
@@ -37,6 +123,7 @@ class PostService:
         else:
             self._storage_service = storage_service
     
+    @timed("post.create")
     def create(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Erstellt einen neuen Post und gibt ihn zurück.
 
@@ -58,10 +145,48 @@ class PostService:
 
             if not res.data:
                 raise RuntimeError("Keine Daten in der Response")
+            invalidate_search_cache()
             return res.data[0]
         except Exception as e:  # noqa: BLE001
             raise RuntimeError(f"Fehler beim Erstellen der Meldung: {str(e)}")
     
+    @timed("post.create_full")
+    def create_full(
+        self,
+        payload: Dict[str, Any],
+        color_ids: Optional[List[int]] = None,
+        image_urls: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Erstellt einen Post mit Farben und Bildern in einem Roundtrip.
+
+        Nutzt die Datenbankfunktion ``create_post_full``: Post, ``post_color``
+        und ``post_image`` werden in einer Transaktion angelegt. Schlägt ein Teil
+        fehl, bleibt nichts zurück. Die Bilder müssen bereits hochgeladen sein.
+
+        Args:
+            payload: Dictionary mit Post-Daten
+            color_ids: IDs der Farben
+            image_urls: Öffentliche URLs der hochgeladenen Bilder
+
+        Returns:
+            Erstellter Post als Dictionary, ``post_image`` enthält die Bild-Zeilen (id, url)
+
+        Raises:
+            ValueError: Wenn payload oder color_ids ungültig sind
+            RuntimeError: Bei Fehler beim Erstellen
+        """
+        colors, urls = _validate_create_full(payload, color_ids, image_urls)
+
+        try:
+            res = create_post_full_rpc(self.sb, payload, colors, urls).execute()
+            if not res.data:
+                raise RuntimeError("Keine Daten in der Response")
+            invalidate_search_cache()
+            return res.data
+        except Exception as e:  # noqa: BLE001
+            raise RuntimeError(f"Fehler beim Erstellen der Meldung: {str(e)}")
+
+    @timed("post.update")
     def update(self, post_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Aktualisiert einen bestehenden Post.
 
@@ -85,94 +210,44 @@ class PostService:
             res = self.sb.table("post").update(payload).eq("id", post_id).execute()
             if not res.data:
                 raise RuntimeError("Keine Daten in der Response")
+            invalidate_search_cache()
             return res.data[0]
         except Exception as e:  # noqa: BLE001
             raise RuntimeError(f"Fehler beim Aktualisieren der Meldung: {str(e)}")
     
+    @timed("post.delete")
     def delete(self, post_id: str) -> bool:
         """Löscht einen Post komplett inkl. Bilder und verknüpfter Daten.
-        
-        Hinweis: Da Supabase Python Client keine expliziten Transaktionen unterstützt,
-        werden die Operationen sequenziell ausgeführt. Bei Fehlern wird versucht,
-        einen konsistenten Zustand zu gewährleisten.
+
+        Die Datenbankfunktion ``delete_post_full`` löscht Post, Bild- und
+        Farb-Zeilen in einer Transaktion und gibt die Bild-URLs zurück. Die
+        Storage-Dateien entfernt danach die Storage-Bereinigung im Hintergrund
+        (eine ``remove``-Anfrage, Wiederholung bei Fehlern); der Aufrufer wartet
+        nur auf den einen Roundtrip.
 
         Args:
             post_id: ID des zu löschenden Posts
 
         Returns:
-            True bei Erfolg, False bei Fehler
+            True bei Erfolg, False bei Fehler oder wenn der Post nicht existiert
         """
         if not post_id or not isinstance(post_id, str) or not post_id.strip():
             logger.warning("Versuch, Post ohne gültige ID zu löschen")
             return False
-        
-        # Prüfe ob Post existiert
+
         try:
-            post_check = self.sb.table("post").select("id").eq("id", post_id).execute()
-            if not post_check.data:
-                logger.warning(f"Post {post_id} existiert nicht")
-                return False
+            res = delete_post_full_rpc(self.sb, post_id).execute()
         except Exception as e:  # noqa: BLE001
-            logger.error(f"Fehler beim Prüfen der Post-Existenz {post_id}: {e}", exc_info=True)
+            logger.error(f"Fehler beim Löschen von Post {post_id}: {e}", exc_info=True)
             return False
-        
-        # Sammle Informationen für Rollback
-        deleted_storage_files = []
-        deleted_images = False
-        deleted_colors = False
-        
-        try:
-            # 1. Hole die Bild-URLs vor dem Löschen
-            images_res = self.sb.table("post_image").select("url").eq("post_id", post_id).execute()
-            image_urls = [img["url"] for img in (images_res.data or [])]
-            
-            # 2. Lösche Bilder aus Storage 
-            for url in image_urls:
-                try:
-                    file_path = self._storage_service.extract_storage_path_from_url(url)
-                    if file_path:
-                        self._storage_service.remove_post_image(file_path)
-                        deleted_storage_files.append(file_path)
-                        logger.debug(f"Storage-Datei gelöscht: {file_path}")
-                except Exception as e:  # noqa: BLE001
-                    logger.warning(f"Konnte Storage-Datei nicht löschen ({url}): {e}")
-            
-            # 3. Lösche verknüpfte Daten aus der Datenbank
-            # Reihenfolge: Zuerst abhängige Tabellen, dann Haupttabelle
-            try:
-                self.sb.table("post_image").delete().eq("post_id", post_id).execute()
-                deleted_images = True
-                logger.debug(f"Post-Images für Post {post_id} gelöscht")
-            except Exception as e:  # noqa: BLE001
-                logger.error(f"Fehler beim Löschen der Post-Images für Post {post_id}: {e}", exc_info=True)
-                raise
-            
-            try:
-                self.sb.table("post_color").delete().eq("post_id", post_id).execute()
-                deleted_colors = True
-                logger.debug(f"Post-Farben für Post {post_id} gelöscht")
-            except Exception as e:  # noqa: BLE001
-                logger.error(f"Fehler beim Löschen der Post-Farben für Post {post_id}: {e}", exc_info=True)
-                raise
-            
-            # 4. Lösche den Post selbst 
-            try:
-                self.sb.table("post").delete().eq("id", post_id).execute()
-                logger.info(f"Post {post_id} erfolgreich gelöscht")
-                return True
-            except Exception as e:  # noqa: BLE001
-                logger.error(f"Fehler beim Löschen des Posts {post_id}: {e}", exc_info=True)
-                raise
-            
-        except Exception as e:  # noqa: BLE001
-            logger.error(
-                f"Fehler beim Löschen von Post {post_id}. "
-                f"Status: Images={deleted_images}, Colors={deleted_colors}, "
-                f"Storage={len(deleted_storage_files)} Dateien gelöscht. "
-                f"Fehler: {e}",
-                exc_info=True
-            )
+        if not res.data:
+            logger.warning(f"Post {post_id} existiert nicht")
             return False
+
+        invalidate_search_cache()
+        _schedule_image_cleanup(self.sb, self._storage_service, post_id, res.data.get("image_urls"))
+        logger.info(f"Post {post_id} erfolgreich gelöscht")
+        return True
     
     def get_by_id(self, post_id: str) -> Optional[Dict[str, Any]]:
         """Holt einen Post anhand seiner ID.
@@ -188,7 +263,7 @@ class PostService:
             return None
 
         try:
-            res = self.sb.table("post").select(POST_SELECT_FULL).eq("id", post_id).execute()
+            res = post_by_id_query(self.sb, post_id).execute()
             return res.data[0] if res.data else None
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Laden des Posts {post_id}: {e}", exc_info=True)
@@ -208,12 +283,13 @@ class PostService:
             limit = DEFAULT_POSTS_LIMIT
 
         try:
-            res = self.sb.table("post").select(POST_SELECT_FULL).limit(limit).execute()
+            res = all_posts_query(self.sb, limit).execute()
             return res.data or []
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Laden der Posts (Limit: {limit}): {e}", exc_info=True)
             return []
 
+    @timed("get_my_posts")
     def get_my_posts(self, user_id: str) -> List[Dict[str, Any]]:
         """Lädt alle Meldungen eines bestimmten Benutzers.
         
@@ -228,15 +304,162 @@ class PostService:
             return []
 
         try:
-            res = (
-                self.sb.table("post")
-                .select(POST_SELECT_MY_POSTS)
-                .eq("user_id", user_id)
-                .order("created_at", desc=True)
-                .execute()
-            )
+            res = my_posts_query(self.sb, user_id).execute()
+            return res.data or []
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Laden der eigenen Meldungen für User {user_id}: {e}", exc_info=True)
+            return []
+
+
+class AsyncPostService:
+    """Async-Variante von ``PostService`` auf dem ``AsyncClient``."""
+
+    def __init__(
+        self,
+        sb: AsyncClient,
+        storage_service: Optional["PostStorageService"] = None,
+    ) -> None:
+        """Initialisiert den Service mit dem async Supabase-Client.
+
+        Args:
+            sb: Async Supabase Client-Instanz
+            storage_service: Optional PostStorageService (nur für die Auflösung
+                von Bild-URLs zu Storage-Pfaden)
+        """
+        self.sb = sb
+        if storage_service is None:
+            from .post_image import PostStorageService
+            self._storage_service = PostStorageService(sb)
+        else:
+            self._storage_service = storage_service
+
+    @timed("post.create")
+    async def create(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Erstellt einen neuen Post (siehe ``PostService.create``).
+
+        Raises:
+            ValueError: Wenn payload ungültig ist
+            RuntimeError: Bei Fehler beim Erstellen
+        """
+        if not payload or not isinstance(payload, dict):
+            raise ValueError("Payload darf nicht leer sein und muss ein Dictionary sein.")
+
+        try:
+            res = await self.sb.table("post").insert(payload).execute()
+            if not res.data:
+                raise RuntimeError("Keine Daten in der Response")
+            invalidate_search_cache()
+            return res.data[0]
+        except Exception as e:  # noqa: BLE001
+            raise RuntimeError(f"Fehler beim Erstellen der Meldung: {str(e)}")
+
+    @timed("post.create_full")
+    async def create_full(
+        self,
+        payload: Dict[str, Any],
+        color_ids: Optional[List[int]] = None,
+        image_urls: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Erstellt einen Post mit Farben und Bildern in einem Roundtrip (siehe ``PostService.create_full``).
+
+        Raises:
+            ValueError: Wenn payload oder color_ids ungültig sind
+            RuntimeError: Bei Fehler beim Erstellen
+        """
+        colors, urls = _validate_create_full(payload, color_ids, image_urls)
+
+        try:
+            res = await create_post_full_rpc(self.sb, payload, colors, urls).execute()
+            if not res.data:
+                raise RuntimeError("Keine Daten in der Response")
+            invalidate_search_cache()
+            return res.data
+        except Exception as e:  # noqa: BLE001
+            raise RuntimeError(f"Fehler beim Erstellen der Meldung: {str(e)}")
+
+    @timed("post.update")
+    async def update(self, post_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Aktualisiert einen bestehenden Post (siehe ``PostService.update``).
+
+        Raises:
+            ValueError: Wenn post_id oder payload ungültig sind
+            RuntimeError: Bei Fehler beim Aktualisieren
+        """
+        if not post_id or not isinstance(post_id, str) or not post_id.strip():
+            raise ValueError("post_id darf nicht leer sein.")
+        if not payload or not isinstance(payload, dict):
+            raise ValueError("Payload darf nicht leer sein und muss ein Dictionary sein.")
+
+        try:
+            res = await self.sb.table("post").update(payload).eq("id", post_id).execute()
+            if not res.data:
+                raise RuntimeError("Keine Daten in der Response")
+            invalidate_search_cache()
+            return res.data[0]
+        except Exception as e:  # noqa: BLE001
+            raise RuntimeError(f"Fehler beim Aktualisieren der Meldung: {str(e)}")
+
+    @timed("post.delete")
+    async def delete(self, post_id: str) -> bool:
+        """Löscht einen Post inkl. Bilder und verknüpfter Daten (siehe ``PostService.delete``).
+
+        Returns:
+            True bei Erfolg, False bei Fehler oder wenn der Post nicht existiert
+        """
+        if not post_id or not isinstance(post_id, str) or not post_id.strip():
+            logger.warning("Versuch, Post ohne gültige ID zu löschen")
+            return False
+
+        try:
+            res = await delete_post_full_rpc(self.sb, post_id).execute()
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Löschen von Post {post_id}: {e}", exc_info=True)
+            return False
+        if not res.data:
+            logger.warning(f"Post {post_id} existiert nicht")
+            return False
+
+        invalidate_search_cache()
+        _schedule_image_cleanup(self.sb, self._storage_service, post_id, res.data.get("image_urls"))
+        logger.info(f"Post {post_id} erfolgreich gelöscht")
+        return True
+
+    async def get_by_id(self, post_id: str) -> Optional[Dict[str, Any]]:
+        """Holt einen Post anhand seiner ID (None bei Fehler)."""
+        if not post_id or not isinstance(post_id, str) or not post_id.strip():
+            logger.warning("Ungültige post_id beim Laden eines Posts")
+            return None
+
+        try:
+            res = await post_by_id_query(self.sb, post_id).execute()
+            return res.data[0] if res.data else None
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Laden des Posts {post_id}: {e}", exc_info=True)
+            return None
+
+    async def get_all(self, limit: int = DEFAULT_POSTS_LIMIT) -> List[Dict[str, Any]]:
+        """Holt alle Posts mit Relationen (leere Liste bei Fehler)."""
+        if not isinstance(limit, int) or limit <= 0:
+            logger.warning(f"Ungültiges Limit für get_all: {limit}. Verwende Standardlimit.")
+            limit = DEFAULT_POSTS_LIMIT
+
+        try:
+            res = await all_posts_query(self.sb, limit).execute()
+            return res.data or []
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Laden der Posts (Limit: {limit}): {e}", exc_info=True)
+            return []
+
+    @timed("get_my_posts")
+    async def get_my_posts(self, user_id: str) -> List[Dict[str, Any]]:
+        """Lädt alle Meldungen eines Benutzers (leere Liste bei Fehler)."""
+        if not user_id or not isinstance(user_id, str) or not user_id.strip():
+            logger.warning("Ungültige user_id beim Laden eigener Meldungen")
+            return []
+
+        try:
+            res = await my_posts_query(self.sb, user_id).execute()
             return res.data or []
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Laden der eigenen Meldungen für User {user_id}: {e}", exc_info=True)
             return []
-    
@@ -13,6 +13,7 @@ from PIL import Image
 import io
 
 from utils.logging_config import get_logger
+from utils.metrics import timed
 
 logger = get_logger(__name__)
 
@@ -146,6 +147,7 @@ class PostStorageService:
             logger.warning(f"Fehler beim Lesen des lokalen Bildes: {e}")
             return None
 
+    @timed("upload_post_image")
     def upload_post_image(
         self,
         file_path: str,
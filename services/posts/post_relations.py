@@ -2,11 +2,12 @@
 
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Dict, List, Optional
 
 from supabase import Client
 
 from utils.logging_config import get_logger
+from .search import invalidate_search_cache
 
 logger = get_logger(__name__)
 
@@ -43,6 +44,7 @@ class PostRelationsService:
                 "color_id": color_id,
             }).execute()
             logger.debug(f"Farbe {color_id} zu Post {post_id} hinzugefügt")
+            invalidate_search_cache()
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Hinzufügen der Farbe {color_id} zu Post {post_id}: {e}", exc_info=True)
             raise
@@ -91,17 +93,21 @@ class PostRelationsService:
                     raise
             else:  
                 logger.debug(f"Keine neuen Farben für Post {post_id}, nur alte gelöscht")
+            invalidate_search_cache()
                 
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Aktualisieren der Farben für Post {post_id}: {e}", exc_info=True)
             raise
     
-    def add_photo(self, post_id: str, photo_url: str) -> None:
+    def add_photo(self, post_id: str, photo_url: str) -> Optional[Dict[str, Any]]:
         """Speichert eine Foto-URL für einen Post.
 
         Args:
             post_id: ID des Posts
             photo_url: URL des hochgeladenen Fotos
+
+        Returns:
+            Eingefügte post_image-Zeile (inkl. ID) oder None
         
         Raises:
             ValueError: Wenn post_id oder photo_url ungültig sind
@@ -112,11 +118,13 @@ class PostRelationsService:
             raise ValueError("photo_url darf nicht leer sein")
         
         try:
-            self.sb.table("post_image").insert({
+            res = self.sb.table("post_image").insert({
                 "post_id": post_id,
                 "url": photo_url.strip(),
             }).execute()
             logger.debug(f"Foto-URL für Post {post_id} gespeichert")
+            invalidate_search_cache()
+            return res.data[0] if res.data else None
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Speichern der Foto-URL für Post {post_id}: {e}", exc_info=True)
             raise
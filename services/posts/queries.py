@@ -4,6 +4,12 @@ Enthält wiederverwendbare Select-Statements und Query-Bausteine
 für konsistente Datenbankabfragen.
 """
 
+from typing import Any, Dict, List, Tuple
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
 # Vollständiges Post-Select mit allen Relationen
 POST_SELECT_FULL = """
     id, headline, description, location_text, location_lat, location_lon,
@@ -65,6 +71,17 @@ POST_SELECT_MY_POSTS = """
     post_color(color(id, name))
 """
 
+# Leichtgewichtiges Post-Select für Kartenmarker (Ausschnittsabfragen)
+POST_SELECT_MARKER = """
+    id,
+    headline,
+    location_lat,
+    location_lon,
+    species_id,
+    post_status(id, name),
+    post_image(url)
+"""
+
 # Minimales Post-Select (nur ID und Bilder)
 POST_SELECT_MINIMAL = """
     id,
@@ -75,3 +92,252 @@ POST_SELECT_MINIMAL = """
 COMMENT_SELECT_FULL = """
     id, post_id, user_id, content, created_at, updated_at, is_deleted, parent_comment_id
 """
+
+# User-Select für öffentliche Profildaten (Name, Bild)
+USER_SELECT_PROFILE = "id, display_name, profile_image"
+
+# Embedding-Select für den Ähnlichkeitsindex (inkl. Filter-Metadaten des Posts)
+EMBEDDING_SELECT_INDEX = """
+    id, post_id, embedding,
+    post(species_id, location_lat, location_lon, is_active, post_status(name))
+"""
+
+# Embedding-Select für den Abgleich des Index (ohne Vektor)
+EMBEDDING_SELECT_LISTING = """
+    id, post_id,
+    post(species_id, location_lat, location_lon, is_active, post_status(name))
+"""
+
+# Embedding-Select für neu hinzugekommene Vektoren
+EMBEDDING_SELECT_VECTOR = "id, post_id, embedding"
+
+
+# ════════════════════════════════════════════════════════════════════
+# QUERY-BAUSTEINE
+# ════════════════════════════════════════════════════════════════════
+# Die Funktionen bauen Abfragen nur auf; ausgeführt werden sie vom Aufrufer
+# (``.execute()`` bzw. ``await ....execute()``). Dadurch nutzen synchrone und
+# async Services (Client bzw. AsyncClient) dieselben Abfragen.
+
+def apply_id_filter(query: Any, filter_value: Any, column_name: str, filter_name: str) -> Any:
+    """Wendet einen ID-basierten Filter an ("alle"/leer = kein Filter).
+
+    Args:
+        query: Supabase Query-Objekt
+        filter_value: Filter-Wert (kann int, str oder None sein)
+        column_name: Name der Datenbank-Spalte
+        filter_name: Name des Filters (für Logging)
+
+    Returns:
+        Query-Objekt mit angewendetem Filter
+    """
+    if not filter_value or filter_value == "alle":
+        return query
+
+    try:
+        filter_id = int(filter_value)
+        if filter_id > 0:
+            return query.eq(column_name, filter_id)
+    except (ValueError, TypeError):
+        logger.warning(f"Ungültiger Filter-{filter_name}: {filter_value}")
+
+    return query
+
+
+def apply_nullable_filter(query: Any, filter_value: Any, column_name: str, filter_name: str) -> Any:
+    """Wendet einen Filter an, der auch "keine_angabe" (NULL) unterstützt.
+
+    Args:
+        query: Supabase Query-Objekt
+        filter_value: Filter-Wert (kann int, str "keine_angabe", oder None sein)
+        column_name: Name der Datenbank-Spalte
+        filter_name: Name des Filters (für Logging)
+
+    Returns:
+        Query-Objekt mit angewendetem Filter
+    """
+    if filter_value == "keine_angabe":
+        return query.is_(column_name, "null")
+    return apply_id_filter(query, filter_value, column_name, filter_name)
+
+
+def apply_post_filters(query: Any, filters: Dict[str, Any]) -> Any:
+    """Wendet die Suchfilter (typ, art, geschlecht, rasse) auf eine Post-Abfrage an."""
+    query = apply_id_filter(query, filters.get("typ"), "post_status_id", "Typ")
+    query = apply_id_filter(query, filters.get("art"), "species_id", "Art")
+    query = apply_nullable_filter(query, filters.get("geschlecht"), "sex_id", "Geschlecht")
+    query = apply_nullable_filter(query, filters.get("rasse"), "breed_id", "Rasse")
+    return query
+
+
+def search_posts_query(sb: Any, filters: Dict[str, Any], sort_option: str, limit: int) -> Any:
+    """Post-Suche mit Filtern; Event-Datum und Entfernung sortiert der Aufrufer in Python.
+
+    Args:
+        sb: Supabase Client (synchron oder async)
+        filters: Dictionary mit Filterwerten (typ, art, geschlecht, rasse)
+        sort_option: Sortier-Option (nur ``created_at_asc`` sortiert aufsteigend)
+        limit: Maximale Anzahl der Posts
+    """
+    query = sb.table("post").select(POST_SELECT_FULL)
+    query = query.order("created_at", desc=sort_option != "created_at_asc")
+    return apply_post_filters(query, filters).limit(limit)
+
+
+def markers_query(
+    sb: Any,
+    select: str,
+    bbox: Tuple[float, float, float, float],
+    filters: Dict[str, Any],
+    limit: int,
+    offset: int = 0,
+) -> Any:
+    """Kartenmarker in einer Bounding Box (eine Seite, neueste zuerst).
+
+    Args:
+        sb: Supabase Client (synchron oder async)
+        select: Select-Statement (``POST_SELECT_MARKER`` plus Zusatzfelder)
+        bbox: (west, süd, ost, nord) in Grad
+        filters: Dictionary mit Filterwerten
+        limit: Maximale Anzahl Marker je Seite
+        offset: Anzahl zu überspringender Zeilen (Seitenweise Laden)
+    """
+    west, south, east, north = bbox
+    query = (
+        sb.table("post")
+        .select(select)
+        .gte("location_lat", south)
+        .lte("location_lat", north)
+    )
+    # Ausschnitt über die Datumsgrenze: keine Längengrad-Einschränkung
+    if west <= east:
+        query = query.gte("location_lon", west).lte("location_lon", east)
+    # id als zweites Sortierkriterium hält die Seiten stabil
+    query = apply_post_filters(query, filters).order("created_at", desc=True).order("id")
+    return query.range(offset, offset + limit - 1)
+
+
+def post_by_id_query(sb: Any, post_id: str) -> Any:
+    """Ein Post mit allen Relationen."""
+    return sb.table("post").select(POST_SELECT_FULL).eq("id", post_id)
+
+
+def all_posts_query(sb: Any, limit: int) -> Any:
+    """Posts mit allen Relationen (ohne Filter)."""
+    return sb.table("post").select(POST_SELECT_FULL).limit(limit)
+
+
+def my_posts_query(sb: Any, user_id: str) -> Any:
+    """Meldungen eines Benutzers, neueste zuerst."""
+    return (
+        sb.table("post")
+        .select(POST_SELECT_MY_POSTS)
+        .eq("user_id", user_id)
+        .order("created_at", desc=True)
+    )
+
+
+def favorite_ids_query(sb: Any, user_id: str) -> Any:
+    """Post-IDs der Favoriten eines Benutzers (nur ``post_id``)."""
+    return sb.table("favorite").select("post_id").eq("user_id", user_id)
+
+
+def favorite_posts_query(sb: Any, post_ids: List[str]) -> Any:
+    """Favorisierte Posts für die Favoriten-Ansicht, neueste zuerst."""
+    return (
+        sb.table("post")
+        .select(POST_SELECT_FAVORITES)
+        .in_("id", post_ids)
+        .order("created_at", desc=True)
+    )
+
+
+def favorite_query(sb: Any, user_id: str, post_id: str) -> Any:
+    """Ein Favorit (höchstens eine Zeile)."""
+    return (
+        sb.table("favorite")
+        .select("id")
+        .eq("user_id", user_id)
+        .eq("post_id", post_id)
+        .maybe_single()
+    )
+
+
+def comments_query(sb: Any, post_id: str) -> Any:
+    """Nicht gelöschte Kommentare eines Posts, neueste zuerst."""
+    return (
+        sb.table("comment")
+        .select(COMMENT_SELECT_FULL)
+        .eq("post_id", post_id)
+        .eq("is_deleted", False)
+        .order("created_at", desc=True)
+    )
+
+
+def comment_reactions_query(sb: Any, comment_ids: List[int]) -> Any:
+    """Emoji-Reaktionen mehrerer Kommentare."""
+    return (
+        sb.table("comment_reaction")
+        .select("comment_id, emoji, user_id")
+        .in_("comment_id", comment_ids)
+    )
+
+
+def user_reaction_query(sb: Any, comment_id: int, user_id: str, emoji: str) -> Any:
+    """Reaktion eines Benutzers mit einem Emoji auf einen Kommentar."""
+    return (
+        sb.table("comment_reaction")
+        .select("id")
+        .eq("comment_id", comment_id)
+        .eq("user_id", str(user_id))
+        .eq("emoji", emoji)
+    )
+
+
+def user_profiles_query(sb: Any, user_ids: List[str]) -> Any:
+    """Öffentliche Profildaten (Name, Bild) mehrerer Benutzer."""
+    return (
+        sb.table("user")
+        .select(USER_SELECT_PROFILE)
+        .in_("id", user_ids)
+    )
+
+
+def create_post_full_rpc(
+    sb: Any,
+    payload: Dict[str, Any],
+    color_ids: List[int],
+    image_urls: List[str],
+) -> Any:
+    """Post mit Farben und Bildern in einer Transaktion anlegen (``create_post_full``).
+
+    Args:
+        sb: Supabase Client (synchron oder async)
+        payload: Post-Daten (Spalten von ``post``)
+        color_ids: IDs der Farben
+        image_urls: Öffentliche URLs bereits hochgeladener Bilder
+    """
+    return sb.rpc("create_post_full", {
+        "p_post": payload,
+        "p_color_ids": color_ids,
+        "p_image_urls": image_urls,
+    })
+
+
+def delete_post_full_rpc(sb: Any, post_id: str) -> Any:
+    """Post mit Bildern und Farben in einer Transaktion löschen (``delete_post_full``).
+
+    Die Antwort enthält die URLs der gelöschten Bilder (``image_urls``) oder ist
+    leer, wenn der Post nicht existiert.
+    """
+    return sb.rpc("delete_post_full", {"p_post_id": post_id})
+
+
+def pending_storage_cleanup_query(sb: Any) -> Any:
+    """Übrig gebliebene Storage-Bereinigungen (RLS: nur die des angemeldeten Benutzers)."""
+    return sb.table("storage_cleanup").select("post_id, image_urls")
+
+
+def delete_storage_cleanup_query(sb: Any, post_id: str) -> Any:
+    """Zeile einer erledigten Storage-Bereinigung löschen."""
+    return sb.table("storage_cleanup").delete().eq("post_id", post_id)
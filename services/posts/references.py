@@ -1,13 +1,22 @@
-"""Service für Referenzdaten-Management (Tierarten, Rassen, Farben, etc.)."""
+"""Service für Referenzdaten-Management (Tierarten, Rassen, Farben, etc.).
+
+Neben dem Cache je Instanz werden die Tabellen im gemeinsamen Speicher
+(``services.shared_store``) abgelegt, damit Sessions und Worker-Prozesse
+sie nur einmal je ``REFERENCE_CACHE_TTL`` laden.
+"""
 
 from __future__ import annotations
 
 from supabase import Client
 from typing import List, Dict, Any, Optional
+from services.shared_store import get_shared_store
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Lebensdauer der Referenzdaten im gemeinsamen Speicher (Sekunden)
+REFERENCE_CACHE_TTL = 600.0
+
 
 class ReferenceService:
     """Service-Klasse für das Laden von Post-Referenzdaten aus der Datenbank."""
@@ -26,6 +35,27 @@ class ReferenceService:
         self._colors: Optional[List[Dict[str, Any]]] = None
         self._sex: Optional[List[Dict[str, Any]]] = None
     
+    def _load_table(self, table: str, use_cache: bool) -> List[Dict[str, Any]]:
+        """Lädt eine Referenztabelle (bevorzugt aus dem gemeinsamen Speicher).
+
+        Args:
+            table: Name der Tabelle
+            use_cache: False erzwingt das Laden aus der Datenbank
+
+        Returns:
+            Liste der Zeilen
+        """
+        store = get_shared_store()
+        key = f"reference:{table}"
+        if use_cache:
+            rows = store.get(key)
+            if rows is not None:
+                return rows
+        res = self.sb.table(table).select("*").execute()
+        rows = res.data or []
+        store.set(key, rows, ttl=REFERENCE_CACHE_TTL)
+        return rows
+
     def get_post_statuses(self, use_cache: bool = True) -> List[Dict[str, Any]]:
         """Lädt alle verfügbaren Post-Statuses/Kategorien.
 
@@ -39,8 +69,7 @@ class ReferenceService:
             return self._post_statuses
 
         try:
-            res = self.sb.table("post_status").select("*").execute()
-            self._post_statuses = res.data or []
+            self._post_statuses = self._load_table("post_status", use_cache)
             return self._post_statuses
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Laden von Meldungstypen: {e}", exc_info=True)
@@ -59,8 +88,7 @@ class ReferenceService:
             return self._species
 
         try:
-            res = self.sb.table("species").select("*").execute()
-            self._species = res.data or []
+            self._species = self._load_table("species", use_cache)
             return self._species
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Laden von Tierarten: {e}", exc_info=True)
@@ -80,9 +108,8 @@ class ReferenceService:
             return self._breeds_by_species
 
         try:
-            res = self.sb.table("breed").select("*").execute()
             grouped: Dict[int, List[Dict[str, Any]]] = {}
-            for breed in res.data or []:
+            for breed in self._load_table("breed", use_cache):
                 sid = breed.get("species_id")
                 if sid is not None and isinstance(sid, int):
                     if sid not in grouped:
@@ -107,8 +134,7 @@ class ReferenceService:
             return self._colors
 
         try:
-            res = self.sb.table("color").select("*").execute()
-            self._colors = res.data or []
+            self._colors = self._load_table("color", use_cache)
             return self._colors
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Laden von Farben: {e}", exc_info=True)
@@ -127,8 +153,7 @@ class ReferenceService:
             return self._sex
 
         try:
-            res = self.sb.table("sex").select("*").execute()
-            self._sex = res.data or []
+            self._sex = self._load_table("sex", use_cache)
             return self._sex
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Laden von Geschlechtern: {e}", exc_info=True)
@@ -1,12 +1,27 @@
-"""Service für Post-Suche mit Filtern."""
+"""Service für Post-Suche mit Filtern.
+
+Die Datenbankzeilen einer Suche (Filter, Sortierung, Limit) werden kurz im
+gemeinsamen Speicher (``services.shared_store``) gehalten, sodass gleiche
+Abfragen anderer Sessions und Worker nicht erneut die Datenbank treffen.
+Schreibende Post-Operationen rufen ``invalidate_search_cache()`` auf.
+
+``AsyncSearchService`` bietet dieselben Abfragen auf dem ``AsyncClient`` an
+(gleiche Query-Bausteine aus ``queries.py``, gleiche Python-Filter).
+"""
 
 from __future__ import annotations
 
-from typing import Optional, Dict, List, Set, Any, TYPE_CHECKING
-from supabase import Client
+import hashlib
+import json
+import math
+import os
+from typing import Optional, Dict, List, Set, Any, Sequence, Tuple, TYPE_CHECKING
+from supabase import AsyncClient, Client
 
+from services.shared_store import get_shared_store
 from utils.logging_config import get_logger
-from utils.constants import MAX_POSTS_LIMIT, MAX_SEARCH_QUERY_LENGTH
+from utils.metrics import timed
+from utils.constants import MAX_MAP_MARKERS, MAX_POSTS_LIMIT, MAX_SEARCH_QUERY_LENGTH
 from utils.validators import sanitize_string
 from .filters import (
     filter_by_search,
@@ -17,10 +32,10 @@ from .filters import (
     sort_by_event_date,
     mark_favorites,
 )
-from .queries import POST_SELECT_FULL
+from .queries import POST_SELECT_MARKER, markers_query, search_posts_query
 
 if TYPE_CHECKING:
-    from services.account.profile import ProfileService
+    from services.account.profile import AsyncProfileService, ProfileService
 
 logger = get_logger(__name__)
 
@@ -30,6 +45,186 @@ SORT_EVENT_DESC = "event_date_desc"
 SORT_EVENT_ASC = "event_date_asc"
 SORT_DISTANCE = "distance"
 
+# Lebensdauer gecachter Suchergebnisse in Sekunden (0 = aus)
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "10"))
+_SEARCH_GENERATION_KEY = "search:generation"
+# Seiten je Kartenausschnitt, solange Python-Filter Zeilen verwerfen
+MAX_MARKER_PAGES = 5
+# Kilometer je Breitengrad (Umkreis → Bounding Box)
+KM_PER_DEGREE = 111.32
+
+
+def invalidate_search_cache() -> None:
+    """Verwirft gecachte Suchergebnisse (nach Erstellen/Ändern/Löschen von Posts)."""
+    if SEARCH_CACHE_TTL > 0:
+        get_shared_store().incr(_SEARCH_GENERATION_KEY)
+
+
+def _search_cache_key(generation: int, filters: Dict[str, Any], sort_option: str, limit: int) -> str:
+    """Schlüssel für gecachte Suchzeilen (``generation`` aus ``_SEARCH_GENERATION_KEY``)."""
+    raw = json.dumps([filters, sort_option, limit], sort_keys=True, default=str)
+    return f"search:{generation}:{hashlib.blake2b(raw.encode('utf-8'), digest_size=12).hexdigest()}"
+
+
+def _filter_and_sort(
+    items: List[Dict[str, Any]],
+    search_query: Optional[str],
+    selected_colors: Optional[Set[int]],
+    sort_option: str,
+    favorite_ids: Optional[Set[str]],
+    location_lat: Optional[float],
+    location_lon: Optional[float],
+    radius_km: Optional[float],
+    location_text_filter: Optional[str],
+) -> List[Dict[str, Any]]:
+    """Wendet Suche, Farben, Ort, Sortierung und Favoritenstatus in Python an."""
+    # Suche (Python-Filter)
+    if search_query:
+        items = filter_by_search(items, search_query)
+
+    # Farben (Python-Filter)
+    if selected_colors:
+        items = filter_by_colors(items, selected_colors)
+
+    # Ort-Filter: Umkreis (Koordinaten) oder Stadtname (Text)
+    if location_lat is not None and location_lon is not None and radius_km:
+        items = filter_by_location(
+            items, location_lat, location_lon, radius_km,
+        )
+    elif location_text_filter:
+        items = filter_by_location_text(items, location_text_filter)
+
+    # Sortierung in Python (falls gewählt)
+    if sort_option == SORT_DISTANCE:
+        # Entfernungen berechnen falls noch nicht vorhanden
+        if location_lat is not None and location_lon is not None:
+            items = enrich_with_distance(items, location_lat, location_lon)
+        items.sort(key=lambda x: x.get("_distance_km", 9999))
+    elif sort_option == SORT_EVENT_DESC:
+        items = sort_by_event_date(items, desc=True)
+    elif sort_option == SORT_EVENT_ASC:
+        items = sort_by_event_date(items, desc=False)
+
+    # Favoritenstatus markieren
+    if favorite_ids is not None:
+        items = mark_favorites(items, favorite_ids)
+    return items
+
+
+def _marker_select(
+    search_query: Optional[str],
+    selected_colors: Optional[Set[int]],
+    location_text_filter: Optional[str],
+) -> str:
+    """Marker-Select; Zusatzfelder nur, wenn der jeweilige Python-Filter aktiv ist."""
+    select = POST_SELECT_MARKER.rstrip()
+    if search_query:
+        select += ", description"
+    if selected_colors:
+        select += ", post_color(color(id, name))"
+    if location_text_filter:
+        select += ", location_text"
+    return select
+
+
+def _marker_bbox(
+    bbox: Tuple[float, ...],
+    location_lat: Optional[float],
+    location_lon: Optional[float],
+    radius_km: Optional[float],
+) -> Optional[Tuple[float, float, float, float]]:
+    """Schneidet den Ausschnitt mit der Bounding Box der Umkreissuche.
+
+    Returns:
+        (west, süd, ost, nord) oder None, wenn sich beide nicht überschneiden
+    """
+    west, south, east, north = bbox
+    if location_lat is None or location_lon is None or not radius_km:
+        return west, south, east, north
+    dlat = radius_km / KM_PER_DEGREE
+    south = max(south, location_lat - dlat)
+    north = min(north, location_lat + dlat)
+    cos_lat = math.cos(math.radians(min(abs(location_lat) + dlat, 90.0)))
+    # Ausschnitt über die Datumsgrenze oder Umkreis nahe am Pol: nur Breite begrenzen
+    if west <= east and cos_lat > 0.01:
+        dlon = radius_km / (KM_PER_DEGREE * cos_lat)
+        if dlon < 180.0:
+            west = max(west, location_lon - dlon)
+            east = min(east, location_lon + dlon)
+    if south > north or (west > east and bbox[0] <= bbox[2]):
+        return None
+    return west, south, east, north
+
+
+def _marker_pages(
+    search_query: Optional[str],
+    selected_colors: Optional[Set[int]],
+    radius_km: Optional[float],
+    location_text_filter: Optional[str],
+) -> int:
+    """Anzahl Seiten, die für ``limit`` passende Marker höchstens geladen werden.
+
+    Ohne Python-Filter liefert die erste Seite bereits das Ergebnis.
+    """
+    if search_query or selected_colors or radius_km or location_text_filter:
+        return MAX_MARKER_PAGES
+    return 1
+
+
+def _to_markers(
+    items: List[Dict[str, Any]],
+    search_query: Optional[str],
+    selected_colors: Optional[Set[int]],
+    favorite_ids: Optional[Set[str]],
+    location_lat: Optional[float],
+    location_lon: Optional[float],
+    radius_km: Optional[float],
+    location_text_filter: Optional[str],
+) -> List[Dict[str, Any]]:
+    """Filtert Markerzeilen in Python und wandelt sie in Marker-Dicts um."""
+    if search_query:
+        items = filter_by_search(items, search_query)
+    if selected_colors:
+        items = filter_by_colors(items, selected_colors)
+    if location_lat is not None and location_lon is not None and radius_km:
+        items = filter_by_location(items, location_lat, location_lon, radius_km)
+    elif location_text_filter:
+        items = filter_by_location_text(items, location_text_filter)
+
+    favorite_ids = favorite_ids or set()
+    markers: List[Dict[str, Any]] = []
+    for item in items:
+        if item.get("location_lat") is None or item.get("location_lon") is None:
+            continue
+        post_status = item.get("post_status") or {}
+        images = item.get("post_image") or []
+        markers.append({
+            "id": item.get("id"),
+            "lat": float(item["location_lat"]),
+            "lon": float(item["location_lon"]),
+            "status": post_status.get("name", "") if isinstance(post_status, dict) else "",
+            "species_id": item.get("species_id"),
+            "thumb": images[0].get("url") if images else None,
+            "headline": item.get("headline", ""),
+            "is_favorite": item.get("id") in favorite_ids,
+        })
+    return markers
+
+
+def _apply_usernames(items: List[Dict[str, Any]], profiles: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Setzt user_display_name und user_profile_image aus den geladenen Profilen."""
+    for item in items:
+        profile = profiles.get(item.get("user_id"), {})
+        item["user_display_name"] = profile.get("display_name", "")
+        item["user_profile_image"] = profile.get("profile_image")
+    return items
+
+
+def _sanitize_query(search_query: Optional[str]) -> Optional[str]:
+    if not search_query:
+        return None
+    return sanitize_string(search_query, max_length=MAX_SEARCH_QUERY_LENGTH) or None
+
 
 class SearchService:
     """Service für Post-Suche mit Filtern."""
@@ -52,107 +247,29 @@ class SearchService:
         else:
             self._profile_service = profile_service
 
-    def _apply_id_filter(
-        self,
-        query: Any,
-        filter_value: Any,
-        column_name: str,
-        filter_name: str,
-    ) -> Any:
-        """Wendet einen ID-basierten Filter auf die Query an.
-        
-        Args:
-            query: Supabase Query-Objekt
-            filter_value: Filter-Wert (kann int, str oder None sein)
-            column_name: Name der Datenbank-Spalte
-            filter_name: Name des Filters (für Logging)
-        
-        Returns:
-            Query-Objekt mit angewendetem Filter
-        """
-        if not filter_value or filter_value == "alle":
-            return query
-        
-        try:
-            filter_id = int(filter_value)
-            if filter_id > 0:
-                return query.eq(column_name, filter_id)
-        except (ValueError, TypeError):
-            logger.warning(f"Ungültiger Filter-{filter_name}: {filter_value}")
-        
-        return query
-
-    def _apply_nullable_filter(
-        self,
-        query: Any,
-        filter_value: Any,
-        column_name: str,
-        filter_name: str,
-    ) -> Any:
-        """Wendet einen Filter an, der auch "keine_angabe" (NULL) unterstützt.
-        
-        Args:
-            query: Supabase Query-Objekt
-            filter_value: Filter-Wert (kann int, str "keine_angabe", oder None sein)
-            column_name: Name der Datenbank-Spalte
-            filter_name: Name des Filters (für Logging)
-        
-        Returns:
-            Query-Objekt mit angewendetem Filter
-        """
-        if not filter_value or filter_value == "alle":
-            return query
-        
-        if filter_value == "keine_angabe":
-            return query.is_(column_name, "null")
-        
-        try:
-            filter_id = int(filter_value)
-            if filter_id > 0:
-                return query.eq(column_name, filter_id)
-        except (ValueError, TypeError):
-            logger.warning(f"Ungültiger Filter-{filter_name}: {filter_value}")
-        
-        return query
-
-    def _build_query(
-        self,
-        filters: Dict[str, Any],
-        sort_option: str = SORT_CREATED_DESC,
-    ) -> Any:
-        """Baut die Supabase-Abfrage mit den aktiven Filtern.
+    def _fetch_rows(self, filters: Dict[str, Any], sort_option: str, limit: int) -> List[Dict[str, Any]]:
+        """Führt die Datenbankabfrage aus (mit kurzlebigem Cache im gemeinsamen Speicher).
 
         Args:
-            filters: Dictionary mit Filterwerten (typ, art, geschlecht, rasse)
-            sort_option: Sortier-Option (z.B. "created_at_desc", "event_date_asc")
+            filters: Dictionary mit Filterwerten
+            sort_option: Sortier-Option
+            limit: Maximale Anzahl der Posts
 
         Returns:
-            Supabase Query-Objekt mit angewendeten Filtern
+            Liste der Post-Zeilen (eigene Kopie)
         """
-        query = (
-            self.sb.table("post")
-            .select(POST_SELECT_FULL)
-        )
-
-        # Sortierung anwenden
-        if sort_option == SORT_CREATED_DESC:
-            query = query.order("created_at", desc=True)
-        elif sort_option == SORT_CREATED_ASC:
-            query = query.order("created_at", desc=False)
-        elif sort_option in (SORT_EVENT_DESC, SORT_EVENT_ASC):
-            # Für Event-Datum Sortierung: Zuerst nach created_at laden, dann in Python sortieren
-            query = query.order("created_at", desc=True)
-        else:
-            query = query.order("created_at", desc=True)
-
-        # Filter anwenden
-        query = self._apply_id_filter(query, filters.get("typ"), "post_status_id", "Typ")
-        query = self._apply_id_filter(query, filters.get("art"), "species_id", "Art")
-        query = self._apply_nullable_filter(query, filters.get("geschlecht"), "sex_id", "Geschlecht")
-        query = self._apply_nullable_filter(query, filters.get("rasse"), "breed_id", "Rasse")
-
-        return query
-
+        if SEARCH_CACHE_TTL <= 0:
+            return search_posts_query(self.sb, filters, sort_option, limit).execute().data or []
+
+        store = get_shared_store()
+        key = _search_cache_key(store.get(_SEARCH_GENERATION_KEY) or 0, filters, sort_option, limit)
+        rows = store.get(key)
+        if rows is None:
+            rows = search_posts_query(self.sb, filters, sort_option, limit).execute().data or []
+            store.set(key, rows, ttl=SEARCH_CACHE_TTL)
+        return rows
+
+    @timed("search_posts")
     def search_posts(
         self,
         filters: Dict[str, Any],
@@ -168,7 +285,7 @@ class SearchService:
     ) -> List[Dict[str, Any]]:
         """Sucht Posts mit Filtern, Suche, Farben, Umkreis und Sortierung.
 
-        Enthält Retry-Logik für transiente Netzwerkfehler (HTTP/2 Connection-Pool).
+        Transiente Netzwerkfehler wiederholt der geteilte httpx-Client (siehe services.resilience).
 
         Args:
             filters: Dictionary mit Filterwerten (typ, art, geschlecht, rasse)
@@ -185,69 +302,79 @@ class SearchService:
             Liste von Post-Dictionaries mit is_favorite Flag und user_display_name.
             Leere Liste bei Fehler.
         """
-        import time
-
         # Input-Validierung und Sanitization
-        if search_query:
-            search_query = sanitize_string(search_query, max_length=MAX_SEARCH_QUERY_LENGTH)
-            if not search_query:
-                search_query = None
+        search_query = _sanitize_query(search_query)
 
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                # Query bauen und ausführen
-                query = self._build_query(filters, sort_option)
-                result = query.limit(limit).execute()
-                items = result.data or []
-
-                # Suche (Python-Filter)
-                if search_query:
-                    items = filter_by_search(items, search_query)
-
-                # Farben (Python-Filter)
-                if selected_colors:
-                    items = filter_by_colors(items, selected_colors)
-
-                # Ort-Filter: Umkreis (Koordinaten) oder Stadtname (Text)
-                if location_lat is not None and location_lon is not None and radius_km:
-                    items = filter_by_location(
-                        items, location_lat, location_lon, radius_km,
-                    )
-                elif location_text_filter:
-                    items = filter_by_location_text(items, location_text_filter)
-
-                # Sortierung in Python (falls gewählt)
-                if sort_option == SORT_DISTANCE:
-                    # Entfernungen berechnen falls noch nicht vorhanden
-                    if location_lat is not None and location_lon is not None:
-                        items = enrich_with_distance(items, location_lat, location_lon)
-                    items.sort(key=lambda x: x.get("_distance_km", 9999))
-                elif sort_option == SORT_EVENT_DESC:
-                    items = sort_by_event_date(items, desc=True)
-                elif sort_option == SORT_EVENT_ASC:
-                    items = sort_by_event_date(items, desc=False)
-
-                # Favoritenstatus markieren
-                if favorite_ids is not None:
-                    items = mark_favorites(items, favorite_ids)
-
-                # Benutzernamen anreichern
-                items = self._enrich_with_usernames(items)
-
-                return items
+        try:
+            items = _filter_and_sort(
+                self._fetch_rows(filters, sort_option, limit),
+                search_query, selected_colors, sort_option, favorite_ids,
+                location_lat, location_lon, radius_km, location_text_filter,
+            )
+            # Benutzernamen anreichern
+            return self._enrich_with_usernames(items)
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Suchen von Posts: {e}", exc_info=True)
+            return []
+
+    @timed("get_markers_in_bbox")
+    def get_markers_in_bbox(
+        self,
+        bbox: Sequence[float],
+        filters: Dict[str, Any],
+        search_query: Optional[str] = None,
+        selected_colors: Optional[Set[int]] = None,
+        favorite_ids: Optional[Set[str]] = None,
+        location_lat: Optional[float] = None,
+        location_lon: Optional[float] = None,
+        radius_km: Optional[float] = None,
+        location_text_filter: Optional[str] = None,
+        limit: int = MAX_MAP_MARKERS,
+    ) -> List[Dict[str, Any]]:
+        """Lädt leichtgewichtige Marker für einen Kartenausschnitt.
+
+        Die Filter entsprechen ``search_posts``; geladen werden aber nur die
+        für Marker nötigen Felder, begrenzt auf die Bounding Box. Der Umkreis
+        verkleinert die Bounding Box bereits in der Abfrage; Suchbegriff, Farben
+        und Ort filtert Python, dafür werden bis zu ``MAX_MARKER_PAGES`` Seiten geladen.
+
+        Args:
+            bbox: [west, süd, ost, nord] in Grad
+            filters: Dictionary mit Filterwerten (typ, art, geschlecht, rasse)
+            search_query: Optionaler Suchbegriff
+            selected_colors: Optional Set mit Farb-IDs
+            favorite_ids: Optional Set mit Post-IDs der Favoriten
+            location_lat: Optional Breitengrad des Suchzentrums (Umkreissuche)
+            location_lon: Optional Laengengrad des Suchzentrums (Umkreissuche)
+            radius_km: Optional Umkreis in Kilometern
+            location_text_filter: Optional Stadtname fuer "Ganzer Ort"-Filter
+            limit: Maximale Anzahl Marker
 
+        Returns:
+            Liste von Dicts mit id, lat, lon, status, species_id, thumb,
+            headline, is_favorite. Leere Liste bei Fehler.
+        """
+        box = _marker_bbox(tuple(float(v) for v in bbox), location_lat, location_lon, radius_km)
+        if box is None:
+            return []
+        search_query = _sanitize_query(search_query)
+        select = _marker_select(search_query, selected_colors, location_text_filter)
+
+        # Python-Filter verwerfen Zeilen: weitere Seiten laden, bis ``limit`` Marker passen
+        markers: List[Dict[str, Any]] = []
+        for page in range(_marker_pages(search_query, selected_colors, radius_km, location_text_filter)):
+            try:
+                items = markers_query(self.sb, select, box, filters, limit, offset=page * limit).execute().data or []
             except Exception as e:  # noqa: BLE001
-                if attempt < max_retries - 1:
-                    wait = 0.5 * (attempt + 1)
-                    logger.warning(
-                        f"Posts laden fehlgeschlagen (Versuch {attempt + 1}/{max_retries}), "
-                        f"Retry in {wait}s: {e}"
-                    )
-                    time.sleep(wait)
-                else:
-                    logger.error(f"Fehler beim Suchen von Posts nach {max_retries} Versuchen: {e}", exc_info=True)
-                    return []
+                logger.error(f"Fehler beim Laden der Kartenmarker: {e}", exc_info=True)
+                return markers[:limit]
+            markers.extend(_to_markers(
+                items, search_query, selected_colors, favorite_ids,
+                location_lat, location_lon, radius_km, location_text_filter,
+            ))
+            if len(markers) >= limit or len(items) < limit:
+                break
+        return markers[:limit]
 
     def _enrich_with_usernames(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Reichert Posts mit Benutzernamen und Profilbildern an.
@@ -268,10 +395,122 @@ class SearchService:
         }
 
         profiles = self._profile_service.get_user_profiles(user_ids) if user_ids else {}
+        return _apply_usernames(items, profiles)
 
-        for item in items:
-            profile = profiles.get(item.get("user_id"), {})
-            item["user_display_name"] = profile.get("display_name", "")
-            item["user_profile_image"] = profile.get("profile_image")
 
-        return items
+class AsyncSearchService:
+    """Async-Variante von ``SearchService`` auf dem ``AsyncClient``.
+
+    Methoden und Rückgabewerte entsprechen ``SearchService``; Handler können
+    sie direkt awaiten bzw. mit ``asyncio.gather`` kombinieren.
+    """
+
+    def __init__(
+        self,
+        sb: AsyncClient,
+        profile_service: Optional["AsyncProfileService"] = None,
+    ) -> None:
+        """Initialisiert den Service mit dem async Supabase-Client.
+
+        Args:
+            sb: Async Supabase Client-Instanz
+            profile_service: Optional AsyncProfileService (wird bei Bedarf erstellt)
+        """
+        self.sb = sb
+        if profile_service is None:
+            from services.account.profile import AsyncProfileService
+            self._profile_service = AsyncProfileService(sb)
+        else:
+            self._profile_service = profile_service
+
+    async def _fetch_rows(self, filters: Dict[str, Any], sort_option: str, limit: int) -> List[Dict[str, Any]]:
+        """Siehe ``SearchService._fetch_rows``."""
+        if SEARCH_CACHE_TTL <= 0:
+            return (await search_posts_query(self.sb, filters, sort_option, limit).execute()).data or []
+
+        # Speicherzugriffe über die async Methoden (SQLite/Redis nicht im Event-Loop)
+        store = get_shared_store()
+        key = _search_cache_key(await store.aget(_SEARCH_GENERATION_KEY) or 0, filters, sort_option, limit)
+        rows = await store.aget(key)
+        if rows is None:
+            rows = (await search_posts_query(self.sb, filters, sort_option, limit).execute()).data or []
+            await store.aset(key, rows, ttl=SEARCH_CACHE_TTL)
+        return rows
+
+    @timed("search_posts")
+    async def search_posts(
+        self,
+        filters: Dict[str, Any],
+        search_query: Optional[str] = None,
+        selected_colors: Optional[Set[int]] = None,
+        sort_option: str = SORT_CREATED_DESC,
+        favorite_ids: Optional[Set[str]] = None,
+        limit: int = MAX_POSTS_LIMIT,
+        location_lat: Optional[float] = None,
+        location_lon: Optional[float] = None,
+        radius_km: Optional[float] = None,
+        location_text_filter: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Sucht Posts mit Filtern (siehe ``SearchService.search_posts``).
+
+        Returns:
+            Liste von Post-Dictionaries mit is_favorite Flag und user_display_name.
+            Leere Liste bei Fehler.
+        """
+        search_query = _sanitize_query(search_query)
+
+        try:
+            items = _filter_and_sort(
+                await self._fetch_rows(filters, sort_option, limit),
+                search_query, selected_colors, sort_option, favorite_ids,
+                location_lat, location_lon, radius_km, location_text_filter,
+            )
+            user_ids = {item.get("user_id") for item in items if item.get("user_id")}
+            profiles = await self._profile_service.get_user_profiles(user_ids) if user_ids else {}
+            return _apply_usernames(items, profiles)
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Suchen von Posts: {e}", exc_info=True)
+            return []
+
+    @timed("get_markers_in_bbox")
+    async def get_markers_in_bbox(
+        self,
+        bbox: Sequence[float],
+        filters: Dict[str, Any],
+        search_query: Optional[str] = None,
+        selected_colors: Optional[Set[int]] = None,
+        favorite_ids: Optional[Set[str]] = None,
+        location_lat: Optional[float] = None,
+        location_lon: Optional[float] = None,
+        radius_km: Optional[float] = None,
+        location_text_filter: Optional[str] = None,
+        limit: int = MAX_MAP_MARKERS,
+    ) -> List[Dict[str, Any]]:
+        """Lädt Marker für einen Kartenausschnitt (siehe ``SearchService.get_markers_in_bbox``).
+
+        Returns:
+            Liste von Marker-Dicts. Leere Liste bei Fehler.
+        """
+        box = _marker_bbox(tuple(float(v) for v in bbox), location_lat, location_lon, radius_km)
+        if box is None:
+            return []
+        search_query = _sanitize_query(search_query)
+        select = _marker_select(search_query, selected_colors, location_text_filter)
+
+        # Python-Filter verwerfen Zeilen: weitere Seiten laden, bis ``limit`` Marker passen
+        markers: List[Dict[str, Any]] = []
+        for page in range(_marker_pages(search_query, selected_colors, radius_km, location_text_filter)):
+            try:
+                items = (
+                    await markers_query(self.sb, select, box, filters, limit, offset=page * limit).execute()
+                ).data or []
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"Fehler beim Laden der Kartenmarker: {e}", exc_info=True)
+                return markers[:limit]
+            markers.extend(_to_markers(
+                items, search_query, selected_colors, favorite_ids,
+                location_lat, location_lon, radius_km, location_text_filter,
+            ))
+            if len(markers) >= limit or len(items) < limit:
+                break
+        return markers[:limit]
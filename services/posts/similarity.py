@@ -0,0 +1,597 @@
+"""Service für die Bildähnlichkeitssuche zwischen Vermisst- und Fundmeldungen.
+
+Zu jedem Post-Bild wird beim Upload ein Merkmalsvektor (ViT-Embedding)
+in der Tabelle ``post_image_embedding`` gespeichert. Der Vektorindex wird
+einmal pro Prozess aus der Datenbank geladen und im Speicher gehalten,
+sodass eine Ähnlichkeitsanfrage ohne Datenbank-Scan beantwortet wird.
+Danach wird er nur noch abgeglichen: neue Vektoren werden nachgeladen,
+gelöschte entfernt und die Post-Metadaten aktualisiert.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from supabase import Client
+
+from utils.logging_config import get_logger
+from .filters import _haversine_km
+from .queries import (
+    POST_SELECT_FULL,
+    EMBEDDING_SELECT_INDEX,
+    EMBEDDING_SELECT_LISTING,
+    EMBEDDING_SELECT_VECTOR,
+)
+
+logger = get_logger(__name__)
+
+EMBEDDING_TABLE = "post_image_embedding"
+
+
+def _parse_vector(value: Any) -> Optional[np.ndarray]:
+    """Wandelt einen gespeicherten Vektor in ein normiertes float32-Array um.
+
+    pgvector-Spalten kommen über PostgREST als String (``"[0.1,0.2,...]"``),
+    JSON/Array-Spalten als Liste zurück.
+
+    Args:
+        value: Vektor als Liste, String oder Array
+
+    Returns:
+        Normiertes Array oder None wenn der Wert ungültig ist
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            return None
+    if isinstance(value, np.ndarray):
+        value = value.ravel()
+    elif not isinstance(value, (list, tuple)) or not value:
+        return None
+    try:
+        vector = np.asarray(value, dtype=np.float32)
+    except (TypeError, ValueError):
+        return None
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0:
+        return None
+    return vector / norm
+
+
+def _status_kind(status_name: Optional[str]) -> str:
+    """Ordnet einen Statusnamen "fund" oder "vermisst" zu."""
+    name = (status_name or "").strip().lower()
+    if "fund" in name or "gefunden" in name or "zugelaufen" in name:
+        return "fund"
+    if "vermisst" in name or "entlaufen" in name:
+        return "vermisst"
+    return ""
+
+
+class EmbeddingIndex:
+    """Vektorindex über normierte Bild-Embeddings.
+
+    Standardmäßig Brute-Force per NumPy-Matrixprodukt. Ist ``hnswlib``
+    installiert und der Index groß genug, wird zusätzlich ein HNSW-Graph
+    (approximate nearest neighbours) aufgebaut.
+    """
+
+    ANN_MIN_SIZE: int = 5000
+
+    def __init__(self, use_ann: Optional[bool] = None) -> None:
+        """Initialisiert einen leeren Index.
+
+        Args:
+            use_ann: True/False erzwingt bzw. verbietet HNSW,
+                None entscheidet anhand der Indexgröße
+        """
+        self._use_ann = use_ann
+        self._post_ids: List[str] = []
+        self._row_ids: List[Optional[str]] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._pending: List[np.ndarray] = []
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._ann: Any = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._post_ids)
+
+    def add(
+        self,
+        post_id: str,
+        vector: Any,
+        meta: Optional[Dict[str, Any]] = None,
+        row_id: Optional[str] = None,
+    ) -> bool:
+        """Fügt einen Vektor für einen Post hinzu.
+
+        Args:
+            post_id: ID des Posts
+            vector: Embedding als Liste, String oder Array
+            meta: Optionale Post-Metadaten (Status, Tierart, Koordinaten)
+            row_id: Optional ID der Zeile in ``post_image_embedding``
+
+        Returns:
+            True wenn der Vektor gültig war und aufgenommen wurde
+        """
+        parsed = _parse_vector(vector)
+        if parsed is None:
+            return False
+        post_id = str(post_id)
+        with self._lock:
+            self._post_ids.append(post_id)
+            self._row_ids.append(str(row_id) if row_id else None)
+            self._pending.append(parsed.astype(np.float32, copy=False))
+            if meta is not None:
+                self._meta[post_id] = meta
+        return True
+
+    def build(self, entries: Iterable[Tuple[str, Any, Optional[Dict[str, Any]], Optional[str]]]) -> None:
+        """Baut den Index aus (post_id, vector, meta, row_id)-Tupeln neu auf."""
+        with self._lock:
+            self._post_ids = []
+            self._row_ids = []
+            self._pending = []
+            self._matrix = None
+            self._meta = {}
+            self._ann = None
+        for post_id, vector, meta, row_id in entries:
+            self.add(post_id, vector, meta, row_id)
+        self._consolidate()
+
+    def row_ids(self) -> Set[Optional[str]]:
+        """Gibt die Zeilen-IDs aller Vektoren zurück (None für Vektoren ohne ID)."""
+        with self._lock:
+            return set(self._row_ids)
+
+    def retain(self, row_ids: Set[str]) -> "EmbeddingIndex":
+        """Erzeugt einen neuen Index nur mit den Vektoren der angegebenen Zeilen.
+
+        Args:
+            row_ids: IDs der Zeilen, die erhalten bleiben
+
+        Returns:
+            Neuer Index; der bestehende bleibt für laufende Anfragen unverändert
+        """
+        matrix = self._consolidate()
+        with self._lock:
+            keep = [i for i, rid in enumerate(self._row_ids) if rid in row_ids]
+            post_ids = [self._post_ids[i] for i in keep]
+            meta = {pid: self._meta[pid] for pid in post_ids if pid in self._meta}
+            row_ids_kept = [self._row_ids[i] for i in keep]
+        index = EmbeddingIndex(self._use_ann)
+        index._post_ids = post_ids
+        index._row_ids = row_ids_kept
+        index._matrix = matrix[keep] if keep else None
+        index._meta = meta
+        return index
+
+    def update_meta(self, meta: Dict[str, Dict[str, Any]]) -> None:
+        """Übernimmt aktuelle Post-Metadaten (Status, Tierart, Koordinaten)."""
+        with self._lock:
+            self._meta.update(meta)
+
+    def get_meta(self, post_id: str) -> Optional[Dict[str, Any]]:
+        """Gibt die gespeicherten Metadaten eines Posts zurück."""
+        return self._meta.get(str(post_id))
+
+    def iter_meta(self) -> Iterable[Tuple[str, Dict[str, Any]]]:
+        """Iteriert über (post_id, Metadaten) aller indexierten Posts."""
+        return list(self._meta.items())
+
+    def get_vectors(self, post_id: str) -> List[np.ndarray]:
+        """Gibt alle Vektoren eines Posts zurück (ein Post kann mehrere Bilder haben)."""
+        matrix = self._consolidate()
+        post_id = str(post_id)
+        return [matrix[i] for i, pid in enumerate(self._post_ids) if pid == post_id]
+
+    def _consolidate(self) -> np.ndarray:
+        """Fügt neu hinzugefügte Vektoren an die Matrix an."""
+        with self._lock:
+            if self._pending:
+                stacked = np.vstack(self._pending)
+                self._matrix = stacked if self._matrix is None else np.vstack([self._matrix, stacked])
+                self._pending = []
+            if self._matrix is None:
+                self._matrix = np.zeros((0, 0), dtype=np.float32)
+            return self._matrix
+
+    def _get_ann(self, matrix: np.ndarray, use_ann: Optional[bool] = None) -> Any:
+        """Baut den HNSW-Index bei Bedarf (nur wenn hnswlib verfügbar ist).
+
+        Neue Vektoren werden inkrementell angehängt (``add_items``); der Graph
+        wird nur beim ersten Aufruf bzw. nach ``build`` vollständig aufgebaut.
+
+        Args:
+            matrix: Aktuelle Vektormatrix
+            use_ann: Überschreibt die Einstellung des Index für diese Anfrage
+        """
+        if use_ann is None:
+            use_ann = self._use_ann
+        if use_ann is None:
+            use_ann = len(matrix) >= self.ANN_MIN_SIZE
+        if not use_ann or len(matrix) == 0:
+            return None
+        with self._lock:
+            ann = self._ann
+            if ann is None:
+                try:
+                    import hnswlib
+                except ImportError:
+                    return None
+                ann = hnswlib.Index(space="ip", dim=matrix.shape[1])
+                ann.init_index(max_elements=len(matrix), ef_construction=200, M=16)
+                ann.set_ef(64)
+                self._ann = ann
+            count = ann.get_current_count()
+            if count < len(matrix):
+                if len(matrix) > ann.get_max_elements():
+                    # Kapazität verdoppeln, damit nicht jedes add ein resize auslöst
+                    ann.resize_index(max(len(matrix), 2 * ann.get_max_elements()))
+                ann.add_items(matrix[count:], np.arange(count, len(matrix)))
+            return ann
+
+    def query(
+        self,
+        vector: Any,
+        k: int = 10,
+        candidate_ids: Optional[Set[str]] = None,
+        exclude_ids: Optional[Set[str]] = None,
+        use_ann: Optional[bool] = None,
+    ) -> List[Tuple[str, float]]:
+        """Sucht die k ähnlichsten Posts.
+
+        Args:
+            vector: Anfrage-Embedding
+            k: Anzahl Treffer
+            candidate_ids: Optional nur diese Post-IDs berücksichtigen
+            exclude_ids: Optional diese Post-IDs ausschließen
+            use_ann: True/False erzwingt bzw. verbietet HNSW für diese Anfrage,
+                None übernimmt die Einstellung des Index
+
+        Returns:
+            Liste von (post_id, score) absteigend nach Kosinus-Ähnlichkeit,
+            pro Post nur der beste Bildtreffer
+        """
+        query = _parse_vector(vector)
+        matrix = self._consolidate()
+        if query is None or len(matrix) == 0 or k <= 0:
+            return []
+
+        def allowed(pid: str) -> bool:
+            if candidate_ids is not None and pid not in candidate_ids:
+                return False
+            return not (exclude_ids and pid in exclude_ids)
+
+        ann = self._get_ann(matrix, use_ann)
+        if ann is not None:
+            fetch = min(len(matrix), max(k * 8, 64))
+            labels, distances = ann.knn_query(query, k=fetch)
+            rows = [(int(i), 1.0 - float(d)) for i, d in zip(labels[0], distances[0])]
+        else:
+            scores = matrix @ query
+            if candidate_ids is not None or exclude_ids:
+                mask = np.fromiter((allowed(pid) for pid in self._post_ids), dtype=bool, count=len(self._post_ids))
+                scores = np.where(mask, scores, -np.inf)
+            fetch = min(len(scores), k * 4)
+            top = np.argpartition(-scores, fetch - 1)[:fetch]
+            top = top[np.argsort(-scores[top])]
+            rows = [(int(i), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+        best: Dict[str, float] = {}
+        for row, score in rows:
+            pid = self._post_ids[row]
+            if not allowed(pid):
+                continue
+            if pid not in best or score > best[pid]:
+                best[pid] = score
+
+        results = sorted(best.items(), key=lambda item: item[1], reverse=True)[:k]
+        if ann is not None and len(results) < k and (candidate_ids is not None or exclude_ids):
+            # Zu viele Kandidaten durch Filter verloren: exakt nachrechnen
+            return self.query(query, k, candidate_ids, exclude_ids, use_ann=False)
+        return results
+
+
+# Prozessweiter Index (von allen Sessions geteilt)
+_shared_index: Optional[EmbeddingIndex] = None
+_shared_index_loaded_at: float = 0.0
+_shared_index_lock = threading.Lock()
+# Serialisiert Laden/Abgleich; Anfragen nutzen solange den bisherigen Index
+_shared_index_refresh_lock = threading.Lock()
+
+
+class SimilarityService:
+    """Service-Klasse für die Ähnlichkeitssuche zwischen Meldungen."""
+
+    INDEX_TTL_SECONDS: float = 300.0
+    # PostgREST kürzt Antworten auf max_rows (Standard 1000)
+    INDEX_PAGE_SIZE: int = 1000
+    # IDs pro in_-Filter beim Nachladen neuer Vektoren (URL-Länge)
+    INDEX_FETCH_CHUNK: int = 100
+    DEFAULT_K: int = 10
+
+    def __init__(self, sb: Client) -> None:
+        """Initialisiert den Service mit dem Supabase-Client.
+
+        Args:
+            sb: Supabase Client-Instanz
+        """
+        self.sb = sb
+
+    @staticmethod
+    def _meta_from_post(post: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Extrahiert die für den Index benötigten Post-Metadaten."""
+        post = post or {}
+        post_status = post.get("post_status") or {}
+        return {
+            "species_id": post.get("species_id"),
+            "status_kind": _status_kind(post_status.get("name") if isinstance(post_status, dict) else None),
+            "lat": post.get("location_lat"),
+            "lon": post.get("location_lon"),
+            "is_active": post.get("is_active", True),
+        }
+
+    def _fetch_pages(self, columns: str) -> Iterator[Dict[str, Any]]:
+        """Liest die Embedding-Tabelle seitenweise (Keyset auf ``id``).
+
+        Args:
+            columns: Select-Ausdruck (muss ``id`` enthalten)
+
+        Yields:
+            Zeilen in ID-Reihenfolge
+        """
+        last_id: Optional[str] = None
+        while True:
+            query = self.sb.table(EMBEDDING_TABLE).select(columns).order("id").limit(self.INDEX_PAGE_SIZE)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.execute().data or []
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1].get("id")
+
+    def _load_index(self) -> EmbeddingIndex:
+        """Lädt alle Embeddings inkl. Post-Metadaten in einen neuen Index."""
+        index = EmbeddingIndex()
+        index.build(
+            (row.get("post_id"), row.get("embedding"), self._meta_from_post(row.get("post")), row.get("id"))
+            for row in self._fetch_pages(EMBEDDING_SELECT_INDEX)
+            if row.get("post_id")
+        )
+        logger.info(f"Embedding-Index geladen: {len(index)} Bilder")
+        return index
+
+    def _refresh_index(self, index: EmbeddingIndex) -> EmbeddingIndex:
+        """Gleicht einen geladenen Index mit der Datenbank ab.
+
+        Übertragen werden nur IDs und Post-Metadaten; Vektoren werden nur für
+        neue Zeilen geladen. Gelöschte Zeilen führen zu einem neuen Index aus
+        den verbliebenen Vektoren, sonst wird der bestehende Index ergänzt.
+
+        Args:
+            index: Aktueller Index
+
+        Returns:
+            Abgeglichener Index (ggf. dieselbe Instanz)
+        """
+        listing: Dict[str, Dict[str, Any]] = {}
+        for row in self._fetch_pages(EMBEDDING_SELECT_LISTING):
+            if row.get("id") and row.get("post_id"):
+                listing[str(row["id"])] = row
+
+        known = index.row_ids()
+        removed = known - listing.keys()
+        if removed:
+            index = index.retain(set(listing))
+        index.update_meta(
+            {str(row["post_id"]): self._meta_from_post(row.get("post")) for row in listing.values()}
+        )
+
+        new_ids = [row_id for row_id in listing if row_id not in known]
+        added = 0
+        for start in range(0, len(new_ids), self.INDEX_FETCH_CHUNK):
+            chunk = new_ids[start:start + self.INDEX_FETCH_CHUNK]
+            res = self.sb.table(EMBEDDING_TABLE).select(EMBEDDING_SELECT_VECTOR).in_("id", chunk).execute()
+            for row in res.data or []:
+                entry = listing.get(str(row.get("id")))
+                if entry and index.add(
+                    entry["post_id"], row.get("embedding"), self._meta_from_post(entry.get("post")), row.get("id")
+                ):
+                    added += 1
+
+        if added or removed:
+            logger.info(f"Embedding-Index abgeglichen: {added} neu, {len(removed)} entfernt, {len(index)} Bilder")
+        return index
+
+    def get_index(self, force_reload: bool = False) -> EmbeddingIndex:
+        """Gibt den prozessweiten Index zurück und gleicht ihn nach Ablauf der TTL ab.
+
+        Geladen wird außerhalb von ``_shared_index_lock``: Während ein Thread
+        den Index abgleicht, antworten die anderen mit dem bisherigen Stand.
+        Nur der erste Aufbau und ``force_reload`` warten auf das Ergebnis.
+
+        Args:
+            force_reload: Index sofort vollständig neu aus der Datenbank laden
+
+        Returns:
+            EmbeddingIndex (leer bei Fehler)
+        """
+        global _shared_index, _shared_index_loaded_at
+        with _shared_index_lock:
+            index = _shared_index
+            loaded_at = _shared_index_loaded_at
+        if index is not None and not force_reload and time.monotonic() - loaded_at <= self.INDEX_TTL_SECONDS:
+            return index
+
+        blocking = index is None or force_reload
+        if not _shared_index_refresh_lock.acquire(blocking=blocking):
+            return index
+        try:
+            with _shared_index_lock:
+                # Ein anderer Thread kann inzwischen geladen haben
+                if _shared_index_loaded_at != loaded_at and _shared_index is not None and not force_reload:
+                    return _shared_index
+                index = _shared_index
+            try:
+                if index is None or force_reload:
+                    index = self._load_index()
+                else:
+                    index = self._refresh_index(index)
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"Fehler beim Laden des Embedding-Index: {e}", exc_info=True)
+                # Beim nächsten Aufruf erneut versuchen
+                return index if index is not None else EmbeddingIndex()
+            with _shared_index_lock:
+                _shared_index = index
+                _shared_index_loaded_at = time.monotonic()
+            return index
+        finally:
+            _shared_index_refresh_lock.release()
+
+    def store_embedding(
+        self,
+        post_id: str,
+        embedding: Sequence[float],
+        post_image_id: Optional[str] = None,
+    ) -> bool:
+        """Speichert das Embedding eines Post-Bildes und nimmt es in den Index auf.
+
+        Args:
+            post_id: ID des Posts
+            embedding: Merkmalsvektor des Bildes
+            post_image_id: Optional ID der post_image-Zeile
+
+        Returns:
+            True bei Erfolg, False bei Fehler
+        """
+        if not post_id or not embedding:
+            return False
+
+        try:
+            payload: Dict[str, Any] = {
+                "post_id": post_id,
+                "embedding": [float(x) for x in embedding],
+            }
+            if post_image_id:
+                payload["post_image_id"] = post_image_id
+            res = self.sb.table(EMBEDDING_TABLE).insert(payload).execute()
+            row_id = (res.data or [{}])[0].get("id")
+
+            if _shared_index is not None:
+                post_res = (
+                    self.sb.table("post")
+                    .select("species_id, location_lat, location_lon, is_active, post_status(name)")
+                    .eq("id", post_id)
+                    .execute()
+                )
+                post = (post_res.data or [None])[0]
+                _shared_index.add(post_id, payload["embedding"], self._meta_from_post(post), row_id)
+            logger.debug(f"Embedding für Post {post_id} gespeichert")
+            return True
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Speichern des Embeddings für Post {post_id}: {e}", exc_info=True)
+            return False
+
+    def find_similar_posts(
+        self,
+        post_id: str,
+        k: int = DEFAULT_K,
+        radius_km: Optional[float] = None,
+        species: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Findet die ähnlichsten Meldungen mit entgegengesetztem Status.
+
+        Für eine Vermisst-Meldung werden Fundtiere gesucht und umgekehrt.
+
+        Args:
+            post_id: ID der Ausgangsmeldung
+            k: Maximale Anzahl Treffer
+            radius_km: Optional nur Treffer im Umkreis um die Ausgangsmeldung
+            species: Optional Tierart-ID (Standard: Tierart der Ausgangsmeldung)
+
+        Returns:
+            Liste von Post-Dictionaries (POST_SELECT_FULL) mit ``_similarity``
+            und ggf. ``_distance_km``, absteigend nach Ähnlichkeit.
+            Leere Liste bei Fehler oder wenn die Meldung kein Embedding hat.
+        """
+        if not post_id or not isinstance(post_id, str) or not post_id.strip():
+            logger.warning("Ungültige post_id für Ähnlichkeitssuche")
+            return []
+        if not isinstance(k, int) or k <= 0:
+            k = self.DEFAULT_K
+
+        try:
+            index = self.get_index()
+            vectors = index.get_vectors(post_id)
+            if not vectors:
+                logger.debug(f"Post {post_id} hat kein Embedding")
+                return []
+
+            source = index.get_meta(post_id) or {}
+            target_species = species if species is not None else source.get("species_id")
+            source_kind = source.get("status_kind")
+            target_kind = {"fund": "vermisst", "vermisst": "fund"}.get(source_kind or "")
+
+            src_lat, src_lon = source.get("lat"), source.get("lon")
+            use_radius = radius_km is not None and src_lat is not None and src_lon is not None
+
+            candidates: Set[str] = set()
+            distances: Dict[str, float] = {}
+            for pid, meta in index.iter_meta():
+                if pid == post_id or not meta.get("is_active", True):
+                    continue
+                if target_kind and meta.get("status_kind") != target_kind:
+                    continue
+                if target_species is not None and meta.get("species_id") != target_species:
+                    continue
+                if use_radius:
+                    if meta.get("lat") is None or meta.get("lon") is None:
+                        continue
+                    dist = _haversine_km(float(src_lat), float(src_lon), float(meta["lat"]), float(meta["lon"]))
+                    if dist > radius_km:
+                        continue
+                    distances[pid] = round(dist, 1)
+                candidates.add(pid)
+
+            if not candidates:
+                return []
+
+            best: Dict[str, float] = {}
+            for vector in vectors:
+                for pid, score in index.query(vector, k=k, candidate_ids=candidates):
+                    if score > best.get(pid, float("-inf")):
+                        best[pid] = score
+            ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)[:k]
+            if not ranked:
+                return []
+
+            posts_res = (
+                self.sb.table("post")
+                .select(POST_SELECT_FULL)
+                .in_("id", [pid for pid, _ in ranked])
+                .eq("is_active", True)
+                .execute()
+            )
+            posts_by_id = {str(p.get("id")): p for p in (posts_res.data or [])}
+
+            results: List[Dict[str, Any]] = []
+            for pid, score in ranked:
+                post = posts_by_id.get(pid)
+                if not post:
+                    continue
+                post["_similarity"] = round(score, 4)
+                if pid in distances:
+                    post["_distance_km"] = distances[pid]
+                results.append(post)
+            return results
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler bei der Ähnlichkeitssuche für Post {post_id}: {e}", exc_info=True)
+            return []
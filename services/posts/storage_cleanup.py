@@ -0,0 +1,354 @@
+"""
+Storage-Bereinigung: Entfernt Bilder gelöschter Meldungen im Hintergrund.
+
+``PostService.delete`` löscht die Datenbank-Zeilen in einem RPC und übergibt
+die Storage-Pfade an diese Queue. Ein Planer-Thread verteilt fällige Aufträge
+auf bis zu ``STORAGE_CLEANUP_WORKERS`` Worker-Threads; jeder entfernt die
+Dateien eines Auftrags mit einer ``remove([...])``-Anfrage. Als entfernt gilt eine Datei nur,
+wenn Storage sie zurückmeldet oder sie nicht mehr existiert; ohne Berechtigung
+(z. B. nach dem Abmelden) meldet Storage nichts zurück. Schlägt der Versuch fehl
+(z. B. Storage gestört oder Circuit Breaker offen), wird der Auftrag mit
+wachsendem Abstand erneut versucht. Nach ``STORAGE_CLEANUP_ATTEMPTS`` Versuchen
+gelten die Dateien als verwaist: Sie werden protokolliert und über ``orphans()``
+bereitgehalten.
+
+Die Queue selbst hält Aufträge nur im Speicher. Dauerhaft vermerkt sind sie in
+der Tabelle ``storage_cleanup`` (von ``delete_post_full`` in derselben
+Transaktion angelegt); ``on_done`` löscht die Zeile nach Erfolg, übrig
+gebliebene Zeilen stellt ``resume_image_cleanup`` bei der Anmeldung neu ein.
+Aufträge eines async Clients (``AsyncPostService``) laufen im Event-Loop, in dem
+sie eingestellt wurden; der Worker wartet auf das Ergebnis.
+Kurze Störungen fängt bereits der Transport ab (``services.resilience``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import inspect
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+from dotenv import load_dotenv
+
+from utils.logging_config import get_logger
+from utils.metrics import get_registry
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+
+STORAGE_CLEANUP_ATTEMPTS = int(os.getenv("STORAGE_CLEANUP_ATTEMPTS", "5"))
+STORAGE_CLEANUP_RETRY_DELAY = float(os.getenv("STORAGE_CLEANUP_RETRY_DELAY", "30"))
+STORAGE_CLEANUP_WORKERS = int(os.getenv("STORAGE_CLEANUP_WORKERS", "4"))
+MAX_RETRY_DELAY_SECONDS = 3600.0
+# Maximale Dauer einer remove-Anfrage über einen async Client
+ASYNC_REMOVE_TIMEOUT_SECONDS = 60.0
+# Verwaiste Dateien, die für ``orphans()`` vorgehalten werden
+MAX_ORPHANS = 1000
+# Antworten der öffentlichen Storage-URL für eine fehlende Datei
+MISSING_STATUS = frozenset({400, 404})
+
+CLEANUP_FILES = get_registry().counter(
+    "petbuddy_storage_cleanup_files_total",
+    "Storage-Dateien aus der Hintergrund-Bereinigung nach Ergebnis (removed, orphaned)",
+    ["result"],
+)
+CLEANUP_PENDING = get_registry().gauge(
+    "petbuddy_storage_cleanup_pending",
+    "Offene Aufträge der Storage-Bereinigung (inkl. wartender Wiederholungen)",
+)
+
+
+@dataclass
+class CleanupJob:
+    """Dateien eines Buckets, die gemeinsam entfernt werden."""
+
+    sb: Any
+    bucket: str
+    paths: List[str]
+    context: str = ""
+    key: Optional[str] = None
+    on_done: Optional[Callable[[], Any]] = field(default=None, repr=False)
+    loop: Optional[asyncio.AbstractEventLoop] = field(default=None, repr=False)
+    attempts: int = 0
+    last_error: Optional[str] = field(default=None, repr=False)
+
+
+class StorageCleanupQueue:
+    """Worker-Pool, der Storage-Dateien im Hintergrund entfernt und Fehlschläge wiederholt."""
+
+    def __init__(
+        self,
+        max_attempts: int = STORAGE_CLEANUP_ATTEMPTS,
+        retry_delay: float = STORAGE_CLEANUP_RETRY_DELAY,
+        max_workers: int = STORAGE_CLEANUP_WORKERS,
+    ) -> None:
+        """Initialisiert die Queue (der Planer startet beim ersten Auftrag).
+
+        Args:
+            max_attempts: Versuche je Auftrag, bevor die Dateien als verwaist gelten
+            retry_delay: Wartezeit vor der ersten Wiederholung in Sekunden
+                (verdoppelt sich je Versuch, höchstens eine Stunde)
+            max_workers: Anzahl parallel bearbeiteter Aufträge
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = max(0.0, retry_delay)
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="storage-cleanup")
+        # Heap aus (fällig ab, laufende Nummer, Auftrag)
+        self._pending: List[Tuple[float, int, CleanupJob]] = []
+        self._sequence = itertools.count()
+        self._orphans: Deque[Dict[str, Any]] = deque(maxlen=MAX_ORPHANS)
+        self._active = 0
+        # Schlüssel offener Aufträge (verhindert doppelte Aufträge beim Wiederaufnehmen)
+        self._keys: Set[str] = set()
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        sb: Any,
+        bucket: str,
+        paths: Sequence[str],
+        context: str = "",
+        key: Optional[str] = None,
+        on_done: Optional[Callable[[], Any]] = None,
+    ) -> bool:
+        """Stellt Dateien zum Entfernen ein (kehrt sofort zurück).
+
+        Args:
+            sb: Supabase Client der Session (Storage-Rechte des Benutzers);
+                ein ``AsyncClient`` nur aus dem Event-Loop heraus
+            bucket: Name des Storage-Buckets
+            paths: Pfade im Bucket
+            context: Beschreibung für Logs (z. B. ``post 123``)
+            key: Optionaler Schlüssel; ist ein Auftrag mit diesem Schlüssel
+                noch offen, wird kein zweiter eingestellt
+            on_done: Wird nach erfolgreichem Entfernen im Worker aufgerufen
+                (z. B. Zeile in ``storage_cleanup`` löschen); darf ein
+                Awaitable zurückgeben
+
+        Returns:
+            True, wenn ein Auftrag eingestellt wurde
+        """
+        unique = list(dict.fromkeys(path for path in paths if path))
+        if not unique and on_done is None:
+            return False
+        try:
+            loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        job = CleanupJob(
+            sb=sb, bucket=bucket, paths=unique, context=context, key=key, on_done=on_done, loop=loop
+        )
+        with self._condition:
+            if key is not None:
+                if key in self._keys:
+                    return False
+                self._keys.add(key)
+        self._schedule(job, time.monotonic())
+        return True
+
+    def pending(self) -> int:
+        """Anzahl offener Aufträge (wartend oder in Bearbeitung)."""
+        with self._condition:
+            return len(self._pending) + self._active
+
+    def orphans(self) -> List[Dict[str, Any]]:
+        """Dateien, die nach allen Versuchen nicht entfernt werden konnten (neueste zuletzt)."""
+        with self._condition:
+            return list(self._orphans)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wartet, bis keine Aufträge mehr offen sind.
+
+        Args:
+            timeout: Maximale Wartezeit in Sekunden (None = unbegrenzt)
+
+        Returns:
+            True, wenn die Queue leer ist
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending or self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def _schedule(self, job: CleanupJob, due: float) -> None:
+        with self._condition:
+            heapq.heappush(self._pending, (due, next(self._sequence), job))
+            CLEANUP_PENDING.set(len(self._pending) + self._active)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="storage-cleanup-scheduler", daemon=True)
+                self._worker.start()
+            self._condition.notify_all()
+
+    def _next_job(self) -> CleanupJob:
+        """Blockiert, bis ein Auftrag fällig und ein Worker frei ist, und entnimmt ihn."""
+        with self._condition:
+            while True:
+                if self._pending and self._active < self.max_workers:
+                    wait = self._pending[0][0] - time.monotonic()
+                    if wait <= 0:
+                        _, _, job = heapq.heappop(self._pending)
+                        self._active += 1
+                        return job
+                    self._condition.wait(wait)
+                else:
+                    self._condition.wait()
+
+    def _run(self) -> None:
+        """Planer: übergibt fällige Aufträge an den Worker-Pool."""
+        while True:
+            job = self._next_job()
+            try:
+                self._executor.submit(self._execute, job)
+            except RuntimeError:
+                # Pool beim Beenden des Interpreters bereits heruntergefahren
+                self._release(job, None)
+                return
+
+    def _execute(self, job: CleanupJob) -> None:
+        """Bearbeitet einen Auftrag im Worker-Thread."""
+        retry_at: Optional[float] = None
+        try:
+            retry_at = self._process(job)
+        finally:
+            self._release(job, retry_at)
+
+    def _release(self, job: CleanupJob, retry_at: Optional[float]) -> None:
+        """Gibt den Worker frei und plant ggf. die Wiederholung ein."""
+        with self._condition:
+            self._active -= 1
+            if retry_at is not None:
+                heapq.heappush(self._pending, (retry_at, next(self._sequence), job))
+            elif job.key is not None:
+                self._keys.discard(job.key)
+            CLEANUP_PENDING.set(len(self._pending) + self._active)
+            self._condition.notify_all()
+
+    def _process(self, job: CleanupJob) -> Optional[float]:
+        """Entfernt die Dateien eines Auftrags.
+
+        Returns:
+            Zeitpunkt der nächsten Wiederholung oder None, wenn der Auftrag erledigt ist
+        """
+        job.attempts += 1
+        try:
+            remaining = self._remove(job)
+            if not remaining:
+                self._finish(job)
+                return None
+            job.last_error = f"{len(remaining)} Dateien nicht entfernt (keine Berechtigung?)"
+            job.paths = remaining
+        except Exception as e:  # noqa: BLE001
+            job.last_error = str(e)
+
+        if job.attempts < self.max_attempts:
+            delay = min(self.retry_delay * (2 ** (job.attempts - 1)), MAX_RETRY_DELAY_SECONDS)
+            logger.warning(
+                f"Storage-Bereinigung fehlgeschlagen ({job.context or job.bucket}, "
+                f"Versuch {job.attempts}/{self.max_attempts}), neuer Versuch in {delay:g} s: {job.last_error}"
+            )
+            return time.monotonic() + delay
+
+        CLEANUP_FILES.inc(len(job.paths), result="orphaned")
+        logger.error(
+            f"Storage-Dateien verwaist ({job.context or job.bucket}) nach {job.attempts} Versuchen: "
+            f"{job.bucket}/{', '.join(job.paths)} – {job.last_error}"
+        )
+        with self._condition:
+            self._orphans.extend(
+                {"bucket": job.bucket, "path": path, "context": job.context, "error": job.last_error}
+                for path in job.paths
+            )
+        return None
+
+    def _remove(self, job: CleanupJob) -> List[str]:
+        """Sendet die remove-Anfrage und prüft das Ergebnis.
+
+        Storage meldet nur Dateien zurück, die es tatsächlich gelöscht hat. Fehlt
+        eine Datei in der Antwort, wird geprüft, ob sie noch existiert (bereits
+        gelöscht oder keine Berechtigung).
+
+        Returns:
+            Pfade, die noch vorhanden sind
+        """
+        if not job.paths:
+            return []
+        bucket = job.sb.storage.from_(job.bucket)
+        result = bucket.remove(job.paths)
+        if inspect.isawaitable(result):
+            result = self._await_in_loop(job, result)
+        removed = {entry.get("name") for entry in (result or []) if isinstance(entry, dict)}
+        remaining = [
+            path for path in job.paths
+            if path not in removed and self._exists(job, bucket, path)
+        ]
+        if len(job.paths) > len(remaining):
+            CLEANUP_FILES.inc(len(job.paths) - len(remaining), result="removed")
+            logger.debug(
+                f"{len(job.paths) - len(remaining)} Storage-Dateien entfernt ({job.context or job.bucket})"
+            )
+        return remaining
+
+    def _exists(self, job: CleanupJob, bucket: Any, path: str) -> bool:
+        """Prüft über die öffentliche URL, ob eine Datei noch existiert (unabhängig von der Anmeldung)."""
+        from services.supabase_client import get_http_client
+
+        url = bucket.get_public_url(path)
+        if inspect.isawaitable(url):
+            url = self._await_in_loop(job, url)
+        response = get_http_client().head(str(url).rstrip("?"))
+        if response.status_code in MISSING_STATUS:
+            return False
+        if response.is_success:
+            return True
+        raise RuntimeError(f"Storage antwortet {response.status_code} für {path}")
+
+    def _finish(self, job: CleanupJob) -> None:
+        """Meldet einen erledigten Auftrag (``on_done``)."""
+        if job.on_done is None:
+            return
+        try:
+            result = job.on_done()
+            if inspect.isawaitable(result):
+                self._await_in_loop(job, result)
+        except Exception as e:  # noqa: BLE001
+            # Die Zeile bleibt stehen und wird bei der nächsten Anmeldung erneut geprüft
+            logger.warning(f"Abschluss der Storage-Bereinigung fehlgeschlagen ({job.context or job.bucket}): {e}")
+
+    @staticmethod
+    def _await_in_loop(job: CleanupJob, awaitable: Any) -> Any:
+        """Führt die Anfrage eines async Clients im Event-Loop des Auftrags aus."""
+        if job.loop is None or job.loop.is_closed():
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            raise RuntimeError("Kein laufender Event-Loop für den async Client")
+        future = asyncio.run_coroutine_threadsafe(awaitable, job.loop)
+        return future.result(timeout=ASYNC_REMOVE_TIMEOUT_SECONDS)
+
+
+# Globale Instanz (Singleton)
+_storage_cleanup_queue: Optional[StorageCleanupQueue] = None
+_storage_cleanup_queue_lock = threading.Lock()
+
+
+def get_storage_cleanup_queue() -> StorageCleanupQueue:
+    """Gibt die globale Queue der Storage-Bereinigung zurück."""
+    global _storage_cleanup_queue
+    with _storage_cleanup_queue_lock:
+        if _storage_cleanup_queue is None:
+            _storage_cleanup_queue = StorageCleanupQueue()
+        return _storage_cleanup_queue
@@ -0,0 +1,487 @@
+"""Wiederholungen und Circuit Breaker für alle Supabase-Anfragen.
+
+``ResilientTransport`` (bzw. ``AsyncResilientTransport``) liegt im geteilten
+httpx-Client (siehe ``services.supabase_client``) und gilt damit für PostgREST,
+RPC, Auth und Storage aller Sessions:
+
+    - Transiente Fehler (Verbindungsabbruch, Timeout, HTTP/2-Reset, 429/502/503/504)
+      werden mit exponentiellem Backoff und vollem Jitter wiederholt. Ohne
+      Risiko doppelter Schreibzugriffe nur bei idempotenten Methoden
+      (GET/HEAD/OPTIONS/PUT/DELETE); POST/PATCH nur, wenn die Anfrage den
+      Server nachweislich nicht erreicht hat (Verbindungsaufbau, Pool).
+    - Ein Retry-Budget begrenzt Wiederholungen auf einen Anteil der Anfragen,
+      damit ein Ausfall die Last nicht vervielfacht.
+    - Ein Circuit Breaker je API (rest, rpc, auth, storage) öffnet nach
+      mehreren Fehlern in Folge. Danach schlagen Anfragen sofort mit
+      ``CircuitOpenError`` fehl, statt in Timeouts und Backoff-Pausen zu
+      warten; nach ``SUPABASE_CIRCUIT_RESET`` Sekunden prüft eine einzelne
+      Anfrage, ob Supabase wieder erreichbar ist. Synchroner und async Client
+      teilen sich die Breaker.
+
+Die Services fangen Fehler wie bisher ab (leere Ergebnisse bzw. RuntimeError);
+eigene Retry-Schleifen sind dort nicht mehr nötig.
+
+Konfiguration (Umgebungsvariablen):
+    - SUPABASE_RETRY_ATTEMPTS: Versuche je Anfrage inkl. des ersten (Standard: 3)
+    - SUPABASE_RETRY_BASE_DELAY: Basis des Backoffs in Sekunden (Standard: 0.2)
+    - SUPABASE_RETRY_MAX_DELAY: Längste Pause in Sekunden (Standard: 2)
+    - SUPABASE_RETRY_BUDGET: Anteil Wiederholungen je Anfrage (Standard: 0.2)
+    - SUPABASE_CIRCUIT_THRESHOLD: Fehler in Folge bis zum Öffnen (Standard: 5)
+    - SUPABASE_CIRCUIT_RESET: Sekunden bis zum Testversuch (Standard: 15)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from utils.logging_config import get_logger
+from utils.metrics import get_registry, supabase_api
+
+logger = get_logger(__name__)
+
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+# Status, die als Ausfall für den Circuit Breaker zählen; 500 meldet PostgREST auch
+# für Fehler der Anfrage selbst (z. B. RPC-Exception) und zählt daher nicht
+FAILURE_STATUS = frozenset({429, 502, 503, 504})
+
+RETRIES = get_registry().counter(
+    "petbuddy_supabase_retries_total",
+    "Wiederholte Supabase-Anfragen nach API und Grund",
+    ["api", "reason"],
+)
+CIRCUIT_REJECTIONS = get_registry().counter(
+    "petbuddy_supabase_circuit_rejections_total",
+    "Supabase-Anfragen, die wegen offenem Circuit Breaker sofort fehlschlugen",
+    ["api"],
+)
+CIRCUIT_OPEN = get_registry().gauge(
+    "petbuddy_supabase_circuit_open",
+    "1, solange der Circuit Breaker der API offen ist",
+    ["api"],
+)
+
+
+# Circuit Breaker je API, geteilt vom synchronen und vom async httpx-Client
+_shared_breakers: Dict[str, "CircuitBreaker"] = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Anfrage wurde nicht gesendet, weil der Circuit Breaker offen ist."""
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Prüft, ob ein Fehler vorübergehend ist und eine Wiederholung lohnt.
+
+    Args:
+        exc: Exception einer Anfrage
+
+    Returns:
+        True für Netzwerk-/Protokollfehler und Timeouts, False sonst
+        (auch für ``CircuitOpenError``)
+    """
+    if isinstance(exc, CircuitOpenError):
+        return False
+    return isinstance(exc, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError))
+
+
+def _request_not_sent(exc: BaseException) -> bool:
+    """Fehler, bei denen die Anfrage den Server sicher nicht erreicht hat."""
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponentieller Backoff mit vollem Jitter.
+
+    Attributes:
+        max_attempts: Versuche inkl. des ersten
+        base_delay: Pause vor der ersten Wiederholung (Obergrenze, Sekunden)
+        max_delay: Längste Pause (Sekunden)
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 2.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Pause vor Wiederholung Nummer ``attempt`` (ab 1).
+
+        Args:
+            attempt: Nummer der Wiederholung
+            retry_after: Wartezeit aus dem ``Retry-After``-Header (falls vorhanden)
+
+        Returns:
+            Pause in Sekunden (höchstens ``max_delay``)
+        """
+        if retry_after is not None:
+            return min(self.max_delay, max(0.0, retry_after))
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0.0, ceiling)
+
+
+class RetryBudget:
+    """Begrenzt Wiederholungen auf einen Anteil der Anfragen (Token-Bucket).
+
+    Jede Anfrage legt ``ratio`` Token ab, jede Wiederholung verbraucht eines.
+    ``min_per_second`` Token kommen unabhängig von der Last hinzu, damit auch
+    bei wenig Verkehr wiederholt werden kann.
+
+    Args:
+        ratio: Token je Anfrage
+        min_per_second: Token je Sekunde
+        max_tokens: Obergrenze des Guthabens
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 2.0, max_tokens: float = 50.0) -> None:
+        self._ratio = ratio
+        self._min_per_second = min_per_second
+        self._max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self._max_tokens, self._tokens + (now - self._updated) * self._min_per_second)
+        self._updated = now
+
+    def deposit(self) -> None:
+        """Verbucht eine Anfrage."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def try_withdraw(self) -> bool:
+        """Verbraucht ein Token für eine Wiederholung.
+
+        Returns:
+            True, wenn wiederholt werden darf
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+class CircuitBreaker:
+    """Circuit Breaker (geschlossen -> offen -> halboffen -> geschlossen).
+
+    Args:
+        name: Name für Logs und Metriken (API)
+        failure_threshold: Fehler in Folge bis zum Öffnen
+        reset_timeout: Sekunden im offenen Zustand bis zum Testversuch
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 15.0) -> None:
+        self.name = name
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """Prüft, ob eine Anfrage gesendet werden darf (im halboffenen Zustand genau eine)."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self._reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_running = False
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        """Meldet eine erfolgreiche Anfrage (schließt den Breaker)."""
+        with self._lock:
+            was_open = self._state != self.CLOSED
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+        if was_open:
+            CIRCUIT_OPEN.set(0, api=self.name)
+            logger.info(f"Circuit Breaker '{self.name}' geschlossen")
+
+    def record_failure(self) -> None:
+        """Meldet einen Ausfall (öffnet ab der Schwelle bzw. nach fehlgeschlagenem Testversuch)."""
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == self.OPEN:
+                return
+            if self._state == self.CLOSED and self._failures < self._failure_threshold:
+                return
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            failures = self._failures
+        CIRCUIT_OPEN.set(1, api=self.name)
+        logger.warning(
+            f"Circuit Breaker '{self.name}' offen nach {failures} Fehlern; "
+            f"Anfragen schlagen {self._reset_timeout:g}s sofort fehl"
+        )
+
+    def release(self) -> None:
+        """Gibt den Testversuch frei, ohne Erfolg oder Ausfall zu melden.
+
+        Ein nicht transienter Fehler sagt nichts über die Erreichbarkeit aus:
+        Der Breaker bleibt halboffen, die nächste Anfrage ist der neue Testversuch.
+        """
+        with self._lock:
+            self._trial_running = False
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    raw = response.headers.get("retry-after")
+    if not raw:
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(raw).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+class _RetryController:
+    """Retry- und Breaker-Entscheidungen, geteilt von synchronem und async Transport.
+
+    Args:
+        policy: Backoff-Einstellungen
+        budget: Gemeinsames Retry-Budget
+        failure_threshold: Fehler in Folge bis zum Öffnen eines Breakers
+        reset_timeout: Sekunden bis zum Testversuch
+        breakers: Circuit Breaker je API, die mit anderen Transports geteilt werden
+    """
+
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        budget: Optional[RetryBudget] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 15.0,
+        breakers: Optional[Dict[str, CircuitBreaker]] = None,
+    ) -> None:
+        self._policy = policy or RetryPolicy()
+        self._budget = budget or RetryBudget()
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._breakers = breakers if breakers is not None else {}
+
+    def breaker(self, api: str) -> CircuitBreaker:
+        """Gibt den Circuit Breaker einer API zurück."""
+        breaker = self._breakers.get(api)
+        if breaker is None:
+            with _breakers_lock:
+                breaker = self._breakers.setdefault(
+                    api, CircuitBreaker(api, self._failure_threshold, self._reset_timeout)
+                )
+        return breaker
+
+    def _start(self, request: httpx.Request) -> Tuple[str, CircuitBreaker]:
+        api = supabase_api(request.url.path)
+        self._budget.deposit()
+        return api, self.breaker(api)
+
+    def _admit(self, request: httpx.Request, api: str, breaker: CircuitBreaker) -> None:
+        """Wirft ``CircuitOpenError``, wenn die Anfrage nicht gesendet werden darf."""
+        if not breaker.allow():
+            CIRCUIT_REJECTIONS.inc(api=api)
+            raise CircuitOpenError(f"Supabase ({api}) vorübergehend nicht erreichbar", request=request)
+
+    def _may_retry(self, api: str, attempt: int, reason: str) -> bool:
+        if attempt >= self._policy.max_attempts:
+            return False
+        if not self._budget.try_withdraw():
+            logger.debug(f"Retry-Budget erschöpft ({api}, {reason})")
+            return False
+        RETRIES.inc(api=api, reason=reason)
+        return True
+
+    def _error_delay(
+        self,
+        request: httpx.Request,
+        api: str,
+        breaker: CircuitBreaker,
+        attempt: int,
+        exc: Exception,
+    ) -> Optional[float]:
+        """Verbucht einen Fehler; Pause bis zur Wiederholung oder None (Fehler weiterreichen)."""
+        if not is_transient_error(exc):
+            breaker.release()
+            return None
+        breaker.record_failure()
+        idempotent = request.method in IDEMPOTENT_METHODS
+        if not (idempotent or _request_not_sent(exc)) or not self._may_retry(api, attempt, type(exc).__name__):
+            return None
+        delay = self._policy.delay(attempt)
+        logger.warning(
+            f"Supabase-Anfrage fehlgeschlagen ({request.method} {api}, Versuch {attempt}/"
+            f"{self._policy.max_attempts}), Retry in {delay:.2f}s: {exc!r}"
+        )
+        return delay
+
+    def _response_delay(
+        self,
+        request: httpx.Request,
+        api: str,
+        breaker: CircuitBreaker,
+        attempt: int,
+        response: httpx.Response,
+    ) -> Optional[float]:
+        """Verbucht eine Antwort; Pause bis zur Wiederholung oder None (Antwort zurückgeben)."""
+        if response.status_code not in FAILURE_STATUS:
+            breaker.record_success()
+            return None
+        breaker.record_failure()
+        if (
+            request.method not in IDEMPOTENT_METHODS
+            or response.status_code not in RETRYABLE_STATUS
+            or not self._may_retry(api, attempt, str(response.status_code))
+        ):
+            return None
+        delay = self._policy.delay(attempt, _retry_after_seconds(response))
+        logger.warning(
+            f"Supabase antwortet {response.status_code} ({request.method} {api}, Versuch "
+            f"{attempt}/{self._policy.max_attempts}), Retry in {delay:.2f}s"
+        )
+        return delay
+
+
+class ResilientTransport(_RetryController, httpx.BaseTransport):
+    """httpx-Transport mit Wiederholungen, Retry-Budget und Circuit Breaker je API.
+
+    Args:
+        transport: Eigentlicher Transport (Verbindungspool)
+        **kwargs: Siehe ``_RetryController``
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        api, breaker = self._start(request)
+        attempt = 1
+        while True:
+            self._admit(request, api, breaker)
+            try:
+                response = self._transport.handle_request(request)
+            except Exception as e:  # noqa: BLE001
+                delay = self._error_delay(request, api, breaker, attempt, e)
+                if delay is None:
+                    raise
+            else:
+                delay = self._response_delay(request, api, breaker, attempt, response)
+                if delay is None:
+                    return response
+                response.close()
+            attempt += 1
+            if delay > 0:
+                time.sleep(delay)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncResilientTransport(_RetryController, httpx.AsyncBaseTransport):
+    """Async-Variante von ``ResilientTransport`` (Pausen mit ``asyncio.sleep``).
+
+    Args:
+        transport: Eigentlicher Transport (Verbindungspool)
+        **kwargs: Siehe ``_RetryController``
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        api, breaker = self._start(request)
+        attempt = 1
+        while True:
+            self._admit(request, api, breaker)
+            try:
+                response = await self._transport.handle_async_request(request)
+            except Exception as e:  # noqa: BLE001
+                delay = self._error_delay(request, api, breaker, attempt, e)
+                if delay is None:
+                    raise
+            else:
+                delay = self._response_delay(request, api, breaker, attempt, response)
+                if delay is None:
+                    return response
+                await response.aclose()
+            attempt += 1
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _controller_options() -> Dict[str, Any]:
+    """Einstellungen aus den Umgebungsvariablen (eigenes Budget, gemeinsame Breaker)."""
+    return {
+        "breakers": _shared_breakers,
+        "policy": RetryPolicy(
+            max_attempts=max(1, int(os.getenv("SUPABASE_RETRY_ATTEMPTS", "3"))),
+            base_delay=float(os.getenv("SUPABASE_RETRY_BASE_DELAY", "0.2")),
+            max_delay=float(os.getenv("SUPABASE_RETRY_MAX_DELAY", "2")),
+        ),
+        "budget": RetryBudget(ratio=float(os.getenv("SUPABASE_RETRY_BUDGET", "0.2"))),
+        "failure_threshold": int(os.getenv("SUPABASE_CIRCUIT_THRESHOLD", "5")),
+        "reset_timeout": float(os.getenv("SUPABASE_CIRCUIT_RESET", "15")),
+    }
+
+
+def create_resilient_transport(transport: httpx.BaseTransport) -> ResilientTransport:
+    """Erstellt den Transport mit den Einstellungen aus den Umgebungsvariablen.
+
+    Args:
+        transport: Eigentlicher Transport (Verbindungspool)
+
+    Returns:
+        ResilientTransport um ``transport``
+    """
+    return ResilientTransport(transport, **_controller_options())
+
+
+def create_async_resilient_transport(transport: httpx.AsyncBaseTransport) -> AsyncResilientTransport:
+    """Erstellt den async Transport mit den Einstellungen aus den Umgebungsvariablen.
+
+    Args:
+        transport: Eigentlicher Transport (Verbindungspool)
+
+    Returns:
+        AsyncResilientTransport um ``transport``
+    """
+    return AsyncResilientTransport(transport, **_controller_options())
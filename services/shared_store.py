@@ -0,0 +1,417 @@
+"""Gemeinsamer Schlüssel-Wert-Speicher für Caches mehrerer Worker-Prozesse.
+
+Im Mehrprozess-Betrieb (``WEB_WORKERS`` > 1, siehe ``utils.workers``) hat jeder
+Worker eigene In-Memory-Caches. Referenzdaten, Benutzerprofile und
+Suchergebnisse werden deshalb zusätzlich in diesem Speicher abgelegt, damit
+ein Worker die Ergebnisse der anderen wiederverwendet.
+
+Backends (Auswahl über ``SHARED_STORE_URL``):
+    - ``memory://``: nur im Prozess (Standard bei einem Worker)
+    - ``sqlite:///<pfad>``: SQLite-Datei im WAL-Modus, von allen Workern eines
+      Hosts nutzbar (Standard bei mehreren Workern:
+      ``sqlite:///cache/shared_store.sqlite3``)
+    - ``redis://host:port/db``: Redis bzw. ein kompatibler Server (benötigt das
+      optionale Paket ``redis``)
+
+Werte werden als JSON gespeichert; jeder Abruf liefert eine eigene Kopie.
+Fehler des Backends werden protokolliert und wie ein Cache-Miss behandelt.
+Async Services nutzen ``aget``/``aget_many``/``aset``/``aset_many``: SQLite
+und Redis laufen dann in einem Worker-Thread und blockieren den Event-Loop nicht.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.logging_config import get_logger
+
+try:
+    import redis  # optional
+except ImportError:  # pragma: no cover - abhängig von der Installation
+    redis = None
+
+logger = get_logger(__name__)
+
+
+DEFAULT_SQLITE_URL = "sqlite:///cache/shared_store.sqlite3"
+DEFAULT_MEMORY_SIZE = 10_000
+# Abgelaufene Einträge in SQLite nach so vielen Schreibzugriffen entfernen
+_PURGE_EVERY = 1000
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class SharedStore(ABC):
+    """Schnittstelle des gemeinsamen Speichers (Werte müssen JSON-serialisierbar sein)."""
+
+    def get(self, key: str) -> Optional[Any]:
+        """Liest einen Wert.
+
+        Args:
+            key: Schlüssel
+
+        Returns:
+            Wert oder None (unbekannt oder abgelaufen)
+        """
+        return self.get_many([key]).get(key)
+
+    @abstractmethod
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Liest mehrere Werte.
+
+        Args:
+            keys: Schlüssel
+
+        Returns:
+            Dictionary der gefundenen Schlüssel und Werte
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Speichert einen Wert.
+
+        Args:
+            key: Schlüssel
+            value: JSON-serialisierbarer Wert
+            ttl: Lebensdauer in Sekunden (None = unbegrenzt)
+        """
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """Speichert mehrere Werte in einem Backend-Zugriff.
+
+        Args:
+            items: Schlüssel und JSON-serialisierbare Werte
+            ttl: Lebensdauer in Sekunden (None = unbegrenzt)
+        """
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Entfernt einen Wert."""
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Async-Variante von ``get``."""
+        return (await self.aget_many([key])).get(key)
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Async-Variante von ``get_many`` (Backend-Zugriff in einem Worker-Thread)."""
+        return await asyncio.to_thread(self.get_many, list(keys))
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Async-Variante von ``set`` (Backend-Zugriff in einem Worker-Thread)."""
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    async def aset_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """Async-Variante von ``set_many`` (Backend-Zugriff in einem Worker-Thread)."""
+        await asyncio.to_thread(self.set_many, dict(items), ttl)
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """Erhöht einen Zähler atomar (z. B. Generation zum Invalidieren).
+
+        Args:
+            key: Schlüssel des Zählers
+
+        Returns:
+            Neuer Zählerstand
+        """
+
+
+class MemorySharedStore(SharedStore):
+    """Speicher im Prozess (LRU + TTL)."""
+
+    def __init__(self, max_entries: int = DEFAULT_MEMORY_SIZE) -> None:
+        """Initialisiert den Speicher.
+
+        Args:
+            max_entries: Maximale Anzahl Einträge
+        """
+        self.max_entries = max_entries
+        # Eintrag: (Ablaufzeitpunkt oder None, JSON-Text)
+        self._entries: "OrderedDict[str, Tuple[Optional[float], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        now = time.time()
+        found: Dict[str, str] = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] is not None and entry[0] < now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry[1]
+        return {key: json.loads(raw) for key, raw in found.items()}
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        encoded = [(key, _encode(value)) for key, value in items.items()]
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            for key, raw in encoded:
+                self._entries[key] = (expires_at, raw)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        # Kein I/O: direkt im Event-Loop statt in einem Worker-Thread
+        return self.get_many(keys)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.set(key, value, ttl)
+
+    async def aset_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        self.set_many(items, ttl)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            entry = self._entries.get(key)
+            value = int(json.loads(entry[1])) + 1 if entry is not None else 1
+            self._entries[key] = (None, str(value))
+            return value
+
+
+class SQLiteSharedStore(SharedStore):
+    """Speicher in einer SQLite-Datei (WAL), gemeinsam für alle Prozesse eines Hosts."""
+
+    def __init__(self, db_path: str) -> None:
+        """Öffnet die Datei und legt die Tabelle bei Bedarf an.
+
+        Args:
+            db_path: Pfad zur SQLite-Datei
+
+        Raises:
+            sqlite3.Error: Wenn die Datei nicht nutzbar ist
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shared_store (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL
+            )
+            """
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        try:
+            with self._lock:
+                rows = self._db.execute(
+                    f"SELECT key, value FROM shared_store WHERE key IN ({placeholders}) "
+                    f"AND (expires_at IS NULL OR expires_at >= ?)",
+                    [*keys, time.time()],
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Gemeinsamer Speicher: Lesen fehlgeschlagen: {e}")
+            return {}
+        return {key: json.loads(raw) for key, raw in rows}
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        if not items:
+            return
+        expires_at = time.time() + ttl if ttl is not None else None
+        rows = [(key, _encode(value), expires_at) for key, value in items.items()]
+        try:
+            with self._lock:
+                # Eine Transaktion für alle Einträge (Verbindung läuft im Autocommit)
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO shared_store (key, value, expires_at) VALUES (?, ?, ?)",
+                        rows,
+                    )
+                    self._db.execute("COMMIT")
+                except Exception:
+                    self._db.execute("ROLLBACK")
+                    raise
+                before, self._writes = self._writes, self._writes + len(rows)
+                if before // _PURGE_EVERY != self._writes // _PURGE_EVERY:
+                    self._db.execute(
+                        "DELETE FROM shared_store WHERE expires_at IS NOT NULL AND expires_at < ?",
+                        (time.time(),),
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Gemeinsamer Speicher: Schreiben fehlgeschlagen: {e}")
+
+    def delete(self, key: str) -> None:
+        try:
+            with self._lock:
+                self._db.execute("DELETE FROM shared_store WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"Gemeinsamer Speicher: Löschen fehlgeschlagen: {e}")
+
+    def incr(self, key: str) -> int:
+        try:
+            with self._lock:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self._db.execute("SELECT value FROM shared_store WHERE key = ?", (key,)).fetchone()
+                    value = int(json.loads(row[0])) + 1 if row else 1
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO shared_store (key, value, expires_at) VALUES (?, ?, NULL)",
+                        (key, str(value)),
+                    )
+                    self._db.execute("COMMIT")
+                except Exception:
+                    self._db.execute("ROLLBACK")
+                    raise
+            return value
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Gemeinsamer Speicher: Zähler {key} nicht erhöht: {e}")
+            return 0
+
+
+class RedisSharedStore(SharedStore):
+    """Speicher in Redis bzw. einem kompatiblen Server."""
+
+    def __init__(self, url: str) -> None:
+        """Verbindet sich mit dem Server.
+
+        Args:
+            url: Redis-URL (``redis://host:port/db``)
+
+        Raises:
+            RuntimeError: Wenn das Paket ``redis`` fehlt
+        """
+        if redis is None:
+            raise RuntimeError("Für SHARED_STORE_URL=redis://… wird das Paket 'redis' benötigt")
+        self._client = redis.Redis.from_url(url, socket_timeout=2.0, socket_connect_timeout=2.0)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        try:
+            values = self._client.mget(keys)
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Gemeinsamer Speicher: Lesen fehlgeschlagen: {e}")
+            return {}
+        return {key: json.loads(raw) for key, raw in zip(keys, values) if raw is not None}
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        try:
+            if ttl is not None:
+                self._client.set(key, _encode(value), px=max(1, int(ttl * 1000)))
+            else:
+                self._client.set(key, _encode(value))
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Gemeinsamer Speicher: Schreiben fehlgeschlagen: {e}")
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        if not items:
+            return
+        try:
+            # Pipeline: alle SETs in einem Roundtrip
+            pipe = self._client.pipeline(transaction=False)
+            for key, value in items.items():
+                if ttl is not None:
+                    pipe.set(key, _encode(value), px=max(1, int(ttl * 1000)))
+                else:
+                    pipe.set(key, _encode(value))
+            pipe.execute()
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Gemeinsamer Speicher: Schreiben fehlgeschlagen: {e}")
+
+    def delete(self, key: str) -> None:
+        try:
+            self._client.delete(key)
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Gemeinsamer Speicher: Löschen fehlgeschlagen: {e}")
+
+    def incr(self, key: str) -> int:
+        try:
+            return int(self._client.incr(key))
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Gemeinsamer Speicher: Zähler {key} nicht erhöht: {e}")
+            return 0
+
+
+def create_shared_store(url: str) -> SharedStore:
+    """Erzeugt einen Speicher anhand seiner URL.
+
+    Ist das Backend nicht nutzbar, wird auf den Speicher im Prozess
+    zurückgefallen.
+
+    Args:
+        url: ``memory://``, ``sqlite:///<pfad>`` oder ``redis://…``
+
+    Returns:
+        SharedStore-Instanz
+    """
+    try:
+        if url.startswith("sqlite:///"):
+            return SQLiteSharedStore(url[len("sqlite:///"):])
+        if url.startswith(("redis://", "rediss://", "unix://")):
+            return RedisSharedStore(url)
+        if url and not url.startswith("memory://"):
+            logger.warning(f"Unbekannte SHARED_STORE_URL '{url}', nutze Speicher im Prozess")
+    except Exception as e:  # noqa: BLE001
+        logger.warning(f"Gemeinsamer Speicher ({url}) nicht nutzbar, nutze Speicher im Prozess: {e}")
+    return MemorySharedStore()
+
+
+# Globale Instanz (Singleton)
+_shared_store: Optional[SharedStore] = None
+_shared_store_lock = threading.Lock()
+
+
+def get_shared_store() -> SharedStore:
+    """Gibt den globalen gemeinsamen Speicher zurück.
+
+    Konfiguration über Umgebungsvariablen:
+    - SHARED_STORE_URL: Backend (siehe Modulbeschreibung)
+    - WEB_WORKERS: Bei mehr als einem Worker ist SQLite der Standard
+    """
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            default = DEFAULT_SQLITE_URL if int(os.getenv("WEB_WORKERS", "1") or 1) > 1 else "memory://"
+            _shared_store = create_shared_store(os.getenv("SHARED_STORE_URL", default) or default)
+        return _shared_store
+
+
+def set_shared_store(store: Optional[SharedStore]) -> None:
+    """Ersetzt den globalen Speicher (z. B. leerer Speicher für Benchmarks).
+
+    Args:
+        store: Neue Instanz; None setzt zurück, sodass ``get_shared_store()``
+            den Speicher beim nächsten Aufruf neu aus der Konfiguration erzeugt
+    """
+    global _shared_store
+    with _shared_store_lock:
+        _shared_store = store
@@ -4,32 +4,182 @@ Dieses Modul ist verantwortlich für die Verbindung zur Supabase-Datenbank.
 Es lädt die Konfiguration aus der .env-Datei und stellt einen initialisierten
 Supabase Client für die gesamte Anwendung zur Verfügung.
 
+Alle Sessions teilen sich einen httpx-Client (Verbindungspool mit Keep-Alive,
+siehe ``get_http_client``). Jede Session bekommt weiterhin einen eigenen
+Supabase-Client, der nur ihre Auth-Header trägt; die Header werden je Anfrage
+gesetzt, nicht am geteilten httpx-Client. Das Erstellen eines Session-Clients
+kostet damit kein eigenes SSL-Setup und keine neuen TCP/TLS-Verbindungen.
+
+Für async Services (``AsyncSearchService`` usw.) gibt ``get_async_client`` je
+Session einen ``AsyncClient`` auf einem geteilten ``httpx.AsyncClient`` zurück.
+Er nutzt die Anmeldung des synchronen Session-Clients mit (gleicher
+Session-Speicher, Auth-Header werden bei An-/Abmeldung übernommen), sodass
+Login und Token-Refresh weiterhin nur über den synchronen Client laufen.
+
+Wiederholungen transienter Fehler und der Circuit Breaker liegen im Transport
+des geteilten Clients (siehe ``services.resilience``) und gelten damit für
+alle Datenbank-, Auth- und Storage-Anfragen.
+
 Konfiguration:
     Benötigte Umgebungsvariablen (in .env-Datei):
     - SUPABASE_URL: Die URL des Supabase-Projekts
       Format: https://[PROJECT-ID].supabase.co
     - SUPABASE_ANON_KEY: Der anonyme API-Schlüssel für public Operationen
       Format: eyJ... (JWT Token)
+
+    Optional (Verbindungspool):
+    - SUPABASE_HTTP2: HTTP/2 verwenden (Standard: false)
+    - SUPABASE_HTTP_MAX_CONNECTIONS: Maximale Verbindungen (Standard: 100)
+    - SUPABASE_HTTP_MAX_KEEPALIVE: Offen gehaltene Verbindungen (Standard: 20)
+    - SUPABASE_HTTP_TIMEOUT: Timeout je Anfrage in Sekunden (Standard: 20)
+    - SUPABASE_RETRY_* / SUPABASE_CIRCUIT_*: siehe ``services.resilience``
+
+Der geteilte Pool setzt supabase >= 2.22 voraus: Ältere Versionen setzen in
+``create_session`` ``base_url`` und Header direkt am übergebenen httpx-Client,
+sodass sich die Sessions gegenseitig den Auth-Header überschreiben würden.
+Mit einer älteren Version erstellt jede Session ihren eigenen httpx-Client.
 """
 
 from __future__ import annotations
 
+import atexit
 import os
+import re
+import threading
+from importlib import metadata
+from typing import Any, Optional
+
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from supabase.lib.client_options import SyncClientOptions
-from httpx import Client as HttpxClient
+from supabase import create_client, AsyncClient, Client
+from supabase.lib.client_options import AsyncClientOptions, SyncClientOptions
+from supabase_auth import AsyncSupportedStorage, SyncSupportedStorage
+from httpx import (
+    AsyncClient as AsyncHttpxClient,
+    AsyncHTTPTransport,
+    Client as HttpxClient,
+    HTTPTransport,
+    Limits,
+    Timeout,
+)
+
+from services.resilience import create_async_resilient_transport, create_resilient_transport
 
 from utils.logging_config import get_logger
+from utils.metrics import supabase_event_hooks
 
 logger = get_logger(__name__)
 
 # Lade Umgebungsvariablen aus .env-Datei beim Modul-Import
 load_dotenv()
 
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "false").lower() == "true"
+SUPABASE_HTTP_MAX_CONNECTIONS = int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "100"))
+SUPABASE_HTTP_MAX_KEEPALIVE = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "20"))
+SUPABASE_HTTP_TIMEOUT = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "20"))
+# Leerlaufzeit, nach der Keep-Alive-Verbindungen geschlossen werden
+KEEPALIVE_EXPIRY_SECONDS = 30.0
+# Erste supabase-Version, die einen übergebenen httpx-Client nicht verändert
+MIN_SHARED_POOL_VERSION = (2, 22)
+
+_http_client: Optional[HttpxClient] = None
+_async_http_client: Optional[AsyncHttpxClient] = None
+_http_client_lock = threading.Lock()
+_shared_pool_supported: Optional[bool] = None
+
+
+def shared_pool_supported() -> bool:
+    """Prüft einmalig, ob die installierte supabase-Version den geteilten Pool erlaubt.
+
+    Returns:
+        True ab supabase 2.22; bei älteren oder unbekannten Versionen False
+    """
+    global _shared_pool_supported
+    if _shared_pool_supported is None:
+        try:
+            installed = metadata.version("supabase")
+        except metadata.PackageNotFoundError:
+            installed = ""
+        match = re.match(r"(\d+)\.(\d+)", installed)
+        version = (int(match.group(1)), int(match.group(2))) if match else (0, 0)
+        _shared_pool_supported = version >= MIN_SHARED_POOL_VERSION
+        if not _shared_pool_supported:
+            logger.warning(
+                f"supabase {installed or 'unbekannt'} verändert übergebene httpx-Clients; "
+                f"geteilter Verbindungspool deaktiviert (benötigt >= "
+                f"{'.'.join(map(str, MIN_SHARED_POOL_VERSION))})"
+            )
+    return _shared_pool_supported
+
+
+def _pool_limits() -> Limits:
+    return Limits(
+        max_connections=SUPABASE_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=SUPABASE_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def get_http_client() -> HttpxClient:
+    """Gibt den von allen Sessions geteilten httpx-Client zurück (wird beim ersten Aufruf erstellt).
+
+    Returns:
+        httpx-Client mit Verbindungspool, Timeouts, Wiederholungen und Metrik-Hooks
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                pool = HTTPTransport(http2=SUPABASE_HTTP2, limits=_pool_limits())
+                _http_client = HttpxClient(
+                    transport=create_resilient_transport(pool),
+                    timeout=Timeout(SUPABASE_HTTP_TIMEOUT, connect=5.0),
+                    # Event-Hooks zählen die Anfragen je Operation (siehe utils.metrics)
+                    event_hooks=supabase_event_hooks(),
+                )
+                logger.info(
+                    f"Supabase-Verbindungspool erstellt (HTTP/2: {SUPABASE_HTTP2}, "
+                    f"max. {SUPABASE_HTTP_MAX_CONNECTIONS} Verbindungen)"
+                )
+    return _http_client
+
+
+def get_async_http_client() -> AsyncHttpxClient:
+    """Gibt den geteilten httpx-AsyncClient der async Services zurück (wird beim ersten Aufruf erstellt).
+
+    Der Client wird im Event-Loop des Servers genutzt; seine Verbindungen
+    werden beim Beenden des Prozesses geschlossen.
+
+    Returns:
+        httpx-AsyncClient mit Verbindungspool, Timeouts, Wiederholungen und Metrik-Hooks
+    """
+    global _async_http_client
+    if _async_http_client is None:
+        with _http_client_lock:
+            if _async_http_client is None:
+                pool = AsyncHTTPTransport(http2=SUPABASE_HTTP2, limits=_pool_limits())
+                _async_http_client = AsyncHttpxClient(
+                    transport=create_async_resilient_transport(pool),
+                    timeout=Timeout(SUPABASE_HTTP_TIMEOUT, connect=5.0),
+                    event_hooks=supabase_event_hooks(asynchronous=True),
+                )
+                logger.info(f"Async Supabase-Verbindungspool erstellt (HTTP/2: {SUPABASE_HTTP2})")
+    return _async_http_client
+
+
+def close_http_client() -> None:
+    """Schließt den geteilten httpx-Client (beim Beenden des Prozesses)."""
+    global _http_client
+    with _http_client_lock:
+        client, _http_client = _http_client, None
+    if client is not None:
+        client.close()
+
+
+atexit.register(close_http_client)
+
 
 def get_client() -> Client:
-    """Erstellt und gibt einen Supabase Client zurück.
+    """Erstellt und gibt einen Supabase Client für eine Session zurück.
     
     Returns:
         Initialisierter Supabase Client
@@ -58,8 +208,11 @@ def get_client() -> Client:
 
     try:
         logger.debug("Initialisiere Supabase Client...")
-        http_client = HttpxClient(http2=False)
-        options = SyncClientOptions(httpx_client=http_client)
+        # Geteilter Verbindungspool; Auth-Header bleiben im Client der Session
+        if shared_pool_supported():
+            options = SyncClientOptions(httpx_client=get_http_client())
+        else:
+            options = SyncClientOptions()
         client = create_client(url, key, options)
         logger.info("Supabase Client erfolgreich initialisiert")
         return client
@@ -74,3 +227,62 @@ def get_client() -> Client:
         )
         logger.error(f"Fehler beim Erstellen des Supabase Clients: {e}", exc_info=True)
         raise RuntimeError(error_msg) from e
+
+
+class _SharedSessionStorage(AsyncSupportedStorage):
+    """Async-Sicht auf den Session-Speicher eines synchronen Clients."""
+
+    def __init__(self, storage: SyncSupportedStorage) -> None:
+        self._storage = storage
+
+    async def get_item(self, key: str) -> Optional[str]:
+        return self._storage.get_item(key)
+
+    async def set_item(self, key: str, value: str) -> None:
+        self._storage.set_item(key, value)
+
+    async def remove_item(self, key: str) -> None:
+        self._storage.remove_item(key)
+
+
+def get_async_client(sb: Client) -> AsyncClient:
+    """Erstellt den async Supabase-Client einer Session.
+
+    Der Client teilt Session-Speicher und Anmeldung mit ``sb``: Meldet sich der
+    Benutzer über ``sb`` an oder ab, übernimmt der async Client den Auth-Header.
+
+    Args:
+        sb: Synchroner Supabase-Client der Session (siehe ``get_client``)
+
+    Returns:
+        AsyncClient auf dem geteilten httpx-AsyncClient
+
+    Raises:
+        RuntimeError: Wenn der Client nicht erstellt werden kann
+    """
+    try:
+        options = AsyncClientOptions(
+            httpx_client=get_async_http_client() if shared_pool_supported() else None,
+            storage=_SharedSessionStorage(sb.options.storage),
+            # Token-Refresh übernimmt der synchrone Client
+            auto_refresh_token=False,
+            headers={"Authorization": sb.options.headers["Authorization"]},
+        )
+        client = AsyncClient(str(sb.supabase_url).rstrip("/"), sb.supabase_key, options)
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Fehler beim Erstellen des async Supabase Clients: {e}", exc_info=True)
+        raise RuntimeError(f"Fehler beim Erstellen des async Supabase Clients: {e}") from e
+
+    def follow_auth(_event: str, session: Optional[Any]) -> None:
+        header = f"Bearer {session.access_token if session else sb.supabase_key}"
+        if client.options.headers.get("Authorization") == header:
+            return
+        client.options.headers["Authorization"] = header
+        # PostgREST/Storage/Functions werden mit dem neuen Header neu erstellt
+        # (wie AsyncClient._listen_to_auth_events, aber ohne Realtime-Task)
+        client._postgrest = None
+        client._storage = None
+        client._functions = None
+
+    sb.auth.on_auth_state_change(follow_auth)
+    return client
@@ -0,0 +1,31 @@
+-- Bild-Embeddings für die Ähnlichkeitssuche (Vermisst <-> Fundtier).
+-- Ein Eintrag pro post_image; Vektor = normierter CLS-Token von
+-- google/vit-base-patch16-224 (768 Dimensionen).
+
+create extension if not exists vector;
+
+create table if not exists public.post_image_embedding (
+    id uuid primary key default gen_random_uuid(),
+    post_id uuid not null references public.post (id) on delete cascade,
+    post_image_id uuid references public.post_image (id) on delete cascade,
+    embedding vector(768) not null,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists post_image_embedding_post_id_idx
+    on public.post_image_embedding (post_id);
+
+alter table public.post_image_embedding enable row level security;
+
+create policy "Embeddings sind öffentlich lesbar"
+    on public.post_image_embedding for select
+    using (true);
+
+create policy "Embeddings nur für eigene Posts anlegen"
+    on public.post_image_embedding for insert
+    with check (
+        exists (
+            select 1 from public.post p
+            where p.id = post_id and p.user_id = auth.uid()
+        )
+    );
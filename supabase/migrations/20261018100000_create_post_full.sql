@@ -0,0 +1,54 @@
+-- Meldung mit Farben und Bildern in einem Aufruf anlegen (ein Roundtrip).
+-- Die Funktion läuft als eine Transaktion: Schlägt ein Insert fehl (z. B.
+-- unbekannte Farbe), bleibt weder Post noch Verknüpfung zurück.
+-- security invoker: Es gelten die RLS-Policies von post, post_color und
+-- post_image für den aufrufenden Benutzer.
+
+create or replace function public.create_post_full(
+    p_post jsonb,
+    p_color_ids bigint[] default '{}',
+    p_image_urls text[] default '{}'
+)
+returns jsonb
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+    v_post public.post;
+    v_images jsonb;
+begin
+    insert into public.post (
+        user_id, post_status_id, headline, description,
+        species_id, breed_id, sex_id, event_date,
+        location_text, location_lat, location_lon
+    )
+    select
+        r.user_id, r.post_status_id, r.headline, r.description,
+        r.species_id, r.breed_id, r.sex_id, r.event_date,
+        r.location_text, r.location_lat, r.location_lon
+    from jsonb_populate_record(null::public.post, p_post) as r
+    returning * into v_post;
+
+    insert into public.post_color (post_id, color_id)
+    select v_post.id, c.color_id
+    from (select distinct unnest(coalesce(p_color_ids, '{}')) as color_id) as c;
+
+    with inserted as (
+        insert into public.post_image (post_id, url)
+        select v_post.id, u.url
+        from unnest(coalesce(p_image_urls, '{}')) with ordinality as u(url, n)
+        where nullif(trim(u.url), '') is not null
+        order by u.n
+        returning id, url
+    )
+    select coalesce(jsonb_agg(jsonb_build_object('id', id, 'url', url)), '[]'::jsonb)
+    into v_images
+    from inserted;
+
+    return to_jsonb(v_post) || jsonb_build_object('post_image', v_images);
+end;
+$$;
+
+revoke execute on function public.create_post_full(jsonb, bigint[], text[]) from public, anon;
+grant execute on function public.create_post_full(jsonb, bigint[], text[]) to authenticated;
@@ -0,0 +1,83 @@
+-- Meldung mit Bildern und Farben in einem Aufruf löschen (ein Roundtrip).
+-- Gibt die URLs der gelöschten Bilder zurück; die Storage-Dateien entfernt
+-- die App danach im Hintergrund (services/posts/storage_cleanup.py).
+-- Ergebnis null: Post existiert nicht (oder ist für den Aufrufer unsichtbar).
+-- security invoker: Es gelten die RLS-Policies des aufrufenden Benutzers.
+-- Darf er den Post nicht löschen, wird die gesamte Funktion zurückgerollt.
+
+-- Ausstehende Storage-Bereinigung (Outbox): delete_post_full trägt die
+-- Bild-URLs in derselben Transaktion ein, die App löscht die Zeile, sobald
+-- die Dateien entfernt sind. Übrig gebliebene Zeilen (Neustart, Abmeldung,
+-- Storage-Ausfall) nimmt die App bei der nächsten Anmeldung wieder auf.
+create table if not exists public.storage_cleanup (
+    post_id uuid primary key,
+    user_id uuid not null default auth.uid() references auth.users (id) on delete cascade,
+    image_urls jsonb not null default '[]'::jsonb,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists storage_cleanup_user_id_idx
+    on public.storage_cleanup (user_id);
+
+alter table public.storage_cleanup enable row level security;
+
+create policy "Eigene Storage-Bereinigung lesen"
+    on public.storage_cleanup for select
+    using (user_id = auth.uid());
+
+create policy "Eigene Storage-Bereinigung anlegen"
+    on public.storage_cleanup for insert
+    with check (user_id = auth.uid());
+
+create policy "Eigene Storage-Bereinigung aktualisieren"
+    on public.storage_cleanup for update
+    using (user_id = auth.uid())
+    with check (user_id = auth.uid());
+
+create policy "Eigene Storage-Bereinigung löschen"
+    on public.storage_cleanup for delete
+    using (user_id = auth.uid());
+
+create or replace function public.delete_post_full(p_post_id uuid)
+returns jsonb
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+    v_urls jsonb;
+begin
+    perform 1 from public.post where id = p_post_id for update;
+    if not found then
+        return null;
+    end if;
+
+    with deleted as (
+        delete from public.post_image
+        where post_id = p_post_id
+        returning url
+    )
+    select coalesce(jsonb_agg(url), '[]'::jsonb)
+    into v_urls
+    from deleted;
+
+    delete from public.post_color where post_id = p_post_id;
+
+    delete from public.post where id = p_post_id;
+    if not found then
+        raise exception 'Keine Berechtigung zum Löschen von Post %', p_post_id
+            using errcode = '42501';
+    end if;
+
+    if jsonb_array_length(v_urls) > 0 then
+        insert into public.storage_cleanup (post_id, image_urls)
+        values (p_post_id, v_urls)
+        on conflict (post_id) do update set image_urls = excluded.image_urls;
+    end if;
+
+    return jsonb_build_object('id', p_post_id, 'image_urls', v_urls);
+end;
+$$;
+
+revoke execute on function public.delete_post_full(uuid) from public, anon;
+grant execute on function public.delete_post_full(uuid) to authenticated;
@@ -14,12 +14,26 @@ Struktur:
 └── profile/         - Benutzer-Profil
 """
 
+from typing import TYPE_CHECKING
+
+from utils.lazy_import import lazy_exports
+
 # Hauptkomponenten
-from ui.auth import AuthView
 from ui.theme import ThemeManager, soft_card, chip
-from ui.post_form import PostForm
-from ui.discover import DiscoverView
-from ui.profile import ProfileView
+
+if TYPE_CHECKING:
+    from ui.auth import AuthView
+    from ui.post_form import PostForm
+    from ui.discover import DiscoverView
+    from ui.profile import ProfileView
+
+# Views werden erst beim ersten Zugriff importiert (schneller Serverstart)
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "AuthView": "ui.auth",
+    "PostForm": "ui.post_form",
+    "DiscoverView": "ui.discover",
+    "ProfileView": "ui.profile",
+})
 
 # Konstanten
 from ui.constants import (
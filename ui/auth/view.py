@@ -16,6 +16,7 @@ from ui.constants import (
 from services.account import AuthService, ProfileService
 from ui.theme import ThemeManager, get_theme_color
 from ui.shared_components import show_confirm_dialog
+from utils.http_middleware import asset_url
 from .components import (
     create_login_email_field,
     create_login_password_field,
@@ -467,7 +468,7 @@ class AuthView:
         
         # Logo
         logo = ft.Image(
-            src="petbuddy_logo_slogan.png",
+            src=asset_url("petbuddy_logo_slogan.png", web=bool(self.page.web)),
             height=200,
             fit=ft.ImageFit.CONTAIN,
         )
@@ -168,3 +168,14 @@ MESSAGE_COLOR_MAP: dict[str, str] = {
 
 LOGOUT_BUTTON_COLOR = ft.Colors.RED_400
 """Farbe für Logout-Button."""
+
+# ══════════════════════════════════════════════════════════════════════
+# PROFIL-UNTERSEITEN
+# ══════════════════════════════════════════════════════════════════════
+
+# IDs der ProfileView-Unterseiten (für Routing ohne Import der View)
+PROFILE_VIEW_EDIT_PROFILE = "edit_profile"
+PROFILE_VIEW_SETTINGS = "settings"
+PROFILE_VIEW_FAVORITES = "favorites"
+PROFILE_VIEW_MY_POSTS = "my_posts"
+PROFILE_VIEW_SAVED_SEARCHES = "saved_searches"
@@ -9,7 +9,9 @@ from typing import Callable, Optional, List, Dict, Any
 import flet as ft
 
 from utils.logging_config import get_logger
-from services.posts import SearchService, FavoritesService
+from utils.metrics import timed
+from services.posts import AsyncSearchService, AsyncFavoritesService
+from services.posts.filters import mark_favorites
 from ui.shared_components import create_loading_indicator, create_no_results_card
 
 logger = get_logger(__name__)
@@ -17,9 +19,9 @@ logger = get_logger(__name__)
 LOADING_MELDUNGEN_TEXT = "Meldungen werden geladen…"
 
 
-def _fetch_posts_sync(
-    search_service: SearchService,
-    favorites_service: FavoritesService,
+async def _fetch_posts(
+    search_service: AsyncSearchService,
+    favorites_service: AsyncFavoritesService,
     filters: Dict[str, Any],
     search_query: Optional[str],
     selected_colors: List[int],
@@ -30,19 +32,21 @@ def _fetch_posts_sync(
     radius_km: Optional[float] = None,
     location_text_filter: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
-    """Lädt Meldungen synchron (für asyncio.to_thread). Gibt Items zurück."""
-    favorite_ids = favorites_service.get_favorite_ids(current_user_id) if current_user_id else set()
-    return search_service.search_posts(
-        filters=filters,
-        search_query=search_query,
-        selected_colors=set(selected_colors) if selected_colors else None,
-        sort_option=sort_option,
-        favorite_ids=favorite_ids,
-        location_lat=location_lat,
-        location_lon=location_lon,
-        radius_km=radius_km,
-        location_text_filter=location_text_filter,
+    """Lädt Favoriten-IDs und Meldungen parallel im Event-Loop. Gibt Items zurück."""
+    favorite_ids, items = await asyncio.gather(
+        favorites_service.get_favorite_ids(current_user_id),
+        search_service.search_posts(
+            filters=filters,
+            search_query=search_query,
+            selected_colors=set(selected_colors) if selected_colors else None,
+            sort_option=sort_option,
+            location_lat=location_lat,
+            location_lon=location_lon,
+            radius_km=radius_km,
+            location_text_filter=location_text_filter,
+        ),
     )
+    return mark_favorites(items, favorite_ids)
 
 
 def handle_render_items(
@@ -110,9 +114,10 @@ def handle_render_items(
 # View-spezifische Handler
 # ─────────────────────────────────────────────────────────────
 
+@timed("ui.load_posts")
 async def handle_view_load_posts(
-    search_service: SearchService,
-    favorites_service: FavoritesService,
+    search_service: AsyncSearchService,
+    favorites_service: AsyncFavoritesService,
     search_field: ft.TextField,
     filter_typ: ft.Dropdown,
     filter_art: ft.Dropdown,
@@ -134,8 +139,8 @@ async def handle_view_load_posts(
     """Lädt Meldungen aus der Datenbank mit aktiven Filteroptionen (View-Wrapper).
     
     Args:
-        search_service: SearchService-Instanz
-        favorites_service: FavoritesService-Instanz
+        search_service: AsyncSearchService-Instanz
+        favorites_service: AsyncFavoritesService-Instanz
         search_field: Suchfeld
         filter_typ: Kategorie-Dropdown
         filter_art: Tierart-Dropdown
@@ -173,8 +178,7 @@ async def handle_view_load_posts(
     await asyncio.sleep(0)
 
     try:
-        items = await asyncio.to_thread(
-            _fetch_posts_sync,
+        items = await _fetch_posts(
             search_service=search_service,
             favorites_service=favorites_service,
             filters=filters,
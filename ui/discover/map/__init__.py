@@ -4,16 +4,21 @@ Map-Module: Kartenvisualisierung für Meldungen.
 
 from .components import (
     build_map_container,
+    update_map_container,
+    is_map_webview,
     build_map_loading_indicator,
     build_map_empty_state,
     build_map_error,
 )
-from .handlers import handle_map_marker_click
+from .handlers import handle_map_marker_click, create_viewport_source
 
 __all__ = [
     "build_map_container",
+    "update_map_container",
+    "is_map_webview",
     "build_map_loading_indicator",
     "build_map_empty_state",
     "build_map_error",
     "handle_map_marker_click",
+    "create_viewport_source",
 ]
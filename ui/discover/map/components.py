@@ -4,17 +4,67 @@ Map-Komponenten: UI-Builder für die Kartenansicht in der Discover-View.
 
 from __future__ import annotations
 
-import base64
-from urllib.parse import unquote
+import os
+from urllib.parse import unquote, urljoin
 from typing import List, Dict, Any, Optional, Callable
 
 import flet as ft
 
-from utils.map_generator import generate_map_html
+from services.posts.map_feed import MapViewportSource, get_map_feed_store
+from services.posts.map_service import MapDataService
+from utils.http_middleware import asset_version
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+MAP_SHELL_PATH = "/map/"
+
+
+def _map_shell_url(page: ft.Page, feed_id: str) -> str:
+    """Baut die URL der statischen Karten-Seite für einen Feed."""
+    base = (
+        os.getenv("APP_BASE_URL")
+        or getattr(page, "url", None)
+        or f"http://localhost:{os.getenv('PORT', '8080')}"
+    )
+    # Version der Karten-Seite in der URL: der Browser cacht sie bis zur nächsten Änderung
+    return f"{urljoin(base, MAP_SHELL_PATH)}?v={asset_version('map/index.html')}&feed={feed_id}"
+
+
+def _set_webview_url(webview: ft.Control, url: str) -> None:
+    """Setzt die URL der Karten-WebView.
+
+    Flet ruft dabei ``load_request`` auf, das es nur auf Android, iOS und macOS
+    gibt; im Web und auf dem Desktop genügt das geänderte ``url``-Attribut.
+    """
+    try:
+        webview.url = url
+    except ft.FletUnsupportedPlatformException:
+        pass
+
+
+def _publish_feed(
+    feed_id: str,
+    posts: List[Dict[str, Any]],
+    center_lat: float,
+    center_lon: float,
+    zoom_level: int,
+    use_clustering: bool,
+    viewport_source: Optional[MapViewportSource] = None,
+) -> int:
+    """Legt die aktuellen Posts als GeoJSON im Feed ab und gibt die Version zurück."""
+    data = MapDataService.build_feature_collection(
+        [] if viewport_source is not None else posts,
+        center_lat=center_lat,
+        center_lon=center_lon,
+        zoom_level=zoom_level,
+        use_clustering=use_clustering,
+    )
+    # Bei Clustering liefert der Server nur die sichtbaren Cluster/Marker je Ausschnitt
+    return get_map_feed_store().publish(
+        feed_id, data, clustered=use_clustering, source=viewport_source
+    )
+
 
 def build_map_container(
     posts: List[Dict[str, Any]],
@@ -26,9 +76,15 @@ def build_map_container(
     zoom_level: int = 5,
     use_clustering: bool = True,
     map_height: Optional[float] = None,
+    feed_id: Optional[str] = None,
+    viewport_source: Optional[MapViewportSource] = None,
 ) -> ft.Container:
     """Erstellt einen Container mit der interaktiven Karte.
 
+    Die WebView lädt einmalig die statische Leaflet-Seite; die Posts
+    kommen als GeoJSON über ``/map/feed/<feed_id>``. Spätere Änderungen
+    laufen über ``update_map_container`` und übertragen nur noch Daten.
+
     Args:
         posts: Liste von Post-Dictionaries mit Geokoordinaten
         page: Flet Page-Instanz
@@ -37,33 +93,31 @@ def build_map_container(
         center_lon: Längengrad des Zentrums
         zoom_level: Standard Zoom-Level (1-20)
         use_clustering: Marker-Clustering aktivieren
+        map_height: Höhe der Karte in Pixeln
+        feed_id: Feed-ID der Session (wird erzeugt wenn None)
+        viewport_source: Datenquelle, um Marker je Kartenausschnitt zu laden
+            (statt nur der übergebenen Posts)
 
     Returns:
         Container mit WebView für die Karte
     """
     try:
-        # Karten-HTML generieren
-        logger.info(f"Generiere Karte mit {len(posts)} Posts...")
-        html_map = generate_map_html(
-            posts=posts,
-            center_lat=center_lat,
-            center_lon=center_lon,
-            zoom_level=zoom_level,
-            use_clustering=use_clustering,
+        feed_id = feed_id or get_map_feed_store().new_feed_id()
+        version = _publish_feed(
+            feed_id, posts, center_lat, center_lon, zoom_level, use_clustering, viewport_source
         )
-
-        # Base64-Encoding für WebView
-        html_bytes = html_map.encode("utf-8")
-        html_b64 = base64.b64encode(html_bytes).decode("utf-8")
-        data_url = f"data:text/html;charset=utf-8;base64,{html_b64}"
+        shell_url = _map_shell_url(page, feed_id)
+        map_state = {"feed_id": feed_id, "shell_url": shell_url, "url": f"{shell_url}#v={version}"}
+        logger.info(f"Karten-Feed {feed_id[:8]} mit {len(posts)} Posts veröffentlicht (v{version})")
 
         # WebView erstellen
         webview = ft.WebView(
-            url=data_url,
+            url=map_state["url"],
             expand=True,
             height=map_height,
             on_page_started=lambda e: on_url_change(e),
             on_page_ended=lambda e: on_url_change(e),
+            data=map_state,
         )
 
         # URL-Change-Handler für Marker-/Favoriten-Klicks
@@ -107,7 +161,7 @@ def build_map_container(
                         on_marker_click(post_id)
 
                     # Nach Klick zurück auf die Karten-URL, damit die Karte sichtbar bleibt
-                    webview.url = data_url
+                    _set_webview_url(webview, map_state["url"])
                     page.update()
             except Exception as ex:
                 logger.error(f"Fehler beim Verarbeiten des Marker-Klicks: {ex}")
@@ -136,6 +190,67 @@ def build_map_container(
         )
 
 
+def is_map_webview(control: Any) -> bool:
+    """Prüft, ob ein Control die von ``build_map_container`` erzeugte Karte ist.
+
+    Die Karte wird an ihrem Zustand (``data`` mit ``feed_id``) erkannt;
+    ``ft.WebView`` ist in Flet eine Factory-Funktion und taugt nicht für ``isinstance``.
+
+    Args:
+        control: Zu prüfendes Control (z. B. ``container.content``)
+
+    Returns:
+        True, wenn das Control eine Karten-WebView ist
+    """
+    map_state = getattr(control, "data", None)
+    return isinstance(map_state, dict) and "feed_id" in map_state
+
+
+def update_map_container(
+    container: ft.Container,
+    posts: List[Dict[str, Any]],
+    center_lat: float = 51.1657,
+    center_lon: float = 10.4515,
+    zoom_level: int = 5,
+    use_clustering: bool = True,
+    map_height: Optional[float] = None,
+    viewport_source: Optional[MapViewportSource] = None,
+) -> bool:
+    """Aktualisiert die Daten einer bestehenden Karte ohne Neuaufbau.
+
+    Es wird nur der Feed neu veröffentlicht und die Version im URL-Hash
+    der WebView erhöht; die Seite lädt daraufhin nur die GeoJSON-Daten.
+
+    Args:
+        container: Von ``build_map_container`` erzeugter Container
+        posts: Liste von Post-Dictionaries mit Geokoordinaten
+        center_lat: Breitengrad des Zentrums
+        center_lon: Längengrad des Zentrums
+        zoom_level: Standard Zoom-Level (1-20)
+        use_clustering: Marker-Clustering aktivieren
+        map_height: Höhe der Karte in Pixeln
+        viewport_source: Datenquelle, um Marker je Kartenausschnitt zu laden
+
+    Returns:
+        True wenn aktualisiert, False wenn der Container keine Karte enthält
+    """
+    webview = getattr(container, "content", None)
+    if not is_map_webview(webview):
+        return False
+    map_state = webview.data
+
+    version = _publish_feed(
+        map_state["feed_id"], posts, center_lat, center_lon, zoom_level, use_clustering, viewport_source
+    )
+    map_state["url"] = f"{map_state['shell_url']}#v={version}"
+    _set_webview_url(webview, map_state["url"])
+    if map_height is not None:
+        webview.height = map_height
+        container.height = map_height
+    logger.info(f"Karten-Feed {map_state['feed_id'][:8]} aktualisiert (v{version}, {len(posts)} Posts)")
+    return True
+
+
 def build_map_loading_indicator() -> ft.Control:
     """Erstellt einen Loading-Indikator für die Karte.
 
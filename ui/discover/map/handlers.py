@@ -4,8 +4,11 @@ Map-Handler: Event-Handler für Karteninteraktionen.
 
 from __future__ import annotations
 
-from typing import Callable, List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Sequence
 
+from services.posts import FavoritesService, PostService, SearchService
+from services.posts.map_feed import MapViewportSource
+from services.posts.map_service import MapDataService
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -17,15 +20,20 @@ def handle_map_marker_click(
     page=None,  # Optional für Kompatibilität
     show_detail_dialog: Callable[[Dict[str, Any]], None] = None,
     on_detail_click: Callable[[Dict[str, Any]], None] = None,  # Legacy-Parameter
+    load_post: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
 ) -> None:
     """Handler wenn User auf einen Marker klickt.
 
+    Marker kommen beim ausschnittsbasierten Laden auch für Posts, die nicht
+    in der Liste stehen; diese werden über ``load_post`` nachgeladen.
+
     Args:
         post_id: UUID des geklickten Posts
         posts: Liste aller Posts zum Suchen
         page: Optional Flet Page (für Kompatibilität)
         show_detail_dialog: Callback zur Detailansicht
         on_detail_click: Legacy-Callback (deprecated)
+        load_post: Optional Callback, der einen Post per ID lädt
     """
     # Callback bestimmen (neue oder alte Variante)
     callback = show_detail_dialog or on_detail_click
@@ -41,4 +49,72 @@ def handle_map_marker_click(
             callback(post)
             return
 
+    post = load_post(str(post_id)) if load_post else None
+    if post:
+        logger.info(f"Zeige Details für nachgeladenen Post: {post.get('headline')}")
+        callback(post)
+        return
+
     logger.warning(f"Post mit ID {post_id} nicht gefunden")
+
+
+def create_viewport_source(
+    search_service: SearchService,
+    favorites_service: FavoritesService,
+    post_service: PostService,
+    query: Dict[str, Any],
+    current_user_id: Optional[str] = None,
+) -> MapViewportSource:
+    """Erstellt die Datenquelle für das ausschnittsbasierte Laden der Karte.
+
+    Die Filter werden beim Erstellen festgehalten; die Karte lädt damit
+    beim Verschieben/Zoomen nur die Marker des sichtbaren Ausschnitts.
+
+    Args:
+        search_service: SearchService der Session
+        favorites_service: FavoritesService der Session
+        post_service: PostService der Session (Popup-Details)
+        query: Aktive Filter (filters, search_query, selected_colors,
+            location_lat, location_lon, radius_km, location_text_filter)
+        current_user_id: Aktuelle User-ID (für Favoriten-Markierung)
+
+    Returns:
+        MapViewportSource für ``build_map_container``/``update_map_container``
+    """
+    favorite_cache: Dict[str, Any] = {}
+
+    def get_favorite_ids() -> set:
+        if "ids" not in favorite_cache:
+            favorite_cache["ids"] = (
+                favorites_service.get_favorite_ids(current_user_id) if current_user_id else set()
+            )
+        return favorite_cache["ids"]
+
+    def load_markers(bbox: Sequence[float]) -> List[Dict[str, Any]]:
+        markers = search_service.get_markers_in_bbox(
+            bbox,
+            filters=query.get("filters") or {},
+            search_query=query.get("search_query"),
+            selected_colors=set(query.get("selected_colors") or []) or None,
+            favorite_ids=get_favorite_ids(),
+            location_lat=query.get("location_lat"),
+            location_lon=query.get("location_lon"),
+            radius_km=query.get("radius_km"),
+            location_text_filter=query.get("location_text_filter"),
+        )
+        return MapDataService.markers_to_geojson(markers)
+
+    def load_detail(post_id: str) -> Optional[Dict[str, Any]]:
+        post = post_service.get_by_id(post_id)
+        if not post:
+            return None
+        post["is_favorite"] = post.get("id") in get_favorite_ids()
+        features = MapDataService.posts_to_geojson([post])
+        if not features:
+            return None
+        properties = features[0]["properties"]
+        properties["detail"] = True
+        return properties
+
+    return MapViewportSource(load_markers=load_markers, load_detail=load_detail)
+
@@ -6,10 +6,17 @@ from __future__ import annotations
 
 from typing import Callable, Optional, Dict, Any, List
 import flet as ft
-from supabase import Client
+from supabase import AsyncClient, Client
 
 from services.posts.references import ReferenceService
-from services.posts import SavedSearchService, FavoritesService, SearchService
+from services.posts import (
+    AsyncFavoritesService,
+    AsyncSearchService,
+    FavoritesService,
+    PostService,
+    SavedSearchService,
+    SearchService,
+)
 from services.posts.map_service import MapDataService
 from services.account import ProfileService
 from ui.theme import get_theme_color, soft_card
@@ -20,13 +27,17 @@ from ui.shared_components import (
 )
 from ui.discover.map import (
     build_map_container,
+    update_map_container,
+    is_map_webview,
     build_map_loading_indicator,
     build_map_empty_state,
     build_map_error,
     handle_map_marker_click,
+    create_viewport_source,
 )
 from app.dialogs import create_login_banner
 from utils.logging_config import get_logger
+from utils.metrics import timed
 
 logger = get_logger(__name__)
 
@@ -69,10 +80,20 @@ class DiscoverView:
         on_contact_login_required: Optional[Callable[[], None]] = None,
         on_save_search_login_required: Optional[Callable[[], None]] = None,
         on_comment_login_required: Optional[Callable[[], None]] = None,
+        async_sb: Optional[AsyncClient] = None,
     ) -> None:
-        """Initialisiert die DiscoverView."""
+        """Initialisiert die DiscoverView.
+
+        ``async_sb`` ist der async Client der Session (siehe
+        ``services.supabase_client.get_async_client``); fehlt er, wird er aus
+        ``sb`` erstellt.
+        """
         self.page = page
         self.sb = sb
+        if async_sb is None:
+            from services.supabase_client import get_async_client
+            async_sb = get_async_client(sb)
+        self.async_sb = async_sb
         self.on_contact_click = on_contact_click
         self.on_melden_click = on_melden_click
         self.on_login_required = on_login_required
@@ -86,6 +107,9 @@ class DiscoverView:
         self.favorites_service = FavoritesService(self.sb)
         self.search_service = SearchService(self.sb)
         self.profile_service = ProfileService(self.sb)
+        # Async Services für das Laden der Liste (ohne Worker-Threads)
+        self.async_favorites_service = AsyncFavoritesService(self.async_sb)
+        self.async_search_service = AsyncSearchService(self.async_sb)
 
         # Filter-Status (als dict für Mutability in Handlern)
         self.selected_farben: list[int] = []
@@ -128,6 +152,10 @@ class DiscoverView:
         self._map_data_service = MapDataService()
         self._all_loaded_posts: List[Dict[str, Any]] = []  # Alle Posts für die Karte
         self._map_loaded = False  # Flag ob Karte bereits gerendert wurde
+        self._map_widget: Optional[ft.Container] = None  # WebView-Karte (wird wiederverwendet)
+        self._map_feed_id: Optional[str] = None  # Feed-ID für die GeoJSON-Daten der Karte
+        self._map_query: Dict[str, Any] = {}  # Aktive Filter für das ausschnittsbasierte Laden
+        self._map_rendered_key: Optional[tuple] = None  # Stand der zuletzt gerenderten Karte
         self._current_tab_index = 0  # 0 = Liste, 1 = Karte
 
         self._all_breeds = {"breeds": {}}
@@ -433,8 +461,10 @@ class DiscoverView:
             self._clear_location_suggestions()
             return
 
-        from services.geocoding import geocode_suggestions
-        suggestions = geocode_suggestions(query)
+        from services.geocoding import geocode_suggestions_async
+        suggestions = await geocode_suggestions_async(query)
+        if version != self._location_query_version:
+            return
         if not suggestions:
             self._clear_location_suggestions()
             return
@@ -542,6 +572,22 @@ class DiscoverView:
                 radius_km = 25.0
                 has_radius = True
 
+        # Filter für die Karte festhalten (Marker werden je Ausschnitt nachgeladen)
+        self._map_query = {
+            "filters": {
+                "typ": handle_view_get_filter_value(self._filter_typ),
+                "art": handle_view_get_filter_value(self._filter_art),
+                "geschlecht": handle_view_get_filter_value(self._filter_geschlecht),
+                "rasse": handle_view_get_filter_value(self._filter_rasse),
+            } if self._filter_typ is not None else {},
+            "search_query": self._search_q.value.strip() if self._search_q and self._search_q.value else None,
+            "selected_colors": list(self.selected_farben),
+            "location_lat": location_lat,
+            "location_lon": location_lon,
+            "radius_km": radius_km,
+            "location_text_filter": location_text_filter,
+        }
+
         # Entfernungs-Sortierung nur bei konkretem Umkreis anzeigen
         if has_radius and orig_lat is not None:
             self._show_distance_sort_option()
@@ -549,8 +595,8 @@ class DiscoverView:
             self._hide_distance_sort_option()
         
         await handle_view_load_posts(
-            search_service=self.search_service,
-            favorites_service=self.favorites_service,
+            search_service=self.async_search_service,
+            favorites_service=self.async_favorites_service,
             search_field=self._search_q,
             filter_typ=self._filter_typ,
             filter_art=self._filter_art,
@@ -641,8 +687,9 @@ class DiscoverView:
         """Rendert die geladenen Items in der Listen-Ansicht."""
         # Speichere Posts für Karten-Rendering
         self._all_loaded_posts = items
-        # Markiere Karte als nicht geladen damit sie neu gerendert wird bei Filter-Änderung
-        self._map_loaded = False
+        # Karte nur neu rendern, wenn sich Posts oder Filter tatsächlich geändert haben
+        if self._map_state_key() != self._map_rendered_key:
+            self._map_loaded = False
 
         # Wenn Karte aktuell sichtbar ist, direkt mit gefilterten Daten neu rendern
         if self._current_tab_index == 1 and self._map_container is not None:
@@ -883,14 +930,51 @@ class DiscoverView:
     # Map Rendering
     # ─────────────────────────────────────────────────────────────
 
+    def _load_post_for_map(self, post_id: str) -> Optional[Dict[str, Any]]:
+        """Lädt einen Post, dessen Marker außerhalb der geladenen Liste liegt.
+
+        Args:
+            post_id: ID des Posts
+
+        Returns:
+            Post mit Benutzername und Favoritenstatus (wie in der Liste) oder None
+        """
+        post = PostService(self.sb).get_by_id(post_id)
+        if not post:
+            return None
+        user_id = post.get("user_id")
+        profile = self.profile_service.get_user_profiles([user_id]).get(user_id, {}) if user_id else {}
+        post["user_display_name"] = profile.get("display_name", "")
+        post["user_profile_image"] = profile.get("profile_image")
+        post["is_favorite"] = bool(self.current_user_id) and self.favorites_service.is_favorite(post_id)
+        return post
+
+    def _map_state_key(self) -> tuple:
+        """Schlüssel für den Karteninhalt (geordnete Post-Versionen + aktive Filter)."""
+        posts_key = tuple(
+            MapDataService.post_cache_key(p) for p in (self._all_loaded_posts or [])
+        )
+        query_key = repr(sorted(self._map_query.items()))
+        return posts_key, query_key
+
+    @timed("ui.render_map")
     async def _load_and_render_map(self) -> None:
         """Lädt und rendert die Karte mit aktuellen gefilterten Posts."""
         if not self._map_container:
             return
 
-        # Loading-Indikator anzeigen
-        self._map_container.content = build_map_loading_indicator()
-        self.page.update()
+        # Unveränderter Inhalt (z. B. nur Tab-Wechsel): vorhandene Karte weiterverwenden
+        state_key = self._map_state_key()
+        if self._map_widget is not None and state_key == self._map_rendered_key:
+            self._map_container.content = self._map_widget
+            self._map_loaded = True
+            self.page.update()
+            return
+
+        # Loading-Indikator nur beim ersten Aufbau; danach werden nur Daten übertragen
+        if self._map_widget is None:
+            self._map_container.content = build_map_loading_indicator()
+            self.page.update()
 
         try:
             # Posts holen (gefiltert)
@@ -921,31 +1005,60 @@ class DiscoverView:
             page_height = self.page.height if self.page and self.page.height else 900
             map_height = max(float(page_height) - 255.0, 360.0)
 
-            # Marker-Click-Handler
-            def on_marker_click(post_id: str):
-                handle_map_marker_click(
-                    post_id=post_id,
-                    posts=posts,  # ALLE Posts übergeben (nicht nur mit Koordinaten)
-                    page=self.page,
-                    show_detail_dialog=self._show_detail_dialog,
-                )
+            # Marker je Kartenausschnitt aus der Datenbank (nicht nur die geladene Liste)
+            viewport_source = create_viewport_source(
+                search_service=self.search_service,
+                favorites_service=self.favorites_service,
+                post_service=PostService(self.sb),
+                query=dict(self._map_query),
+                current_user_id=self.current_user_id,
+            )
 
-            # Karte rendern (mit Clustering bei >10 Posts)
-            map_widget = build_map_container(
+            # Bestehende Karte: nur neue Daten an die statische Karten-Seite senden
+            if self._map_widget is not None and update_map_container(
+                self._map_widget,
                 posts=posts_with_coords,
-                page=self.page,
-                on_marker_click=on_marker_click,
-                on_favorite_click=self._toggle_favorite_from_map,
                 center_lat=center[0],
                 center_lon=center[1],
                 zoom_level=5,
                 use_clustering=len(posts_with_coords) > 10,
                 map_height=map_height,
-            )
+                viewport_source=viewport_source,
+            ):
+                map_widget = self._map_widget
+            else:
+                # Marker-Click-Handler (immer mit den aktuell geladenen Posts)
+                def on_marker_click(post_id: str):
+                    handle_map_marker_click(
+                        post_id=post_id,
+                        posts=self._all_loaded_posts or [],  # ALLE Posts (nicht nur mit Koordinaten)
+                        page=self.page,
+                        show_detail_dialog=self._show_detail_dialog,
+                        load_post=self._load_post_for_map,
+                    )
+
+                # Karte einmalig aufbauen (mit Clustering bei >10 Posts)
+                map_widget = build_map_container(
+                    posts=posts_with_coords,
+                    page=self.page,
+                    on_marker_click=on_marker_click,
+                    on_favorite_click=self._toggle_favorite_from_map,
+                    center_lat=center[0],
+                    center_lon=center[1],
+                    zoom_level=5,
+                    use_clustering=len(posts_with_coords) > 10,
+                    map_height=map_height,
+                    feed_id=self._map_feed_id,
+                    viewport_source=viewport_source,
+                )
+                if is_map_webview(map_widget.content):
+                    self._map_widget = map_widget
+                    self._map_feed_id = map_widget.content.data["feed_id"]
 
             self._map_container.content = map_widget
             self._map_container.height = map_height
             self._map_loaded = True
+            self._map_rendered_key = state_key if map_widget is self._map_widget else None
             logger.info(f"Karte gerendert mit {len(posts_with_coords)} Meldungen")
             self.page.update()
 
@@ -9,6 +9,8 @@ Enthält:
 from __future__ import annotations
 
 import asyncio
+import base64
+import binascii
 import concurrent.futures
 from typing import Dict, Any, Optional, Callable, List
 
@@ -132,9 +134,18 @@ async def perform_ai_recognition(
             return
         
         try:
-            if local_path:
+            # Bereits komprimierte Vorschau-Bytes wiederverwenden (kein erneutes
+            # Dekodieren/Komprimieren und kein Storage-Download)
+            image_data = None
+            preview_b64 = selected_photo.get("base64")
+            if preview_b64:
+                try:
+                    image_data = base64.b64decode(preview_b64)
+                except (binascii.Error, ValueError):
+                    image_data = None
+            if not image_data and local_path:
                 image_data = post_storage_service.read_local_image_bytes(local_path)
-            else:
+            elif not image_data:
                 image_data = post_storage_service.download_post_image(storage_path)
             if not image_data:
                 show_error_dialog(page, "Fehler", "Fehler beim Laden des Bildes")
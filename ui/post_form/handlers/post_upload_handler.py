@@ -4,16 +4,20 @@ Post Upload-Feature: UI und Logik für Post-Erstellung und Speicherung.
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import os
 from datetime import date
 from typing import Callable, Optional, Dict, Any, List
 
 import flet as ft
 
-from services.posts import PostService, PostRelationsService, PostStorageService
+from services.posts import PostService, PostStorageService, SimilarityService
 from services.account import ProfileService
 from .photo_upload_handler import cleanup_local_file
 from utils.validators import sanitize_string
 from utils.logging_config import get_logger
+from utils.metrics import timed
 from ui.constants import (
     NO_SELECTION_VALUE,
     NO_SELECTION_LABEL,
@@ -28,11 +32,47 @@ from ui.shared_components import show_error_dialog, show_success_dialog, show_pr
 logger = get_logger(__name__)
 
 
+def _embeddings_enabled() -> bool:
+    """Prüft ob Bild-Embeddings beim Upload berechnet werden sollen (PET_EMBEDDINGS_ENABLED)."""
+    return os.getenv("PET_EMBEDDINGS_ENABLED", "false").lower() == "true"
+
+
+async def index_post_image(
+    sb,
+    post_id: str,
+    image_bytes: Optional[bytes],
+    post_image_id: Optional[str] = None,
+) -> None:
+    """Berechnet das Embedding eines Post-Bildes und speichert es für die Ähnlichkeitssuche.
+
+    Läuft im Hintergrund (Thread), damit das Speichern der Meldung nicht wartet.
+    Fehler werden nur geloggt.
+
+    Args:
+        sb: Supabase Client
+        post_id: ID des Posts
+        image_bytes: Komprimierte Bilddaten
+        post_image_id: Optional ID der post_image-Zeile
+    """
+    if not image_bytes or not _embeddings_enabled():
+        return
+    try:
+        from services.ai.pet_recognition import get_recognition_service
+
+        embedding = await asyncio.to_thread(get_recognition_service().compute_embedding, image_bytes)
+        if embedding:
+            await asyncio.to_thread(
+                SimilarityService(sb).store_embedding, post_id, embedding, post_image_id
+            )
+    except Exception as ex:  # noqa: BLE001
+        logger.warning(f"Embedding für Post {post_id} konnte nicht erstellt werden: {ex}")
+
+
+@timed("ui.save_post")
 async def handle_save_post(
     page: ft.Page,
     sb,
     post_service: PostService,
-    post_relations_service: PostRelationsService,
     post_storage_service: PostStorageService,
     meldungsart: ft.SegmentedButton,
     name_tf: ft.TextField,
@@ -56,7 +96,6 @@ async def handle_save_post(
         page: Flet Page-Instanz
         sb: Supabase Client
         post_service: PostService-Instanz
-        post_relations_service: PostRelationsService-Instanz
         meldungsart: SegmentedButton für Meldungsart
         name_tf: TextField für Name/Überschrift
         species_dd: Dropdown für Tierart
@@ -127,14 +166,11 @@ async def handle_save_post(
             "location_lon": location_selected.get("lon"),
         }
         
-        new_post = post_service.create(post_data)
-        post_id = new_post["id"]
-        
-        # Farben verknüpfen
-        for color_id in selected_farben:
-            post_relations_service.add_color(post_id, color_id)
-        
-        # Bild: wenn nur lokal vorhanden, jetzt in Storage hochladen und verknüpfen
+        # Bild: wenn nur lokal vorhanden, zuerst in Storage hochladen
+        # (Storage ist nicht Teil der Datenbank-Transaktion)
+        image_urls: List[str] = []
+        image_bytes: Optional[bytes] = None
+        uploaded_path: Optional[str] = None
         photo_url = selected_photo.get("url")
         local_path = selected_photo.get("local_path")
         if local_path:
@@ -143,10 +179,33 @@ async def handle_save_post(
                 original_filename=selected_photo.get("name") or "image.jpg",
             )
             if upload_result.get("url"):
-                post_relations_service.add_photo(post_id, upload_result["url"])
-            cleanup_local_file(local_path)
+                image_urls.append(upload_result["url"])
+                uploaded_path = upload_result.get("path")
+                image_bytes = base64.b64decode(upload_result["base64"]) if upload_result.get("base64") else None
         elif photo_url:
-            post_relations_service.add_photo(post_id, photo_url)
+            image_urls.append(photo_url)
+
+        # Post, Farben und Bild in einer Transaktion (ein Roundtrip)
+        try:
+            new_post = post_service.create_full(post_data, selected_farben, image_urls)
+        except Exception:
+            # Ohne Meldung bliebe das hochgeladene Bild verwaist im Storage
+            if uploaded_path:
+                post_storage_service.remove_post_image(uploaded_path)
+            raise
+        post_id = new_post["id"]
+
+        if local_path:
+            images = new_post.get("post_image") or []
+            if image_bytes and images:
+                page.run_task(
+                    index_post_image,
+                    sb,
+                    post_id,
+                    image_bytes,
+                    images[0].get("id"),
+                )
+            cleanup_local_file(local_path)
         
         if progress_dlg:
             page.close(progress_dlg)
@@ -248,7 +307,6 @@ async def handle_view_save_post(
     page: ft.Page,
     sb,
     post_service: PostService,
-    post_relations_service: PostRelationsService,
     post_storage_service: PostStorageService,
     meldungsart: ft.SegmentedButton,
     name_tf: ft.TextField,
@@ -280,7 +338,6 @@ async def handle_view_save_post(
         page: Flet Page-Instanz
         sb: Supabase Client
         post_service: PostService-Instanz
-        post_relations_service: PostRelationsService-Instanz
         meldungsart: SegmentedButton für Meldungsart
         name_tf: TextField für Name/Überschrift
         species_dd: Dropdown für Tierart
@@ -328,7 +385,6 @@ async def handle_view_save_post(
         page=page,
         sb=sb,
         post_service=post_service,
-        post_relations_service=post_relations_service,
         post_storage_service=post_storage_service,
         meldungsart=meldungsart,
         name_tf=name_tf,
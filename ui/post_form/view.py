@@ -13,8 +13,8 @@ import asyncio
 import flet as ft
 
 from services.posts.references import ReferenceService
-from services.geocoding import geocode_suggestions
-from services.posts import PostService, PostRelationsService, PostStorageService
+from services.geocoding import geocode_suggestions_async
+from services.posts import PostService, PostStorageService
 from services.ai.pet_recognition import get_recognition_service
 from ui.constants import (
     DATE_FORMAT,
@@ -71,7 +71,6 @@ class PostForm:
         # Services
         self.ref_service = ReferenceService(self.sb)
         self.post_service = PostService(self.sb)
-        self.post_relations_service = PostRelationsService(self.sb)
         self.post_storage_service = PostStorageService(self.sb)
         self.recognition_service = get_recognition_service()
         
@@ -341,7 +340,9 @@ class PostForm:
         if not query or len(query.strip()) < 3:
             self._clear_location_suggestions()
             return
-        suggestions = geocode_suggestions(query)
+        suggestions = await geocode_suggestions_async(query)
+        if version != self._location_query_version:
+            return
         if not suggestions:
             self._clear_location_suggestions()
             return
@@ -459,7 +460,6 @@ class PostForm:
             page=self.page,
             sb=self.sb,
             post_service=self.post_service,
-            post_relations_service=self.post_relations_service,
             post_storage_service=self.post_storage_service,
             meldungsart=self.meldungsart,
             name_tf=self.name_tf,
@@ -14,7 +14,7 @@ import flet as ft
 
 from services.posts.references import ReferenceService
 from services.posts import PostService, PostRelationsService, PostStorageService
-from services.geocoding import geocode_suggestions
+from services.geocoding import geocode_suggestions_async
 from ui.constants import (
     PRIMARY_COLOR,
     BORDER_COLOR,
@@ -380,7 +380,9 @@ class EditPostDialog:
         if not query or len(query.strip()) < 3:
             self._clear_location_suggestions()
             return
-        suggestions = geocode_suggestions(query)
+        suggestions = await geocode_suggestions_async(query)
+        if version != self._location_query_version:
+            return
         if not suggestions:
             self._clear_location_suggestions()
             return
@@ -5,24 +5,26 @@ Enthält: Laden, Rendern, Löschen, Bearbeiten.
 
 from __future__ import annotations
 
-from typing import Callable, List, Optional
-from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List, Optional
 from urllib.parse import urlparse
 from datetime import date
-import time
-import uuid
+import asyncio
+import shutil
 import flet as ft
 
 from ui.shared_components import loading_indicator, show_success_dialog, show_error_dialog
-from services.posts import PostService, PostStorageService
+from services.posts import PostService
 from services.posts.references import ReferenceService
 from utils.logging_config import get_logger
 from utils.validators import validate_email
-from utils.pdf_generator import create_post_pdf, create_post_pdf_bytes
 from ..components.my_posts_components import build_my_post_card
 from ui.discover.components.post_card_components import show_detail_dialog
 from ..components.edit_post_components import EditPostDialog
 
+if TYPE_CHECKING:
+    # PDF-Export (ReportLab) erst beim ersten Export laden
+    from services.posts.pdf_export import PdfJob
+
 logger = get_logger(__name__)
 
 
@@ -364,83 +366,106 @@ def generate_post_pdf(
     contact_phone: Optional[str],
     additions: Optional[str],
 ) -> None:
-    """Erstellt die PDF-Datei fuer eine Meldung und speichert sie lokal."""
-    try:
-        image_bytes = None
-        post_images = post.get("post_image") or []
-        image_url = post_images[0].get("url") if post_images else None
-        if isinstance(image_url, str) and image_url.strip():
-            storage_service = PostStorageService(sb)
-            storage_path = storage_service.extract_storage_path_from_url(image_url)
-            if storage_path:
-                image_bytes = storage_service.download_post_image(storage_path)
+    """Startet die PDF-Erstellung fuer eine Meldung im Hintergrund.
 
-        if page.web:
-            pdf_bytes = create_post_pdf_bytes(
-                post=post,
-                image_bytes=image_bytes,
-                contact_email=contact_email,
-                contact_phone=contact_phone,
-                additions=additions,
-            )
-            root_dir = Path(__file__).resolve().parents[3]
-            export_dir = root_dir / "assets" / "pdf_exports"
-            export_dir.mkdir(parents=True, exist_ok=True)
-            post_id = post.get("id") or "meldung"
-            safe_id = str(post_id).replace(" ", "_")
-            filename = f"{safe_id}_{int(time.time())}_{uuid.uuid4().hex[:6]}.pdf"
-            export_path = export_dir / filename
-            export_path.write_bytes(pdf_bytes)
-            download_path = f"/download/{filename}"
-            raw_url = (page.url or "").strip()
-            base_url = ""
-            if raw_url:
-                parsed = urlparse(raw_url)
-                scheme = parsed.scheme
-                if scheme == "ws":
-                    scheme = "http"
-                elif scheme == "wss":
-                    scheme = "https"
-                if parsed.netloc:
-                    base_url = f"{scheme}://{parsed.netloc}"
-            full_url = f"{base_url}{download_path}" if base_url else download_path
-
-            dialog = ft.AlertDialog(
-                modal=True,
-                title=ft.Text("PDF bereit"),
-                content=ft.Text("Die PDF wird heruntergeladen."),
-                actions=[
-                    ft.TextButton("Abbrechen", on_click=lambda e: page.close(dialog)),
-                    ft.ElevatedButton(
-                        "Download starten",
-                        url=full_url,
-                        url_target=ft.UrlTarget.BLANK,
-                        on_click=lambda e: page.close(dialog),
-                    ),
-                ],
-                actions_alignment=ft.MainAxisAlignment.END,
-            )
-            page.open(dialog)
-            return
+    Die PDF wird ueber den PDF-Job-Service erzeugt (bzw. aus dem Cache
+    geliefert); der Fortschritt wird in einem Dialog angezeigt.
+    """
+    if not page.web and not output_path:
+        show_error_dialog(page, "Fehler", "Kein Speicherpfad ausgewaehlt.")
+        return
 
-        if not output_path:
-            show_error_dialog(page, "Fehler", "Kein Speicherpfad ausgewaehlt.")
-            return
+    try:
+        from services.posts.pdf_export import PdfExportService
 
-        create_post_pdf(
+        job = PdfExportService(sb).export(
             post=post,
-            output_path=output_path,
-            image_bytes=image_bytes,
             contact_email=contact_email,
             contact_phone=contact_phone,
             additions=additions,
         )
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Fehler beim PDF-Export: {e}", exc_info=True)
+        show_error_dialog(page, "Fehler", "Die PDF konnte nicht erstellt werden.")
+        return
+
+    page.run_task(_await_pdf_job, page, job, output_path)
+
+
+async def _await_pdf_job(page: ft.Page, job: PdfJob, output_path: Optional[str]) -> None:
+    """Zeigt den Fortschritt eines PDF-Jobs und liefert das Ergebnis aus."""
+    progress_dialog: Optional[ft.AlertDialog] = None
+    if not job.done:
+        progress_bar = ft.ProgressBar(value=job.progress, width=260)
+        progress_dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("PDF wird erstellt"),
+            content=progress_bar,
+        )
+        page.open(progress_dialog)
+
+        loop = asyncio.get_running_loop()
+
+        def apply_progress(value: float) -> None:
+            progress_bar.value = value
+            page.update()
+
+        job.add_progress_listener(
+            lambda j: loop.call_soon_threadsafe(apply_progress, j.progress)
+        )
+
+    try:
+        pdf_path = await asyncio.wrap_future(job.future)
+        if progress_dialog is not None:
+            page.close(progress_dialog)
+
+        if page.web:
+            _show_pdf_download_dialog(page, pdf_path.name)
+            return
+
+        await asyncio.to_thread(shutil.copyfile, pdf_path, output_path)
         show_success_dialog(page, "PDF erstellt", "Die PDF wurde erfolgreich gespeichert.")
     except Exception as e:  # noqa: BLE001
+        if progress_dialog is not None:
+            page.close(progress_dialog)
         logger.error(f"Fehler beim PDF-Export: {e}", exc_info=True)
         show_error_dialog(page, "Fehler", "Die PDF konnte nicht erstellt werden.")
 
 
+def _show_pdf_download_dialog(page: ft.Page, filename: str) -> None:
+    """Zeigt den Download-Dialog fuer eine erzeugte PDF (Web)."""
+    download_path = f"/download/{filename}"
+    raw_url = (page.url or "").strip()
+    base_url = ""
+    if raw_url:
+        parsed = urlparse(raw_url)
+        scheme = parsed.scheme
+        if scheme == "ws":
+            scheme = "http"
+        elif scheme == "wss":
+            scheme = "https"
+        if parsed.netloc:
+            base_url = f"{scheme}://{parsed.netloc}"
+    full_url = f"{base_url}{download_path}" if base_url else download_path
+
+    dialog = ft.AlertDialog(
+        modal=True,
+        title=ft.Text("PDF bereit"),
+        content=ft.Text("Die PDF wird heruntergeladen."),
+        actions=[
+            ft.TextButton("Abbrechen", on_click=lambda e: page.close(dialog)),
+            ft.ElevatedButton(
+                "Download starten",
+                url=full_url,
+                url_target=ft.UrlTarget.BLANK,
+                on_click=lambda e: page.close(dialog),
+            ),
+        ],
+        actions_alignment=ft.MainAxisAlignment.END,
+    )
+    page.open(dialog)
+
+
 def edit_post(
     post: dict,
     page: ft.Page,
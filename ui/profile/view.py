@@ -10,7 +10,14 @@ from typing import Callable, Optional, List
 
 import flet as ft
 
-from ui.constants import PRIMARY_COLOR
+from ui.constants import (
+    PRIMARY_COLOR,
+    PROFILE_VIEW_EDIT_PROFILE,
+    PROFILE_VIEW_FAVORITES,
+    PROFILE_VIEW_MY_POSTS,
+    PROFILE_VIEW_SAVED_SEARCHES,
+    PROFILE_VIEW_SETTINGS,
+)
 from utils.logging_config import get_logger
 from ui.shared_components import show_success_dialog, show_error_dialog, show_confirm_dialog
 
@@ -60,11 +67,11 @@ logger = get_logger(__name__)
 class ProfileView:
     """Benutzer-Profilbereich mit Einstellungen und Profilverwaltung."""
 
-    VIEW_EDIT_PROFILE: str = "edit_profile"
-    VIEW_SETTINGS: str = "settings"
-    VIEW_FAVORITES: str = "favorites"
-    VIEW_MY_POSTS: str = "my_posts"
-    VIEW_SAVED_SEARCHES: str = "saved_searches"
+    VIEW_EDIT_PROFILE: str = PROFILE_VIEW_EDIT_PROFILE
+    VIEW_SETTINGS: str = PROFILE_VIEW_SETTINGS
+    VIEW_FAVORITES: str = PROFILE_VIEW_FAVORITES
+    VIEW_MY_POSTS: str = PROFILE_VIEW_MY_POSTS
+    VIEW_SAVED_SEARCHES: str = PROFILE_VIEW_SAVED_SEARCHES
 
     def __init__(
         self,
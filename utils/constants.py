@@ -63,3 +63,6 @@ MAX_POSTS_LIMIT = 30
 
 DEFAULT_POSTS_LIMIT = 200
 """Standard-Limit für Post-Abfragen in der Datenbank."""
+
+MAX_MAP_MARKERS = 1000
+"""Maximale Anzahl von Kartenmarkern pro Ausschnittsabfrage (PostgREST max-rows)."""
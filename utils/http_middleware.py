@@ -0,0 +1,406 @@
+"""
+HTTP-Middleware für die FastAPI-Front (Flet-Web-Bundle, Assets, Karte, PDFs).
+
+- Kompression (Brotli, sonst gzip) für textbasierte Antworten; Ergebnisse mit
+  ETag werden zwischengespeichert, sodass z. B. ``main.dart.js`` nur einmal
+  komprimiert wird.
+- Cache-Control nach konfigurierbaren Regeln, sofern die Route keinen eigenen
+  Header setzt. Versionierte Assets (``?v=<hash>``, siehe ``asset_url``) sind
+  unveränderlich und werden ein Jahr gecacht.
+- ``If-None-Match`` wird für alle GET-Antworten mit ETag beantwortet (304).
+
+Konfiguration (Umgebungsvariablen):
+    - HTTP_STATIC_MAX_AGE: max-age für nicht versionierte Assets in Sekunden
+      (Standard: 0 = bei jedem Aufruf per ETag revalidieren)
+    - HTTP_COMPRESSION: "false" schaltet die Kompression ab
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.logging_config import get_logger
+
+try:
+    import brotli  # optional
+except ImportError:  # pragma: no cover - abhängig von der Installation
+    brotli = None
+
+logger = get_logger(__name__)
+
+
+ASSETS_DIR = Path(__file__).resolve().parents[1] / "assets"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_EXTENSIONS = (
+    "js", "mjs", "css", "wasm", "json", "bin", "frag", "png", "jpg", "jpeg", "gif",
+    "svg", "ico", "webp", "otf", "ttf", "woff", "woff2",
+)
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/geo+json",
+    "application/manifest+json",
+    "application/wasm",
+    "application/xml",
+    "image/svg+xml",
+    "font/otf",
+    "font/ttf",
+)
+# Kleinere Antworten lohnen die Kompression nicht
+COMPRESSION_MIN_SIZE = 1024
+# Größere Antworten werden unkomprimiert durchgereicht
+COMPRESSION_MAX_SIZE = 32 * 1024 * 1024
+# Ab dieser Größe wird außerhalb des Event-Loops komprimiert
+COMPRESSION_THREAD_SIZE = 256 * 1024
+COMPRESSION_CACHE_BYTES = 64 * 1024 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Cache-Control-Regel für Pfade.
+
+    Attributes:
+        pattern: Regulärer Ausdruck auf den URL-Pfad
+        cache_control: Header-Wert
+    """
+
+    pattern: str
+    cache_control: str
+
+
+def default_cache_policies() -> List[CachePolicy]:
+    """Standardregeln: Startseite revalidieren, Assets nach ``HTTP_STATIC_MAX_AGE``."""
+    static_max_age = int(os.getenv("HTTP_STATIC_MAX_AGE", "0"))
+    static_policy = (
+        f"public, max-age={static_max_age}" if static_max_age > 0 else "no-cache"
+    )
+    return [
+        CachePolicy(r"^/(index\.html)?$", "no-cache"),
+        CachePolicy(r"\.(?:%s)$" % "|".join(STATIC_EXTENSIONS), static_policy),
+    ]
+
+
+# ─────────────────────────────────────────────────────────────
+# Versionierte Asset-URLs
+# ─────────────────────────────────────────────────────────────
+
+_asset_versions: Dict[Tuple[str, int], str] = {}
+_asset_versions_lock = threading.Lock()
+
+
+def asset_version(name: str, assets_dir: Path = ASSETS_DIR) -> str:
+    """Gibt einen Inhalts-Hash (8 Zeichen) für eine Datei in ``assets/`` zurück.
+
+    Args:
+        name: Pfad relativ zu ``assets/``
+        assets_dir: Asset-Verzeichnis
+
+    Returns:
+        Hash oder "" wenn die Datei fehlt
+    """
+    path = assets_dir / name
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return ""
+    key = (str(path), mtime)
+    with _asset_versions_lock:
+        cached = _asset_versions.get(key)
+    if cached is not None:
+        return cached
+    version = hashlib.blake2b(path.read_bytes(), digest_size=4).hexdigest()
+    with _asset_versions_lock:
+        _asset_versions[key] = version
+    return version
+
+
+def asset_url(name: str, web: bool = True) -> str:
+    """Hängt die Inhaltsversion an einen Asset-Pfad an (``name?v=<hash>``).
+
+    Versionierte URLs werden von ``HttpCacheMiddleware`` als unveränderlich
+    ausgeliefert. Desktop-Clients lesen Assets als Datei und erhalten den
+    unveränderten Namen.
+
+    Args:
+        name: Pfad relativ zu ``assets/``
+        web: False für Desktop-Clients (``page.web``)
+
+    Returns:
+        Asset-Pfad für ``ft.Image(src=...)`` o. Ä.
+    """
+    version = asset_version(name) if web else ""
+    return f"{name}?v={version}" if version else name
+
+
+# ─────────────────────────────────────────────────────────────
+# Middleware
+# ─────────────────────────────────────────────────────────────
+
+def _select_encoding(accept_encoding: str) -> Optional[str]:
+    """Wählt "br" oder "gzip" anhand des Accept-Encoding-Headers."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Schwacher Vergleich nach RFC 9110 (W/-Präfix wird ignoriert)."""
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == bare:
+            return True
+    return False
+
+
+class _CompressionCache:
+    """LRU-Cache komprimierter Antworten (Schlüssel: Pfad, ETag, Kodierung)."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[bytes]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple[str, str, str], value: bytes) -> None:
+        if len(value) > self.max_bytes // 4:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._items[key] = value
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes and self._items:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+
+
+class HttpCacheMiddleware:
+    """ASGI-Middleware für Kompression, Cache-Control und bedingte Anfragen."""
+
+    def __init__(
+        self,
+        app: Any,
+        policies: Optional[Sequence[CachePolicy]] = None,
+        compress: Optional[bool] = None,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        cache_bytes: int = COMPRESSION_CACHE_BYTES,
+    ) -> None:
+        """Initialisiert die Middleware.
+
+        Args:
+            app: Innere ASGI-App
+            policies: Cache-Control-Regeln (erste passende gewinnt)
+            compress: Kompression aktivieren (Standard: ``HTTP_COMPRESSION``)
+            minimum_size: Mindestgröße für Kompression in Bytes
+            cache_bytes: Speicherbudget für komprimierte Antworten
+        """
+        self.app = app
+        self.policies = [
+            (re.compile(p.pattern), p.cache_control)
+            for p in (policies if policies is not None else default_cache_policies())
+        ]
+        if compress is None:
+            compress = os.getenv("HTTP_COMPRESSION", "true").lower() != "false"
+        self.compress = compress
+        self.minimum_size = minimum_size
+        self._cache = _CompressionCache(cache_bytes)
+
+    def _cache_control_for(self, path: str, query: str) -> Optional[str]:
+        if re.search(r"(?:^|&)v=[^&]+", query) and re.search(
+            r"\.(?:%s)$|/$" % "|".join(STATIC_EXTENSIONS), path
+        ):
+            return IMMUTABLE_CACHE_CONTROL
+        for pattern, cache_control in self.policies:
+            if pattern.search(path):
+                return cache_control
+        return None
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope.get("method") not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {
+            k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers") or []
+        }
+        path = scope.get("path", "")
+        query = (scope.get("query_string") or b"").decode("latin-1")
+        encoding = (
+            _select_encoding(request_headers.get("accept-encoding", ""))
+            if self.compress and scope["method"] == "GET"
+            else None
+        )
+        if_none_match = request_headers.get("if-none-match")
+
+        state: Dict[str, Any] = {"mode": None, "start": None, "headers": None, "body": []}
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                await self._on_start(message, state, path, query, encoding, if_none_match, send)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            mode = state["mode"]
+            if mode == "not_modified":
+                return
+            if mode != "buffer":
+                await send(message)
+                return
+
+            state["body"].append(message.get("body", b""))
+            state["size"] = state.get("size", 0) + len(message.get("body", b""))
+            more_body = message.get("more_body", False)
+            if more_body and state["size"] <= COMPRESSION_MAX_SIZE:
+                return
+            body = b"".join(state["body"])
+            state["body"] = []
+            if more_body:
+                # Zu groß: unkomprimiert weiterreichen
+                state["mode"] = "pass"
+                await send(state["start"])
+                await send({"type": "http.response.body", "body": body, "more_body": True})
+                return
+            await self._send_compressed(body, state, path, encoding, send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _on_start(
+        self,
+        message: Dict[str, Any],
+        state: Dict[str, Any],
+        path: str,
+        query: str,
+        encoding: Optional[str],
+        if_none_match: Optional[str],
+        send: Any,
+    ) -> None:
+        headers: List[Tuple[bytes, bytes]] = list(message.get("headers") or [])
+        names = {k.lower() for k, _ in headers}
+        values = {k.lower(): v for k, v in headers}
+        status = message["status"]
+
+        if b"cache-control" not in names and status in (200, 304):
+            cache_control = self._cache_control_for(path, query)
+            if cache_control:
+                headers.append((b"cache-control", cache_control.encode("latin-1")))
+
+        etag = values.get(b"etag", b"").decode("latin-1")
+        if status == 200 and etag and if_none_match and _etag_matches(if_none_match, etag):
+            keep = {b"etag", b"cache-control", b"vary", b"last-modified"}
+            state["mode"] = "not_modified"
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(k, v) for k, v in headers if k.lower() in keep],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        content_type = values.get(b"content-type", b"").decode("latin-1").lower()
+        length = values.get(b"content-length")
+        eligible = (
+            encoding is not None
+            and status == 200
+            and b"content-encoding" not in names
+            and b"content-range" not in names
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and (length is None or int(length) >= self.minimum_size)
+        )
+        if eligible:
+            state["mode"] = "buffer"
+            state["headers"] = headers
+            state["etag"] = etag
+            state["start"] = dict(message, headers=headers)
+            return
+
+        state["mode"] = "pass"
+        await send(dict(message, headers=headers))
+
+    async def _send_compressed(
+        self,
+        body: bytes,
+        state: Dict[str, Any],
+        path: str,
+        encoding: Optional[str],
+        send: Any,
+    ) -> None:
+        if len(body) < self.minimum_size or encoding is None:
+            await send(state["start"])
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = state.get("etag") or ""
+        cache_key = (path, etag, encoding)
+        compressed = self._cache.get(cache_key) if etag else None
+        if compressed is None:
+            if len(body) >= COMPRESSION_THREAD_SIZE:
+                compressed = await asyncio.to_thread(_compress, body, encoding)
+            else:
+                compressed = _compress(body, encoding)
+            if etag:
+                self._cache.put(cache_key, compressed)
+
+        if len(compressed) >= len(body):
+            await send(state["start"])
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = [
+            (k, v) for k, v in state["headers"]
+            if k.lower() not in (b"content-length", b"etag", b"vary")
+        ]
+        vary = dict((k.lower(), v) for k, v in state["headers"]).get(b"vary")
+        headers.append((b"content-encoding", encoding.encode("latin-1")))
+        headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+        headers.append((b"vary", (vary + b", Accept-Encoding") if vary else b"Accept-Encoding"))
+        if etag:
+            # Kodierte Variante: schwaches ETag, bleibt für If-None-Match vergleichbar
+            weak = etag if etag.startswith("W/") else f"W/{etag}"
+            headers.append((b"etag", weak.encode("latin-1")))
+        await send(dict(state["start"], headers=headers))
+        await send({"type": "http.response.body", "body": compressed})
@@ -0,0 +1,45 @@
+"""
+Verzögerte Re-Exports für Pakete (PEP 562).
+
+Paket-``__init__``-Module re-exportieren ihre Klassen, importieren die
+Untermodule aber erst beim ersten Zugriff. So lädt z. B. ``import
+services.posts.map_feed`` nicht mehr die Ähnlichkeitssuche (NumPy) oder
+``import ui`` alle Views. Verwendung im Paket::
+
+    __getattr__, __dir__ = lazy_exports(__name__, {"PostService": ".post"})
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(
+    package: str,
+    exports: Dict[str, str],
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Erzeugt ``__getattr__`` und ``__dir__`` für verzögerte Re-Exports.
+
+    Args:
+        package: ``__name__`` des Pakets
+        exports: Name -> Modul (relativ zum Paket, z. B. ``".post"``)
+
+    Returns:
+        Tuple (``__getattr__``, ``__dir__``) für das Paket
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        # Folgezugriffe ohne __getattr__
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
@@ -2,67 +2,278 @@
 Logging-Konfiguration für PetBuddy.
 
 Dieses Modul stellt eine zentrale Logging-Konfiguration bereit.
+
+Log-Aufrufe schreiben nicht selbst auf Konsole oder Datei: Der Root-Logger
+hat nur einen ``QueueHandler``, der den Eintrag in eine Warteschlange legt.
+Ein ``QueueListener``-Thread formatiert und schreibt ihn anschließend, sodass
+Event-Loop und Inferenz-Threads nicht auf Log-I/O warten. Die Nachricht wird
+erst im Listener zusammengesetzt, wenn alle Argumente unveränderlich sind
+(``logger.debug("Post %s", post_id)``).
+
+Vor dem Einreihen greifen (nur für Einträge unter WARNING):
+    - Stichproben je Modul (``LOG_SAMPLING``, z. B. ``services.posts.map_service=0.1``)
+    - ein Limit je Logger und Sekunde (``LOG_RATE_LIMIT``); verworfene Einträge
+      werden beim nächsten durchgelassenen Eintrag als ``dropped`` gemeldet
+
+Konfiguration (Umgebungsvariablen):
+    - LOG_LEVEL: Log-Level (Standard: INFO)
+    - LOG_FORMAT: ``text`` (Standard) oder ``json`` (eine JSON-Zeile je Eintrag)
+    - LOG_SAMPLING: Kommagetrennte ``modul=anteil``-Paare (Präfix-Vergleich)
+    - LOG_RATE_LIMIT: Einträge je Logger und Sekunde (0 = unbegrenzt)
+    - LOG_QUEUE_SIZE: Größe der Warteschlange (Standard: 10000; voll = verwerfen)
 """
 
+import atexit
+import json
 import logging
 import os
+import queue
+import random
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_QUEUE_SIZE = 10_000
+# Attribute eines LogRecord, die nicht als Zusatzfelder ins JSON übernommen werden
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "dropped"}
+# Argumenttypen, bei denen die Nachricht erst im Listener formatiert wird
+_IMMUTABLE_TYPES = (str, int, float, bool, type(None), bytes)
+
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatiert Log-Einträge als einzeilige JSON-Objekte."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        dropped = getattr(record, "dropped", 0)
+        if dropped:
+            entry["dropped"] = dropped
+        # Zusatzfelder aus extra={...}
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Textformat der Anwendung; meldet verworfene Einträge am Zeilenende."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        dropped = getattr(record, "dropped", 0)
+        if dropped:
+            text += f" [{dropped} Einträge verworfen]"
+        return text
+
+
+class LogThrottleFilter(logging.Filter):
+    """Stichproben je Modul und Limit je Logger für Einträge unter WARNING.
+
+    Args:
+        sampling: Modulpräfix -> Anteil (0–1) der durchgelassenen Einträge
+        rate_limit: Einträge je Logger und Sekunde (0 = unbegrenzt)
+    """
+
+    def __init__(self, sampling: Optional[Dict[str, float]] = None, rate_limit: float = 0.0) -> None:
+        super().__init__()
+        self._sampling = dict(sampling or {})
+        self._rate_limit = max(0.0, rate_limit)
+        # Logger-Name -> Anteil (Cache der Präfix-Suche)
+        self._rates: Dict[str, float] = {}
+        # Logger-Name -> [Token, letzte Auffüllung, verworfen]
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def _sample_rate(self, name: str) -> float:
+        rate = self._rates.get(name)
+        if rate is None:
+            rate = 1.0
+            best = -1
+            for prefix, value in self._sampling.items():
+                if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > best:
+                    rate, best = value, len(prefix)
+            self._rates[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._sample_rate(record.name) if self._sampling else 1.0
+        if rate < 1.0 and random.random() >= rate:
+            return False
+        if not self._rate_limit:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = self._buckets[record.name] = [self._rate_limit, now, 0]
+            bucket[0] = min(self._rate_limit, bucket[0] + (now - bucket[1]) * self._rate_limit)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            if bucket[2]:
+                record.dropped = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """QueueHandler, der Nachrichten möglichst erst im Listener formatiert.
+
+    Bei voller Warteschlange wird der Eintrag verworfen statt zu blockieren.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if not isinstance(record.msg, str) or (
+            args and not (isinstance(args, tuple) and all(isinstance(a, _IMMUTABLE_TYPES) for a in args))
+        ):
+            # Veränderliche Argumente jetzt festhalten
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.dropped:
+            record.dropped = getattr(record, "dropped", 0) + self.dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped = getattr(record, "dropped", 0) + 1
+            return
+        self.dropped = 0
+
+
+def _parse_sampling(raw: str) -> Dict[str, float]:
+    sampling = {}
+    for part in raw.split(","):
+        name, sep, value = part.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            sampling[name.strip()] = min(1.0, max(0.0, float(value)))
+        except ValueError:
+            continue
+    return sampling
+
+
+def stop_logging() -> None:
+    """Schreibt alle wartenden Einträge und beendet den Listener-Thread."""
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        try:
+            listener.stop()
+        except queue.Full:
+            # Warteschlange voll: Listener-Thread (Daemon) nicht mehr erreichbar
+            pass
+        for handler in listener.handlers:
+            handler.close()
 
 
 def setup_logging(
     log_level: str = None,
     log_to_file: bool = True,
-    log_file_path: str = "logs/petbuddy.log"
+    log_file_path: str = "logs/petbuddy.log",
+    log_format: Optional[str] = None,
+    sampling: Optional[Dict[str, float]] = None,
+    rate_limit: Optional[float] = None,
 ) -> None:
     """
     Konfiguriert das Logging-System für die Anwendung.
-    
+
     Args:
         log_level: Log-Level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
                   Falls None, wird aus Umgebungsvariable LOG_LEVEL gelesen
         log_to_file: Ob Logs in Datei geschrieben werden sollen
         log_file_path: Pfad zur Log-Datei
+        log_format: ``text`` oder ``json`` (Standard: LOG_FORMAT)
+        sampling: Modulpräfix -> Anteil der Einträge unter WARNING (Standard: LOG_SAMPLING)
+        rate_limit: Einträge je Logger und Sekunde unter WARNING (Standard: LOG_RATE_LIMIT)
     """
     # Log-Level bestimmen
     if log_level is None:
         log_level = os.getenv("LOG_LEVEL", "INFO")
-    
+
     # Log-Level zu uppercase konvertieren (für Konsistenz)
     if isinstance(log_level, str):
         log_level = log_level.upper()
-    
+
     # Log-Level validieren
     numeric_level = getattr(logging, log_level, logging.INFO)
     if not isinstance(numeric_level, int):
         numeric_level = logging.INFO
-    
+
+    if log_format is None:
+        log_format = os.getenv("LOG_FORMAT", "text")
+    if sampling is None:
+        sampling = _parse_sampling(os.getenv("LOG_SAMPLING", ""))
+    if rate_limit is None:
+        try:
+            rate_limit = float(os.getenv("LOG_RATE_LIMIT", "0"))
+        except ValueError:
+            rate_limit = 0.0
+    try:
+        queue_size = int(os.getenv("LOG_QUEUE_SIZE", str(DEFAULT_QUEUE_SIZE)))
+    except ValueError:
+        queue_size = DEFAULT_QUEUE_SIZE
+
     # Root Logger konfigurieren
     root_logger = logging.getLogger()
     root_logger.setLevel(numeric_level)
-    
+
     # Bestehende Handler entfernen (falls bereits konfiguriert)
     root_logger.handlers.clear()
-    
+    stop_logging()
+
     # Log-Format definieren
-    log_format = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
+    if log_format.lower() == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = TextFormatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+
     # Console Handler (immer aktiv)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(numeric_level)
-    console_handler.setFormatter(log_format)
-    root_logger.addHandler(console_handler)
-    
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
+
     # File Handler (optional)
     if log_to_file:
         # Log-Verzeichnis erstellen falls nicht vorhanden
         log_path = Path(log_file_path)
         log_path.parent.mkdir(parents=True, exist_ok=True)
-        
+
         # Rotating File Handler (max. 10MB pro Datei, 5 Backup-Dateien)
         file_handler = RotatingFileHandler(
             log_file_path,
@@ -71,9 +282,23 @@ def setup_logging(
             encoding='utf-8'
         )
         file_handler.setLevel(numeric_level)
-        file_handler.setFormatter(log_format)
-        root_logger.addHandler(file_handler)
-    
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    # Nur der QueueHandler läuft im aufrufenden Thread; schreiben übernimmt der Listener
+    log_queue: queue.Queue = queue.Queue(maxsize=max(0, queue_size))
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.setLevel(numeric_level)
+    if sampling or rate_limit:
+        queue_handler.addFilter(LogThrottleFilter(sampling, rate_limit))
+    root_logger.addHandler(queue_handler)
+
+    global _listener
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    with _listener_lock:
+        _listener = listener
+
     # Externe Logger auf WARNING setzen (um Spam zu reduzieren)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -83,16 +308,18 @@ def setup_logging(
 def get_logger(name: str) -> logging.Logger:
     """
     Gibt einen Logger für das angegebene Modul zurück.
-    
+
     Args:
         name: Name des Moduls (normalerweise __name__)
-    
+
     Returns:
         Konfigurierter Logger
     """
     return logging.getLogger(name)
 
 
+# Wartende Einträge beim Beenden noch schreiben
+atexit.register(stop_logging)
+
 if os.getenv("AUTO_SETUP_LOGGING", "false").lower() == "true":
     setup_logging()
-
@@ -19,6 +19,7 @@ import folium
 from folium import plugins
 
 from utils.logging_config import get_logger
+from utils.metrics import timed
 
 logger = get_logger(__name__)
 
@@ -205,6 +206,7 @@ def create_popup_html(post: Dict[str, Any], image_url: Optional[str], post_id: s
     return html_str
 
 
+@timed("generate_map_html")
 def generate_map_html(
     posts: List[Dict[str, Any]],
     center_lat: float = 51.1657,
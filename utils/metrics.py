@@ -0,0 +1,516 @@
+"""
+Metriken für PetBuddy (Prometheus-Textformat).
+
+Die Metriken liegen im Speicher des Prozesses und werden über ``/metrics``
+ausgeliefert (siehe ``main.py``). Erfasst werden:
+    - Dauer und Fehler von Operationen der Service- und Handler-Schicht
+      (``@timed`` bzw. ``with track(...)``)
+    - Supabase-Anfragen je Operation, API und Methode sowie die
+      Anzahl Anfragen je Aufruf einer Operation
+    - offene und verbundene Flet-Sessions
+
+Jede Operation ist zugleich ein Einstiegspunkt für den Stichproben-Profiler
+(``utils.profiling``), der ohne aktives Profiling nichts aufzeichnet.
+
+Supabase-Anfragen werden über die Event-Hooks des httpx-Clients gezählt
+(``supabase_event_hooks``) und der innersten laufenden Operation
+zugeordnet. Die laufende Operation liegt in einer ``ContextVar`` und gilt
+damit auch in ``asyncio.to_thread``; äußere Operationen (z. B. ein
+UI-Handler) zählen die Anfragen ihrer inneren Operationen mit.
+
+Konfiguration (Umgebungsvariablen):
+    - METRICS_ENABLED: ``false`` schaltet Erfassung und Endpunkt ab (Standard: true)
+    - METRICS_TOKEN: Bearer-Token für ``/metrics`` (auf Fly.io Pflicht,
+      ohne Token gibt es dort keinen Endpunkt)
+
+Verwendung::
+
+    @timed("search_posts")
+    def search_posts(...): ...
+
+    with track("map.render"):
+        ...
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+from utils import profiling
+
+# main.py importiert dieses Modul vor load_dotenv()
+load_dotenv()
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CALL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# Operation für Supabase-Anfragen außerhalb von track()/timed()
+NO_OPERATION = "none"
+
+_LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Basisklasse: Name, Hilfetext und Label-Namen einer Metrik."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> _LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: Labels {sorted(labels)} statt {list(self.labelnames)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, values: _LabelValues, extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self) -> List[str]:
+        """Gibt die Zeilen der Metrik im Prometheus-Textformat zurück."""
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monoton steigender Zähler."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[_LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Erhöht den Zähler.
+
+        Args:
+            amount: Betrag (nicht negativ)
+            **labels: Werte aller Labels der Metrik
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """Gibt den aktuellen Wert zurück (0 für unbekannte Labels)."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._label_text(key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Wert, der steigen und fallen kann."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        """Verringert den Wert."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Setzt den Wert."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    """Verteilung von Messwerten in festen Buckets (kumulativ ausgegeben)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Label-Werte -> [Zähler je Bucket (+Inf zuletzt), Summe, Anzahl]
+        self._values: Dict[_LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Erfasst einen Messwert.
+
+        Args:
+            value: Messwert (z. B. Sekunden)
+            **labels: Werte aller Labels der Metrik
+        """
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels: Any) -> int:
+        """Gibt die Anzahl Messwerte zurück."""
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def total(self, **labels: Any) -> float:
+        """Gibt die Summe der Messwerte zurück."""
+        entry = self._values.get(self._key(labels))
+        return entry[1] if entry else 0.0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(entry[0]), entry[1], entry[2])) for key, entry in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = self._label_text(key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Sammlung aller Metriken eines Prozesses."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Registriert eine Metrik (Namen müssen eindeutig sein).
+
+        Raises:
+            ValueError: Wenn der Name bereits vergeben ist
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metrik {metric.name} ist bereits registriert")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Gibt alle Metriken im Prometheus-Textformat zurück."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Gibt die Registry des Prozesses zurück."""
+    return _registry
+
+
+OPERATION_SECONDS = _registry.histogram(
+    "petbuddy_operation_duration_seconds",
+    "Dauer von Service- und Handler-Operationen",
+    ["operation"],
+)
+OPERATION_ERRORS = _registry.counter(
+    "petbuddy_operation_errors_total",
+    "Operationen, die mit einer Exception endeten",
+    ["operation"],
+)
+OPERATION_SUPABASE_CALLS = _registry.histogram(
+    "petbuddy_operation_supabase_calls",
+    "Supabase-Anfragen je Aufruf einer Operation (inkl. innerer Operationen)",
+    ["operation"],
+    buckets=CALL_COUNT_BUCKETS,
+)
+SUPABASE_REQUESTS = _registry.counter(
+    "petbuddy_supabase_requests_total",
+    "Supabase-Anfragen nach innerster Operation, API und HTTP-Methode",
+    ["operation", "api", "method"],
+)
+SUPABASE_SECONDS = _registry.histogram(
+    "petbuddy_supabase_request_duration_seconds",
+    "Dauer von Supabase-Anfragen bis zum Antwortkopf",
+    ["api"],
+)
+SUPABASE_ERRORS = _registry.counter(
+    "petbuddy_supabase_request_errors_total",
+    "Supabase-Antworten mit Status >= 500 bzw. 429",
+    ["api", "status"],
+)
+SESSIONS_ACTIVE = _registry.gauge(
+    "petbuddy_sessions_active",
+    "Offene Flet-Sessions (bis zum Ablauf der Session)",
+)
+SESSIONS_CONNECTED = _registry.gauge(
+    "petbuddy_sessions_connected",
+    "Flet-Sessions mit bestehender WebSocket-Verbindung",
+)
+
+
+# ════════════════════════════════════════════════════════════════════
+# OPERATIONEN
+# ════════════════════════════════════════════════════════════════════
+
+class _Scope:
+    """Laufende Operation (für die Zuordnung von Supabase-Anfragen)."""
+
+    __slots__ = ("operation", "parent", "calls")
+
+    def __init__(self, operation: str, parent: Optional["_Scope"]) -> None:
+        self.operation = operation
+        self.parent = parent
+        self.calls = 0
+
+
+_current_scope: ContextVar[Optional[_Scope]] = ContextVar("petbuddy_metrics_scope", default=None)
+
+
+def current_operation() -> str:
+    """Gibt den Namen der innersten laufenden Operation zurück."""
+    scope = _current_scope.get()
+    return scope.operation if scope is not None else NO_OPERATION
+
+
+@contextmanager
+def track(operation: str) -> Iterator[None]:
+    """Misst einen Codeblock als Operation.
+
+    Args:
+        operation: Name der Operation (Label ``operation``)
+    """
+    parent = _current_scope.get()
+    # Rahmen des Aufrufers (0: dieser Generator, 1: __enter__) als Wurzel für den Profiler
+    profile_token = profiling.enter(operation, sys._getframe(2), outermost=parent is None)
+    if not METRICS_ENABLED:
+        try:
+            yield
+        finally:
+            profiling.leave(profile_token)
+        return
+    scope = _Scope(operation, parent)
+    token = _current_scope.set(scope)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        OPERATION_ERRORS.inc(operation=operation)
+        raise
+    finally:
+        OPERATION_SECONDS.observe(time.perf_counter() - started, operation=operation)
+        OPERATION_SUPABASE_CALLS.observe(scope.calls, operation=operation)
+        _current_scope.reset(token)
+        profiling.leave(profile_token)
+
+
+def timed(operation: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorator: misst jeden Aufruf einer Funktion (synchron oder async) als Operation.
+
+    Args:
+        operation: Name der Operation (Standard: ``__qualname__`` der Funktion)
+    """
+
+    def decorator(func: Callable) -> Callable:
+        name = operation or func.__qualname__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_supabase_call(api: str, method: str) -> None:
+    """Zählt eine Supabase-Anfrage für die laufenden Operationen.
+
+    Args:
+        api: Supabase-API (``rest``, ``rpc``, ``auth``, ``storage``, ``functions``)
+        method: HTTP-Methode bzw. Aufrufart
+    """
+    if not METRICS_ENABLED:
+        return
+    scope = _current_scope.get()
+    SUPABASE_REQUESTS.inc(
+        operation=scope.operation if scope is not None else NO_OPERATION,
+        api=api,
+        method=method,
+    )
+    while scope is not None:
+        scope.calls += 1
+        scope = scope.parent
+
+
+# ════════════════════════════════════════════════════════════════════
+# SUPABASE (httpx Event-Hooks)
+# ════════════════════════════════════════════════════════════════════
+
+def supabase_api(path: str) -> str:
+    """Ordnet einen URL-Pfad einer Supabase-API zu (``/rest/v1/rpc/...`` -> ``rpc``)."""
+    parts = path.strip("/").split("/")
+    if not parts or not parts[0]:
+        return "other"
+    if parts[0] == "rest" and len(parts) > 2 and parts[2] == "rpc":
+        return "rpc"
+    if parts[0] in ("rest", "auth", "storage", "functions", "realtime"):
+        return parts[0]
+    return "other"
+
+
+def _on_request(request) -> None:
+    api = supabase_api(urlsplit(str(request.url)).path)
+    request.extensions["petbuddy_metrics"] = (api, time.perf_counter())
+    record_supabase_call(api, request.method)
+
+
+def _on_response(response) -> None:
+    info = response.request.extensions.get("petbuddy_metrics")
+    if info is None:
+        return
+    api, started = info
+    SUPABASE_SECONDS.observe(time.perf_counter() - started, api=api)
+    if response.status_code >= 500 or response.status_code == 429:
+        SUPABASE_ERRORS.inc(api=api, status=str(response.status_code))
+
+
+async def _on_request_async(request) -> None:
+    _on_request(request)
+
+
+async def _on_response_async(response) -> None:
+    _on_response(response)
+
+
+def supabase_event_hooks(asynchronous: bool = False) -> Dict[str, List[Callable]]:
+    """Gibt die httpx-Event-Hooks für den Supabase-Client zurück (leer, wenn abgeschaltet).
+
+    Args:
+        asynchronous: Hooks für ``httpx.AsyncClient`` (Coroutinen)
+    """
+    if not METRICS_ENABLED:
+        return {}
+    if asynchronous:
+        return {"request": [_on_request_async], "response": [_on_response_async]}
+    return {"request": [_on_request], "response": [_on_response]}
+
+
+# ════════════════════════════════════════════════════════════════════
+# SESSIONS
+# ════════════════════════════════════════════════════════════════════
+
+class SessionMetrics:
+    """Zählt eine Flet-Session in den Session-Gauges (eine Instanz je Session).
+
+    Die App ruft ``connected``/``disconnected``/``closed`` aus ihren
+    ``on_connect``/``on_disconnect``/``on_close``-Handlern auf; doppelte
+    Aufrufe verändern die Gauges nicht.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._connected = METRICS_ENABLED
+        self._closed = not METRICS_ENABLED
+        if METRICS_ENABLED:
+            SESSIONS_ACTIVE.inc()
+            SESSIONS_CONNECTED.inc()
+
+    def connected(self) -> None:
+        """WebSocket der Session wieder verbunden."""
+        with self._lock:
+            if self._connected or self._closed:
+                return
+            self._connected = True
+        SESSIONS_CONNECTED.inc()
+
+    def disconnected(self) -> None:
+        """WebSocket der Session getrennt (Session kann sich neu verbinden)."""
+        with self._lock:
+            if not self._connected:
+                return
+            self._connected = False
+        SESSIONS_CONNECTED.dec()
+
+    def closed(self) -> None:
+        """Session beendet."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            was_connected, self._connected = self._connected, False
+        SESSIONS_ACTIVE.dec()
+        if was_connected:
+            SESSIONS_CONNECTED.dec()
+
+
+def render_metrics() -> str:
+    """Gibt alle Metriken im Prometheus-Textformat zurück."""
+    return _registry.render()
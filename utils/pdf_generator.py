@@ -4,9 +4,10 @@ PDF-Erstellung fuer Meldungen (Vermisst/Fundtier).
 
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from io import BytesIO
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, BinaryIO, Callable, Sequence, Union
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -14,6 +15,14 @@ from reportlab.lib.units import mm
 from reportlab.lib.utils import ImageReader, simpleSplit
 from reportlab.pdfgen import canvas
 
+from utils.metrics import timed
+
+# Bei Änderungen am Layout erhöhen (macht zwischengespeicherte PDFs ungültig)
+PDF_LAYOUT_VERSION = 1
+
+# Unterstützte Anzahl Flyer pro A4-Seite (Spalten, Zeilen)
+PDF_SHEET_LAYOUTS = {1: (1, 1), 2: (1, 2), 4: (2, 2)}
+
 
 def _format_date(date_str: Optional[str]) -> str:
     if not date_str:
@@ -151,22 +160,40 @@ def _draw_wrapped_text(
     return y
 
 
+def _title_for_status(status_name: str) -> str:
+    status_lower = status_name.lower()
+    if "vermisst" in status_lower:
+        return "VERMISST-MELDUNG"
+    if "fund" in status_lower:
+        return "FUNDTIER-MELDUNG"
+    return "TIER-MELDUNG"
+
+
+def _contact_text(contact_email: Optional[str], contact_phone: Optional[str]) -> str:
+    contact_parts = []
+    if contact_email:
+        contact_parts.append(f"E-Mail: {contact_email}")
+    if contact_phone:
+        contact_parts.append(f"Telefon: {contact_phone}")
+    return " | ".join(contact_parts) if contact_parts else "—"
+
+
+def _as_image_reader(image: Union[bytes, ImageReader, None]) -> Optional[ImageReader]:
+    if image is None or isinstance(image, ImageReader):
+        return image
+    return ImageReader(BytesIO(image))
+
+
 def _render_post_pdf(
     c: canvas.Canvas,
     post: Dict[str, Any],
-    image_bytes: Optional[bytes],
+    image_bytes: Union[bytes, ImageReader, None],
     contact_email: Optional[str],
     contact_phone: Optional[str],
     additions: Optional[str],
 ) -> None:
     data = _extract_post_data(post)
-    status_lower = data["status_name"].lower()
-    if "vermisst" in status_lower:
-        title = "VERMISST-MELDUNG"
-    elif "fund" in status_lower:
-        title = "FUNDTIER-MELDUNG"
-    else:
-        title = "TIER-MELDUNG"
+    title = _title_for_status(data["status_name"])
 
     width, height = A4
     margin = 18 * mm
@@ -183,7 +210,7 @@ def _render_post_pdf(
     image_max_height = 240
 
     if image_bytes:
-        img_reader = ImageReader(BytesIO(image_bytes))
+        img_reader = _as_image_reader(image_bytes)
         img_w, img_h = img_reader.getSize()
         scale = min(image_max_width / img_w, image_max_height / img_h)
         draw_w = img_w * scale
@@ -245,14 +272,7 @@ def _render_post_pdf(
 
     draw_kv("Beschreibung", data["description"])
 
-    contact_parts = []
-    if contact_email:
-        contact_parts.append(f"E-Mail: {contact_email}")
-    if contact_phone:
-        contact_parts.append(f"Telefon: {contact_phone}")
-    contact_text = " | ".join(contact_parts) if contact_parts else "—"
-
-    draw_kv("Kontakt", contact_text)
+    draw_kv("Kontakt", _contact_text(contact_email, contact_phone))
 
     if additions:
         draw_kv("Ergänzungen", additions)
@@ -284,6 +304,7 @@ def create_post_pdf(
     c.save()
 
 
+@timed("create_post_pdf_bytes")
 def create_post_pdf_bytes(
     post: Dict[str, Any],
     image_bytes: Optional[bytes],
@@ -298,3 +319,237 @@ def create_post_pdf_bytes(
     c.save()
     buffer.seek(0)
     return buffer.read()
+
+
+def _render_post_cell(
+    c: canvas.Canvas,
+    post: Dict[str, Any],
+    image: Optional[ImageReader],
+    x: float,
+    y: float,
+    cell_width: float,
+    cell_height: float,
+    contact_text: str,
+    additions: Optional[str],
+) -> None:
+    """Zeichnet einen kompakten Flyer in eine Zelle (N-up-Layout); Text wird gekürzt."""
+    data = _extract_post_data(post)
+    pad = 5 * mm
+    font_size = 10 if cell_width < 300 else 11
+    line_height = font_size + 3
+
+    c.setStrokeColor(colors.red)
+    c.setLineWidth(1.5)
+    c.rect(x + 2, y + 2, cell_width - 4, cell_height - 4, stroke=1, fill=0)
+    c.setFillColor(colors.black)
+
+    inner_x = x + pad
+    inner_width = cell_width - 2 * pad
+    bottom = y + pad
+    cursor = y + cell_height - pad
+
+    title = _title_for_status(data["status_name"])
+    title_size = font_size + 6
+    c.setFont("Helvetica-Bold", title_size)
+    c.drawString(x + (cell_width - c.stringWidth(title, "Helvetica-Bold", title_size)) / 2, cursor - title_size, title)
+    cursor -= title_size + 8
+
+    image_max_height = cell_height * 0.38
+    if image is not None:
+        img_w, img_h = image.getSize()
+        scale = min(inner_width / img_w, image_max_height / img_h)
+        draw_w, draw_h = img_w * scale, img_h * scale
+        c.drawImage(
+            image,
+            inner_x + (inner_width - draw_w) / 2,
+            cursor - draw_h,
+            width=draw_w,
+            height=draw_h,
+            preserveAspectRatio=True,
+            mask="auto",
+        )
+        cursor -= draw_h + 8
+    else:
+        c.setStrokeColor(colors.grey)
+        c.rect(inner_x, cursor - image_max_height, inner_width, image_max_height, stroke=1, fill=0)
+        c.setFont("Helvetica-Oblique", font_size - 1)
+        c.drawString(inner_x + 4, cursor - font_size - 2, "Kein Bild vorhanden")
+        cursor -= image_max_height + 8
+
+    rows = [
+        ("Tierart", data["species_name"]),
+        ("Rasse", data["breed_name"]),
+        ("Geschlecht", data["sex_name"]),
+        ("Farben", data["colors"]),
+        ("Ort", data["location_text"]),
+        ("Datum", data["event_date"]),
+        ("Kontakt", contact_text),
+    ]
+    if additions:
+        rows.append(("Ergänzungen", additions))
+    # Beschreibung zuletzt, da sie bei Platzmangel gekürzt wird
+    rows.append(("Beschreibung", data["description"]))
+
+    # Überschrift über volle Breite, danach Schlüssel/Wert-Zeilen bis die Zelle voll ist
+    for line in _wrap_text(c, data["headline"], inner_width, "Helvetica-Bold", font_size + 1)[:2]:
+        c.setFont("Helvetica-Bold", font_size + 1)
+        c.drawString(inner_x, cursor - font_size, line)
+        cursor -= line_height
+    cursor -= 2
+
+    label_width = max(c.stringWidth(f"{label}:", "Helvetica-Bold", font_size) for label, _ in rows) + 6
+    value_width = inner_width - label_width
+    for label, value in rows:
+        if cursor - line_height < bottom:
+            break
+        c.setFont("Helvetica-Bold", font_size)
+        c.drawString(inner_x, cursor - font_size, f"{label}:")
+        lines = _wrap_text(c, value or "—", value_width, "Helvetica", font_size)
+        available = max(1, int((cursor - bottom) // line_height))
+        if len(lines) > available:
+            lines = lines[:available]
+            lines[-1] = lines[-1].rstrip() + " …"
+        c.setFont("Helvetica", font_size)
+        for line in lines:
+            c.drawString(inner_x + label_width, cursor - font_size, line)
+            cursor -= line_height
+
+
+def _first_image_url(post: Dict[str, Any]) -> Optional[str]:
+    post_images = post.get("post_image") or []
+    url = post_images[0].get("url") if post_images and isinstance(post_images[0], dict) else None
+    return url if isinstance(url, str) and url.strip() else None
+
+
+def create_posts_pdf(
+    posts: Sequence[Dict[str, Any]],
+    output: Union[str, BinaryIO],
+    load_image: Optional[Callable[[str], Optional[bytes]]] = None,
+    per_sheet: int = 1,
+    contact_email: Optional[str] = None,
+    contact_phone: Optional[str] = None,
+    additions: Optional[str] = None,
+    prefetch_workers: int = 8,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """Erstellt eine mehrseitige PDF mit Flyern für mehrere Meldungen.
+
+    Bilder werden parallel über ``load_image`` vorgeladen, jedoch nur in einem
+    begrenzten Fenster vor der aktuellen Seite; nach ihrer letzten Verwendung
+    werden sie wieder freigegeben. Mehrfach verwendete Bilder (gleiche URL)
+    werden nur einmal geladen und von ReportLab nur einmal eingebettet.
+
+    Args:
+        posts: Post-Dictionaries aus der Datenbank
+        output: Zielpfad oder beschreibbares Binär-Objekt
+        load_image: Lädt Bilddaten zu einer Bild-URL (None = ohne Bilder)
+        per_sheet: Flyer pro A4-Seite (1, 2 oder 4)
+        contact_email: Kontakt-E-Mail (optional)
+        contact_phone: Kontakt-Telefon (optional)
+        additions: Ergänzungen (optional)
+        prefetch_workers: Parallele Bild-Downloads
+        on_progress: Callback (fertige Posts, Gesamtanzahl)
+
+    Returns:
+        Anzahl gezeichneter Posts
+
+    Raises:
+        ValueError: Bei nicht unterstütztem ``per_sheet``
+    """
+    if per_sheet not in PDF_SHEET_LAYOUTS:
+        raise ValueError(f"per_sheet muss einer von {sorted(PDF_SHEET_LAYOUTS)} sein")
+
+    urls = [_first_image_url(post) if load_image else None for post in posts]
+    last_use = {url: index for index, url in enumerate(urls) if url}
+    window = max(prefetch_workers, 2 * per_sheet)
+
+    cols, rows = PDF_SHEET_LAYOUTS[per_sheet]
+    width, height = A4
+    margin = 10 * mm
+    cell_width = (width - 2 * margin) / cols
+    cell_height = (height - 2 * margin) / rows
+    contact_text = _contact_text(contact_email, contact_phone)
+
+    c = canvas.Canvas(output, pagesize=A4)
+    pending: Dict[str, Future] = {}
+    readers: Dict[str, Optional[ImageReader]] = {}
+    next_prefetch = 0
+
+    def prefetch_until(limit: int, executor: ThreadPoolExecutor) -> None:
+        nonlocal next_prefetch
+        while next_prefetch < min(limit, len(urls)):
+            url = urls[next_prefetch]
+            if url and url not in pending and url not in readers:
+                pending[url] = executor.submit(load_image, url)
+            next_prefetch += 1
+
+    def reader_for(index: int) -> Optional[ImageReader]:
+        url = urls[index]
+        if not url:
+            return None
+        if url not in readers:
+            try:
+                image_bytes = pending.pop(url).result()
+            except Exception:  # noqa: BLE001
+                image_bytes = None
+            try:
+                readers[url] = _as_image_reader(image_bytes) if image_bytes else None
+            except Exception:  # noqa: BLE001
+                # Defekte Bilddaten: Flyer ohne Bild erstellen
+                readers[url] = None
+        return readers[url]
+
+    with ThreadPoolExecutor(max_workers=max(1, prefetch_workers), thread_name_prefix="pdf-images") as executor:
+        for index, post in enumerate(posts):
+            prefetch_until(index + window, executor)
+            image = reader_for(index)
+            slot = index % per_sheet
+            if per_sheet == 1:
+                _render_post_pdf(c, post, image, contact_email, contact_phone, additions)
+                c.showPage()
+            else:
+                col, row = slot % cols, slot // cols
+                _render_post_cell(
+                    c,
+                    post,
+                    image,
+                    margin + col * cell_width,
+                    height - margin - (row + 1) * cell_height,
+                    cell_width,
+                    cell_height,
+                    contact_text,
+                    additions,
+                )
+                if slot == per_sheet - 1:
+                    c.showPage()
+            # Bilddaten nach der letzten Verwendung freigeben
+            url = urls[index]
+            if url and last_use.get(url) == index:
+                readers.pop(url, None)
+            if on_progress:
+                on_progress(index + 1, len(posts))
+    c.save()
+    return len(posts)
+
+
+def create_posts_pdf_bytes(
+    posts: Sequence[Dict[str, Any]],
+    load_image: Optional[Callable[[str], Optional[bytes]]] = None,
+    per_sheet: int = 1,
+    contact_email: Optional[str] = None,
+    contact_phone: Optional[str] = None,
+    additions: Optional[str] = None,
+) -> bytes:
+    """Erstellt eine PDF für mehrere Meldungen und gibt Bytes zurück."""
+    buffer = BytesIO()
+    create_posts_pdf(
+        posts,
+        buffer,
+        load_image=load_image,
+        per_sheet=per_sheet,
+        contact_email=contact_email,
+        contact_phone=contact_phone,
+        additions=additions,
+    )
+    return buffer.getvalue()
+
@@ -0,0 +1,411 @@
+"""
+Stichproben-Profiler für einzelne Handler und Operationen (opt-in).
+
+Ist das Profiling aktiv, wird für ausgewählte Operationen (``PROFILE_OPERATIONS``,
+Namen wie in ``utils.metrics``, z. B. ``ui.load_posts``) und für einen
+zufälligen Anteil aller übrigen äußersten Operationen (``PROFILE_SAMPLE_RATE``)
+eine Aufnahme gestartet. Ein Hintergrund-Thread liest dann alle
+``PROFILE_INTERVAL_MS`` die Stacks der beteiligten Threads
+(``sys._current_frames()``):
+    - den Thread, der die Operation gestartet hat, solange die Operation dort
+      läuft (bei async-Handlern nur, wenn die Coroutine gerade ausgeführt wird)
+    - Worker-Threads, in denen innere Operationen derselben Aufnahme laufen
+      (z. B. Services in ``asyncio.to_thread``)
+Läuft keiner davon, zählt die Stichprobe als ``<await>`` (Warten auf I/O oder
+die Event-Loop).
+
+Jede Aufnahme wird als Collapsed-Stack-Datei (``stack;stack;... anzahl``, z. B.
+für ``flamegraph.pl`` oder speedscope) in ``PROFILE_DIR`` geschrieben; der
+Dateiname enthält Zeitpunkt, Operation und Session-ID.
+
+Ohne aktives Profiling kostet ``enter()`` nur eine Abfrage; es läuft kein
+Thread. Aktiv begrenzen ``PROFILE_MAX_ACTIVE`` (gleichzeitige Aufnahmen),
+``PROFILE_MAX_SECONDS`` (Dauer je Aufnahme) und ``PROFILE_MAX_FILES`` den
+Aufwand.
+
+Konfiguration (Umgebungsvariablen, zur Laufzeit über ``configure()`` bzw.
+``/admin/profiling`` änderbar):
+    - PROFILE_ENABLED: Profiling beim Start aktivieren (Standard: false)
+    - PROFILE_OPERATIONS: Kommagetrennte Operationen, die immer profiliert werden
+    - PROFILE_SAMPLE_RATE: Anteil (0–1) der übrigen äußersten Operationen
+    - PROFILE_INTERVAL_MS: Abstand der Stichproben (Standard: 5)
+    - PROFILE_DIR: Zielverzeichnis (Standard: logs/profiles)
+    - PROFILE_ADMIN_TOKEN: Bearer-Token für ``/admin/profiling`` (ohne Token ist die Route aus)
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FrameType
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from dotenv import load_dotenv
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# main.py importiert dieses Modul vor load_dotenv()
+load_dotenv()
+
+
+DEFAULT_OPERATIONS = ("ui.load_posts", "ui.render_map", "ui.save_post")
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_MAX_ACTIVE = int(os.getenv("PROFILE_MAX_ACTIVE", "4"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+PROFILE_MAX_DEPTH = 128
+PROFILE_FILE_SUFFIX = ".collapsed"
+AWAIT_FRAME = "<await>"
+
+# Rahmen der Thread-Infrastruktur, die in den Stacks weggelassen werden
+_SKIPPED_FILES = (
+    "threading.py",
+    os.path.join("concurrent", "futures", "thread.py"),
+    os.path.join("asyncio", "events.py"),
+    os.path.join("asyncio", "base_events.py"),
+    os.path.join("asyncio", "runners.py"),
+    "contextlib.py",
+    # Wrapper von @timed/track()
+    os.path.join("utils", "metrics.py"),
+)
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _env_operations() -> Set[str]:
+    raw = os.getenv("PROFILE_OPERATIONS")
+    if raw is None:
+        return set(DEFAULT_OPERATIONS)
+    return {name.strip() for name in raw.split(",") if name.strip()}
+
+
+@dataclass
+class ProfilerConfig:
+    """Laufzeit-Einstellungen des Profilers."""
+
+    enabled: bool = False
+    operations: Set[str] = field(default_factory=set)
+    sample_rate: float = 0.0
+    interval: float = 0.005
+    directory: Path = Path("logs/profiles")
+    # Automatisch abschalten ab diesem Zeitpunkt (time.monotonic(), None = nie)
+    until: Optional[float] = None
+
+
+_config = ProfilerConfig(
+    enabled=os.getenv("PROFILE_ENABLED", "false").lower() == "true",
+    operations=_env_operations(),
+    sample_rate=min(1.0, max(0.0, float(os.getenv("PROFILE_SAMPLE_RATE", "0")))),
+    interval=max(0.001, float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000.0),
+    directory=Path(os.getenv("PROFILE_DIR", "logs/profiles")),
+)
+
+
+class _Capture:
+    """Eine laufende Aufnahme (eine Operation in einer Session)."""
+
+    def __init__(self, operation: str, session: str, root_frame: Optional[FrameType]) -> None:
+        self.operation = operation
+        self.session = session
+        self.root_thread = threading.get_ident()
+        self.root_frame = root_frame
+        self.started = time.time()
+        self.deadline = time.monotonic() + PROFILE_MAX_SECONDS
+        self.samples: Counter = Counter()
+        # Thread-ID -> Anzahl innerer Operationen in diesem Thread
+        self.threads: Dict[int, int] = {}
+
+
+_current_capture: ContextVar[Optional[_Capture]] = ContextVar("petbuddy_profile_capture", default=None)
+_active: List[_Capture] = []
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_sampler: Optional[threading.Thread] = None
+
+
+# ════════════════════════════════════════════════════════════════════
+# KONFIGURATION
+# ════════════════════════════════════════════════════════════════════
+
+def configure(
+    enabled: Optional[bool] = None,
+    operations: Optional[Iterable[str]] = None,
+    sample_rate: Optional[float] = None,
+    interval_ms: Optional[float] = None,
+    duration: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Ändert die Einstellungen zur Laufzeit.
+
+    Args:
+        enabled: Profiling ein-/ausschalten
+        operations: Operationen, die immer profiliert werden
+        sample_rate: Anteil (0–1) der übrigen äußersten Operationen
+        interval_ms: Abstand der Stichproben in Millisekunden
+        duration: Nach so vielen Sekunden automatisch abschalten (None/0 = nie)
+
+    Returns:
+        Aktueller Status (siehe ``status()``)
+    """
+    with _lock:
+        if operations is not None:
+            _config.operations = {name.strip() for name in operations if name and name.strip()}
+        if sample_rate is not None:
+            _config.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+        if interval_ms is not None:
+            _config.interval = max(0.001, float(interval_ms) / 1000.0)
+        if enabled is not None:
+            _config.enabled = enabled
+            _config.until = time.monotonic() + duration if enabled and duration else None
+    logger.info(
+        f"Profiling {'aktiv' if _config.enabled else 'aus'} "
+        f"(Operationen: {sorted(_config.operations)}, Anteil: {_config.sample_rate})"
+    )
+    return status()
+
+
+def is_enabled() -> bool:
+    """Prüft, ob neue Aufnahmen gestartet werden (beachtet die automatische Abschaltung)."""
+    if _config.enabled and _config.until is not None and time.monotonic() >= _config.until:
+        _config.enabled = False
+        _config.until = None
+        logger.info("Profiling automatisch beendet")
+    return _config.enabled
+
+
+def status() -> Dict[str, Any]:
+    """Gibt Einstellungen, laufende Aufnahmen und die neuesten Dateien zurück."""
+    remaining = None
+    if _config.until is not None:
+        remaining = max(0.0, round(_config.until - time.monotonic(), 1))
+    with _lock:
+        active = [{"operation": c.operation, "session": c.session} for c in _active]
+    return {
+        "enabled": is_enabled(),
+        "operations": sorted(_config.operations),
+        "sample_rate": _config.sample_rate,
+        "interval_ms": _config.interval * 1000.0,
+        "remaining_seconds": remaining,
+        "active": active,
+        "files": [path.name for path in list_profiles()[:50]],
+    }
+
+
+def list_profiles() -> List[Path]:
+    """Gibt die geschriebenen Profile zurück (neueste zuerst)."""
+    directory = _config.directory
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob(f"*{PROFILE_FILE_SUFFIX}"), key=lambda p: p.name, reverse=True)
+
+
+def get_profile_path(name: str) -> Optional[Path]:
+    """Gibt den Pfad eines Profils zurück (None bei unbekanntem oder ungültigem Namen)."""
+    if not name.endswith(PROFILE_FILE_SUFFIX) or Path(name).name != name:
+        return None
+    path = _config.directory / name
+    return path if path.is_file() else None
+
+
+# ════════════════════════════════════════════════════════════════════
+# AUFNAHMEN
+# ════════════════════════════════════════════════════════════════════
+
+def _session_of(frame: Optional[FrameType]) -> str:
+    """Sucht die Flet-Session in den Argumenten des Aufrufers (``page`` bzw. ``self.page``)."""
+    if frame is None:
+        return "-"
+    local_vars = frame.f_locals
+    candidates = [local_vars.get("page"), local_vars.get("self")]
+    candidates.extend(local_vars.get("args") or ())
+    candidates.extend((local_vars.get("kwargs") or {}).values())
+    for obj in candidates:
+        for target in (obj, getattr(obj, "page", None)):
+            session_id = getattr(target, "session_id", None)
+            if isinstance(session_id, str) and session_id:
+                return session_id
+    return "-"
+
+
+def enter(operation: str, frame: Optional[FrameType] = None, outermost: bool = True) -> Optional[object]:
+    """Wird von ``utils.metrics.track`` beim Start jeder Operation aufgerufen.
+
+    Startet eine Aufnahme (ausgewählte Operation oder Zufallsstichprobe) oder
+    meldet den aktuellen Thread bei der laufenden Aufnahme des Kontexts an.
+
+    Args:
+        operation: Name der Operation
+        frame: Rahmen des Aufrufers (Wurzel der Aufnahme im startenden Thread)
+        outermost: Ob keine andere Operation läuft (nur dann Zufallsstichprobe)
+
+    Returns:
+        Token für ``leave()`` oder None (nichts zu tun)
+    """
+    capture = _current_capture.get()
+    if capture is not None:
+        # Innere Operation: Thread mitprofilieren, solange sie läuft
+        ident = threading.get_ident()
+        if ident == capture.root_thread:
+            return None
+        with _lock:
+            capture.threads[ident] = capture.threads.get(ident, 0) + 1
+        return ("thread", capture, ident)
+
+    if not is_enabled():
+        return None
+    if operation not in _config.operations and not (
+        outermost and _config.sample_rate > 0 and random.random() < _config.sample_rate
+    ):
+        return None
+    capture = _Capture(operation, _session_of(frame), frame)
+    with _lock:
+        if len(_active) >= PROFILE_MAX_ACTIVE:
+            return None
+        _active.append(capture)
+    _ensure_sampler()
+    _wakeup.set()
+    return ("capture", capture, _current_capture.set(capture))
+
+
+def leave(token: Optional[object]) -> None:
+    """Beendet, was ``enter()`` begonnen hat (Gegenstück im selben Kontext)."""
+    if token is None:
+        return
+    kind, capture, value = token
+    if kind == "thread":
+        with _lock:
+            remaining = capture.threads.get(value, 0) - 1
+            if remaining > 0:
+                capture.threads[value] = remaining
+            else:
+                capture.threads.pop(value, None)
+        return
+    _current_capture.reset(value)
+    with _lock:
+        if capture in _active:
+            _active.remove(capture)
+    capture.root_frame = None
+    _write_capture(capture)
+
+
+# ════════════════════════════════════════════════════════════════════
+# STICHPROBEN
+# ════════════════════════════════════════════════════════════════════
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _collapse(frame: FrameType, stop: Optional[FrameType] = None) -> Optional[List[str]]:
+    """Wandelt einen Stack in Rahmennamen (außen nach innen) um.
+
+    Args:
+        frame: Innerster Rahmen
+        stop: Wurzelrahmen; ist er nicht im Stack, wird None zurückgegeben
+
+    Returns:
+        Rahmennamen ab ``stop`` (ohne Thread-Infrastruktur) oder None
+    """
+    names: List[str] = []
+    found = stop is None
+    while frame is not None and len(names) < PROFILE_MAX_DEPTH:
+        if not frame.f_code.co_filename.endswith(_SKIPPED_FILES):
+            names.append(_frame_name(frame))
+        if frame is stop:
+            found = True
+            break
+        frame = frame.f_back
+    if not found:
+        return None
+    names.reverse()
+    return names
+
+
+def _take_sample() -> None:
+    with _lock:
+        captures = [(c, c.root_thread, c.root_frame, list(c.threads)) for c in _active]
+    if not captures:
+        return
+    frames = sys._current_frames()
+    now = time.monotonic()
+    for capture, root_thread, root_frame, threads in captures:
+        if now > capture.deadline:
+            continue
+        sampled = False
+        root_stack = frames.get(root_thread)
+        if root_stack is not None and root_frame is not None:
+            names = _collapse(root_stack, stop=root_frame)
+            if names:
+                capture.samples[";".join([capture.operation] + names)] += 1
+                sampled = True
+        for ident in threads:
+            stack = frames.get(ident)
+            if stack is None:
+                continue
+            names = _collapse(stack)
+            if names:
+                capture.samples[";".join([capture.operation, "<thread>"] + names)] += 1
+                sampled = True
+        if not sampled:
+            capture.samples[f"{capture.operation};{AWAIT_FRAME}"] += 1
+    del frames
+
+
+def _sampler_loop() -> None:
+    while True:
+        with _lock:
+            idle = not _active
+        if idle:
+            _wakeup.wait()
+            _wakeup.clear()
+            continue
+        try:
+            _take_sample()
+        except Exception as e:  # noqa: BLE001
+            logger.debug(f"Profiler-Stichprobe fehlgeschlagen: {e}")
+        time.sleep(_config.interval)
+
+
+def _ensure_sampler() -> None:
+    global _sampler
+    if _sampler is not None:
+        return
+    with _lock:
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sampler_loop, name="profiler-sampler", daemon=True)
+            _sampler.start()
+
+
+def _write_capture(capture: _Capture) -> None:
+    """Schreibt eine Aufnahme als Collapsed-Stack-Datei und begrenzt die Dateianzahl."""
+    if not capture.samples:
+        return
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(capture.started))
+    millis = int((capture.started % 1) * 1000)
+    name = (
+        f"{stamp}-{millis:03d}_{_SAFE_NAME.sub('_', capture.operation)}"
+        f"_{_SAFE_NAME.sub('_', capture.session)[:40]}_{id(capture) & 0xFFFF:04x}{PROFILE_FILE_SUFFIX}"
+    )
+    try:
+        _config.directory.mkdir(parents=True, exist_ok=True)
+        path = _config.directory / name
+        lines = [f"{stack} {count}" for stack, count in capture.samples.most_common()]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        logger.info(
+            f"Profil geschrieben: {path} ({sum(capture.samples.values())} Stichproben, "
+            f"{(time.time() - capture.started) * 1000:.0f} ms)"
+        )
+        for old in list_profiles()[PROFILE_MAX_FILES:]:
+            old.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Profil konnte nicht geschrieben werden: {e}")
@@ -0,0 +1,395 @@
+"""
+Mehrprozess-Betrieb: mehrere Uvicorn-Worker hinter einem Sticky-Proxy.
+
+Flet-Sessions (WebSocket) und Karten-Feeds liegen im Speicher des Workers,
+der die Session bedient. Der Proxy im Elternprozess leitet deshalb jede
+TCP-Verbindung anhand des Cookies ``pb_worker`` immer an denselben Worker
+weiter; ohne Cookie entscheidet ein Hash der Client-IP. Die Worker setzen
+das Cookie über ``WorkerAffinityMiddleware`` bei der ersten HTTP-Antwort.
+Der Proxy leitet Bytes unverändert weiter und unterstützt damit HTTP/1.1
+Keep-Alive und WebSockets. Nur ``GET /metrics`` beantwortet er selbst: Er fragt
+alle Worker ab und führt ihre Metriken mit dem Label ``worker`` zusammen.
+
+Konfiguration (Umgebungsvariablen):
+    - WEB_WORKERS: Anzahl Worker-Prozesse (Standard: 1 = ein Prozess ohne Proxy)
+    - WORKER_INDEX: Wird vom Elternprozess für jeden Worker gesetzt
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+WORKER_COOKIE = "pb_worker"
+# Maximale Größe des Request-Kopfes, der für das Routing gelesen wird
+MAX_HEADER_BYTES = 64 * 1024
+PROXY_BUFFER_SIZE = 64 * 1024
+# Wartezeit vor dem Neustart eines beendeten Workers
+RESTART_DELAY_SECONDS = 1.0
+METRICS_PATH = b"/metrics"
+# Maximale Wartezeit auf die Metriken eines Workers
+METRICS_TIMEOUT_SECONDS = 5.0
+
+
+def web_worker_count() -> int:
+    """Gibt die konfigurierte Anzahl Worker-Prozesse zurück (mindestens 1)."""
+    try:
+        return max(1, int(os.getenv("WEB_WORKERS", "1")))
+    except ValueError:
+        return 1
+
+
+def worker_index() -> Optional[int]:
+    """Gibt den Index dieses Worker-Prozesses zurück (None im Einzelprozess-Betrieb)."""
+    raw = os.getenv("WORKER_INDEX")
+    return int(raw) if raw is not None and raw.isdigit() else None
+
+
+def worker_port(base_port: int, index: int) -> int:
+    """Interner Port eines Workers (direkt oberhalb des öffentlichen Ports)."""
+    return base_port + 1 + index
+
+
+class WorkerAffinityMiddleware:
+    """ASGI-Middleware: setzt das Affinitäts-Cookie des bedienenden Workers."""
+
+    def __init__(self, app, index: int) -> None:
+        """Initialisiert die Middleware.
+
+        Args:
+            app: Innere ASGI-App
+            index: Index dieses Workers
+        """
+        self.app = app
+        self.value = str(index)
+        self._set_cookie = (
+            f"{WORKER_COOKIE}={self.value}; Path=/; HttpOnly; SameSite=Lax".encode("latin-1")
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or _cookie_value(_header(scope["headers"], b"cookie")) == self.value:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers") or [])
+                headers.append((b"set-cookie", self._set_cookie))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def _header(headers: Sequence[Tuple[bytes, bytes]], name: bytes) -> bytes:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return b""
+
+
+def _cookie_value(cookie_header: bytes) -> Optional[str]:
+    """Liest den Wert des Affinitäts-Cookies aus einem Cookie-Header."""
+    for part in cookie_header.decode("latin-1").split(";"):
+        key, _, value = part.strip().partition("=")
+        if key == WORKER_COOKIE:
+            return value.strip()
+    return None
+
+
+class StickyProxy:
+    """TCP-Proxy, der Verbindungen per Cookie bzw. Client-IP an Worker bindet."""
+
+    def __init__(self, backends: Sequence[Tuple[str, int]]) -> None:
+        """Initialisiert den Proxy.
+
+        Args:
+            backends: (Host, Port) je Worker, Index = Worker-Index
+        """
+        self.backends = list(backends)
+
+    def pick(self, head: bytes, peer: str) -> int:
+        """Wählt den Worker für eine Verbindung.
+
+        Args:
+            head: Request-Kopf der ersten Anfrage
+            peer: IP-Adresse der Gegenstelle
+
+        Returns:
+            Worker-Index
+        """
+        headers = self._parse_headers(head)
+        value = _cookie_value(headers.get(b"cookie", b""))
+        if value is not None and value.isdigit() and int(value) < len(self.backends):
+            return int(value)
+        # Hinter einem vorgeschalteten Proxy (z. B. Fly.io) die echte Client-IP nutzen
+        client = (
+            headers.get(b"fly-client-ip")
+            or headers.get(b"x-forwarded-for", b"").split(b",")[0].strip()
+            or peer.encode("latin-1")
+        )
+        digest = hashlib.blake2b(client, digest_size=4).digest()
+        return int.from_bytes(digest, "big") % len(self.backends)
+
+    @staticmethod
+    def _parse_headers(head: bytes) -> Dict[bytes, bytes]:
+        headers: Dict[bytes, bytes] = {}
+        for line in head.split(b"\r\n")[1:]:
+            key, sep, value = line.partition(b":")
+            if sep:
+                headers[key.strip().lower()] = value.strip()
+        return headers
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Bedient eine eingehende Verbindung."""
+        peer = (writer.get_extra_info("peername") or ("", 0))[0]
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+
+        if self._is_metrics_request(head):
+            await self._serve_metrics(head, writer)
+            return
+
+        preferred = self.pick(head, peer)
+        # Startet ein Worker gerade neu, übernimmt vorübergehend der nächste
+        order = [preferred] + [i for i in range(len(self.backends)) if i != preferred]
+        upstream: Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = None
+        for index in order:
+            host, port = self.backends[index]
+            try:
+                upstream = await asyncio.open_connection(host, port, limit=PROXY_BUFFER_SIZE)
+                break
+            except OSError:
+                continue
+        if upstream is None:
+            writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await self._close(writer)
+            return
+
+        up_reader, up_writer = upstream
+        up_writer.write(head)
+        try:
+            await asyncio.gather(
+                self._pipe(reader, up_writer),
+                self._pipe(up_reader, writer),
+            )
+        finally:
+            await self._close(up_writer)
+            await self._close(writer)
+
+    @staticmethod
+    def _is_metrics_request(head: bytes) -> bool:
+        method, _, rest = head.partition(b"\r\n")[0].partition(b" ")
+        path = rest.partition(b" ")[0].partition(b"?")[0]
+        return method == b"GET" and path == METRICS_PATH
+
+    async def _serve_metrics(self, head: bytes, writer: asyncio.StreamWriter) -> None:
+        """Beantwortet ``GET /metrics`` mit den zusammengeführten Metriken aller Worker.
+
+        Die Worker prüfen das mitgesendete Token selbst; lehnt ein Worker ab,
+        lehnt auch der Proxy ab.
+        """
+        authorization = self._parse_headers(head).get(b"authorization")
+        results = await asyncio.gather(
+            *(self._fetch_metrics(host, port, authorization) for host, port in self.backends)
+        )
+        statuses = [status for status, _ in results if status is not None]
+        if any(status != 200 for status in statuses):
+            status_line = b"401 Unauthorized" if 401 in statuses else b"404 Not Found"
+            body = b""
+        elif not statuses:
+            status_line, body = b"503 Service Unavailable", b""
+        else:
+            body = merge_metrics(
+                {index: text for index, (status, text) in enumerate(results) if status == 200}
+            )
+            status_line = b"200 OK"
+        writer.write(
+            b"HTTP/1.1 " + status_line + b"\r\n"
+            b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            b"Cache-Control: no-store\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+            b"Connection: close\r\n\r\n" + body
+        )
+        await self._close(writer)
+
+    @staticmethod
+    async def _fetch_metrics(
+        host: str, port: int, authorization: Optional[bytes]
+    ) -> Tuple[Optional[int], bytes]:
+        """Lädt ``/metrics`` eines Workers.
+
+        Returns:
+            (HTTP-Status, Body) oder (None, b"") wenn der Worker nicht erreichbar ist
+        """
+        request = (
+            b"GET " + METRICS_PATH + b" HTTP/1.1\r\nHost: " + host.encode() + b"\r\n"
+            b"Accept-Encoding: identity\r\nConnection: close\r\n"
+        )
+        if authorization:
+            request += b"Authorization: " + authorization + b"\r\n"
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), METRICS_TIMEOUT_SECONDS)
+            writer.write(request + b"\r\n")
+            response = await asyncio.wait_for(reader.read(), METRICS_TIMEOUT_SECONDS)
+            await StickyProxy._close(writer)
+        except (OSError, asyncio.TimeoutError):
+            return None, b""
+        head, _, body = response.partition(b"\r\n\r\n")
+        try:
+            status = int(head.split(b" ", 2)[1])
+        except (IndexError, ValueError):
+            return None, b""
+        return status, body
+
+    @staticmethod
+    async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Kopiert eine Richtung der Verbindung bis EOF.
+
+        Bei EOF wird nur die Schreibrichtung beendet (Half-Close), damit die
+        Gegenrichtung weiterlaufen kann; geschlossen wird in ``handle``.
+        Bei einem Verbindungsfehler wird ``writer`` sofort geschlossen, damit
+        auch die Gegenrichtung endet.
+        """
+        try:
+            while True:
+                data = await reader.read(PROXY_BUFFER_SIZE)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+            if writer.can_write_eof():
+                writer.write_eof()
+            else:
+                await StickyProxy._close(writer)
+        except (ConnectionError, OSError):
+            await StickyProxy._close(writer)
+
+    @staticmethod
+    async def _close(writer: asyncio.StreamWriter) -> None:
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    async def serve(self, host: str, port: int) -> None:
+        """Startet den Proxy und läuft bis zum Abbruch."""
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        logger.info(f"Sticky-Proxy auf {host}:{port} für {len(self.backends)} Worker")
+        async with server:
+            await server.serve_forever()
+
+
+def merge_metrics(texts: Dict[int, bytes]) -> bytes:
+    """Führt die Prometheus-Texte mehrerer Worker zusammen.
+
+    Jede Probe erhält das Label ``worker``; ``# HELP``/``# TYPE`` und die Proben
+    einer Metrik bleiben beieinander, wie es das Textformat verlangt.
+
+    Args:
+        texts: Metriken im Textformat je Worker-Index
+
+    Returns:
+        Zusammengeführte Metriken im Textformat
+    """
+    families: Dict[bytes, Tuple[List[bytes], List[bytes]]] = {}
+    for index, text in sorted(texts.items()):
+        label = b'worker="' + str(index).encode() + b'"'
+        current: Optional[Tuple[List[bytes], List[bytes]]] = None
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            if line.startswith(b"#"):
+                parts = line.split(b" ", 3)
+                if len(parts) >= 3 and parts[1] in (b"HELP", b"TYPE"):
+                    current = families.setdefault(parts[2], ([], []))
+                    if line not in current[0]:
+                        current[0].append(line)
+                continue
+            name_end = min((i for i in (line.find(b"{"), line.find(b" ")) if i >= 0), default=len(line))
+            name, rest = line[:name_end], line[name_end:]
+            if rest.startswith(b"{"):
+                labelled = name + b"{" + label + (b"," if not rest.startswith(b"{}") else b"") + rest[1:]
+            else:
+                labelled = name + b"{" + label + b"}" + rest
+            if current is None:
+                current = families.setdefault(name, ([], []))
+            current[1].append(labelled)
+    lines: List[bytes] = []
+    for header, samples in families.values():
+        lines.extend(header)
+        lines.extend(samples)
+    return b"\n".join(lines) + b"\n"
+
+
+def _spawn_worker(script: str, index: int, base_port: int) -> subprocess.Popen:
+    env = dict(os.environ, WORKER_INDEX=str(index), PORT=str(worker_port(base_port, index)))
+    return subprocess.Popen([sys.executable, script], env=env)
+
+
+async def _supervise(script: str, processes: List[subprocess.Popen], base_port: int) -> None:
+    """Startet beendete Worker neu."""
+    while True:
+        await asyncio.sleep(RESTART_DELAY_SECONDS)
+        for index, process in enumerate(processes):
+            code = process.poll()
+            if code is not None:
+                logger.warning(f"Worker {index} beendet (Code {code}), starte neu")
+                processes[index] = _spawn_worker(script, index, base_port)
+
+
+def run_workers(script: str, workers: int, port: int, host: str = "0.0.0.0") -> None:
+    """Startet ``workers`` Worker-Prozesse und den Sticky-Proxy (blockiert).
+
+    Jeder Worker führt ``script`` mit gesetztem ``WORKER_INDEX`` und eigenem
+    internen Port aus; nur der Proxy ist öffentlich erreichbar.
+
+    Args:
+        script: Pfad zum Einstiegsskript (``main.py``)
+        workers: Anzahl Worker-Prozesse
+        port: Öffentlicher Port des Proxys
+        host: Adresse des Proxys
+    """
+    processes = [_spawn_worker(script, index, port) for index in range(workers)]
+    backends = [("127.0.0.1", worker_port(port, index)) for index in range(workers)]
+    proxy = StickyProxy(backends)
+
+    async def main() -> None:
+        supervisor = asyncio.ensure_future(_supervise(script, processes, port))
+        try:
+            await proxy.serve(host, port)
+        finally:
+            supervisor.cancel()
+
+    def stop(*_args) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        deadline = time.time() + 10
+        for process in processes:
+            try:
+                process.wait(timeout=max(0.1, deadline - time.time()))
+            except subprocess.TimeoutExpired:
+                process.kill()